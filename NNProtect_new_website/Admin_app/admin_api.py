@@ -0,0 +1,75 @@
+"""
+Endpoints HTTP de administración (montados en la app de Reflex vía api_transformer).
+
+GET  /api/admin/db-profile        → métricas del pool y reporte del perfilador de queries
+POST /api/admin/db-profile/reset  → reinicia los agregados del perfilador
+
+Requieren "Authorization: Bearer <jwt>" de un usuario con rol ADMIN.
+"""
+
+import sqlmodel
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from database.engine_config import EngineRegistry, get_configured_engine
+from database.query_profiler import QueryProfiler
+from database.roles import Roles
+from database.roles_users import RolesUsers
+from NNProtect_new_website.modules.auth.backend.auth_service import AuthService
+
+ADMIN_ROLE = "ADMIN"
+
+
+def _is_admin_request(request: Request) -> bool:
+    """Valida el JWT del header Authorization y que el usuario tenga rol ADMIN."""
+    header = request.headers.get("authorization", "")
+    if not header.lower().startswith("bearer "):
+        return False
+
+    payload = AuthService.decode_jwt_token(header[7:].strip())
+    user_id = payload.get("id")
+    if not user_id:
+        return False
+
+    with sqlmodel.Session(get_configured_engine()) as session:
+        return session.exec(
+            sqlmodel.select(RolesUsers.user_id)
+            .join(Roles, Roles.role_id == RolesUsers.role_id)
+            .where(
+                (RolesUsers.user_id == user_id) &
+                (Roles.role_name == ADMIN_ROLE)
+            )
+        ).first() is not None
+
+
+def db_profile(request: Request) -> JSONResponse:
+    """Pool de conexiones + scopes y statements lentos del perfilador."""
+    if not _is_admin_request(request):
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+
+    try:
+        top_n = int(request.query_params.get("top", QueryProfiler.TOP_N))
+    except ValueError:
+        top_n = QueryProfiler.TOP_N
+
+    return JSONResponse({
+        "pool": EngineRegistry.get_pool_metrics(),
+        "queries": QueryProfiler.get_report(top_n),
+    })
+
+
+def reset_db_profile(request: Request) -> JSONResponse:
+    """Reinicia los agregados del perfilador (p. ej. antes de medir un flujo)."""
+    if not _is_admin_request(request):
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+
+    QueryProfiler.reset()
+    return JSONResponse({"reset": True})
+
+
+admin_api = Starlette(routes=[
+    Route("/api/admin/db-profile", db_profile, methods=["GET"]),
+    Route("/api/admin/db-profile/reset", reset_db_profile, methods=["POST"]),
+])
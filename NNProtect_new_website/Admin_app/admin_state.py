@@ -1025,10 +1025,15 @@ class AdminState(rx.State):
                             from NNProtect_new_website.modules.network.backend.mlm_user_manager import MLMUserManager
                             
                             print(f"  🔄 Actualizando UnilevelReports para member_id={user.member_id}")
-                            MLMUserManager.update_unilevel_report_for_order(
-                                order_member_id=user.member_id,
-                                period_id=period.id
-                            )
+                            # Savepoint: un fallo aquí no deja abortada la transacción de la orden
+                            with session.begin_nested():
+                                MLMUserManager.update_unilevel_report_for_order(
+                                    session,
+                                    order_member_id=user.member_id,
+                                    period_id=period.id,
+                                    pv=total_pv,
+                                    vn=total_vn
+                                )
                             print(f"  ✅ UnilevelReports actualizado correctamente con PVG por nivel y totales")
                         except Exception as e_unilevel:
                             print(f"  ⚠️  Error actualizando UnilevelReports para user {user.member_id}: {e_unilevel}")
@@ -1066,16 +1071,12 @@ class AdminState(rx.State):
                             import traceback
                             traceback.print_exc()
                         
-                        # ✅ CRÍTICO: Verificar y actualizar rango del usuario tras cambio de PVG
-                        rank_updated = RankService.check_and_update_rank(session, user.member_id)
-                        if rank_updated:
-                            print(f"  🎉 User {user.member_id} promovido a nuevo rango")
-                        
-                        # ✅ CRÍTICO: Verificar y actualizar rango de cada ancestro tras cambio de PVG
-                        for path in ancestor_paths:
-                            ancestor_rank_updated = RankService.check_and_update_rank(session, path.ancestor_id)
-                            if ancestor_rank_updated:
-                                print(f"  🎉 Ancestro {path.ancestor_id} promovido a nuevo rango")
+                        # ✅ CRÍTICO: Verificar y actualizar rango del usuario y de cada ancestro tras cambio de PVG
+                        promoted = RankService.recalculate_ranks_bulk(
+                            session, [user.member_id] + [path.ancestor_id for path in ancestor_paths]
+                        )
+                        for member_id in promoted:
+                            print(f"  🎉 User {member_id} promovido a nuevo rango")
 
                         total_orders += 1
 
@@ -1206,6 +1207,9 @@ class AdminState(rx.State):
                 self.network_progress = 0
                 self.network_current_user = 0
 
+                # Lote pendiente: usuarios creados cuya genealogía/órdenes faltan
+                batch_users = []
+
                 while queue and created_count < total_users:
                     sponsor_id, current_level = queue.pop(0)
                     
@@ -1219,7 +1223,7 @@ class AdminState(rx.State):
                         
                         new_member_id = next_member_id + created_count
                         
-                        # Crear usuario completo
+                        # Crear usuario completo (genealogía y órdenes se crean por lote)
                         new_user = self._create_mlm_user(
                             session=session,
                             member_id=new_member_id,
@@ -1227,9 +1231,9 @@ class AdminState(rx.State):
                             level=current_level,
                             country_config=self.network_country,
                             default_rank=default_rank,
-                            products_map=products_map if self.network_create_orders else None,
                             current_period=current_period
                         )
+                        batch_users.append(new_user)
                         
                         created_count += 1
                         queue.append((new_member_id, current_level + 1))
@@ -1240,10 +1244,13 @@ class AdminState(rx.State):
                         
                         # Commit cada 50 usuarios
                         if created_count % 50 == 0:
+                            self._flush_network_batch(session, batch_users, products_map, current_period)
+                            batch_users = []
                             session.commit()
                             print(f"  [{created_count}/{total_users}] usuarios creados... ({self.network_progress}%)")
 
                 # Commit final
+                self._flush_network_batch(session, batch_users, products_map, current_period)
                 session.commit()
                 
                 # Progreso completo
@@ -1267,6 +1274,23 @@ class AdminState(rx.State):
             print("DEBUG: create_network_tree - FIN")
             print("="*80 + "\n")
     
+    def _flush_network_batch(self, session, batch_users: list, products_map: dict, current_period):
+        """
+        Crea la genealogía de un lote de usuarios con GenealogyService.add_members_to_tree
+        y después sus órdenes (las órdenes propagan PVG, así que necesitan los caminos).
+        """
+        if not batch_users:
+            return
+
+        GenealogyService.add_members_to_tree(
+            session,
+            [(user.member_id, user.sponsor_id) for user in batch_users]
+        )
+
+        if self.network_create_orders and products_map and current_period:
+            for user in batch_users:
+                self._create_mlm_order(session, user, user.country_cache, products_map, current_period)
+
     def _create_mlm_user(
         self,
         session,
@@ -1275,10 +1299,12 @@ class AdminState(rx.State):
         level: int,
         country_config: str,
         default_rank,
-        products_map: dict | None = None,
         current_period = None
     ) -> Users:
-        """Crea un usuario MLM completo con todos sus datos"""
+        """
+        Crea un usuario MLM con todos sus datos excepto genealogía y órdenes,
+        que se generan por lote en _flush_network_batch.
+        """
         from datetime import date
         
         # Determinar país
@@ -1347,27 +1373,7 @@ class AdminState(rx.State):
         )
         session.add(user_address)
         
-        # 4. USERTREEPATHS - Copiar árbol del sponsor
-        self_path = UserTreePath(
-            sponsor_id=sponsor_id,
-            ancestor_id=member_id,
-            descendant_id=member_id,
-            depth=0
-        )
-        session.add(self_path)
-        
-        sponsor_ancestors = session.exec(
-            sqlmodel.select(UserTreePath).where(UserTreePath.descendant_id == sponsor_id)
-        ).all()
-        
-        for ancestor_path in sponsor_ancestors:
-            new_path = UserTreePath(
-                sponsor_id=sponsor_id,
-                ancestor_id=ancestor_path.ancestor_id,
-                descendant_id=member_id,
-                depth=ancestor_path.depth + 1
-            )
-            session.add(new_path)
+        # 4. USERTREEPATHS - Se crean por lote en _flush_network_batch
         
         # 5. WALLETS
         currency = self._get_currency(country)
@@ -1426,9 +1432,7 @@ class AdminState(rx.State):
             )
             session.add(initial_report)
         
-        # 7. ORDERS (si está habilitado)
-        if products_map and current_period:
-            self._create_mlm_order(session, user, country, products_map, current_period)
+        # 7. ORDERS - Se crean por lote en _flush_network_batch
         
         return user
     
@@ -1526,16 +1530,12 @@ class AdminState(rx.State):
         
         print(f"  ✅ Orden creada: {total_pv} PV → User {user.member_id} (PVG: +{total_pv}, propagado a {len(ancestor_paths)} ancestros)")
         
-        # ✅ CRÍTICO: Verificar y actualizar rango del usuario tras cambio de PVG
-        rank_updated = RankService.check_and_update_rank(session, user.member_id)
-        if rank_updated:
-            print(f"  🎉 User {user.member_id} promovido a nuevo rango")
-        
-        # ✅ CRÍTICO: Verificar y actualizar rango de cada ancestro tras cambio de PVG
-        for path in ancestor_paths:
-            ancestor_rank_updated = RankService.check_and_update_rank(session, path.ancestor_id)
-            if ancestor_rank_updated:
-                print(f"  🎉 Ancestro {path.ancestor_id} promovido a nuevo rango")
+        # ✅ CRÍTICO: Verificar y actualizar rango del usuario y de cada ancestro tras cambio de PVG
+        promoted = RankService.recalculate_ranks_bulk(
+            session, [user.member_id] + [path.ancestor_id for path in ancestor_paths]
+        )
+        for member_id in promoted:
+            print(f"  🎉 User {member_id} promovido a nuevo rango")
         
         # 💰 NUEVO: CALCULAR COMISIONES INSTANTÁNEAMENTE (Uninivel + Matching)
         # Esto permite que el dashboard muestre ganancias en tiempo real
@@ -1902,7 +1902,6 @@ class AdminState(rx.State):
         try:
             from database.engine_config import get_configured_engine
             from database.periods import Periods
-            from database.comissions import Commissions, CommissionStatus
             from NNProtect_new_website.modules.finance.backend.wallet_service import WalletService
             from NNProtect_new_website.modules.network.backend.period_reset_service import PeriodResetService
             
@@ -1934,54 +1933,25 @@ class AdminState(rx.State):
                 print(f"   Inicio: {current_period.starts_on}")
                 print(f"   Fin: {current_period.ends_on}\n")
                 
-                # 2. Obtener todas las comisiones PENDING del período
-                pending_commissions = session.exec(
-                    sqlmodel.select(Commissions)
-                    .where(
-                        (Commissions.period_id == current_period.id) &
-                        (Commissions.status == CommissionStatus.PENDING.value)
-                    )
-                ).all()
-                
-                print(f"💸 Comisiones PENDING encontradas: {len(pending_commissions)}\n")
-                
-                # 3. Depositar cada comisión en la wallet del usuario
-                deposited_count = 0
-                deposited_total = 0.0
-                failed_count = 0
-                
-                for commission in pending_commissions:
-                    if commission.id is None:
-                        failed_count += 1
-                        continue
-                        
-                    success = WalletService.deposit_commission(
-                        session=session,
-                        member_id=commission.member_id,
-                        commission_id=commission.id,
-                        amount=commission.amount_converted,
-                        currency=commission.currency_destination,
-                        description=commission.notes
-                    )
-                    
-                    if success:
-                        deposited_count += 1
-                        deposited_total += commission.amount_converted
-                    else:
-                        failed_count += 1
-                
+                # 2. Depositar todas las comisiones PENDING en bloque
+                #    (una pasada de bloqueo por wallet, en orden de member_id)
+                deposit_summary = WalletService.deposit_commissions_bulk(session, current_period.id)
+                deposited_count = deposit_summary["deposited_count"]
+                deposited_total = deposit_summary["deposited_total"]
+                failed_count = deposit_summary["failed_count"]
+
                 print(f"\n💰 RESUMEN DE DEPÓSITOS:")
                 print(f"   ✅ Exitosos: {deposited_count}")
                 print(f"   ❌ Fallidos: {failed_count}")
                 print(f"   💵 Total depositado: ${deposited_total:.2f}\n")
                 
-                # 4. Cerrar el período actual
+                # 3. Cerrar el período actual
                 current_period.closed_at = datetime.now(timezone.utc)
                 session.add(current_period)
                 
                 print(f"🔒 Período {current_period.name} cerrado exitosamente\n")
                 
-                # 5. Crear nuevo período
+                # 4. Crear nuevo período
                 now = datetime.now(timezone.utc)
                 next_month = now.month + 1 if now.month < 12 else 1
                 next_year = now.year if now.month < 12 else now.year + 1
@@ -2010,7 +1980,7 @@ class AdminState(rx.State):
                     
                     print(f"✨ Nuevo período creado: {new_period.name} (ID: {new_period.id})")
                     
-                    # 6. Resetear TODOS los usuarios para el nuevo período
+                    # 5. Resetear TODOS los usuarios para el nuevo período
                     if new_period.id:
                         users_reset = PeriodResetService.reset_all_users_for_new_period(
                             session, new_period.id
@@ -2019,6 +1989,10 @@ class AdminState(rx.State):
                         users_reset = 0
                 
                 session.commit()
+
+                # El período activo en caché cambió (cierre + período nuevo)
+                from NNProtect_new_website.modules.network.backend.reference_data_cache import ReferenceDataCache
+                ReferenceDataCache.invalidate_periods()
                 
                 # Guardar resultados
                 self.commission_results = {
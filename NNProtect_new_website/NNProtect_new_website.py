@@ -33,6 +33,7 @@ from .modules.store.pages.payment import payment
 
 # Admin App
 from .Admin_app.admin_page import admin_page
+from .Admin_app.admin_api import admin_api
 
 # --- Components ---
 from .components.shared_ui.layout import main_container_derecha, mobile_header, desktop_sidebar, mobile_sidebar, header
@@ -108,100 +109,80 @@ class DashboardState(rx.State):
             import traceback
             traceback.print_exc()
     
+    async def _get_dashboard_snapshot(self):
+        """
+        Obtiene el snapshot del dashboard del usuario autenticado.
+        Principio DRY: Fuente única para progresión de rango y ganancias.
+
+        Returns:
+            DashboardSnapshot o None si no hay usuario o período activo
+        """
+        from .modules.network.backend.dashboard_snapshot_service import DashboardSnapshotService
+
+        # Obtener member_id desde AuthState (acceso async)
+        auth_state = await self.get_state(AuthState)
+        profile_data = auth_state.profile_data
+
+        # Validar que profile_data existe y tiene member_id
+        if not isinstance(profile_data, dict) or "member_id" not in profile_data:
+            print("⚠️  No se pudo obtener member_id del usuario")
+            return None
+
+        member_id = profile_data["member_id"]
+
+        with rx.session() as session:
+            snapshot = DashboardSnapshotService.get_snapshot(session, member_id)
+
+        if not snapshot:
+            print(f"⚠️  Sin snapshot de dashboard para {member_id} (usuario o período activo no encontrado)")
+        return snapshot
+
+    def _apply_rank_progression(self, snapshot) -> None:
+        """Copia PVG y progreso de rango del snapshot al estado."""
+        self.current_pvg = snapshot.pvg
+        self.next_rank_pvg = snapshot.next_rank_pvg
+        self.rank_progress_percentage = snapshot.rank_progress_percentage
+
+        print(f"📊 Progresión de rango - PVG: {self.current_pvg}/{self.next_rank_pvg} ({self.rank_progress_percentage:.1f}%)")
+
+    def _apply_estimated_earnings(self, snapshot) -> None:
+        """Copia la proyección mensual (Uninivel + Matching + Alcance) del snapshot al estado."""
+        from database.comissions import BonusType
+
+        self.estimated_earnings_currency = snapshot.currency
+        self.estimated_monthly_earnings = snapshot.estimated_monthly_earnings
+
+        if snapshot.pvg == 0:
+            print(f"📊 Ganancias estimadas: $0.00 (PVG=0, usuario reseteado)")
+            return
+
+        print(f"💰 Proyección mensual (comisiones calculadas):")
+        print(f"   Bonos Alcance:  ${snapshot.earnings_by_type.get(BonusType.BONO_ALCANCE.value, 0.0):,.2f}")
+        print(f"   Bonos Uninivel: ${snapshot.earnings_by_type.get(BonusType.BONO_UNINIVEL.value, 0.0):,.2f}")
+        print(f"   Bonos Matching: ${snapshot.earnings_by_type.get(BonusType.BONO_MATCHING.value, 0.0):,.2f}")
+        print(f"   TOTAL:          ${self.estimated_monthly_earnings:,.2f} {self.estimated_earnings_currency}")
+
     async def load_rank_progression(self):
         """
         Carga la progresión del usuario hacia el siguiente rango.
         
         ACTUALIZADO: Ahora también dispara el recálculo de ganancias estimadas
         cuando detecta cambios en el PVG (principio reactivo).
+        Los datos salen de DashboardSnapshotService (1 query sin caché, 0 con caché).
         """
         try:
-            from database.user_rank_history import UserRankHistory
-            from database.ranks import Ranks
-            from datetime import datetime, timezone
-            
-            # Obtener member_id desde AuthState (acceso async)
-            auth_state = await self.get_state(AuthState)
-            profile_data = auth_state.profile_data
-            
-            # Validar que profile_data existe y tiene member_id
-            if not isinstance(profile_data, dict) or "member_id" not in profile_data:
-                print("⚠️  No se pudo obtener member_id del usuario")
+            snapshot = await self._get_dashboard_snapshot()
+            if not snapshot:
                 return
-            
-            member_id = profile_data["member_id"]
-            
-            with rx.session() as session:
-                # Obtener PVG actual del usuario
-                user = session.exec(
-                    sqlmodel.select(Users).where(Users.member_id == member_id)
-                ).first()
-                
-                if not user:
-                    print(f"⚠️  Usuario {member_id} no encontrado")
-                    return
-                
-                # Guardar PVG anterior para detectar cambios
-                previous_pvg = self.current_pvg
-                self.current_pvg = user.pvg_cache or 0
-                
-                # Obtener rank_id actual del período corriendo (no por fecha, sino por period_id)
-                from database.periods import Periods
-                from .utils.timezone_mx import get_mexico_now
-                
-                now = get_mexico_now()
-                current_period = session.exec(
-                    sqlmodel.select(Periods)
-                    .where(
-                        (Periods.starts_on <= now) &
-                        (Periods.ends_on >= now)
-                    )
-                ).first()
-                
-                if not current_period:
-                    print(f"⚠️  No hay período activo")
-                    return
-                
-                current_rank_history = session.exec(
-                    sqlmodel.select(UserRankHistory)
-                    .where(
-                        (UserRankHistory.member_id == member_id) &
-                        (UserRankHistory.period_id == current_period.id)
-                    )
-                    .order_by(sqlmodel.desc(UserRankHistory.rank_id))
-                ).first()
-                
-                current_rank_id = current_rank_history.rank_id if current_rank_history else 1
-                
-                # Obtener siguiente rango
-                next_rank = session.exec(
-                    sqlmodel.select(Ranks)
-                    .where(Ranks.id == current_rank_id + 1)
-                    .order_by(Ranks.id)
-                ).first()
-                
-                if next_rank:
-                    self.next_rank_pvg = next_rank.pvg_required
-                    
-                    # Calcular porcentaje de progreso
-                    if self.next_rank_pvg > 0:
-                        self.rank_progress_percentage = int((self.current_pvg / self.next_rank_pvg) * 100)
-                    else:
-                        self.rank_progress_percentage = 0
-                else:
-                    # Usuario está en el rango máximo
-                    current_rank = session.exec(
-                        sqlmodel.select(Ranks).where(Ranks.id == current_rank_id)
-                    ).first()
-                    self.next_rank_pvg = current_rank.pvg_required if current_rank else 0
-                    self.rank_progress_percentage = 100
-                
-                print(f"📊 Progresión de rango - PVG: {self.current_pvg}/{self.next_rank_pvg} ({self.rank_progress_percentage:.1f}%)")
-                
-                # ✅ NUEVO: Si el PVG cambió, recalcular ganancias estimadas automáticamente
-                if self.current_pvg != previous_pvg:
-                    print(f"🔄 PVG cambió de {previous_pvg} a {self.current_pvg} - Recalculando ganancias...")
-                    await self.load_estimated_monthly_earnings()
+
+            # Guardar PVG anterior para detectar cambios
+            previous_pvg = self.current_pvg
+            self._apply_rank_progression(snapshot)
+
+            # ✅ Si el PVG cambió, actualizar ganancias estimadas (mismo snapshot, sin queries)
+            if self.current_pvg != previous_pvg:
+                print(f"🔄 PVG cambió de {previous_pvg} a {self.current_pvg} - Recalculando ganancias...")
+                self._apply_estimated_earnings(snapshot)
                 
         except Exception as e:
             print(f"❌ Error cargando progresión de rango: {e}")
@@ -220,108 +201,17 @@ class DashboardState(rx.State):
         Si quieres proyección futura, las comisiones deben calcularse primero.
         
         ACTUALIZADO: Retorna $0 si PVG=0 (cuando los usuarios fueron reseteados).
+        Los totales por tipo de bono salen de un solo GROUP BY bonus_type (snapshot).
         
         Arquitectura: Adrian (KISS) + Giovanni (QA Financial)
         """
         try:
-            from database.comissions import Commissions, BonusType
-            from database.periods import Periods
-            from .modules.finance.backend.exchange_service import ExchangeService
-            
-            # Obtener member_id desde AuthState
-            auth_state = await self.get_state(AuthState)
-            profile_data = auth_state.profile_data
-            
-            if not isinstance(profile_data, dict) or "member_id" not in profile_data:
-                print("⚠️  No se pudo obtener member_id del usuario")
+            snapshot = await self._get_dashboard_snapshot()
+            if not snapshot:
+                self.estimated_monthly_earnings = 0.0
                 return
-            
-            member_id = profile_data["member_id"]
-            
-            with rx.session() as session:
-                # Obtener usuario para moneda y PVG
-                user = session.exec(
-                    sqlmodel.select(Users).where(Users.member_id == member_id)
-                ).first()
-                
-                if not user:
-                    print(f"⚠️  Usuario {member_id} no encontrado")
-                    return
-                
-                # ✅ Si el PVG está en 0, las ganancias deben ser $0 (periodo reseteado)
-                if (user.pvg_cache or 0) == 0:
-                    self.estimated_monthly_earnings = 0.0
-                    self.estimated_earnings_currency = ExchangeService.get_country_currency(user.country_cache or "MX")
-                    print(f"📊 Ganancias estimadas: $0.00 (PVG=0, usuario reseteado)")
-                    return
-                
-                self.estimated_earnings_currency = ExchangeService.get_country_currency(user.country_cache or "MX")
-                
-                # Obtener período actual
-                from .utils.timezone_mx import get_mexico_now
-                now = get_mexico_now()
-                current_period = session.exec(
-                    sqlmodel.select(Periods)
-                    .where(
-                        (Periods.starts_on <= now) &
-                        (Periods.ends_on >= now)
-                    )
-                ).first()
-                
-                if not current_period:
-                    print(f"⚠️  No hay período activo")
-                    self.estimated_monthly_earnings = 0.0
-                    return
-                
-                # Sumar TODAS las comisiones del período (Uninivel + Matching + Alcance)
-                total_earnings = session.exec(
-                    sqlmodel.select(sqlmodel.func.sum(Commissions.amount_converted))
-                    .where(
-                        (Commissions.member_id == member_id) &
-                        (Commissions.period_id == current_period.id) &
-                        (Commissions.bonus_type.in_([
-                            BonusType.BONO_UNINIVEL.value,
-                            BonusType.BONO_MATCHING.value,
-                            BonusType.BONO_ALCANCE.value
-                        ]))
-                    )
-                ).first()
-                
-                self.estimated_monthly_earnings = float(total_earnings) if total_earnings else 0.0
-                
-                # Desglose por tipo de bono (para debug)
-                bonos_alcance = session.exec(
-                    sqlmodel.select(sqlmodel.func.sum(Commissions.amount_converted))
-                    .where(
-                        (Commissions.member_id == member_id) &
-                        (Commissions.period_id == current_period.id) &
-                        (Commissions.bonus_type == BonusType.BONO_ALCANCE.value)
-                    )
-                ).first() or 0.0
-                
-                bonos_uninivel = session.exec(
-                    sqlmodel.select(sqlmodel.func.sum(Commissions.amount_converted))
-                    .where(
-                        (Commissions.member_id == member_id) &
-                        (Commissions.period_id == current_period.id) &
-                        (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value)
-                    )
-                ).first() or 0.0
-                
-                bonos_matching = session.exec(
-                    sqlmodel.select(sqlmodel.func.sum(Commissions.amount_converted))
-                    .where(
-                        (Commissions.member_id == member_id) &
-                        (Commissions.period_id == current_period.id) &
-                        (Commissions.bonus_type == BonusType.BONO_MATCHING.value)
-                    )
-                ).first() or 0.0
-                
-                print(f"💰 Proyección mensual (comisiones calculadas):")
-                print(f"   Bonos Alcance:  ${bonos_alcance:,.2f}")
-                print(f"   Bonos Uninivel: ${bonos_uninivel:,.2f}")
-                print(f"   Bonos Matching: ${bonos_matching:,.2f}")
-                print(f"   TOTAL:          ${self.estimated_monthly_earnings:,.2f} {self.estimated_earnings_currency}")
+
+            self._apply_estimated_earnings(snapshot)
                 
         except Exception as e:
             print(f"❌ Error calculando proyección de ganancias: {e}")
@@ -338,8 +228,8 @@ class DashboardState(rx.State):
         
         PATRONES APLICADOS:
         - Reactivo: Responde automáticamente a cambios de datos
-        - KISS: Simplemente llama a los métodos existentes
-        - DRY: Reutiliza load_rank_progression y load_estimated_monthly_earnings
+        - KISS: Un solo snapshot para progresión y ganancias
+        - DRY: Reutiliza _apply_rank_progression y _apply_estimated_earnings
         
         CASOS DE USO:
         - Después de crear una orden (PVG aumenta)
@@ -352,13 +242,10 @@ class DashboardState(rx.State):
         try:
             print("🔄 Refrescando datos del dashboard...")
             
-            # 1. Recargar progresión de rango (incluye PVG actual)
-            await self.load_rank_progression()
-            
-            # 2. Recargar ganancias estimadas (se dispara automáticamente si PVG cambió)
-            # Nota: load_rank_progression ya llama a load_estimated_monthly_earnings si detecta cambio
-            # pero lo llamamos explícitamente aquí por si acaso
-            await self.load_estimated_monthly_earnings()
+            snapshot = await self._get_dashboard_snapshot()
+            if snapshot:
+                self._apply_rank_progression(snapshot)
+                self._apply_estimated_earnings(snapshot)
             
             print("✅ Dashboard refrescado correctamente")
             
@@ -367,7 +254,6 @@ class DashboardState(rx.State):
             import traceback
             traceback.print_exc()
 
-
 def index() -> rx.Component:
     # Welcome Page (Index)
     return rx.center(
@@ -1000,7 +886,8 @@ meta = [
 ]
 
 app = rx.App(
-    theme=rx.theme(appearance="inherit")
+    theme=rx.theme(appearance="inherit"),
+    api_transformer=admin_api  # Endpoints /api/admin/* (perfilador de BD)
 )
 
 app.add_page(
@@ -13,7 +13,9 @@ from datetime import datetime, timezone
 
 from database.users import Users
 from database.periods import Periods
+from database.period_closures import PeriodClosureCheckpoints, ClosureStage
 from NNProtect_new_website.modules.network.backend.commission_service import CommissionService
+from NNProtect_new_website.modules.network.backend.reference_data_cache import ReferenceDataCache
 from NNProtect_new_website.utils.timezone_mx import get_mexico_now
 
 
@@ -23,26 +25,32 @@ class MonthlyClosureJob:
     Principio POO: Encapsula toda la lógica del cierre mensual.
     """
 
+    CHUNK_SIZE = 500  # Miembros por lote de pago (un commit por lote)
+
     @classmethod
-    def execute_monthly_closure(cls) -> bool:
+    def execute_monthly_closure(cls, chunk_size: Optional[int] = None) -> bool:
         """
         Ejecuta el cierre mensual completo.
         SIMPLIFICADO: Solo paga comisiones PENDING y resetea usuarios.
 
         Pasos:
         1. Verificar que no se haya ejecutado ya (idempotencia)
-        2. Obtener período actual
-        3. Pagar todas las comisiones PENDING
+        2. Obtener período actual y su checkpoint de cierre
+        3. Pagar comisiones PENDING por lotes de miembros (commit + checkpoint por lote)
         4. Cerrar período
         5. Crear nuevo período
         6. Resetear todos los usuarios
 
+        Si el cierre se interrumpe, una nueva ejecución reanuda desde el último
+        lote confirmado (checkpoint por período). Los pasos 4-6 van en una sola transacción.
+
+        Args:
+            chunk_size: Miembros por lote de pago (default CHUNK_SIZE)
+
         Returns:
             True si el cierre fue exitoso, False si falló
         """
         try:
-            from database.comissions import Commissions, CommissionStatus
-            from NNProtect_new_website.modules.finance.backend.wallet_service import WalletService
             from NNProtect_new_website.modules.network.backend.period_reset_service import PeriodResetService
             
             print("\n" + "="*80)
@@ -64,54 +72,29 @@ class MonthlyClosureJob:
 
                 print(f"📅 Período actual: {current_period.name} (ID: {current_period.id})")
 
-                # 3. Obtener todas las comisiones PENDING del período
-                pending_commissions = session.exec(
-                    sqlmodel.select(Commissions)
-                    .where(
-                        (Commissions.period_id == current_period.id) &
-                        (Commissions.status == CommissionStatus.PENDING.value)
-                    )
-                ).all()
-
-                print(f"💸 Comisiones PENDING encontradas: {len(pending_commissions)}\n")
-
-                # 4. Depositar cada comisión en la wallet del usuario
-                deposited_count = 0
-                deposited_total = 0.0
-                failed_count = 0
-
-                for commission in pending_commissions:
-                    if commission.id is None:
-                        failed_count += 1
-                        continue
-
-                    success = WalletService.deposit_commission(
-                        session=session,
-                        member_id=commission.member_id,
-                        commission_id=commission.id,
-                        amount=commission.amount_converted,
-                        currency=commission.currency_destination,
-                        description=commission.notes
-                    )
+                checkpoint = cls._get_or_create_checkpoint(session, current_period.id)
+                session.commit()
+
+                if checkpoint.chunks_done:
+                    print(f"⏯️  Reanudando cierre desde member_id > {checkpoint.last_member_id} ({checkpoint.chunks_done} lotes previos)")
 
-                    if success:
-                        deposited_count += 1
-                        deposited_total += commission.amount_converted
-                    else:
-                        failed_count += 1
+                # 3. Depositar comisiones PENDING por lotes de miembros
+                cls._pay_commissions_in_chunks(
+                    session, current_period.id, checkpoint, chunk_size or cls.CHUNK_SIZE
+                )
 
                 print(f"\n💰 RESUMEN DE DEPÓSITOS:")
-                print(f"   ✅ Exitosos: {deposited_count}")
-                print(f"   ❌ Fallidos: {failed_count}")
-                print(f"   💵 Total depositado: ${deposited_total:.2f}\n")
+                print(f"   ✅ Exitosos: {checkpoint.deposited_count}")
+                print(f"   ❌ Fallidos: {checkpoint.failed_count}")
+                print(f"   💵 Total depositado: ${checkpoint.deposited_total:.2f}\n")
 
-                # 5. Cerrar el período actual
+                # 4. Cerrar el período actual
                 current_period.closed_at = datetime.now(timezone.utc)
                 session.add(current_period)
 
                 print(f"🔒 Período {current_period.name} cerrado exitosamente\n")
 
-                # 6. Crear nuevo período
+                # 5. Crear nuevo período
                 now = datetime.now(timezone.utc)
                 next_month = now.month + 1 if now.month < 12 else 1
                 next_year = now.year if now.month < 12 else now.year + 1
@@ -139,15 +122,24 @@ class MonthlyClosureJob:
 
                     print(f"✨ Nuevo período creado: {new_period.name} (ID: {new_period.id})")
 
-                    # 7. Resetear TODOS los usuarios para el nuevo período
+                    # 6. Resetear TODOS los usuarios para el nuevo período
                     if new_period.id:
                         users_reset = PeriodResetService.reset_all_users_for_new_period(
                             session, new_period.id
                         )
                         print(f"🔄 {users_reset} usuarios reseteados para el nuevo período")
 
+                # 7. Marcar checkpoint como completado (misma transacción)
+                checkpoint.stage = ClosureStage.COMPLETED.value
+                checkpoint.completed_at = datetime.now(timezone.utc)
+                checkpoint.updated_at = checkpoint.completed_at
+                session.add(checkpoint)
+
                 session.commit()
 
+                # El período activo en caché cambió (cierre + período nuevo)
+                ReferenceDataCache.invalidate_periods()
+
                 print("\n" + "="*80)
                 print("✅ CIERRE MENSUAL COMPLETADO")
                 print("="*80 + "\n")
@@ -160,11 +152,79 @@ class MonthlyClosureJob:
             traceback.print_exc()
             return False
 
+    @classmethod
+    def _get_or_create_checkpoint(cls, session, period_id: int) -> PeriodClosureCheckpoints:
+        """
+        Obtiene (o crea) el checkpoint de cierre del período.
+        Principio KISS: Un registro por período.
+        """
+        checkpoint = session.exec(
+            sqlmodel.select(PeriodClosureCheckpoints)
+            .where(PeriodClosureCheckpoints.period_id == period_id)
+        ).first()
+
+        if not checkpoint:
+            checkpoint = PeriodClosureCheckpoints(period_id=period_id)
+            session.add(checkpoint)
+            session.flush()
+
+        return checkpoint
+
+    @classmethod
+    def _pay_commissions_in_chunks(
+        cls,
+        session,
+        period_id: int,
+        checkpoint: PeriodClosureCheckpoints,
+        chunk_size: int
+    ) -> None:
+        """
+        Paga las comisiones PENDING del período por lotes de member_id ascendente.
+        Cada lote se confirma junto con el avance del checkpoint, así que un fallo
+        solo revierte el lote en curso. La idempotencia por comisión la garantiza
+        WalletService.deposit_commissions_bulk (solo paga comisiones PENDING).
+        """
+        from database.comissions import Commissions, CommissionStatus
+        from NNProtect_new_website.modules.finance.backend.wallet_service import WalletService
+
+        while True:
+            member_ids = session.exec(
+                sqlmodel.select(Commissions.member_id)
+                .where(
+                    (Commissions.period_id == period_id) &
+                    (Commissions.status == CommissionStatus.PENDING.value) &
+                    (Commissions.member_id > checkpoint.last_member_id)
+                )
+                .distinct()
+                .order_by(Commissions.member_id)
+                .limit(chunk_size)
+            ).all()
+
+            if not member_ids:
+                break
+
+            summary = WalletService.deposit_commissions_bulk(session, period_id, list(member_ids))
+
+            checkpoint.last_member_id = member_ids[-1]
+            checkpoint.chunks_done += 1
+            checkpoint.deposited_count += summary["deposited_count"]
+            checkpoint.deposited_total = round(checkpoint.deposited_total + summary["deposited_total"], 2)
+            checkpoint.failed_count += summary["failed_count"]
+            checkpoint.updated_at = datetime.now(timezone.utc)
+            session.add(checkpoint)
+            session.commit()
+
+            print(f"   📦 Lote {checkpoint.chunks_done}: {len(member_ids)} miembros, "
+                  f"{summary['deposited_count']} comisiones (${summary['deposited_total']:.2f})")
+
     @classmethod
     def _get_current_period(cls, session) -> Optional[Periods]:
         """
         Obtiene el período actual activo.
         Principio DRY: Método reutilizable.
+
+        Lee de la BD (no de ReferenceDataCache): el cierre necesita el objeto
+        ORM vigente para marcar closed_at.
         """
         try:
             current_date = get_mexico_now()
@@ -2,14 +2,22 @@
 Servicio POO para gestión de tasas de cambio.
 Permite conversión entre monedas usando tasas fijas de la compañía.
 
+Las tasas se indexan en memoria por par de monedas (vigencias ordenadas por
+effective_from) y se buscan con bisect; create_exchange_rate refresca el índice.
+
 Principios aplicados: KISS, DRY, YAGNI, POO
 """
 
+import time
 import sqlmodel
-from typing import Optional
+from bisect import bisect_right
+from threading import Lock
+from typing import Optional, List, Dict, Tuple, Sequence, Union
 from datetime import datetime, timezone
 
 from database.exchange_rates import ExchangeRates
+from NNProtect_new_website.utils.timezone_mx import to_naive_utc
+from NNProtect_new_website.utils.after_commit import run_after_commit
 
 
 class ExchangeService:
@@ -25,6 +33,13 @@ class ExchangeService:
         "Colombia": "COP"
     }
 
+    RATES_TTL_SECONDS = 300  # Red de seguridad entre procesos (5 minutos)
+
+    # Índice en memoria: (from, to) → (effective_from ordenados, [(effective_from, effective_until, rate)])
+    _rates_lock = Lock()
+    _rate_index: Optional[Dict[Tuple[str, str], Tuple[List[datetime], List[tuple]]]] = None
+    _rates_loaded_at: float = 0.0
+
     @classmethod
     def convert_amount(
         cls,
@@ -68,6 +83,53 @@ class ExchangeService:
         except Exception:
             return amount
 
+    @classmethod
+    def convert_many(
+        cls,
+        session,
+        amounts: Sequence[float],
+        from_currency: str,
+        to_currency: str,
+        dates: Union[None, datetime, Sequence[Optional[datetime]]] = None
+    ) -> List[float]:
+        """
+        Versión masiva de convert_amount: convierte muchos montos de un par de monedas.
+        El índice de tasas se carga una sola vez; cada fecha se resuelve en memoria.
+
+        Args:
+            session: Sesión de base de datos (solo se usa si el índice expiró)
+            amounts: Montos a convertir
+            from_currency: Moneda origen
+            to_currency: Moneda destino
+            dates: Fecha única para todos, una fecha por monto, o None (ahora)
+
+        Returns:
+            Montos convertidos en el mismo orden (sin tasa vigente → monto original)
+        """
+        if from_currency == to_currency:
+            return list(amounts)
+
+        if dates is None or isinstance(dates, datetime):
+            rate = cls._get_exchange_rate(
+                session, from_currency, to_currency, dates or datetime.now(timezone.utc)
+            )
+            return [amount * rate if rate is not None else amount for amount in amounts]
+
+        now = datetime.now(timezone.utc)
+        converted = []
+        rates_by_date: Dict[datetime, Optional[float]] = {}
+
+        for amount, as_of_date in zip(amounts, dates):
+            as_of_date = as_of_date or now
+            if as_of_date not in rates_by_date:
+                rates_by_date[as_of_date] = cls._get_exchange_rate(
+                    session, from_currency, to_currency, as_of_date
+                )
+            rate = rates_by_date[as_of_date]
+            converted.append(amount * rate if rate is not None else amount)
+
+        return converted
+
     @classmethod
     def _get_exchange_rate(
         cls,
@@ -90,26 +152,71 @@ class ExchangeService:
             Tasa de cambio o None si no existe
         """
         try:
-            # Buscar tasa vigente
-            exchange_rate = session.exec(
-                sqlmodel.select(ExchangeRates)
-                .where(
-                    (ExchangeRates.from_currency == from_currency) &
-                    (ExchangeRates.to_currency == to_currency) &
-                    (ExchangeRates.effective_from <= as_of_date) &
-                    (
-                        (ExchangeRates.effective_until.is_(None)) |
-                        (ExchangeRates.effective_until >= as_of_date)
-                    )
-                )
-                .order_by(sqlmodel.desc(ExchangeRates.effective_from))
-            ).first()
+            rate_index = cls._get_rate_index(session)
+            starts, intervals = rate_index.get((from_currency, to_currency), ([], []))
+            as_of_date = to_naive_utc(as_of_date)
+
+            # Vigencia más reciente con effective_from <= fecha que siga abierta en esa fecha
+            for index in range(bisect_right(starts, as_of_date) - 1, -1, -1):
+                _, effective_until, rate = intervals[index]
+                if effective_until is None or effective_until >= as_of_date:
+                    return rate
 
-            return exchange_rate.rate if exchange_rate else None
+            return None
 
         except Exception:
             return None
 
+    @classmethod
+    def _get_rate_index(cls, session) -> Dict[Tuple[str, str], Tuple[List[datetime], List[tuple]]]:
+        """
+        Índice de tasas por par de monedas, cargado con una sola consulta.
+        Se recarga al expirar RATES_TTL_SECONDS o tras invalidate_rates().
+        """
+        rate_index = cls._rate_index
+        if rate_index is not None and (time.monotonic() - cls._rates_loaded_at) < cls.RATES_TTL_SECONDS:
+            return rate_index
+
+        rows = session.exec(
+            sqlmodel.select(
+                ExchangeRates.from_currency,
+                ExchangeRates.to_currency,
+                ExchangeRates.effective_from,
+                ExchangeRates.effective_until,
+                ExchangeRates.rate
+            )
+            .order_by(ExchangeRates.effective_from, ExchangeRates.id)
+        ).all()
+
+        rate_index = {}
+        for from_currency, to_currency, effective_from, effective_until, rate in rows:
+            starts, intervals = rate_index.setdefault((from_currency, to_currency), ([], []))
+            effective_from = to_naive_utc(effective_from)
+            starts.append(effective_from)
+            intervals.append((
+                effective_from,
+                to_naive_utc(effective_until) if effective_until else None,
+                rate
+            ))
+
+        with cls._rates_lock:
+            cls._rate_index = rate_index
+            cls._rates_loaded_at = time.monotonic()
+        return rate_index
+
+    @classmethod
+    def invalidate_rates(cls, session=None) -> None:
+        """
+        Descarta el índice de tasas en memoria (se recarga en la siguiente consulta).
+        Con session, se aplica tras su commit.
+        """
+        def _discard():
+            with cls._rates_lock:
+                cls._rate_index = None
+                cls._rates_loaded_at = 0.0
+
+        run_after_commit(session, _discard)
+
     @classmethod
     def get_country_currency(cls, country: str) -> str:
         """
@@ -167,6 +274,9 @@ class ExchangeService:
             session.add(exchange_rate)
             session.flush()
 
+            # La nueva vigencia debe verse en la siguiente conversión (tras el commit)
+            cls.invalidate_rates(session)
+
             return exchange_rate.id
 
         except Exception:
@@ -8,7 +8,7 @@ CRÍTICO: Todas las operaciones son atómicas (todo o nada)
 
 import sqlmodel
 import uuid
-from typing import Optional, Dict, Any
+from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 
 from database.wallet import (
@@ -24,6 +24,8 @@ class WalletService:
     Principio POO: Encapsula toda la lógica de negocio de wallet.
     """
 
+    BULK_CHUNK_SIZE = 5000  # Tamaño de lote para IN (...) en operaciones masivas
+
     @classmethod
     def create_wallet(cls, session, member_id: int, currency: str) -> Optional[int]:
         """
@@ -168,6 +170,141 @@ class WalletService:
         except Exception:
             return False
 
+    @classmethod
+    def deposit_commissions_bulk(
+        cls,
+        session,
+        period_id: int,
+        member_ids: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Deposita TODAS las comisiones PENDING de un período en las wallets.
+        Versión masiva de deposit_commission para el cierre de período:
+        - Reclama las comisiones con UN UPDATE status=PAID WHERE status='pending' RETURNING:
+          dos cierres concurrentes no pueden reclamar la misma comisión (el segundo
+          re-evalúa el WHERE tras el bloqueo de fila y no la obtiene)
+        - Solo reclama comisiones de miembros con wallet ACTIVE (el resto sigue PENDING)
+        - Bloquea cada wallet UNA sola vez, en orden de member_id (evita deadlocks)
+        - Inserta en bloque una WalletTransactions por comisión reclamada (trazabilidad por commission_id)
+
+        Principio: Atomicidad - no hace commit, corre en la transacción del llamador.
+
+        Args:
+            session: Sesión de base de datos
+            period_id: ID del período
+            member_ids: Restringe el pago a estos miembros (lotes del cierre mensual)
+
+        Returns:
+            Dict con deposited_count, deposited_total, failed_count y members
+        """
+        summary = {"deposited_count": 0, "deposited_total": 0.0, "failed_count": 0, "members": 0}
+        now = datetime.now(timezone.utc)
+
+        pending_filter = (
+            (Commissions.period_id == period_id) &
+            (Commissions.status == CommissionStatus.PENDING.value)
+        )
+        if member_ids is not None:
+            pending_filter = pending_filter & Commissions.member_id.in_(member_ids)
+
+        # 1. Reclamar comisiones PENDING de wallets activas (flip de estado atómico)
+        claimed = session.exec(
+            sqlmodel.update(Commissions)
+            .where(
+                pending_filter &
+                Commissions.member_id.in_(
+                    sqlmodel.select(Wallets.member_id)
+                    .where(Wallets.status == WalletStatus.ACTIVE.value)
+                )
+            )
+            .values(status=CommissionStatus.PAID.value, paid_at=now)
+            .returning(
+                Commissions.id,
+                Commissions.member_id,
+                Commissions.amount_converted,
+                Commissions.currency_destination,
+                Commissions.notes
+            )
+            .execution_options(synchronize_session="fetch")
+        ).all()
+
+        # Comisiones sin wallet activa: siguen PENDING
+        summary["failed_count"] = session.exec(
+            sqlmodel.select(sqlmodel.func.count()).select_from(Commissions).where(pending_filter)
+        ).one()
+
+        if not claimed:
+            return summary
+
+        grouped: Dict[tuple, list] = {}
+        for commission in sorted(claimed, key=lambda row: (row.member_id, row.id)):
+            grouped.setdefault((commission.member_id, commission.currency_destination), []).append(commission)
+
+        # 2. Bloquear wallets una sola vez, en orden de member_id
+        wallets = cls._lock_wallets(session, sorted({member_id for member_id, _ in grouped}))
+
+        # 3. Construir transacciones con saldo corrido por wallet
+        transactions = []
+        balances: Dict[int, float] = {}
+
+        for (member_id, currency), commissions in sorted(grouped.items()):
+            wallet = wallets[member_id]
+            balance = balances.get(member_id, wallet.balance)
+            for commission in commissions:
+                transactions.append({
+                    "transaction_uuid": str(uuid.uuid4()),
+                    "member_id": member_id,
+                    "transaction_type": WalletTransactionType.COMMISSION_DEPOSIT.value,
+                    "status": WalletTransactionStatus.COMPLETED.value,
+                    "amount": commission.amount_converted,
+                    "balance_before": balance,
+                    "balance_after": balance + commission.amount_converted,
+                    "currency": currency,
+                    "commission_id": commission.id,
+                    "description": commission.notes or f"Depósito de comisión #{commission.id}",
+                    "created_at": now,
+                    "completed_at": now
+                })
+                balance += commission.amount_converted
+                summary["deposited_total"] += commission.amount_converted
+
+            balances[member_id] = balance
+
+        for member_id, balance in balances.items():
+            wallets[member_id].balance = balance
+            wallets[member_id].updated_at = now
+
+        # 4. Insertar transacciones en bloque
+        for start in range(0, len(transactions), cls.BULK_CHUNK_SIZE):
+            session.execute(
+                sqlmodel.insert(WalletTransactions),
+                transactions[start:start + cls.BULK_CHUNK_SIZE]
+            )
+
+        session.flush()
+
+        summary["deposited_count"] = len(claimed)
+        summary["members"] = len(balances)
+        summary["deposited_total"] = round(summary["deposited_total"], 2)
+        return summary
+
+    @classmethod
+    def _lock_wallets(cls, session, member_ids: List[int]) -> Dict[int, Wallets]:
+        """
+        Bloquea (FOR UPDATE) las wallets de los miembros en orden de member_id, por lotes.
+        """
+        wallets: Dict[int, Wallets] = {}
+        for start in range(0, len(member_ids), cls.BULK_CHUNK_SIZE):
+            chunk = member_ids[start:start + cls.BULK_CHUNK_SIZE]
+            for wallet in session.exec(
+                sqlmodel.select(Wallets)
+                .where(Wallets.member_id.in_(chunk))
+                .order_by(Wallets.member_id)
+                .with_for_update()
+            ).all():
+                wallets[wallet.member_id] = wallet
+        return wallets
+
     @classmethod
     def pay_order_with_wallet(
         cls,
@@ -475,7 +612,7 @@ class WalletService:
     def process_pending_commissions_to_wallet(cls, session, period_id: int) -> int:
         """
         Procesa todas las comisiones PENDING de un período y las deposita en wallets.
-        Principio: Procesamiento batch con atomicidad individual.
+        Principio DRY: Usa deposit_commissions_bulk() (una pasada de bloqueo por wallet).
 
         Args:
             session: Sesión de base de datos
@@ -485,34 +622,10 @@ class WalletService:
             Cantidad de comisiones procesadas exitosamente
         """
         try:
-            # Obtener todas las comisiones PENDING del período
-            pending_commissions = session.exec(
-                sqlmodel.select(Commissions)
-                .where(
-                    (Commissions.period_id == period_id) &
-                    (Commissions.status == CommissionStatus.PENDING.value)
-                )
-            ).all()
-
-            processed_count = 0
-
-            for commission in pending_commissions:
-                # Depositar cada comisión en su wallet
-                success = cls.deposit_commission(
-                    session=session,
-                    member_id=commission.member_id,
-                    commission_id=commission.id,
-                    amount=commission.amount_converted,
-                    currency=commission.currency_destination,
-                    description=f"Comisión {commission.bonus_type} - Período {period_id}"
-                )
-
-                if success:
-                    processed_count += 1
-
+            summary = cls.deposit_commissions_bulk(session, period_id)
             session.commit()
 
-            return processed_count
+            return summary["deposited_count"]
 
         except Exception:
             session.rollback()
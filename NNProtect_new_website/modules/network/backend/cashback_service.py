@@ -7,7 +7,7 @@ CRÍTICO: Cashback es 70% de descuento sobre precio público, válido hasta fin
 """
 
 import sqlmodel
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple, Callable
 from datetime import datetime, timezone
 from calendar import monthrange
 
@@ -275,36 +275,73 @@ class CashbackService:
         }
 
     @classmethod
-    def expire_old_cashbacks(cls, session) -> int:
+    def _audit_expired(cls, expired: List[Tuple[int, int]]) -> None:
+        """Registro de auditoría por lote: (cashback_id, member_id) expirados."""
+        if expired:
+            print(f"🧾 Cashbacks expirados: {', '.join(f'{cashback_id}:{member_id}' for cashback_id, member_id in expired)}")
+
+    @classmethod
+    def expire_old_cashbacks(
+        cls,
+        session,
+        chunk_size: Optional[int] = None,
+        on_expired: Optional[Callable[[List[Tuple[int, int]]], None]] = None
+    ) -> int:
         """
         Marca como expirados todos los cashbacks que pasaron su fecha de expiración.
         Job automático que se ejecuta diariamente.
 
+        Sin chunk_size: un único UPDATE ... RETURNING id, member_id y un commit.
+        Con chunk_size: lotes de hasta chunk_size ids (índice status + expires_at),
+        con commit por lote; los ids de cada lote se envían a on_expired y se descartan.
+
         Args:
             session: Sesión de base de datos
+            chunk_size: Tamaño de lote para backlogs grandes (None = un solo UPDATE)
+            on_expired: Recibe [(cashback_id, member_id), ...] por lote (default: log de auditoría)
 
         Returns:
             Cantidad de cashbacks expirados
         """
+        audit = on_expired or cls._audit_expired
+
         try:
             now = datetime.now(timezone.utc)
-
-            # Obtener cashbacks disponibles que expiraron
-            expired_cashbacks = session.exec(
-                sqlmodel.select(Cashback)
-                .where(
-                    (Cashback.status == CashbackStatus.AVAILABLE.value) &
-                    (Cashback.expires_at < now)
-                )
-            ).all()
+            expirable = (
+                (Cashback.status == CashbackStatus.AVAILABLE.value) &
+                (Cashback.expires_at < now)
+            )
 
             expired_count = 0
 
-            for cashback in expired_cashbacks:
-                cashback.mark_as_expired()
-                expired_count += 1
-
-            session.commit()
+            while True:
+                target = expirable
+                if chunk_size:
+                    # Siguiente lote en el orden del índice (status, expires_at, id): el LIMIT
+                    # lee las primeras entradas sin ordenar el backlog; los ya expirados dejan de coincidir
+                    target = Cashback.id.in_(
+                        sqlmodel.select(Cashback.id)
+                        .where(expirable)
+                        .order_by(Cashback.expires_at, Cashback.id)
+                        .limit(chunk_size)
+                        .with_for_update(skip_locked=True)
+                        .scalar_subquery()
+                    )
+
+                expired = session.exec(
+                    sqlmodel.update(Cashback)
+                    .where(target)
+                    .values(status=CashbackStatus.EXPIRED.value)
+                    .returning(Cashback.id, Cashback.member_id)
+                    .execution_options(synchronize_session="fetch")
+                ).all()
+
+                session.commit()
+                audit([(cashback_id, member_id) for cashback_id, member_id in expired])
+                expired_count += len(expired)
+
+                if not chunk_size or len(expired) < chunk_size:
+                    break
 
             print(f"✅ Job de expiración de cashbacks completado: {expired_count} cashbacks expirados")
             return expired_count
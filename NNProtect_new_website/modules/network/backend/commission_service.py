@@ -9,17 +9,17 @@ import sqlmodel
 from typing import Optional, List
 from datetime import datetime, timezone
 
-from database.users import Users
+from database.users import Users, UserStatus
 from database.orders import Orders, OrderStatus
 from database.order_items import OrderItems
 from database.products import Products
-from database.comissions import Commissions, BonusType
-from database.periods import Periods
-from database.ranks import Ranks
+from database.comissions import Commissions, BonusType, CommissionStatus
 from database.usertreepaths import UserTreePath
 from .genealogy_service import GenealogyService
 from NNProtect_new_website.modules.finance.backend.exchange_service import ExchangeService
 from .rank_service import RankService
+from .reference_data_cache import ReferenceDataCache, PeriodInfo
+from .dashboard_snapshot_service import DashboardSnapshotService
 
 
 class CommissionService:
@@ -75,7 +75,7 @@ class CommissionService:
     }
 
     @classmethod
-    def process_fast_start_bonus(cls, session, order_id: int) -> List[int]:
+    def process_fast_start_bonus(cls, session, order_id: int, raise_errors: bool = False) -> List[int]:
         """
         Procesa Bono Rápido cuando se confirma el pago de un KIT.
         Reglas:
@@ -88,6 +88,7 @@ class CommissionService:
         Args:
             session: Sesión de base de datos
             order_id: ID de la orden confirmada
+            raise_errors: Si True, propaga el error en lugar de retornar []
 
         Returns:
             Lista de IDs de comisiones creadas
@@ -198,10 +199,13 @@ class CommissionService:
 
                     print(f"✅ Comisión Bono Rápido creada: ${commission_vn:.2f} para member_id={sponsor_member_id} (nivel {level})")
 
+            DashboardSnapshotService.invalidate([sponsor.member_id for sponsor in upline[:3]], session)
             return commission_ids
 
         except Exception as e:
             print(f"❌ Error procesando Bono Rápido para orden {order_id}: {e}")
+            if raise_errors:
+                raise
             return []
 
     @classmethod
@@ -210,7 +214,8 @@ class CommissionService:
         session,
         buyer_id: int,
         order_id: int,
-        vn_amount: float
+        vn_amount: float,
+        raise_errors: bool = False
     ) -> Optional[int]:
         """
         Procesa Bono Directo (25% del VN) al patrocinador directo.
@@ -227,6 +232,7 @@ class CommissionService:
             buyer_id: ID del comprador (source)
             order_id: ID de la orden
             vn_amount: Monto total de VN de la orden
+            raise_errors: Si True, propaga el error en lugar de retornar None
 
         Returns:
             ID de la comisión creada, o None si no aplica
@@ -302,10 +308,13 @@ class CommissionService:
 
             print(f"✅ Bono Directo creado: {commission_converted:.2f} {sponsor_currency} para sponsor {sponsor.member_id}")
 
+            DashboardSnapshotService.invalidate([sponsor.member_id], session)
             return commission.id
 
         except Exception as e:
             print(f"❌ Error procesando Bono Directo para orden {order_id}: {e}")
+            if raise_errors:
+                raise
             import traceback
             traceback.print_exc()
             return None
@@ -337,19 +346,17 @@ class CommissionService:
                 print(f"⚠️  Usuario {member_id} no tiene rango asignado")
                 return []
 
-            rank = session.exec(
-                sqlmodel.select(Ranks).where(Ranks.id == current_rank_id)
-            ).first()
+            rank_name = ReferenceDataCache.get_rank_name(session, current_rank_id)
 
-            if not rank:
+            if not rank_name:
                 print(f"❌ Rango {current_rank_id} no encontrado")
                 return []
 
             # 2. Obtener porcentajes según rango
-            percentages = cls.UNILEVEL_BONUS_PERCENTAGES.get(rank.name, [])
+            percentages = cls.UNILEVEL_BONUS_PERCENTAGES.get(rank_name, [])
 
             if not percentages:
-                print(f"⚠️  No hay porcentajes definidos para rango {rank.name}")
+                print(f"⚠️  No hay porcentajes definidos para rango {rank_name}")
                 return []
 
             # 3. Obtener usuario para moneda
@@ -417,6 +424,7 @@ class CommissionService:
                 if depth == 10 and max_depth >= 10:
                     break
 
+            DashboardSnapshotService.invalidate([member_id], session)
             return commission_ids
 
         except Exception as e:
@@ -513,6 +521,138 @@ class CommissionService:
             print(f"❌ Error sumando VN desde nivel {start_depth}: {e}")
             return 0.0
 
+    @classmethod
+    def calculate_unilevel_for_period(cls, session, period_id: int, active_only: bool = False) -> List[int]:
+        """
+        Calcula el Bono Uninivel mensual de TODA la red en una sola pasada.
+        Equivalente a llamar calculate_unilevel_bonus() para cada miembro, pero con
+        un número constante de queries en lugar de ~10 agregaciones por miembro.
+
+        Flujo:
+        1. Una query agrupada: VN por (ancestro, nivel) con nivel 10+ agrupado en 10
+        2. Una query de rangos actuales (RankService.get_current_ranks_bulk)
+        3. Construir filas en memoria según porcentajes del rango
+        4. Un INSERT masivo en Commissions
+
+        Idempotencia: los miembros que ya tienen Uninivel mensual (sin orden origen)
+        en el período se omiten, así que re-ejecutar no duplica comisiones.
+
+        Args:
+            session: Sesión de base de datos
+            period_id: ID del período mensual
+            active_only: Si True, solo cobran los miembros activos (no suspendidos)
+
+        Returns:
+            Lista de IDs de comisiones creadas
+        """
+        try:
+            # 1. VN por (ancestro, nivel) de toda la red - solo productos (NO kits)
+            level_bucket = sqlmodel.case(
+                (UserTreePath.depth >= 10, 10),
+                else_=UserTreePath.depth
+            )
+
+            filters = (
+                (UserTreePath.depth > 0) &
+                (Orders.period_id == period_id) &
+                (Orders.status == OrderStatus.PAYMENT_CONFIRMED.value) &
+                (Products.type != "kit")  # Excluir kits
+            )
+            if active_only:
+                filters &= (Users.status != UserStatus.SUSPENDED)
+
+            vn_rows = session.exec(
+                sqlmodel.select(
+                    UserTreePath.ancestor_id,
+                    Users.country_cache,
+                    level_bucket,
+                    sqlmodel.func.sum(OrderItems.line_vn)
+                )
+                .join(Users, Users.member_id == UserTreePath.ancestor_id)
+                .join(Orders, Orders.member_id == UserTreePath.descendant_id)
+                .join(OrderItems, OrderItems.order_id == Orders.id)
+                .join(Products, OrderItems.product_id == Products.id)
+                .where(filters)
+                .group_by(UserTreePath.ancestor_id, Users.country_cache, level_bucket)
+            ).all()
+
+            if not vn_rows:
+                print(f"⚠️  No hay VN de productos en el período {period_id}")
+                return []
+
+            # 2. Rangos actuales y nombres (desde la caché de referencia)
+            current_ranks = RankService.get_current_ranks_bulk(session)
+            rank_names = ReferenceDataCache.get_rank_names(session)
+
+            # 3. Miembros que ya tienen Uninivel mensual en este período
+            already_calculated = set(session.exec(
+                sqlmodel.select(Commissions.member_id)
+                .where(
+                    (Commissions.period_id == period_id) &
+                    (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value) &
+                    (Commissions.source_order_id == None)
+                )
+                .distinct()
+            ).all())
+
+            # 4. Construir comisiones en memoria
+            now = datetime.now(timezone.utc)
+            rows = []
+
+            for ancestor_id, country, level, vn_level in vn_rows:
+                if ancestor_id in already_calculated:
+                    continue
+
+                vn_level = float(vn_level or 0)
+                if vn_level <= 0:
+                    continue
+
+                rank_name = rank_names.get(current_ranks.get(ancestor_id))
+                percentages = cls.UNILEVEL_BONUS_PERCENTAGES.get(rank_name, [])
+
+                if level > len(percentages):
+                    continue
+
+                percentage = percentages[level - 1]
+                level_label = "10+" if level == 10 else str(level)
+                user_currency = ExchangeService.get_country_currency(country)
+
+                rows.append({
+                    "member_id": ancestor_id,
+                    "bonus_type": BonusType.BONO_UNINIVEL.value,
+                    "source_member_id": None,
+                    "source_order_id": None,
+                    "period_id": period_id,
+                    "level_depth": level,
+                    "amount_vn": vn_level,
+                    "currency_origin": user_currency,
+                    "amount_converted": vn_level * (percentage / 100),
+                    "currency_destination": user_currency,
+                    "exchange_rate": 1.0,
+                    "status": CommissionStatus.PENDING.value,
+                    "calculated_at": now,
+                    "paid_at": None,
+                    "notes": f"Bono Uninivel {percentage}% - Nivel {level_label} - VN: {vn_level:.2f}"
+                })
+
+            if not rows:
+                print(f"ℹ️  No se generaron comisiones Uninivel para el período {period_id}")
+                return []
+
+            # 5. Inserción masiva
+            commission_ids = list(session.scalars(
+                sqlmodel.insert(Commissions).returning(Commissions.id),
+                rows
+            ).all())
+
+            print(f"✅ Uninivel del período {period_id}: {len(commission_ids)} comisiones para {len({r['member_id'] for r in rows})} miembros")
+            DashboardSnapshotService.invalidate({r['member_id'] for r in rows}, session)
+            return commission_ids
+
+        except Exception as e:
+            print(f"❌ Error calculando Bono Uninivel del período {period_id}: {e}")
+            return []
+
     @classmethod
     def calculate_matching_bonus(cls, session, member_id: int, period_id: int) -> List[int]:
         """
@@ -540,24 +680,22 @@ class CommissionService:
                 print(f"⚠️  Usuario {member_id} no tiene rango asignado")
                 return []
 
-            rank = session.exec(
-                sqlmodel.select(Ranks).where(Ranks.id == current_rank_id)
-            ).first()
+            rank_name = ReferenceDataCache.get_rank_name(session, current_rank_id)
 
-            if not rank:
+            if not rank_name:
                 print(f"❌ Rango {current_rank_id} no encontrado")
                 return []
 
             # 2. Verificar que sea rango Embajador
-            if rank.name not in cls.AMBASSADOR_RANKS:
-                print(f"⚠️  Rango {rank.name} no es elegible para Matching Bonus")
+            if rank_name not in cls.AMBASSADOR_RANKS:
+                print(f"⚠️  Rango {rank_name} no es elegible para Matching Bonus")
                 return []
 
             # 3. Obtener porcentajes según rango
-            percentages = cls.MATCHING_BONUS_PERCENTAGES.get(rank.name, [])
+            percentages = cls.MATCHING_BONUS_PERCENTAGES.get(rank_name, [])
 
             if not percentages:
-                print(f"⚠️  No hay porcentajes Matching para rango {rank.name}")
+                print(f"⚠️  No hay porcentajes Matching para rango {rank_name}")
                 return []
 
             # 4. Obtener usuario para moneda
@@ -595,11 +733,9 @@ class CommissionService:
                     if not descendant_rank_id:
                         continue
 
-                    descendant_rank = session.exec(
-                        sqlmodel.select(Ranks).where(Ranks.id == descendant_rank_id)
-                    ).first()
+                    descendant_rank_name = ReferenceDataCache.get_rank_name(session, descendant_rank_id)
 
-                    if not descendant_rank or descendant_rank.name not in cls.AMBASSADOR_RANKS:
+                    if descendant_rank_name not in cls.AMBASSADOR_RANKS:
                         continue
 
                     # Obtener comisiones Uninivel del descendiente en este período
@@ -642,12 +778,152 @@ class CommissionService:
 
                     print(f"✅ Comisión Matching creada: ${matching_amount:.2f} para member_id={member_id} desde {descendant.member_id}")
 
+            DashboardSnapshotService.invalidate([member_id], session)
             return commission_ids
 
         except Exception as e:
             print(f"❌ Error calculando Matching Bonus para usuario {member_id}: {e}")
             return []
 
+    @classmethod
+    def calculate_matching_for_period(cls, session, period_id: int) -> List[int]:
+        """
+        Calcula el Bono Matching de TODOS los Embajadores del período en una pasada.
+        Equivalente a calculate_matching_bonus() por embajador, pero con un número
+        constante de queries: rangos, totales Uninivel y genealogía se cargan en
+        bloque y se resuelven con diccionarios en memoria.
+
+        Idempotencia: los embajadores que ya tienen Matching mensual (sin orden
+        origen) en el período se omiten.
+
+        Args:
+            session: Sesión de base de datos
+            period_id: ID del período mensual
+
+        Returns:
+            Lista de IDs de comisiones creadas
+        """
+        try:
+            # 1. Rangos actuales de todos los miembros + nombres de rangos
+            current_ranks = RankService.get_current_ranks_bulk(session)
+            rank_names = ReferenceDataCache.get_rank_names(session)
+
+            member_rank_name = {
+                member_id: rank_names.get(rank_id)
+                for member_id, rank_id in current_ranks.items()
+            }
+
+            ambassador_ids = [
+                member_id for member_id, rank_name in member_rank_name.items()
+                if rank_name in cls.AMBASSADOR_RANKS
+            ]
+
+            if not ambassador_ids:
+                print(f"ℹ️  No hay Embajadores para Matching en el período {period_id}")
+                return []
+
+            # 2. Total Uninivel ganado por miembro en el período
+            unilevel_totals = dict(session.exec(
+                sqlmodel.select(Commissions.member_id, sqlmodel.func.sum(Commissions.amount_converted))
+                .where(
+                    (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value) &
+                    (Commissions.period_id == period_id)
+                )
+                .group_by(Commissions.member_id)
+            ).all())
+
+            # 3. Embajadores que ya tienen Matching mensual en este período
+            already_calculated = set(session.exec(
+                sqlmodel.select(Commissions.member_id)
+                .where(
+                    (Commissions.period_id == period_id) &
+                    (Commissions.bonus_type == BonusType.BONO_MATCHING.value) &
+                    (Commissions.source_order_id == None)
+                )
+                .distinct()
+            ).all())
+
+            pending_ambassadors = [a for a in ambassador_ids if a not in already_calculated]
+
+            if not pending_ambassadors:
+                print(f"ℹ️  Matching del período {period_id} ya fue calculado")
+                return []
+
+            # 4. Relaciones embajador → descendiente hasta la profundidad máxima de Matching
+            max_depth = max(len(p) for p in cls.MATCHING_BONUS_PERCENTAGES.values())
+
+            paths = session.exec(
+                sqlmodel.select(UserTreePath.ancestor_id, UserTreePath.descendant_id, UserTreePath.depth)
+                .where(
+                    (UserTreePath.ancestor_id.in_(pending_ambassadors)) &
+                    (UserTreePath.depth >= 1) &
+                    (UserTreePath.depth <= max_depth)
+                )
+            ).all()
+
+            # 5. Moneda de cada embajador
+            ambassador_countries = dict(session.exec(
+                sqlmodel.select(Users.member_id, Users.country_cache)
+                .where(Users.member_id.in_(pending_ambassadors))
+            ).all())
+
+            # 6. Construir comisiones en memoria
+            now = datetime.now(timezone.utc)
+            rows = []
+
+            for ambassador_id, descendant_id, depth in paths:
+                percentages = cls.MATCHING_BONUS_PERCENTAGES.get(member_rank_name.get(ambassador_id), [])
+
+                if depth > len(percentages):
+                    continue
+
+                if member_rank_name.get(descendant_id) not in cls.AMBASSADOR_RANKS:
+                    continue
+
+                uninivel_earned = float(unilevel_totals.get(descendant_id) or 0)
+
+                if uninivel_earned <= 0:
+                    continue
+
+                percentage = percentages[depth - 1]
+                user_currency = ExchangeService.get_country_currency(ambassador_countries.get(ambassador_id))
+
+                rows.append({
+                    "member_id": ambassador_id,
+                    "bonus_type": BonusType.BONO_MATCHING.value,
+                    "source_member_id": descendant_id,
+                    "source_order_id": None,
+                    "period_id": period_id,
+                    "level_depth": depth,
+                    "amount_vn": uninivel_earned,
+                    "currency_origin": user_currency,
+                    "amount_converted": uninivel_earned * (percentage / 100),
+                    "currency_destination": user_currency,
+                    "exchange_rate": 1.0,
+                    "status": CommissionStatus.PENDING.value,
+                    "calculated_at": now,
+                    "paid_at": None,
+                    "notes": f"Matching Bonus {percentage}% - Nivel {depth} - Embajador: {descendant_id} - Uninivel: {uninivel_earned:.2f}"
+                })
+
+            if not rows:
+                print(f"ℹ️  No se generaron comisiones Matching para el período {period_id}")
+                return []
+
+            # 7. Inserción masiva
+            commission_ids = list(session.scalars(
+                sqlmodel.insert(Commissions).returning(Commissions.id),
+                rows
+            ).all())
+
+            print(f"✅ Matching del período {period_id}: {len(commission_ids)} comisiones para {len({r['member_id'] for r in rows})} embajadores")
+            DashboardSnapshotService.invalidate({r['member_id'] for r in rows}, session)
+            return commission_ids
+
+        except Exception as e:
+            print(f"❌ Error calculando Matching del período {period_id}: {e}")
+            return []
+
     @classmethod
     def process_achievement_bonus(cls, session, member_id: int, new_rank_name: str) -> Optional[int]:
         """
@@ -738,6 +1014,7 @@ class CommissionService:
             session.flush()
 
             print(f"✅ Bono por Alcance creado: ${amount} {user_currency} para member_id={member_id} - Rango: {new_rank_name}")
+            DashboardSnapshotService.invalidate([member_id], session)
             return commission.id
 
         except Exception as e:
@@ -745,24 +1022,13 @@ class CommissionService:
             return None
 
     @classmethod
-    def _get_current_period(cls, session) -> Optional[Periods]:
+    def _get_current_period(cls, session) -> Optional[PeriodInfo]:
         """
-        Obtiene el período actual activo.
+        Obtiene el período actual activo (desde ReferenceDataCache).
         Principio DRY: Método reutilizable.
         """
         try:
-            from NNProtect_new_website.utils.timezone_mx import get_mexico_now
-            current_date = get_mexico_now()
-
-            current_period = session.exec(
-                sqlmodel.select(Periods)
-                .where(
-                    (Periods.starts_on <= current_date) &
-                    (Periods.ends_on >= current_date)
-                )
-            ).first()
-
-            return current_period
+            return ReferenceDataCache.get_current_period(session)
 
         except Exception as e:
             print(f"❌ Error obteniendo período actual: {e}")
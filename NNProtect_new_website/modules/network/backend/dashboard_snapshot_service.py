@@ -0,0 +1,188 @@
+"""
+Servicio POO para el snapshot del dashboard de un miembro.
+PVG, progreso de rango y totales de comisiones por tipo de bono en UNA consulta,
+con caché por miembro invalidada cuando cambian su PV o sus comisiones.
+
+Principios aplicados: KISS, DRY, YAGNI, POO
+"""
+
+import time
+import sqlmodel
+from threading import Lock
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Iterable
+
+from database.users import Users
+from database.comissions import Commissions, BonusType
+from database.user_rank_history import UserRankHistory
+from NNProtect_new_website.modules.finance.backend.exchange_service import ExchangeService
+from NNProtect_new_website.utils.after_commit import run_after_commit
+from .reference_data_cache import ReferenceDataCache
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    """Datos del dashboard de un miembro para el período activo."""
+    member_id: int
+    period_id: int
+    pvg: int
+    currency: str
+    current_rank_id: int
+    next_rank_pvg: int
+    rank_progress_percentage: int
+    earnings_by_type: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def estimated_monthly_earnings(self) -> float:
+        """Uninivel + Matching + Alcance del período ($0 si el PVG fue reseteado)."""
+        if self.pvg == 0:
+            return 0.0
+        return sum(
+            self.earnings_by_type.get(bonus_type, 0.0)
+            for bonus_type in DashboardSnapshotService.EARNINGS_BONUS_TYPES
+        )
+
+
+class DashboardSnapshotService:
+    """
+    Servicio POO para calcular y cachear el snapshot del dashboard.
+    Principio POO: Encapsula consulta, caché e invalidación por miembro.
+    """
+
+    TTL_SECONDS = 60       # Red de seguridad entre procesos
+    MAX_ENTRIES = 10000    # Al superarse se vacía la caché (KISS)
+
+    # Bonos que forman la proyección mensual
+    EARNINGS_BONUS_TYPES = (
+        BonusType.BONO_UNINIVEL.value,
+        BonusType.BONO_MATCHING.value,
+        BonusType.BONO_ALCANCE.value,
+    )
+
+    _lock = Lock()
+    _snapshots: Dict[int, tuple] = {}  # member_id → (snapshot, loaded_at)
+
+    @classmethod
+    def get_snapshot(cls, session, member_id: int) -> Optional[DashboardSnapshot]:
+        """
+        Snapshot del dashboard del miembro: 0 consultas si está en caché, 1 si no.
+
+        Args:
+            session: Sesión de base de datos
+            member_id: ID del miembro
+
+        Returns:
+            DashboardSnapshot o None si el miembro no existe o no hay período activo
+        """
+        current_period = ReferenceDataCache.get_current_period(session)
+        if not current_period:
+            return None
+
+        cached = cls._snapshots.get(member_id)
+        if cached:
+            snapshot, loaded_at = cached
+            if snapshot.period_id == current_period.id and \
+                    (time.monotonic() - loaded_at) < cls.TTL_SECONDS:
+                return snapshot
+
+        snapshot = cls._build_snapshot(session, member_id, current_period.id)
+        if snapshot:
+            with cls._lock:
+                if len(cls._snapshots) >= cls.MAX_ENTRIES:
+                    cls._snapshots.clear()
+                cls._snapshots[member_id] = (snapshot, time.monotonic())
+        return snapshot
+
+    @classmethod
+    def _build_snapshot(cls, session, member_id: int, period_id: int) -> Optional[DashboardSnapshot]:
+        """
+        Una sola consulta: usuario + rango del período + SUM(amount) GROUP BY bonus_type.
+        """
+        period_rank = (
+            sqlmodel.select(sqlmodel.func.max(UserRankHistory.rank_id))
+            .where(
+                (UserRankHistory.member_id == member_id) &
+                (UserRankHistory.period_id == period_id)
+            )
+            .scalar_subquery()
+        )
+
+        rows = session.exec(
+            sqlmodel.select(
+                Users.pvg_cache,
+                Users.country_cache,
+                period_rank,
+                Commissions.bonus_type,
+                sqlmodel.func.sum(Commissions.amount_converted)
+            )
+            .outerjoin(
+                Commissions,
+                (Commissions.member_id == Users.member_id) &
+                (Commissions.period_id == period_id)
+            )
+            .where(Users.member_id == member_id)
+            .group_by(Users.pvg_cache, Users.country_cache, Commissions.bonus_type)
+        ).all()
+
+        if not rows:
+            return None
+
+        pvg, country, current_rank_id, _, _ = rows[0]
+        pvg = pvg or 0
+        current_rank_id = current_rank_id or 1
+        earnings_by_type = {
+            bonus_type: float(total or 0)
+            for _, _, _, bonus_type, total in rows
+            if bonus_type is not None
+        }
+
+        # Progreso hacia el siguiente rango (rangos en caché)
+        ranks_by_id = {rank.id: rank for rank in ReferenceDataCache.get_ranks(session)}
+        next_rank = ranks_by_id.get(current_rank_id + 1)
+
+        if next_rank:
+            next_rank_pvg = next_rank.pvg_required
+            progress = int((pvg / next_rank_pvg) * 100) if next_rank_pvg > 0 else 0
+        else:
+            # Usuario está en el rango máximo
+            current_rank = ranks_by_id.get(current_rank_id)
+            next_rank_pvg = current_rank.pvg_required if current_rank else 0
+            progress = 100
+
+        return DashboardSnapshot(
+            member_id=member_id,
+            period_id=period_id,
+            pvg=pvg,
+            currency=ExchangeService.get_country_currency(country or "MX"),
+            current_rank_id=current_rank_id,
+            next_rank_pvg=next_rank_pvg,
+            rank_progress_percentage=progress,
+            earnings_by_type=earnings_by_type
+        )
+
+    @classmethod
+    def invalidate(cls, member_ids: Iterable[int], session=None) -> None:
+        """
+        Descarta el snapshot de los miembros cuyo PV, rango o comisiones cambiaron.
+        Con session, se aplica tras su commit.
+        """
+        member_ids = list(member_ids)
+
+        def _discard():
+            with cls._lock:
+                for member_id in member_ids:
+                    cls._snapshots.pop(member_id, None)
+
+        run_after_commit(session, _discard)
+
+    @classmethod
+    def invalidate_all(cls, session=None) -> None:
+        """
+        Descarta todos los snapshots (procesos masivos: cierre, reset de período).
+        Con session, se aplica tras su commit.
+        """
+        def _discard():
+            with cls._lock:
+                cls._snapshots.clear()
+
+        run_after_commit(session, _discard)
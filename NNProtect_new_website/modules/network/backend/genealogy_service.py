@@ -3,10 +3,11 @@ Servicio de Genealogía MLM.
 Maneja la estructura de red usando UserTreePath (Closure Table Pattern).
 """
 import reflex as rx
-from sqlmodel import select
-from typing import List, Optional
+from sqlmodel import select, insert, literal
+from typing import List, Optional, Tuple
 from database.usertreepaths import UserTreePath
 from database.users import Users
+from .registration_counter_service import RegistrationCounterService
 
 
 class GenealogyService:
@@ -15,6 +16,9 @@ class GenealogyService:
     Principio: Path Enumeration para queries eficientes sin recursión.
     """
 
+    # Filas por INSERT en add_members_to_tree (limita memoria en redes profundas)
+    INSERT_BATCH_SIZE = 5000
+
     @staticmethod
     def add_member_to_tree(session, new_member_id: int, sponsor_id: int) -> bool:
         """
@@ -35,10 +39,12 @@ class GenealogyService:
             1. Insertar registro self (depth=0)
             2. Copiar TODAS las relaciones del sponsor incrementando depth
             3. Crear relación directa con sponsor (depth=1)
+            4. Sumar la inscripción al rollup diario de cada ancestro
         """
         try:
             # 1. Crear relación self (depth=0)
             self_path = UserTreePath(
+                sponsor_id=sponsor_id or None,
                 ancestor_id=new_member_id,
                 descendant_id=new_member_id,
                 depth=0
@@ -49,24 +55,25 @@ class GenealogyService:
             if sponsor_id is None or sponsor_id == 0:
                 return True
 
-            # 2. Copiar TODAS las relaciones del sponsor + nueva relación
-            # Equivalente SQL:
-            # INSERT INTO usertreepaths (ancestor_id, descendant_id, depth)
-            # SELECT ancestor_id, new_member_id, depth + 1
-            # FROM usertreepaths
-            # WHERE descendant_id = sponsor_id
-
-            sponsor_paths = session.exec(
-                select(UserTreePath).where(UserTreePath.descendant_id == sponsor_id)
-            ).all()
-
-            for path in sponsor_paths:
-                new_path = UserTreePath(
-                    ancestor_id=path.ancestor_id,
-                    descendant_id=new_member_id,
-                    depth=path.depth + 1
+            # 2. Copiar TODAS las relaciones del sponsor en un solo statement:
+            # INSERT INTO usertreepath (sponsor_id, ancestor_id, descendant_id, depth)
+            # SELECT :sponsor_id, ancestor_id, :new_member_id, depth + 1
+            # FROM usertreepath
+            # WHERE descendant_id = :sponsor_id
+            session.exec(
+                insert(UserTreePath).from_select(
+                    ["sponsor_id", "ancestor_id", "descendant_id", "depth"],
+                    select(
+                        literal(sponsor_id),
+                        UserTreePath.ancestor_id,
+                        literal(new_member_id),
+                        UserTreePath.depth + 1
+                    ).where(UserTreePath.descendant_id == sponsor_id)
                 )
-                session.add(new_path)
+            )
+
+            # 3. Contadores de inscripciones por (ancestro, día)
+            RegistrationCounterService.record_registration(session, new_member_id)
 
             print(f"✅ Genealogía creada: member_id={new_member_id}, sponsor_id={sponsor_id}")
             return True
@@ -75,6 +82,96 @@ class GenealogyService:
             print(f"❌ Error agregando miembro al árbol: {e}")
             return False
 
+    @staticmethod
+    def add_members_to_tree(session, pairs: List[Tuple[int, Optional[int]]]) -> int:
+        """
+        Agrega MUCHOS miembros al árbol genealógico con pocos statements.
+        Pensado para creación masiva de redes (AdminState, seeders).
+
+        Los caminos de los sponsors que ya existen en BD se cargan en UNA query;
+        los de los miembros del lote se derivan en memoria, así que un sponsor
+        puede venir en el mismo lote siempre que aparezca ANTES que sus hijos.
+        Las filas se insertan en bloques de INSERT_BATCH_SIZE.
+
+        Args:
+            session: Sesión de base de datos activa
+            pairs: Lista ordenada de (new_member_id, sponsor_id); sponsor_id None = raíz
+
+        Returns:
+            int: Total de registros UserTreePath insertados
+
+        Raises:
+            Exception: Se relanza para que el llamador haga rollback del lote completo
+        """
+        try:
+            batch_ids = {member_id for member_id, _ in pairs}
+            external_sponsors = {
+                sponsor_id for _, sponsor_id in pairs
+                if sponsor_id and sponsor_id not in batch_ids
+            }
+
+            # 1. Caminos (ancestor_id, depth) de los sponsors que ya existen en BD
+            paths_by_member = {}
+            if external_sponsors:
+                existing_paths = session.exec(
+                    select(UserTreePath.descendant_id, UserTreePath.ancestor_id, UserTreePath.depth)
+                    .where(UserTreePath.descendant_id.in_(external_sponsors))
+                ).all()
+
+                for descendant_id, ancestor_id, depth in existing_paths:
+                    paths_by_member.setdefault(descendant_id, []).append((ancestor_id, depth))
+
+            # 2. Derivar caminos de cada nuevo miembro e insertar por bloques
+            rows = []
+            inserted = 0
+
+            for new_member_id, sponsor_id in pairs:
+                member_paths = [(new_member_id, 0)]
+
+                if sponsor_id:
+                    if sponsor_id not in paths_by_member:
+                        print(f"⚠️  Sponsor {sponsor_id} sin genealogía, member_id={new_member_id} queda como raíz")
+                    member_paths.extend(
+                        (ancestor_id, depth + 1)
+                        for ancestor_id, depth in paths_by_member.get(sponsor_id, [])
+                    )
+
+                paths_by_member[new_member_id] = member_paths
+
+                for ancestor_id, depth in member_paths:
+                    rows.append({
+                        "sponsor_id": sponsor_id or None,
+                        "ancestor_id": ancestor_id,
+                        "descendant_id": new_member_id,
+                        "depth": depth
+                    })
+
+                if len(rows) >= GenealogyService.INSERT_BATCH_SIZE:
+                    session.execute(insert(UserTreePath), rows)
+                    inserted += len(rows)
+                    rows = []
+
+            if rows:
+                session.execute(insert(UserTreePath), rows)
+                inserted += len(rows)
+
+            # 3. Contadores de inscripciones por (ancestro, día) del lote completo
+            RegistrationCounterService.record_registrations(
+                session,
+                RegistrationCounterService.increments_for_paths(session, (
+                    (ancestor_id, member_id, depth)
+                    for member_id in batch_ids
+                    for ancestor_id, depth in paths_by_member.get(member_id, [])
+                ))
+            )
+
+            print(f"✅ Genealogía masiva creada: {len(pairs)} miembros, {inserted} caminos")
+            return inserted
+
+        except Exception as e:
+            print(f"❌ Error agregando miembros al árbol en bloque: {e}")
+            raise
+
     @staticmethod
     def get_upline(session, member_id: int, max_depth: Optional[int] = None) -> List[Users]:
         """
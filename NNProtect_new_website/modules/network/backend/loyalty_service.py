@@ -7,7 +7,7 @@ CRÍTICO: Si un mes no compra en día 1-7 → RESETEO A 0
 """
 
 import sqlmodel
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from datetime import datetime, timezone
 
 from database.loyalty_points import (
@@ -333,6 +333,94 @@ class LoyaltyService:
             traceback.print_exc()
             return False
 
+    @classmethod
+    def bulk_reset_inactive_users(cls, session, period_id: int, window_start: Optional[datetime] = None) -> List[int]:
+        """
+        Resetea en bloque a todos los usuarios con puntos que no compraron en el mes de la ventana.
+        Número constante de round trips: lectura de puntos previos, un UPDATE ... RETURNING
+        y un INSERT masivo del historial.
+
+        ⚠️ No hace commit: corre dentro de la transacción del llamador.
+
+        Args:
+            session: Sesión de base de datos
+            period_id: ID del período actual (para el historial)
+            window_start: Inicio del mes evaluado (default: día 1 del mes actual, UTC)
+
+        Returns:
+            member_ids reseteados
+        """
+        if window_start is None:
+            window_start = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        if window_start.month == 12:
+            window_end = window_start.replace(year=window_start.year + 1, month=1)
+        else:
+            window_end = window_start.replace(month=window_start.month + 1)
+
+        stale = (
+            (LoyaltyPoints.current_points > 0) &
+            (
+                LoyaltyPoints.last_valid_purchase_date.is_(None) |
+                (LoyaltyPoints.last_valid_purchase_date < window_start) |
+                (LoyaltyPoints.last_valid_purchase_date >= window_end)
+            )
+        )
+
+        # 1️⃣ Puntos previos de los registros a resetear (bloqueados hasta el commit)
+        previous = {
+            member_id: (points_before, last_purchase)
+            for member_id, points_before, last_purchase in session.exec(
+                sqlmodel.select(
+                    LoyaltyPoints.member_id,
+                    LoyaltyPoints.current_points,
+                    LoyaltyPoints.last_valid_purchase_date
+                )
+                .where(stale)
+                .with_for_update()
+            ).all()
+        }
+
+        if not previous:
+            return []
+
+        # 2️⃣ Reset con un único UPDATE ... RETURNING sobre la misma ventana
+        reset_ids = list(session.exec(
+            sqlmodel.update(LoyaltyPoints)
+            .where(stale)
+            .values(
+                current_points=0,
+                consecutive_months=0,
+                status=LoyaltyStatus.REINICIADO.value
+            )
+            .returning(LoyaltyPoints.member_id)
+            .execution_options(synchronize_session="fetch")
+        ).scalars())
+        reset_rows = [
+            (member_id, *previous[member_id]) for member_id in reset_ids if member_id in previous
+        ]
+
+        if not reset_rows:
+            return []
+
+        # 3️⃣ Historial RESET en un solo INSERT masivo
+        session.execute(sqlmodel.insert(LoyaltyPointsHistory), [
+            {
+                "member_id": member_id,
+                "period_id": period_id,
+                "event_type": LoyaltyEventType.RESET.value,
+                "points_before": points_before,
+                "points_after": 0,
+                "points_change": -points_before,
+                "description": (
+                    "Reinicio automático por falta de compra en ventana 1-7 del mes anterior"
+                    if last_purchase else "Reinicio automático por falta de compra"
+                )
+            }
+            for member_id, points_before, last_purchase in reset_rows
+        ])
+
+        return [member_id for member_id, _, _ in reset_rows]
+
     @classmethod
     def check_and_reset_inactive_users(cls, session, period_id: int) -> int:
         """
@@ -347,46 +435,7 @@ class LoyaltyService:
             Cantidad de usuarios reseteados
         """
         try:
-            # Obtener el período anterior (mes pasado)
-            # En producción, calcular correctamente el período anterior
-            previous_month = datetime.now(timezone.utc).replace(day=1)
-
-            # Obtener todos los usuarios con puntos > 0
-            users_with_points = session.exec(
-                sqlmodel.select(LoyaltyPoints)
-                .where(LoyaltyPoints.current_points > 0)
-            ).all()
-
-            reset_count = 0
-
-            for loyalty in users_with_points:
-                # Verificar si hubo compra válida en el mes anterior
-                if loyalty.last_valid_purchase_date:
-                    last_purchase_month = loyalty.last_valid_purchase_date.month
-                    last_purchase_year = loyalty.last_valid_purchase_date.year
-                    previous_month_num = previous_month.month
-                    previous_year = previous_month.year
-
-                    # Si la última compra NO fue en el mes anterior, resetear
-                    if last_purchase_month != previous_month_num or last_purchase_year != previous_year:
-                        success = cls.reset_points(
-                            session=session,
-                            member_id=loyalty.member_id,
-                            period_id=period_id,
-                            reason=f"Reinicio automático por falta de compra en ventana 1-7 del mes anterior"
-                        )
-                        if success:
-                            reset_count += 1
-                else:
-                    # Si nunca ha comprado, resetear
-                    success = cls.reset_points(
-                        session=session,
-                        member_id=loyalty.member_id,
-                        period_id=period_id,
-                        reason="Reinicio automático por falta de compra"
-                    )
-                    if success:
-                        reset_count += 1
+            reset_count = len(cls.bulk_reset_inactive_users(session, period_id))
 
             session.commit()
 
@@ -4,11 +4,14 @@ Se enfoca únicamente en la lógica de negocio multinivel.
 """
 import reflex as rx
 import sqlmodel
-from typing import Optional, Dict, Any
+import time
+from threading import Lock
+from typing import Optional, Dict, Any, Iterable
 from database.users import Users, UserStatus
 
 # Timezone utilities
 from NNProtect_new_website.utils.timezone_mx import get_mexico_now, format_mexico_date, format_mexico_datetime, get_mexico_date, get_mexico_datetime_naive
+from NNProtect_new_website.utils.after_commit import run_after_commit
 from datetime import timedelta
 from database.userprofiles import UserProfiles, UserGender
 from database.social_accounts import SocialAccounts, SocialNetwork
@@ -17,12 +20,19 @@ from database.roles_users import RolesUsers
 from database.auth_credentials import AuthCredentials
 from database.usertreepaths import UserTreePath
 from database.unilevel_report import UnilevelReports
+from database.query_profiler import QueryProfiler
 from NNProtect_new_website.modules.network.backend.rank_service import RankService
 from NNProtect_new_website.modules.finance.backend.wallet_service import WalletService
 import os
 
 class MLMUserManager:
     """Maneja datos MLM separados de la autenticación Supabase."""
+
+    # Caché de volúmenes por (member_id, period_id) para la pestaña de volúmenes
+    VOLUME_CACHE_TTL_SECONDS = 300   # Red de seguridad entre procesos
+    VOLUME_CACHE_MAX_ENTRIES = 50000 # Al superarse se vacía la caché (KISS)
+    _volume_lock = Lock()
+    _volume_cache: Dict[tuple, tuple] = {}  # (member_id, period_id) → (volúmenes, loaded_at)
     
     @staticmethod
     def get_next_member_id(session) -> int:
@@ -555,10 +565,36 @@ class MLMUserManager:
             print(f"❌ Error creando dirección: {e}")
             # No fallar el registro completo por error de dirección
     
+    @staticmethod
+    def _query_user_levels(session, member_ids, root_sponsor_id: int) -> Dict[int, int]:
+        """
+        Niveles de varios usuarios respecto a un sponsor raíz en UNA consulta:
+        el nivel es el depth de la fila (ancestor_id, descendant_id) de la closure table.
+
+        Returns:
+            Dict member_id → nivel (0 si es la raíz o no está en su red)
+        """
+        member_ids = list(dict.fromkeys(member_ids))
+        levels = {member_id: 0 for member_id in member_ids}
+        if not member_ids:
+            return levels
+
+        rows = session.exec(
+            sqlmodel.select(UserTreePath.descendant_id, UserTreePath.depth)
+            .where(
+                UserTreePath.ancestor_id == root_sponsor_id,
+                UserTreePath.descendant_id.in_(member_ids)
+            )
+        ).all()
+
+        levels.update({descendant_id: depth for descendant_id, depth in rows})
+        return levels
+
     @staticmethod
     def get_user_level(user_member_id: int, root_sponsor_id: int) -> int:
         """
-        Calcula el nivel de un usuario respecto a un sponsor raíz usando BFS.
+        Calcula el nivel de un usuario respecto a un sponsor raíz.
+        Lectura directa de la fila (ancestor_id, descendant_id) de UserTreePath.
         
         Args:
             user_member_id: member_id del usuario a evaluar
@@ -567,142 +603,204 @@ class MLMUserManager:
         Returns:
             int: Nivel del usuario (1, 2, 3, etc.) o 0 si no está en la red
         """
+        return MLMUserManager.get_user_levels([user_member_id], root_sponsor_id).get(user_member_id, 0)
+
+    @staticmethod
+    def get_user_levels(member_ids: list, root_sponsor_id: int) -> Dict[int, int]:
+        """
+        Calcula el nivel de varios usuarios respecto a un sponsor raíz en una sola consulta.
+
+        Args:
+            member_ids: member_ids de los usuarios a evaluar
+            root_sponsor_id: member_id del sponsor raíz (usuario autenticado)
+
+        Returns:
+            Dict member_id → nivel (0 si es la raíz o no está en la red)
+        """
         try:
-            if user_member_id == root_sponsor_id:
-                return 0  # El sponsor raíz es nivel 0
-            
             with rx.session() as session:
-                # BFS desde el sponsor raíz hacia abajo
-                from collections import deque
-                
-                # Cola: (member_id, nivel)
-                queue = deque([(root_sponsor_id, 0)])
-                visited = set([root_sponsor_id])
-                
-                while queue:
-                    current_id, current_level = queue.popleft()
-                    
-                    # Buscar todos los usuarios directos de current_id
-                    direct_users = session.exec(
-                        sqlmodel.select(UserTreePath)
-                        .where(UserTreePath.ancestor_id == current_id)
-                    ).all()
-                    
-                    for tree_path in direct_users:
-                        child_id = tree_path.descendant_id
-                        child_level = current_level + 1
-                        
-                        # Si encontramos al usuario buscado
-                        if child_id == user_member_id:
-                            print(f"✅ Usuario {user_member_id} encontrado en nivel {child_level} de {root_sponsor_id}")
-                            return child_level
-                        
-                        # Si no lo hemos visitado, agregarlo a la cola
-                        if child_id not in visited:
-                            visited.add(child_id)
-                            queue.append((child_id, child_level))
-                
-                # Usuario no encontrado en la red
-                print(f"⚠️ Usuario {user_member_id} no encontrado en la red de {root_sponsor_id}")
-                return 0
-                
+                return MLMUserManager._query_user_levels(session, member_ids, root_sponsor_id)
+
         except Exception as e:
-            print(f"❌ Error calculando nivel de usuario {user_member_id}: {e}")
+            print(f"❌ Error calculando niveles respecto a {root_sponsor_id}: {e}")
             import traceback
             traceback.print_exc()
-            return 0
+            return {member_id: 0 for member_id in member_ids}
 
     @staticmethod
-    def get_network_descendants(sponsor_member_id: int, root_user_id: Optional[int] = None) -> list:
+    def _registrations_filters(sponsor_member_id: int, start_date=None, end_date=None) -> list:
         """
-        Obtiene toda la red descendente de un sponsor usando UserTreePath.
-        Optimizado con Path Enumeration Pattern - elimina recursión innecesaria.
+        Condiciones comunes del reporte de inscripciones: descendientes del sponsor
+        (closure table, sin self-reference) y rango de fechas de registro inclusivo.
+        """
+        from datetime import datetime, time
+
+        filters = [
+            UserTreePath.ancestor_id == sponsor_member_id,
+            UserTreePath.depth > 0  # Excluir self-reference
+        ]
+
+        if start_date is not None:
+            start_day = start_date.date() if isinstance(start_date, datetime) else start_date
+            filters.append(Users.created_at >= datetime.combine(start_day, time.min))
+
+        if end_date is not None:
+            end_day = end_date.date() if isinstance(end_date, datetime) else end_date
+            filters.append(Users.created_at < datetime.combine(end_day + timedelta(days=1), time.min))
+
+        return filters
+
+    @staticmethod
+    def _query_registrations_page(session, sponsor_member_id: int, limit: Optional[int] = None,
+                                  cursor: Optional[tuple] = None, start_date=None, end_date=None) -> dict:
+        """
+        Una página del reporte de inscripciones en UNA consulta:
+        UserTreePath + Users + perfil + sponsor + perfil del sponsor.
+        Orden (nivel, member_id) con paginación keyset.
 
         Args:
+            session: Sesión de base de datos
             sponsor_member_id: member_id del sponsor principal
-            root_user_id: member_id del usuario autenticado (para calcular niveles)
+            limit: Inscripciones por página (None = todas)
+            cursor: (nivel, member_id) de la última inscripción de la página anterior
+            start_date: Fecha de registro mínima (inclusive, opcional)
+            end_date: Fecha de registro máxima (inclusive, opcional)
 
         Returns:
-            Lista de diccionarios con datos de usuarios descendentes
+            Dict con 'registrations', 'next_cursor' (None si no hay más) y 'total'
+        """
+        from sqlalchemy.orm import aliased
+
+        Sponsor = aliased(Users)
+        SponsorProfile = aliased(UserProfiles)
+
+        filters = MLMUserManager._registrations_filters(sponsor_member_id, start_date, end_date)
+
+        total = session.exec(
+            sqlmodel.select(sqlmodel.func.count())
+            .select_from(UserTreePath)
+            .join(Users, Users.member_id == UserTreePath.descendant_id)
+            .where(*filters)
+        ).one()
+
+        page_filters = list(filters)
+        if cursor:
+            last_level, last_member_id = cursor
+            page_filters.append(sqlmodel.or_(
+                UserTreePath.depth > last_level,
+                sqlmodel.and_(UserTreePath.depth == last_level, Users.member_id > last_member_id)
+            ))
+
+        statement = (
+            sqlmodel.select(
+                Users,
+                UserTreePath.depth,
+                UserProfiles.phone_number,
+                Sponsor.member_id,
+                Sponsor.first_name,
+                Sponsor.last_name,
+                SponsorProfile.phone_number
+            )
+            .join(UserTreePath, Users.member_id == UserTreePath.descendant_id)
+            .outerjoin(UserProfiles, Users.id == UserProfiles.user_id)
+            .outerjoin(Sponsor, Users.sponsor_id == Sponsor.member_id)
+            .outerjoin(SponsorProfile, Sponsor.id == SponsorProfile.user_id)
+            .where(*page_filters)
+            .order_by(UserTreePath.depth, Users.member_id)
+        )
+        if limit is not None:
+            statement = statement.limit(limit + 1)
+
+        rows = session.exec(statement).all()
+
+        has_more = limit is not None and len(rows) > limit
+        if has_more:
+            rows = rows[:limit]
+
+        registrations = []
+        for user, depth, phone, sponsor_id, sponsor_first, sponsor_last, sponsor_phone in rows:
+            # Formatear fecha a DD/MM/YYYY
+            formatted_date = user.created_at.strftime("%d/%m/%Y") if user.created_at else "N/A"
+
+            if sponsor_id is not None:
+                sponsor_full_name = f"{sponsor_first or ''} {sponsor_last or ''}".strip()
+                sponsor_phone = sponsor_phone or ""
+            else:
+                sponsor_full_name = "N/A"
+                sponsor_phone = "N/A"
+
+            registrations.append({
+                "id": user.id,
+                "member_id": user.member_id,
+                "first_name": user.first_name or "",
+                "last_name": user.last_name or "",
+                "full_name": f"{user.first_name or ''} {user.last_name or ''}".strip() if (user.first_name or user.last_name) else "N/A",
+                "email": user.email_cache or "",
+                "status": user.status.value if hasattr(user.status, 'value') else str(user.status),
+                "created_at": formatted_date,
+                "phone": phone or "",
+                "sponsor_member_id": sponsor_id,
+                "level": depth,  # Nivel directo desde la closure table
+                "sponsor_full_name": sponsor_full_name,
+                "sponsor_phone": sponsor_phone
+            })
+
+        next_cursor = None
+        if has_more and registrations:
+            last = registrations[-1]
+            next_cursor = (last["level"], last["member_id"])
+
+        return {"registrations": registrations, "next_cursor": next_cursor, "total": total}
+
+    @staticmethod
+    def get_registrations_page(sponsor_member_id: int, limit: int = 50, cursor: Optional[tuple] = None,
+                               start_date=None, end_date=None) -> dict:
+        """
+        Página del reporte de inscripciones de la red de un sponsor.
+        Filtros de fecha, conteo y paginación se resuelven en la BD.
+
+        Args:
+            sponsor_member_id: member_id del sponsor principal
+            limit: Inscripciones por página
+            cursor: next_cursor de la página anterior (None = primera página)
+            start_date: Fecha de registro mínima (inclusive, opcional)
+            end_date: Fecha de registro máxima (inclusive, opcional)
+
+        Returns:
+            Dict con 'registrations', 'next_cursor' y 'total'
         """
         try:
             with rx.session() as session:
-                # Query optimizado con JOIN para obtener todos los datos en una sola consulta
-                descendants_query = session.exec(
-                    sqlmodel.select(Users, UserTreePath, UserProfiles)
-                    .join(UserTreePath, Users.member_id == UserTreePath.descendant_id)
-                    .outerjoin(UserProfiles, Users.id == UserProfiles.user_id)
-                    .where(
-                        UserTreePath.ancestor_id == sponsor_member_id,
-                        UserTreePath.depth > 0  # Excluir self-reference
-                    )
-                    .order_by(UserTreePath.depth, Users.member_id)
-                ).all()
-
-                descendants = []
-                sponsor_cache = {}  # Cache para evitar queries repetidas de sponsors
-
-                for user, tree_path, user_profile in descendants_query:
-                    # Obtener datos del sponsor (con cache)
-                    sponsor_data = {}
-                    if user.sponsor_id:
-                        if user.sponsor_id not in sponsor_cache:
-                            sponsor_result = session.exec(
-                                sqlmodel.select(Users, UserProfiles)
-                                .outerjoin(UserProfiles, Users.id == UserProfiles.user_id)
-                                .where(Users.member_id == user.sponsor_id)
-                            ).first()
-
-                            if sponsor_result:
-                                sponsor_user, sponsor_profile = sponsor_result
-                                sponsor_cache[user.sponsor_id] = {
-                                    "id": sponsor_user.id,
-                                    "member_id": sponsor_user.member_id,
-                                    "first_name": sponsor_user.first_name or "",
-                                    "last_name": sponsor_user.last_name or "",
-                                    "full_name": f"{sponsor_user.first_name or ''} {sponsor_user.last_name or ''}".strip(),
-                                    "phone": sponsor_profile.phone_number if sponsor_profile else "",
-                                    "email": sponsor_user.email_cache or ""
-                                }
-
-                        sponsor_data = sponsor_cache.get(user.sponsor_id, {})
-
-                    # Formatear fecha a DD/MM/YYYY
-                    formatted_date = user.created_at.strftime("%d/%m/%Y") if user.created_at else "N/A"
-
-                    # Nivel ya viene directamente de tree_path.depth (más eficiente)
-                    user_level = tree_path.depth
-
-                    user_data = {
-                        "id": user.id,
-                        "member_id": user.member_id,
-                        "first_name": user.first_name or "",
-                        "last_name": user.last_name or "",
-                        "full_name": f"{user.first_name or ''} {user.last_name or ''}".strip() if (user.first_name or user.last_name) else "N/A",
-                        "email": user.email_cache or "",
-                        "status": user.status.value if hasattr(user.status, 'value') else str(user.status),
-                        "created_at": formatted_date,
-                        "phone": user_profile.phone_number if user_profile else "",
-                        "sponsor_member_id": sponsor_data.get("member_id", None),
-                        "level": user_level,
-                        "sponsor_full_name": sponsor_data.get("full_name", "N/A"),
-                        "sponsor_phone": sponsor_data.get("phone", "N/A")
-                    }
-                    descendants.append(user_data)
-
-                return descendants
+                return MLMUserManager._query_registrations_page(
+                    session, sponsor_member_id, limit, cursor, start_date, end_date
+                )
 
         except Exception as e:
-            print(f"❌ Error obteniendo red descendente: {e}")
+            print(f"❌ Error obteniendo página de inscripciones: {e}")
             import traceback
             traceback.print_exc()
-            return []
-    
+            return {"registrations": [], "next_cursor": None, "total": 0}
+
+    @staticmethod
+    def get_network_descendants(sponsor_member_id: int, root_user_id: Optional[int] = None) -> list:
+        """
+        Obtiene toda la red descendente de un sponsor usando UserTreePath.
+        Usuario, perfil y sponsor en una sola consulta (sin lookups por fila).
+
+        Args:
+            sponsor_member_id: member_id del sponsor principal
+            root_user_id: member_id del usuario autenticado (el nivel sale de la closure table)
+
+        Returns:
+            Lista de diccionarios con datos de usuarios descendentes
+        """
+        return MLMUserManager.get_registrations_page(sponsor_member_id, limit=None)["registrations"]
+
     @staticmethod
     def _filter_registrations_by_date_range(sponsor_member_id: int, start_date, end_date) -> list:
         """
         Método privado que filtra registraciones por rango de fechas.
-        Aplica POO para reutilizar lógica común.
+        El filtro se aplica en la BD sobre users.created_at.
         
         Args:
             sponsor_member_id: member_id del sponsor principal
@@ -712,39 +810,45 @@ class MLMUserManager:
         Returns:
             Lista de usuarios registrados en el rango de fechas
         """
+        filtered_registrations = MLMUserManager.get_registrations_page(
+            sponsor_member_id, limit=None, start_date=start_date, end_date=end_date
+        )["registrations"]
+
+        print(f"✅ Filtradas {len(filtered_registrations)} registraciones entre {start_date} y {end_date}")
+        return filtered_registrations
+
+    @staticmethod
+    def get_registration_counts(sponsor_member_id: int) -> dict:
+        """
+        Contadores de inscripciones de la red (hoy, período actual e histórico)
+        desde el rollup network_registration_counts, sin recorrer la red.
+
+        Args:
+            sponsor_member_id: member_id del sponsor principal
+
+        Returns:
+            Dict con 'today', 'monthly' y 'all'
+        """
         try:
-            # Obtener toda la red descendente pasando el sponsor como root para niveles
-            all_descendants = MLMUserManager.get_network_descendants(sponsor_member_id, sponsor_member_id)
-            
-            # Filtrar por rango de fechas
-            filtered_registrations = []
-            from datetime import datetime
-            
-            # Convertir start_date y end_date a date objects para comparación consistente
-            start_date_only = start_date.date() if hasattr(start_date, 'date') else start_date
-            end_date_only = end_date.date() if hasattr(end_date, 'date') else end_date
-            
-            for user in all_descendants:
-                if user.get("created_at") and user["created_at"] != "N/A":
-                    try:
-                        # Parsear string formato DD/MM/YYYY a date object
-                        created_at_str = user["created_at"]  # "26/09/2025"
-                        created_at_date = datetime.strptime(created_at_str, "%d/%m/%Y").date()
-                        
-                        # Comparar fechas
-                        if start_date_only <= created_at_date <= end_date_only:
-                            filtered_registrations.append(user)
-                            
-                    except ValueError as ve:
-                        print(f"⚠️ Error parseando fecha '{user['created_at']}': {ve}")
-                        continue
-            
-            print(f"✅ Filtradas {len(filtered_registrations)} registraciones entre {start_date_only} y {end_date_only}")
-            return filtered_registrations
-            
+            from .registration_counter_service import RegistrationCounterService
+            from .reference_data_cache import ReferenceDataCache
+
+            with rx.session() as session:
+                current_period = ReferenceDataCache.get_current_period(session)
+
+                return RegistrationCounterService.get_counts(
+                    session,
+                    sponsor_member_id,
+                    today=get_mexico_now().date(),
+                    period_start=current_period.starts_on.date() if current_period else None,
+                    period_end=current_period.ends_on.date() if current_period else None
+                )
+
         except Exception as e:
-            print(f"❌ Error filtrando registraciones por fecha: {e}")
-            return []
+            print(f"❌ Error obteniendo contadores de inscripciones: {e}")
+            import traceback
+            traceback.print_exc()
+            return {"today": 0, "monthly": 0, "all": 0}
 
     @staticmethod
     def get_todays_registrations(sponsor_member_id: int) -> list:
@@ -807,13 +911,12 @@ class MLMUserManager:
             return []
 
     @staticmethod
+    @QueryProfiler.profiled("MLMUserManager.get_all_registrations")
     def get_all_registrations(sponsor_member_id: int) -> list:
         """
-        Obtiene TODAS las inscripciones de la red de un sponsor usando CTE recursivo,
+        Obtiene TODAS las inscripciones de la red de un sponsor desde UserTreePath,
         sin importar el período o fecha de registro.
-        
-        Usa el mismo enfoque que tu query SQL - recursión directa sobre sponsor_id
-        en lugar de depender de UserTreePath.
+        Para redes grandes usar get_registrations_page (paginado con conteo).
 
         Args:
             sponsor_member_id: member_id del sponsor principal
@@ -821,139 +924,117 @@ class MLMUserManager:
         Returns:
             Lista de TODOS los usuarios registrados en la red (histórico completo)
         """
-        try:
-            print(f"🔄 Obteniendo TODAS las inscripciones para member_id: {sponsor_member_id}")
-            
-            with rx.session() as session:
-                # CTE recursivo - Igual que tu SQL
-                # Busca todos los descendientes usando sponsor_id
-                recursive_query = sqlmodel.text("""
-                    WITH RECURSIVE network_tree AS (
-                        -- Caso base: el usuario raíz
-                        SELECT 
-                            u.id,
-                            u.member_id,
-                            u.first_name,
-                            u.last_name,
-                            u.email_cache,
-                            u.sponsor_id,
-                            u.status,
-                            u.created_at,
-                            1 AS level,
-                            ARRAY[u.member_id] AS path
-                        FROM users u
-                        WHERE u.member_id = :root_member_id
-                        
-                        UNION ALL
-                        
-                        -- Caso recursivo: todos los referidos directos e indirectos
-                        SELECT 
-                            u.id,
-                            u.member_id,
-                            u.first_name,
-                            u.last_name,
-                            u.email_cache,
-                            u.sponsor_id,
-                            u.status,
-                            u.created_at,
-                            nt.level + 1 AS level,
-                            nt.path || u.member_id AS path
-                        FROM users u
-                        INNER JOIN network_tree nt ON u.sponsor_id = nt.member_id
-                        WHERE NOT (u.member_id = ANY(nt.path))  -- Evitar ciclos
-                    )
-                    SELECT 
-                        id,
-                        member_id,
-                        first_name,
-                        last_name,
-                        email_cache,
-                        sponsor_id,
-                        status,
-                        created_at,
-                        level
-                    FROM network_tree
-                    WHERE level > 1  -- Excluir el usuario raíz
-                    ORDER BY level, member_id
-                """)
-                
-                # Ejecutar query con parámetros
-                result = session.execute(
-                    recursive_query.bindparams(root_member_id=sponsor_member_id)
-                )
-                
-                # Procesar resultados
-                descendants = []
-                sponsor_cache = {}  # Cache para sponsors
-                
-                for row in result:
-                    # Obtener datos del sponsor (con cache)
-                    sponsor_data = {}
-                    if row.sponsor_id:
-                        if row.sponsor_id not in sponsor_cache:
-                            sponsor_result = session.exec(
-                                sqlmodel.select(Users, UserProfiles)
-                                .outerjoin(UserProfiles, Users.id == UserProfiles.user_id)
-                                .where(Users.member_id == row.sponsor_id)
-                            ).first()
-
-                            if sponsor_result:
-                                sponsor_user, sponsor_profile = sponsor_result
-                                sponsor_cache[row.sponsor_id] = {
-                                    "id": sponsor_user.id,
-                                    "member_id": sponsor_user.member_id,
-                                    "first_name": sponsor_user.first_name or "",
-                                    "last_name": sponsor_user.last_name or "",
-                                    "full_name": f"{sponsor_user.first_name or ''} {sponsor_user.last_name or ''}".strip(),
-                                    "phone": sponsor_profile.phone_number if sponsor_profile else "",
-                                    "email": sponsor_user.email_cache or ""
-                                }
-
-                        sponsor_data = sponsor_cache.get(row.sponsor_id, {})
-                    
-                    # Obtener teléfono del usuario
-                    user_profile = session.exec(
-                        sqlmodel.select(UserProfiles)
-                        .where(UserProfiles.user_id == row.id)
-                    ).first()
-                    
-                    # Formatear fecha
-                    formatted_date = row.created_at.strftime("%d/%m/%Y") if row.created_at else "N/A"
-                    
-                    user_data = {
-                        "id": row.id,
-                        "member_id": row.member_id,
-                        "first_name": row.first_name or "",
-                        "last_name": row.last_name or "",
-                        "full_name": f"{row.first_name or ''} {row.last_name or ''}".strip() if (row.first_name or row.last_name) else "N/A",
-                        "email": row.email_cache or "",
-                        "status": row.status if isinstance(row.status, str) else row.status.value,
-                        "created_at": formatted_date,
-                        "phone": user_profile.phone_number if user_profile else "",
-                        "sponsor_member_id": sponsor_data.get("member_id", None),
-                        "level": row.level,
-                        "sponsor_full_name": sponsor_data.get("full_name", "N/A"),
-                        "sponsor_phone": sponsor_data.get("phone", "N/A")
-                    }
-                    descendants.append(user_data)
-                
-                print(f"✅ Obtenidas {len(descendants)} inscripciones totales en la red")
-                return descendants
-            
-        except Exception as e:
-            print(f"❌ Error obteniendo todas las inscripciones: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
+        print(f"🔄 Obteniendo TODAS las inscripciones para member_id: {sponsor_member_id}")
+
+        descendants = MLMUserManager.get_registrations_page(sponsor_member_id, limit=None)["registrations"]
+
+        print(f"✅ Obtenidas {len(descendants)} inscripciones totales en la red")
+        return descendants
+
+    @staticmethod
+    def _empty_period_volumes(periods: int, levels: int) -> dict:
+        """Estructura plana de get_period_volumes con todos los valores en 0."""
+        result = {"period_names": [f"Mes {i+1}" for i in range(periods)]}
+        for idx in range(periods):
+            result[f"pv_{idx}"] = "0"
+            for level in range(1, levels + 1):
+                result[f"level_{level}_{idx}"] = "0"
+        return result
 
     @staticmethod
-    def get_period_volumes(member_id: int) -> dict:
+    def _volume_columns() -> list:
+        """Columnas de unilevel_report que expone get_period_volumes (pv y pvg por nivel)."""
+        return ["pv"] + [f"pvg_{MLMUserManager._unilevel_bucket(depth)}" for depth in range(1, 11)]
+
+    @staticmethod
+    def _get_period_reports(session, member_id: int, period_ids: list, use_cache: bool = True) -> Dict[int, Dict[str, int]]:
+        """
+        Volúmenes (pv, pvg_1..pvg_10_plus) del usuario por período.
+        Los períodos que no están en caché se leen en UNA query IN (period_ids).
+
+        Returns:
+            Dict period_id → {columna: valor} (ceros si no hay reporte)
+        """
+        columns = MLMUserManager._volume_columns()
+        now = time.monotonic()
+        reports: Dict[int, Dict[str, int]] = {}
+
+        if use_cache:
+            for period_id in period_ids:
+                cached = MLMUserManager._volume_cache.get((member_id, period_id))
+                if cached and (now - cached[1]) < MLMUserManager.VOLUME_CACHE_TTL_SECONDS:
+                    reports[period_id] = cached[0]
+
+        missing = [period_id for period_id in period_ids if period_id not in reports]
+        if not missing:
+            return reports
+
+        rows = session.exec(
+            sqlmodel.select(UnilevelReports.period_id, *[getattr(UnilevelReports, column) for column in columns])
+            .join(Users, Users.id == UnilevelReports.user_id)
+            .where(
+                Users.member_id == member_id,
+                UnilevelReports.period_id.in_(missing)
+            )
+        ).all()
+
+        loaded = {period_id: dict.fromkeys(columns, 0) for period_id in missing}
+        for period_id, *values in rows:
+            loaded[period_id] = {column: value or 0 for column, value in zip(columns, values)}
+
+        if use_cache:
+            with MLMUserManager._volume_lock:
+                if len(MLMUserManager._volume_cache) + len(loaded) > MLMUserManager.VOLUME_CACHE_MAX_ENTRIES:
+                    MLMUserManager._volume_cache.clear()
+                for period_id, volumes in loaded.items():
+                    MLMUserManager._volume_cache[(member_id, period_id)] = (volumes, now)
+
+        reports.update(loaded)
+        return reports
+
+    @staticmethod
+    def invalidate_period_volumes(member_ids: Iterable[int], period_id: Optional[int] = None, session=None) -> None:
+        """
+        Descarta volúmenes en caché de los miembros (de un período o de todos).
+        Se llama cuando update_unilevel_report_for_order toca sus reportes.
+        Con session, se aplica tras su commit.
+        """
+        member_ids = set(member_ids)
+
+        def _discard():
+            with MLMUserManager._volume_lock:
+                for key in list(MLMUserManager._volume_cache):
+                    if key[0] in member_ids and (period_id is None or key[1] == period_id):
+                        MLMUserManager._volume_cache.pop(key, None)
+
+        run_after_commit(session, _discard)
+
+    @staticmethod
+    def invalidate_all_period_volumes(period_id: Optional[int] = None) -> None:
+        """Descarta todos los volúmenes en caché (de un período o completos)."""
+        with MLMUserManager._volume_lock:
+            if period_id is None:
+                MLMUserManager._volume_cache.clear()
+                return
+            for key in list(MLMUserManager._volume_cache):
+                if key[1] == period_id:
+                    MLMUserManager._volume_cache.pop(key, None)
+
+    @staticmethod
+    def get_period_volumes(member_id: int, periods: int = 6, levels: int = 9, use_cache: bool = True) -> dict:
         """
         Obtiene volúmenes por periodo y por nivel desde la tabla precalculada unilevel_report.
-        Retorna los últimos 6 periodos con PV y PVG desglosados por niveles (1-9).
+        Retorna los últimos `periods` periodos con PV y PVG desglosados por niveles (1-`levels`);
+        el nivel 10 corresponde a pvg_10_plus (10 en adelante).
+
+        Costo: períodos desde ReferenceDataCache y, como máximo, UNA query IN (period_ids)
+        para los (usuario, período) que no estén en caché.
         
         Args:
             member_id: ID del usuario (member_id en Users)
+            periods: Número de periodos (más reciente primero)
+            levels: Niveles a exponer (1-10)
+            use_cache: Usar la caché por (member_id, period_id)
             
         Returns:
             Diccionario con estructura plana para acceso fácil desde Reflex
@@ -964,297 +1045,206 @@ class MLMUserManager:
                 ...
             }
         """
+        levels = max(1, min(levels, 10))
+
         try:
-            from database.periods import Periods
-            from database.unilevel_report import UnilevelReports
-            from database.users import Users
-            
+            from .reference_data_cache import ReferenceDataCache
+
             with rx.session() as session:
                 print(f"🔄 Obteniendo volúmenes por periodo para member_id: {member_id}")
-                
-                # 1️⃣ Obtener user_id desde member_id
-                user = session.exec(
-                    sqlmodel.select(Users).where(Users.member_id == member_id)
-                ).first()
-                
-                if not user:
-                    print(f"⚠️  Usuario con member_id={member_id} no encontrado")
-                    # Retornar estructura vacía
-                    result = {"period_names": [f"Mes {i+1}" for i in range(6)]}
-                    for idx in range(6):
-                        result[f"pv_{idx}"] = "0"
-                        for level in range(1, 10):
-                            result[f"level_{level}_{idx}"] = "0"
-                    return result
-                
-                user_id = user.id
-                
-                # 2️⃣ Obtener últimos 6 periodos
-                periods = session.exec(
-                    sqlmodel.select(Periods)
-                    .order_by(sqlmodel.desc(Periods.starts_on))
-                    .limit(6)
-                ).all()
-                
-                # 3️⃣ Crear estructura plana con datos de unilevel_report
-                result = {"period_names": []}
-                
-                for idx, period in enumerate(periods):
-                    result["period_names"].append(period.name)
-                    
-                    # Buscar reporte de este usuario en este periodo
-                    report = session.exec(
-                        sqlmodel.select(UnilevelReports)
-                        .where(
-                            UnilevelReports.user_id == user_id,
-                            UnilevelReports.period_id == period.id
-                        )
-                    ).first()
-                    
-                    if report:
-                        result[f"pv_{idx}"] = f"{report.pv:,}"
-                        result[f"level_1_{idx}"] = f"{report.pvg_1:,}"
-                        result[f"level_2_{idx}"] = f"{report.pvg_2:,}"
-                        result[f"level_3_{idx}"] = f"{report.pvg_3:,}"
-                        result[f"level_4_{idx}"] = f"{report.pvg_4:,}"
-                        result[f"level_5_{idx}"] = f"{report.pvg_5:,}"
-                        result[f"level_6_{idx}"] = f"{report.pvg_6:,}"
-                        result[f"level_7_{idx}"] = f"{report.pvg_7:,}"
-                        result[f"level_8_{idx}"] = f"{report.pvg_8:,}"
-                        result[f"level_9_{idx}"] = f"{report.pvg_9:,}"
-                        print(f"  ✅ Periodo '{period.name}': PV={report.pv}")
-                    else:
-                        # Sin reporte, todos en 0
-                        result[f"pv_{idx}"] = "0"
-                        for level in range(1, 10):
-                            result[f"level_{level}_{idx}"] = "0"
-                        print(f"  ⚠️  Periodo '{period.name}': Sin reporte")
-                
-                # 4️⃣ Rellenar con periodos vacíos hasta completar 6
-                while len(result["period_names"]) < 6:
-                    idx = len(result["period_names"])
-                    period_num = idx + 1
-                    result["period_names"].append(f"Mes {period_num}")
-                    result[f"pv_{idx}"] = "0"
-                    for level in range(1, 10):
-                        result[f"level_{level}_{idx}"] = "0"
-                
-                print(f"✅ Retornando volúmenes de {len(result['period_names'])} periodos")
-                return result
+
+                # 1️⃣ Últimos N periodos (en memoria) y sus reportes en una sola query
+                recent_periods = ReferenceDataCache.get_recent_periods(session, periods)
+                reports = MLMUserManager._get_period_reports(
+                    session, member_id, [period.id for period in recent_periods], use_cache
+                )
+
+            # 2️⃣ Estructura plana; los periodos faltantes quedan como "Mes N" en 0
+            result = MLMUserManager._empty_period_volumes(periods, levels)
+            for idx, period in enumerate(recent_periods):
+                report = reports[period.id]
+                result["period_names"][idx] = period.name
+                result[f"pv_{idx}"] = f"{report['pv']:,}"
+                for level in range(1, levels + 1):
+                    result[f"level_{level}_{idx}"] = f"{report[f'pvg_{MLMUserManager._unilevel_bucket(level)}']:,}"
+
+            print(f"✅ Retornando volúmenes de {len(result['period_names'])} periodos")
+            return result
                 
         except Exception as e:
             print(f"❌ Error obteniendo volúmenes por periodo: {e}")
             import traceback
             traceback.print_exc()
-            # Retornar estructura vacía
-            result = {"period_names": [f"Mes {i+1}" for i in range(6)]}
-            for idx in range(6):
-                result[f"pv_{idx}"] = "0"
-                for level in range(1, 10):
-                    result[f"level_{level}_{idx}"] = "0"
-            return result
+            return MLMUserManager._empty_period_volumes(periods, levels)
 
     @staticmethod
-    def update_unilevel_report_for_order(order_member_id: int, period_id: int):
+    def _unilevel_bucket(depth: int) -> str:
+        """Sufijo de columna de unilevel_report para una profundidad (1-9 o 10_plus)."""
+        return str(depth) if depth < 10 else "10_plus"
+
+    @staticmethod
+    @QueryProfiler.profiled("MLMUserManager.update_unilevel_report_for_order")
+    def update_unilevel_report_for_order(session, order_member_id: int, period_id: int,
+                                         pv: int, vn: float) -> int:
         """
-        Actualiza la tabla unilevel_report para todos los ancestros del usuario que hizo la orden.
-        Se debe llamar cada vez que se complete una orden.
-        
+        Suma el PV/VN de una orden confirmada al unilevel_report del comprador y de sus ancestros.
+        Actualización incremental: cada ancestro recibe el delta en la columna de su nivel
+        (pvg_N/vng_N o pvg_10_plus/vng_10_plus) y en sus totales, sin re-agregar órdenes.
+        Dos queries: caminos y un INSERT ... ON CONFLICT (user_id, period_id) DO UPDATE que
+        crea o incrementa todos los reportes; órdenes concurrentes de la misma línea
+        ascendente no pueden duplicar filas.
+
+        ⚠️ No hace commit: corre dentro de la transacción del llamador.
+
         Args:
+            session: Sesión de base de datos
             order_member_id: member_id del usuario que hizo la orden
             period_id: ID del periodo de la orden
+            pv: total_pv de la orden
+            vn: total_vn de la orden
+
+        Returns:
+            Número de reportes actualizados (comprador + ancestros)
         """
-        try:
-            from database.unilevel_report import UnilevelReports
-            from database.users import Users
-            from database.orders import Orders
-            
-            with rx.session() as session:
-                print(f"🔄 Actualizando unilevel_report para orden de member_id={order_member_id}, periodo={period_id}")
-                
-                # 1️⃣ Obtener user_id del comprador
-                buyer = session.exec(
-                    sqlmodel.select(Users).where(Users.member_id == order_member_id)
-                ).first()
-                
-                if not buyer:
-                    print(f"⚠️  Usuario comprador no encontrado")
-                    return
-                
-                # 2️⃣ Actualizar el PV personal del comprador
-                pv_total = session.exec(
-                    sqlmodel.select(sqlmodel.func.sum(Orders.total_pv))
-                    .where(
-                        Orders.member_id == order_member_id,
-                        Orders.period_id == period_id,
-                        Orders.status == "completed"
-                    )
-                ).first() or 0
-                
-                buyer_report = session.exec(
-                    sqlmodel.select(UnilevelReports)
-                    .where(
-                        UnilevelReports.user_id == buyer.id,
-                        UnilevelReports.period_id == period_id
-                    )
-                ).first()
-                
-                # Calcular VN total del comprador
-                vn_total = session.exec(
-                    sqlmodel.select(sqlmodel.func.sum(Orders.total_vn))
-                    .where(
-                        Orders.member_id == order_member_id,
-                        Orders.period_id == period_id,
-                        Orders.status == "completed"
-                    )
-                ).first() or 0.0
-                
-                if buyer_report:
-                    buyer_report.pv = int(pv_total)
-                    buyer_report.vn = float(vn_total)
-                else:
-                    buyer_report = UnilevelReports(
-                        user_id=buyer.id,
-                        period_id=period_id,
-                        pv=int(pv_total),
-                        vn=float(vn_total)
-                    )
-                    session.add(buyer_report)
-                
-                # 🆕 Calcular totales para el comprador (no tiene PVG, solo PV personal)
-                buyer_report.pvg_total = 0
-                buyer_report.vng_total = 0.0
-                
-                # 3️⃣ Obtener todos los ancestros y actualizar sus PVG por nivel
-                ancestors = session.exec(
-                    sqlmodel.select(UserTreePath)
-                    .where(UserTreePath.descendant_id == order_member_id)
-                ).all()
-                
-                for ancestor_path in ancestors:
-                    if ancestor_path.depth == 0:
-                        continue  # Skip self
-                    
-                    ancestor_member_id = ancestor_path.ancestor_id
-                    depth = ancestor_path.depth
-                    
-                    # Obtener user_id del ancestro
-                    ancestor_user = session.exec(
-                        sqlmodel.select(Users).where(Users.member_id == ancestor_member_id)
-                    ).first()
-                    
-                    if not ancestor_user:
-                        continue
-                    
-                    # Calcular PVG para este nivel
-                    descendants_at_this_level = session.exec(
-                        sqlmodel.select(UserTreePath.descendant_id)
-                        .where(
-                            UserTreePath.ancestor_id == ancestor_member_id,
-                            UserTreePath.depth == depth
-                        )
-                    ).all()
-                    
-                    pvg_for_level = session.exec(
-                        sqlmodel.select(sqlmodel.func.sum(Orders.total_pv))
-                        .where(
-                            Orders.member_id.in_(descendants_at_this_level),
-                            Orders.period_id == period_id,
-                            Orders.status == "completed"
-                        )
-                    ).first() or 0
-                    
-                    vng_for_level = session.exec(
-                        sqlmodel.select(sqlmodel.func.sum(Orders.total_vn))
-                        .where(
-                            Orders.member_id.in_(descendants_at_this_level),
-                            Orders.period_id == period_id,
-                            Orders.status == "completed"
-                        )
-                    ).first() or 0.0
-                    
-                    # Actualizar/crear reporte del ancestro
-                    ancestor_report = session.exec(
-                        sqlmodel.select(UnilevelReports)
-                        .where(
-                            UnilevelReports.user_id == ancestor_user.id,
-                            UnilevelReports.period_id == period_id
-                        )
-                    ).first()
-                    
-                    if not ancestor_report:
-                        ancestor_report = UnilevelReports(
-                            user_id=ancestor_user.id,
-                            period_id=period_id
-                        )
-                        session.add(ancestor_report)
-                    
-                    # Actualizar el PVG y VNG del nivel correspondiente
-                    if depth == 1:
-                        ancestor_report.pvg_1 = int(pvg_for_level)
-                        ancestor_report.vng_1 = float(vng_for_level)
-                    elif depth == 2:
-                        ancestor_report.pvg_2 = int(pvg_for_level)
-                        ancestor_report.vng_2 = float(vng_for_level)
-                    elif depth == 3:
-                        ancestor_report.pvg_3 = int(pvg_for_level)
-                        ancestor_report.vng_3 = float(vng_for_level)
-                    elif depth == 4:
-                        ancestor_report.pvg_4 = int(pvg_for_level)
-                        ancestor_report.vng_4 = float(vng_for_level)
-                    elif depth == 5:
-                        ancestor_report.pvg_5 = int(pvg_for_level)
-                        ancestor_report.vng_5 = float(vng_for_level)
-                    elif depth == 6:
-                        ancestor_report.pvg_6 = int(pvg_for_level)
-                        ancestor_report.vng_6 = float(vng_for_level)
-                    elif depth == 7:
-                        ancestor_report.pvg_7 = int(pvg_for_level)
-                        ancestor_report.vng_7 = float(vng_for_level)
-                    elif depth == 8:
-                        ancestor_report.pvg_8 = int(pvg_for_level)
-                        ancestor_report.vng_8 = float(vng_for_level)
-                    elif depth == 9:
-                        ancestor_report.pvg_9 = int(pvg_for_level)
-                        ancestor_report.vng_9 = float(vng_for_level)
-                    elif depth >= 10:
-                        ancestor_report.pvg_10_plus = int(pvg_for_level)
-                        ancestor_report.vng_10_plus = float(vng_for_level)
-                    
-                    # 🆕 Calcular totales agregados
-                    ancestor_report.pvg_total = (
-                        (ancestor_report.pvg_1 or 0) +
-                        (ancestor_report.pvg_2 or 0) +
-                        (ancestor_report.pvg_3 or 0) +
-                        (ancestor_report.pvg_4 or 0) +
-                        (ancestor_report.pvg_5 or 0) +
-                        (ancestor_report.pvg_6 or 0) +
-                        (ancestor_report.pvg_7 or 0) +
-                        (ancestor_report.pvg_8 or 0) +
-                        (ancestor_report.pvg_9 or 0) +
-                        (ancestor_report.pvg_10_plus or 0)
-                    )
-                    
-                    ancestor_report.vng_total = (
-                        (ancestor_report.vng_1 or 0.0) +
-                        (ancestor_report.vng_2 or 0.0) +
-                        (ancestor_report.vng_3 or 0.0) +
-                        (ancestor_report.vng_4 or 0.0) +
-                        (ancestor_report.vng_5 or 0.0) +
-                        (ancestor_report.vng_6 or 0.0) +
-                        (ancestor_report.vng_7 or 0.0) +
-                        (ancestor_report.vng_8 or 0.0) +
-                        (ancestor_report.vng_9 or 0.0) +
-                        (ancestor_report.vng_10_plus or 0.0)
-                    )
-                
-                session.commit()
-                print(f"✅ unilevel_report actualizado correctamente")
-                
-        except Exception as e:
-            print(f"❌ Error actualizando unilevel_report: {e}")
-            import traceback
-            traceback.print_exc()
+        from NNProtect_new_website.utils.sql_upsert import dialect_insert
+
+        # 1️⃣ Comprador (depth=0) y ancestros con su user_id en una sola consulta
+        rows = session.exec(
+            sqlmodel.select(UserTreePath.depth, Users.id, UserTreePath.ancestor_id)
+            .join(Users, Users.member_id == UserTreePath.ancestor_id)
+            .where(UserTreePath.descendant_id == order_member_id)
+        ).all()
+
+        if not rows:
+            print(f"⚠️  Usuario comprador {order_member_id} no encontrado en el árbol")
+            return 0
+
+        # 2️⃣ Delta por reporte: comprador en pv/vn, ancestros en su nivel y totales
+        delta_columns = ["pv", "vn", "pvg_total", "vng_total"] + [
+            f"{prefix}_{bucket}"
+            for bucket in [str(level) for level in range(1, 10)] + ["10_plus"]
+            for prefix in ("pvg", "vng")
+        ]
+        reports = []
+        for depth, user_id, _ in rows:
+            report = dict.fromkeys(delta_columns, 0)
+            if depth == 0:
+                report.update(pv=pv, vn=vn)
+            else:
+                bucket = MLMUserManager._unilevel_bucket(depth)
+                report.update({
+                    f"pvg_{bucket}": pv, f"vng_{bucket}": vn,
+                    "pvg_total": pv, "vng_total": vn,
+                })
+            reports.append({"user_id": user_id, "period_id": period_id, **report})
+
+        # 3️⃣ Crear o incrementar todos los reportes en un solo statement (incremento en SQL).
+        # Orden por user_id: órdenes concurrentes de la misma rama bloquean las filas en el mismo orden
+        reports.sort(key=lambda report: report["user_id"])
+        statement = dialect_insert(session, UnilevelReports).values(reports)
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["user_id", "period_id"],
+                set_={
+                    column: getattr(UnilevelReports, column) + statement.excluded[column]
+                    for column in delta_columns
+                }
+            )
+        )
+
+        # Los reportes ya cargados en la sesión quedan obsoletos tras el upsert
+        user_ids = {report["user_id"] for report in reports}
+        for instance in list(session.identity_map.values()):
+            if isinstance(instance, UnilevelReports) and instance.period_id == period_id and instance.user_id in user_ids:
+                session.expire(instance)
+
+        # 4️⃣ Volúmenes en caché de las filas tocadas
+        MLMUserManager.invalidate_period_volumes([member_id for _, _, member_id in rows], period_id, session)
+
+        print(f"✅ unilevel_report: +{pv} PV / +{vn} VN para member_id={order_member_id} y {len(rows) - 1} ancestros")
+        return len(reports)
+
+    @staticmethod
+    def rebuild_unilevel_reports(session, period_id: int) -> int:
+        """
+        Reconstruye desde cero el unilevel_report de un periodo a partir de las órdenes pagadas.
+        Sirve para reconciliar la tabla incremental; conserva una fila por usuario que ya tenía reporte.
+
+        ⚠️ No hace commit: corre dentro de la transacción del llamador.
+
+        Args:
+            session: Sesión de base de datos
+            period_id: ID del periodo a reconstruir
+
+        Returns:
+            Número de reportes escritos
+        """
+        from database.orders import Orders, OrderStatus
+
+        paid_orders = (
+            (Orders.period_id == period_id) &
+            (Orders.payment_confirmed_at.isnot(None)) &
+            (Orders.status.notin_([OrderStatus.CANCELLED.value, OrderStatus.REFUNDED.value]))
+        )
+
+        bucket_expr = sqlmodel.case((UserTreePath.depth >= 10, 10), else_=UserTreePath.depth)
+
+        # 1️⃣ Volumen por (ancestro, nivel); depth=0 es el volumen personal
+        volumes = session.exec(
+            sqlmodel.select(
+                Users.id,
+                bucket_expr,
+                sqlmodel.func.sum(Orders.total_pv),
+                sqlmodel.func.sum(Orders.total_vn)
+            )
+            .join(Users, Users.member_id == UserTreePath.ancestor_id)
+            .join(Orders, Orders.member_id == UserTreePath.descendant_id)
+            .where(paid_orders)
+            .group_by(Users.id, bucket_expr)
+        ).all()
+
+        reports: Dict[int, Dict[str, Any]] = {}
+
+        def _report(user_id: int) -> Dict[str, Any]:
+            if user_id not in reports:
+                reports[user_id] = {"user_id": user_id, "period_id": period_id,
+                                    "pv": 0, "vn": 0.0, "pvg_total": 0, "vng_total": 0.0}
+            return reports[user_id]
+
+        for user_id in session.exec(
+            sqlmodel.select(UnilevelReports.user_id).where(UnilevelReports.period_id == period_id)
+        ).all():
+            _report(user_id)
+
+        for user_id, depth, pv_sum, vn_sum in volumes:
+            report = _report(user_id)
+            pv_sum, vn_sum = int(pv_sum or 0), float(vn_sum or 0.0)
+            if depth == 0:
+                report["pv"], report["vn"] = pv_sum, vn_sum
+                continue
+            bucket = MLMUserManager._unilevel_bucket(depth)
+            report[f"pvg_{bucket}"], report[f"vng_{bucket}"] = pv_sum, vn_sum
+            report["pvg_total"] += pv_sum
+            report["vng_total"] += vn_sum
+
+        # 2️⃣ Reemplazar el periodo completo en bloque
+        session.execute(
+            sqlmodel.delete(UnilevelReports).where(UnilevelReports.period_id == period_id)
+        )
+        rows = list(reports.values())
+        columns = ["pv", "vn", "pvg_total", "vng_total"] + [
+            f"{prefix}_{MLMUserManager._unilevel_bucket(depth)}"
+            for depth in range(1, 11) for prefix in ("pvg", "vng")
+        ]
+        for row in rows:
+            for column in columns:
+                row.setdefault(column, 0.0 if column.startswith("vn") else 0)
+        if rows:
+            session.execute(sqlmodel.insert(UnilevelReports), rows)
+        MLMUserManager.invalidate_all_period_volumes(period_id)
+
+        print(f"✅ unilevel_report reconstruido para periodo {period_id}: {len(rows)} reportes")
+        return len(rows)
 
     # 🎯 MÉTODOS PARA GESTIÓN AUTOMÁTICA DE RANGOS
     @staticmethod
@@ -1268,36 +1258,24 @@ class MLMUserManager:
         """
         try:
             from database.user_rank_history import UserRankHistory
-            from database.ranks import Ranks
-            from database.periods import Periods
-            from NNProtect_new_website.utils.timezone_mx import get_mexico_now
+            from .reference_data_cache import ReferenceDataCache
 
-            # Obtener período actual
-            now = get_mexico_now()
-            current_period = session.exec(
-                sqlmodel.select(Periods)
-                .where(
-                    (Periods.starts_on <= now) &
-                    (Periods.ends_on >= now)
-                )
-            ).first()
+            # Período actual y nombres de rango desde la caché de referencia
+            current_period = ReferenceDataCache.get_current_period(session)
 
             if not current_period:
                 print(f"⚠️  No hay período activo")
                 return "Sin rango"
 
-            # JOIN explícito entre Ranks y UserRankHistory, filtrando por period_id
-            latest_rank = session.exec(
-                sqlmodel.select(Ranks)
-                .join(UserRankHistory, Ranks.id == UserRankHistory.rank_id)
+            latest_rank_id = session.exec(
+                sqlmodel.select(sqlmodel.func.max(UserRankHistory.rank_id))
                 .where(
                     (UserRankHistory.member_id == member_id) &
                     (UserRankHistory.period_id == current_period.id)
                 )
-                .order_by(sqlmodel.desc(UserRankHistory.rank_id))
-            ).first()
+            ).one()
 
-            return latest_rank.name if latest_rank else "Sin rango"
+            return ReferenceDataCache.get_rank_name(session, latest_rank_id) or "Sin rango"
 
         except Exception as e:
             print(f"❌ Error obteniendo rango mensual de usuario {member_id}: {e}")
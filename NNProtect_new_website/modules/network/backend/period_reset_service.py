@@ -9,6 +9,7 @@ from typing import Optional
 
 from database.users import Users, UserStatus
 from database.user_rank_history import UserRankHistory
+from .dashboard_snapshot_service import DashboardSnapshotService
 
 
 class PeriodResetService:
@@ -33,7 +34,8 @@ class PeriodResetService:
         4. vn_cache → 0
         5. Asignar rank_id=1 en user_rank_history con nuevo period_id
         
-        Principio KISS: Proceso lineal y claro.
+        Principio KISS: Dos sentencias set-based (UPDATE + INSERT ... SELECT),
+        sin materializar la tabla de usuarios en memoria.
         
         Args:
             session: Sesión de base de datos
@@ -43,41 +45,44 @@ class PeriodResetService:
             Cantidad de usuarios reseteados
         """
         try:
-            # 1. Obtener TODOS los usuarios
-            all_users = session.exec(
-                sqlmodel.select(Users)
-            ).all()
-            
-            if not all_users:
+            now = datetime.now(timezone.utc)
+
+            # 1. Resetear campos de TODOS los usuarios en un solo UPDATE
+            result = session.execute(
+                sqlmodel.update(Users)
+                .values(
+                    status=UserStatus.NO_QUALIFIED,
+                    pv_cache=0,
+                    pvg_cache=0,
+                    vn_cache=0.0,
+                    updated_at=now
+                )
+                .execution_options(synchronize_session=False)
+            )
+            resetted_count = result.rowcount
+
+            if not resetted_count:
                 print("⚠️  No hay usuarios para resetear")
                 return 0
-            
-            print(f"\n🔄 Reseteando {len(all_users)} usuarios para nuevo período...")
-            
-            resetted_count = 0
-            
-            for user in all_users:
-                # 2. Resetear campos del usuario
-                user.status = UserStatus.NO_QUALIFIED
-                user.pv_cache = 0
-                user.pvg_cache = 0
-                user.vn_cache = 0.0
-                user.updated_at = datetime.now(timezone.utc)
-                
-                session.add(user)
-                
-                # 3. Crear registro en user_rank_history con rank_id=1
-                rank_history = UserRankHistory(
-                    member_id=user.member_id,
-                    rank_id=1,  # Rank "Sin rango" o inicial
-                    achieved_on=datetime.now(timezone.utc),
-                    period_id=new_period_id
+
+            print(f"\n🔄 Reseteando {resetted_count} usuarios para nuevo período...")
+
+            # 2. rank_id=1 ("Sin rango") en user_rank_history con el nuevo period_id
+            session.execute(
+                sqlmodel.insert(UserRankHistory).from_select(
+                    ["member_id", "rank_id", "achieved_on", "period_id"],
+                    sqlmodel.select(
+                        Users.member_id,
+                        sqlmodel.literal(1),
+                        sqlmodel.literal(now),
+                        sqlmodel.literal(new_period_id)
+                    )
                 )
-                
-                session.add(rank_history)
-                resetted_count += 1
-            
-            session.flush()
+            )
+
+            # Los objetos Users ya cargados en la sesión y los snapshots del dashboard quedan obsoletos
+            session.expire_all()
+            DashboardSnapshotService.invalidate_all(session)
             
             print(f"✅ {resetted_count} usuarios reseteados exitosamente")
             return resetted_count
@@ -14,6 +14,7 @@ from database.periods import Periods
 from database.users import Users, UserStatus
 from database.user_rank_history import UserRankHistory
 from NNProtect_new_website.utils.timezone_mx import get_mexico_now
+from .reference_data_cache import ReferenceDataCache, PeriodInfo
 
 
 class PeriodService:
@@ -23,27 +24,23 @@ class PeriodService:
     """
 
     @classmethod
-    def get_current_period(cls, session) -> Optional[Periods]:
+    def get_current_period(cls, session) -> Optional[PeriodInfo]:
         """
         Obtiene el período actual activo.
         Principio KISS: Método simple para obtener período actual.
 
+        Se resuelve desde ReferenceDataCache (solo lectura: id, name, fechas);
+        create_period_for_month y finalize_period invalidan la caché.
+
         Returns:
-            Periods object si existe, None si no hay período actual
+            Período actual si existe y no está cerrado, None si no hay período actual
         """
         try:
-            current_date = get_mexico_now()
+            current_period = ReferenceDataCache.get_current_period(session)
 
-            current_period = session.exec(
-                sqlmodel.select(Periods)
-                .where(
-                    (Periods.starts_on <= current_date) &
-                    (Periods.ends_on >= current_date) &
-                    (Periods.closed_at.is_(None))
-                )
-            ).first()
-
-            return current_period
+            if current_period and current_period.closed_at is None:
+                return current_period
+            return None
 
         except Exception as e:
             print(f"❌ Error obteniendo período actual: {e}")
@@ -152,6 +149,9 @@ class PeriodService:
             session.add(new_period)
             session.flush()
 
+            # El período activo en caché ya no es válido
+            ReferenceDataCache.invalidate_periods(session)
+
             print(f"✅ Período creado: {period_name} ({first_day.date()} - {last_day.date()})")
             
             # Reiniciar usuarios para el nuevo período
@@ -214,6 +214,9 @@ class PeriodService:
             session.add(period)
             session.flush()
 
+            # El período activo en caché ya no es válido
+            ReferenceDataCache.invalidate_periods(session)
+
             print(f"✅ Período {period.name} finalizado el {period.closed_at}")
             return True
 
@@ -6,10 +6,10 @@ Principios aplicados: KISS, DRY, YAGNI, POO
 """
 
 import sqlmodel
-from typing import List
 
 from database.users import Users
 from .rank_service import RankService
+from .dashboard_snapshot_service import DashboardSnapshotService
 
 
 class PVResetService:
@@ -22,25 +22,21 @@ class PVResetService:
     def reset_all_users_pv_pvg(cls, session) -> int:
         """
         Resetea PV_cache y PVG_cache de todos los usuarios a 0.
-        Principio KISS: Operación directa sin complejidad.
+        Principio KISS: Un solo UPDATE set-based, sin cargar usuarios en memoria.
 
         Returns:
             Número de usuarios reseteados
         """
         try:
-            # Obtener todos los usuarios
-            all_users = session.exec(
-                sqlmodel.select(Users)
-            ).all()
-
-            reset_count = 0
-            for user in all_users:
-                user.pv_cache = 0
-                user.pvg_cache = 0
-                session.add(user)
-                reset_count += 1
-
-            session.flush()
+            result = session.execute(
+                sqlmodel.update(Users)
+                .values(pv_cache=0, pvg_cache=0)
+                .execution_options(synchronize_session=False)
+            )
+            session.expire_all()
+            DashboardSnapshotService.invalidate_all(session)
+
+            reset_count = result.rowcount
             print(f"✅ PV/PVG reseteado para {reset_count} usuarios")
             return reset_count
 
@@ -54,23 +50,14 @@ class PVResetService:
         Ajusta los rangos de todos los usuarios después del reseteo.
         Como PV/PVG están en 0, todos volverán al rango "Sin rango".
 
-        Principio DRY: Usa RankService.check_and_update_rank() para cada usuario.
+        Principio DRY: Usa RankService.recalculate_ranks_bulk() para toda la red
+        (umbrales y caches cargados una sola vez, promociones en un solo INSERT).
 
         Returns:
             Número de usuarios cuyo rango fue ajustado
         """
         try:
-            # Obtener todos los usuarios
-            all_users = session.exec(
-                sqlmodel.select(Users)
-            ).all()
-
-            adjusted_count = 0
-            for user in all_users:
-                # Verificar y actualizar rango según PV/PVG actual (que será 0)
-                rank_changed = RankService.check_and_update_rank(session, user.member_id)
-                if rank_changed:
-                    adjusted_count += 1
+            adjusted_count = len(RankService.recalculate_ranks_bulk(session))
 
             print(f"✅ Rangos ajustados para {adjusted_count} usuarios")
             return adjusted_count
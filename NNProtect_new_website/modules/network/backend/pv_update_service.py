@@ -6,12 +6,13 @@ Principios aplicados: KISS, DRY, YAGNI, POO
 """
 
 import sqlmodel
-from typing import Optional
+from typing import Optional, List
 
 from database.users import Users
 from database.orders import Orders
+from database.usertreepaths import UserTreePath
 from .rank_service import RankService
-from .genealogy_service import GenealogyService
+from .dashboard_snapshot_service import DashboardSnapshotService
 
 
 class PVUpdateService:
@@ -29,7 +30,7 @@ class PVUpdateService:
         1. Obtener orden y validar
         2. Actualizar PV del comprador (pv_cache)
         3. Actualizar PVG de todos los ancestros
-        4. Verificar y actualizar rango del comprador
+        4. Verificar y actualizar rangos del comprador y ancestros
 
         Principio KISS: Proceso lineal y directo.
 
@@ -80,18 +81,23 @@ class PVUpdateService:
             print(f"✅ PVG actualizado para member_id={buyer.member_id}: {pvg_anterior} -> {buyer.pvg_cache} (+{order.total_pv})")
 
             # 3. Actualizar PVG de todos los ancestros (excluyendo el comprador)
-            cls._update_pvg_for_ancestors(session, buyer.member_id, order.total_pv)
+            updated_ancestors = cls._update_pvg_for_ancestors(session, buyer.member_id, order.total_pv)
 
             # 3b. Actualizar tabla unilevel_report para el comprador y ancestros
             print("📊 Actualizando unilevel_report...")
             from .mlm_user_manager import MLMUserManager
-            MLMUserManager.update_unilevel_report_for_order(order.member_id, order.period_id)
+            MLMUserManager.update_unilevel_report_for_order(
+                session, order.member_id, order.period_id, order.total_pv, order.total_vn
+            )
 
-            # 4. Verificar y actualizar rango del comprador
-            rank_updated = RankService.check_and_update_rank(session, buyer.member_id)
+            # 4. Verificar y actualizar rango del comprador y de los ancestros afectados (en bloque)
+            promoted = RankService.recalculate_ranks_bulk(session, [buyer.member_id] + updated_ancestors)
 
-            if rank_updated:
-                print(f"🎖️  Rango actualizado para member_id={buyer.member_id}")
+            for member_id in promoted:
+                print(f"🎖️  Rango actualizado para member_id={member_id}")
+
+            # 5. PV/PVG cambiaron: descartar snapshots del dashboard afectados
+            DashboardSnapshotService.invalidate([buyer.member_id] + updated_ancestors, session)
 
             # ⚠️ NO hacer commit aquí - el PaymentService hará el commit final
             # Esto garantiza atomicidad: todo o nada
@@ -106,37 +112,43 @@ class PVUpdateService:
             return False
 
     @classmethod
-    def _update_pvg_for_ancestors(cls, session, member_id: int, pv_amount: int) -> None:
+    def _update_pvg_for_ancestors(cls, session, member_id: int, pv_amount: int) -> List[int]:
         """
         Actualiza PVG_cache de todos los ancestros cuando se añade PV.
         Excluye al propio usuario (ya se actualizó su PVG en el paso anterior).
 
+        Un único UPDATE ... WHERE member_id IN (SELECT ancestor_id ...) en lugar de
+        un SELECT + UPDATE por ancestro: mantiene corta la transacción del pago.
+
         Principio DRY: Método reutilizable para actualizar PVG.
 
         Args:
             session: Sesión de base de datos
             member_id: ID del miembro que generó el PV
             pv_amount: Cantidad de PV a sumar
+
+        Returns:
+            member_ids de los ancestros actualizados (para re-evaluar rangos en bloque)
         """
         try:
-            # Obtener todos los ancestros (incluyendo self)
-            all_ancestors = GenealogyService.get_all_ancestors(session, member_id)
-
-            # Excluir al propio usuario (depth > 0)
-            ancestors = [ancestor_id for ancestor_id in all_ancestors if ancestor_id != member_id]
-
-            for ancestor_id in ancestors:
-                ancestor = session.exec(
-                    sqlmodel.select(Users).where(Users.member_id == ancestor_id)
-                ).first()
-
-                if ancestor:
-                    pvg_anterior = ancestor.pvg_cache
-                    ancestor.pvg_cache += pv_amount
-                    session.add(ancestor)
-                    print(f"📈 PVG actualizado para ancestor member_id={ancestor_id}: {pvg_anterior} -> {ancestor.pvg_cache} (+{pv_amount})")
-
-            session.flush()
+            ancestors_subquery = (
+                sqlmodel.select(UserTreePath.ancestor_id)
+                .where(
+                    (UserTreePath.descendant_id == member_id) &
+                    (UserTreePath.depth > 0)
+                )
+            )
+
+            updated_ancestors = list(session.exec(
+                sqlmodel.update(Users)
+                .where(Users.member_id.in_(ancestors_subquery))
+                .values(pvg_cache=Users.pvg_cache + pv_amount)
+                .returning(Users.member_id)
+                .execution_options(synchronize_session="fetch")
+            ).scalars())
+
+            print(f"📈 PVG actualizado (+{pv_amount}) para {len(updated_ancestors)} ancestros de member_id={member_id}")
+            return updated_ancestors
 
         except Exception as e:
             print(f"❌ Error actualizando PVG de ancestros: {e}")
@@ -7,16 +7,17 @@ Principios aplicados: KISS, DRY, YAGNI, POO
 
 import reflex as rx
 import sqlmodel
-from typing import Optional
+from typing import Optional, List, Dict
 from datetime import datetime, timezone
+from bisect import bisect_right
 
 from database.users import Users
 from database.ranks import Ranks
 from database.user_rank_history import UserRankHistory
-from database.periods import Periods
 from database.orders import Orders, OrderStatus
 from database.usertreepaths import UserTreePath
-from NNProtect_new_website.utils.timezone_mx import get_mexico_now
+from .reference_data_cache import ReferenceDataCache, PeriodInfo
+from .dashboard_snapshot_service import DashboardSnapshotService
 
 
 class RankService:
@@ -101,6 +102,50 @@ class RankService:
             print(f"❌ Error obteniendo rango actual de usuario {member_id}: {e}")
             return None
     
+    @classmethod
+    def get_current_ranks_bulk(cls, session, member_ids: Optional[List[int]] = None) -> Dict[int, int]:
+        """
+        Obtiene el rango actual de muchos usuarios en UNA sola query.
+        Misma regla que get_user_current_rank (último achieved_on), resuelta
+        con ROW_NUMBER() por member_id en lugar de una query por usuario.
+
+        Args:
+            session: Sesión de base de datos
+            member_ids: Lista de member_ids (None = todos los usuarios con historial)
+
+        Returns:
+            Dict {member_id: rank_id}
+        """
+        try:
+            latest_first = sqlmodel.func.row_number().over(
+                partition_by=UserRankHistory.member_id,
+                order_by=(sqlmodel.desc(UserRankHistory.achieved_on), sqlmodel.desc(UserRankHistory.id))
+            ).label("rn")
+
+            ranked = sqlmodel.select(
+                UserRankHistory.member_id,
+                UserRankHistory.rank_id,
+                latest_first
+            )
+
+            if member_ids is not None:
+                if not member_ids:
+                    return {}
+                ranked = ranked.where(UserRankHistory.member_id.in_(member_ids))
+
+            ranked = ranked.subquery()
+
+            rows = session.exec(
+                sqlmodel.select(ranked.c.member_id, ranked.c.rank_id)
+                .where(ranked.c.rn == 1)
+            ).all()
+
+            return {member_id: rank_id for member_id, rank_id in rows}
+
+        except Exception as e:
+            print(f"❌ Error obteniendo rangos actuales en bloque: {e}")
+            return {}
+
     @classmethod
     def get_user_highest_rank(cls, session, member_id: int) -> Optional[int]:
         """
@@ -168,6 +213,7 @@ class RankService:
 
             session.add(rank_history)
             session.flush()
+            DashboardSnapshotService.invalidate([member_id], session)
 
             print(f"✅ Usuario {member_id} promovido a rango {new_rank.name} (id={new_rank_id})")
 
@@ -289,7 +335,7 @@ class RankService:
         """
         Calcula Puntos de Volumen Grupal (PVG) en TIEMPO REAL.
         PVG = PV personal + PV de TODOS los descendientes.
-        Principio DRY: Usa get_pv() para evitar duplicación.
+        Principio DRY: Usa get_pvg_many() (una sola query agregada).
 
         Args:
             session: Sesión de base de datos
@@ -299,29 +345,49 @@ class RankService:
         Returns:
             Total de PVG (personal + grupo)
         """
-        try:
-            # 1. Obtener PV personal
-            personal_pv = cls.get_pv(session, member_id, period_id)
+        return cls.get_pvg_many(session, [member_id], period_id).get(member_id, 0)
+
+    @classmethod
+    def get_pvg_many(cls, session, member_ids: List[int], period_id: Optional[int] = None) -> Dict[int, int]:
+        """
+        Calcula el PVG en tiempo real de muchos usuarios con UNA query agregada.
+        Join UserTreePath (depth >= 0, incluye al propio usuario) con Orders
+        confirmadas, agrupado por ancestro.
+
+        Args:
+            session: Sesión de base de datos
+            member_ids: Lista de member_ids
+            period_id: ID del período (opcional, si None = acumulado total)
 
-            # 2. Obtener todos los descendientes usando UserTreePath
-            descendants = session.exec(
-                sqlmodel.select(UserTreePath.descendant_id)
+        Returns:
+            Dict {member_id: pvg} (0 para usuarios sin volumen)
+        """
+        if not member_ids:
+            return {}
+
+        try:
+            query = (
+                sqlmodel.select(UserTreePath.ancestor_id, sqlmodel.func.sum(Orders.total_pv))
+                .join(Orders, Orders.member_id == UserTreePath.descendant_id)
                 .where(
-                    (UserTreePath.ancestor_id == member_id) &
-                    (UserTreePath.depth > 0)  # Excluir self-reference
+                    (UserTreePath.ancestor_id.in_(member_ids)) &
+                    (Orders.status == OrderStatus.PAYMENT_CONFIRMED.value)
                 )
-            ).all()
+                .group_by(UserTreePath.ancestor_id)
+            )
 
-            # 3. Calcular PV de cada descendiente
-            group_pv = 0
-            for descendant_id in descendants:
-                group_pv += cls.get_pv(session, descendant_id, period_id)
+            if period_id:
+                query = query.where(Orders.period_id == period_id)
 
-            return personal_pv + group_pv
+            pvg_by_member = {member_id: 0 for member_id in member_ids}
+            for member_id, pvg in session.exec(query).all():
+                pvg_by_member[member_id] = int(pvg or 0)
+
+            return pvg_by_member
 
         except Exception as e:
-            print(f"❌ Error calculando PVG de usuario {member_id}: {e}")
-            return 0
+            print(f"❌ Error calculando PVG en bloque: {e}")
+            return {member_id: 0 for member_id in member_ids}
 
     @classmethod
     def calculate_rank(cls, session, member_id: int, period_id: Optional[int] = None) -> Optional[int]:
@@ -350,20 +416,9 @@ class RankService:
             # Calcular PVG
             pvg = cls.get_pvg(session, member_id, period_id)
 
-            # Obtener todos los rangos ordenados por PVG requerido (descendente)
-            ranks = session.exec(
-                sqlmodel.select(Ranks)
-                .where(Ranks.pvg_required > 0)
-                .order_by(sqlmodel.desc(Ranks.pvg_required))
-            ).all()
-
-            # Encontrar el rango más alto que cumple el requisito
-            for rank in ranks:
-                if pvg >= rank.pvg_required:
-                    return rank.id
-
-            # Si tiene PV suficiente pero no cumple ningún umbral de PVG
-            return cls.DEFAULT_RANK_ID
+            # Rango más alto que cumple el requisito (umbrales en caché)
+            # Si tiene PV suficiente pero no cumple ningún umbral de PVG → DEFAULT_RANK_ID
+            return ReferenceDataCache.get_rank_for_pvg(session, pvg) or cls.DEFAULT_RANK_ID
 
         except Exception as e:
             print(f"❌ Error calculando rango de usuario {member_id}: {e}")
@@ -399,20 +454,9 @@ class RankService:
             # Usar pvg_cache para determinar rango
             pvg = user.pvg_cache
             
-            # Obtener todos los rangos ordenados por PVG requerido (descendente)
-            ranks = session.exec(
-                sqlmodel.select(Ranks)
-                .where(Ranks.pvg_required > 0)
-                .order_by(sqlmodel.desc(Ranks.pvg_required))
-            ).all()
-            
-            # Encontrar el rango más alto que cumple el requisito
-            for rank in ranks:
-                if pvg >= rank.pvg_required:
-                    return rank.id
-            
-            # Si tiene PV suficiente pero no cumple ningún umbral de PVG
-            return cls.DEFAULT_RANK_ID
+            # Rango más alto que cumple el requisito (umbrales en caché)
+            # Si tiene PV suficiente pero no cumple ningún umbral de PVG → DEFAULT_RANK_ID
+            return ReferenceDataCache.get_rank_for_pvg(session, pvg) or cls.DEFAULT_RANK_ID
         
         except Exception as e:
             print(f"❌ Error calculando rango desde cache de usuario {member_id}: {e}")
@@ -458,23 +502,94 @@ class RankService:
             return False
 
     @classmethod
-    def _get_current_period(cls, session) -> Optional[Periods]:
+    def recalculate_ranks_bulk(cls, session, member_ids: Optional[List[int]] = None) -> List[int]:
         """
-        Obtiene el período actual activo.
-        Principio KISS: Método helper simple.
+        Versión masiva de check_and_update_rank (use_cache=True) para muchos usuarios.
+        Carga umbrales de rango, caches de PV/PVG y rangos actuales una sola vez,
+        resuelve el rango de cada usuario con bisect e inserta todas las promociones
+        en un solo INSERT a UserRankHistory. Escala linealmente con el número de miembros.
+
+        Los Bonos por Alcance de rangos intermedios se disparan solo para los promovidos,
+        igual que en promote_user_rank.
+
+        Args:
+            session: Sesión de base de datos
+            member_ids: Lista de member_ids (None = toda la red)
+
+        Returns:
+            member_ids de los usuarios promovidos
         """
-        try:
-            current_date = get_mexico_now()
+        if member_ids is not None and not member_ids:
+            return []
 
-            current_period = session.exec(
-                sqlmodel.select(Periods)
-                .where(
-                    (Periods.starts_on <= current_date) &
-                    (Periods.ends_on >= current_date)
-                )
-            ).first()
+        # 1️⃣ Umbrales de PVG ordenados (ascendente) para bisect, desde la caché de referencia
+        all_ranks = ReferenceDataCache.get_ranks(session)
+        rank_names = {rank.id: rank.name for rank in all_ranks}
+        thresholds = [(rank.pvg_required, rank.id) for rank in all_ranks if rank.pvg_required > 0]
+        pvg_thresholds = [pvg_required for pvg_required, _ in thresholds]
+
+        # 2️⃣ Caches de PV/PVG y rango actual de todos los usuarios
+        users_query = sqlmodel.select(Users.member_id, Users.pv_cache, Users.pvg_cache)
+        if member_ids is not None:
+            users_query = users_query.where(Users.member_id.in_(member_ids))
+        users = session.exec(users_query).all()
+
+        current_ranks = cls.get_current_ranks_bulk(session, member_ids)
+
+        # 3️⃣ Misma regla que calculate_rank_from_cache, sin queries por usuario
+        promotions: Dict[int, int] = {}
+        for member_id, pv_cache, pvg_cache in users:
+            if pv_cache < 1465:
+                calculated_rank_id = cls.DEFAULT_RANK_ID
+            else:
+                index = bisect_right(pvg_thresholds, pvg_cache)
+                calculated_rank_id = thresholds[index - 1][1] if index else cls.DEFAULT_RANK_ID
+
+            current_rank_id = current_ranks.get(member_id)
+            if not current_rank_id or calculated_rank_id > current_rank_id:
+                promotions[member_id] = calculated_rank_id
 
-            return current_period
+        if not promotions:
+            print(f"✅ Rangos evaluados para {len(users)} usuarios: sin promociones")
+            return []
+
+        # 4️⃣ Registrar todas las promociones en un solo INSERT
+        current_period = cls._get_current_period(session)
+        period_id = current_period.id if current_period else None
+        achieved_on = datetime.now(timezone.utc)
+
+        session.execute(
+            sqlmodel.insert(UserRankHistory),
+            [
+                {"member_id": member_id, "rank_id": rank_id,
+                 "achieved_on": achieved_on, "period_id": period_id}
+                for member_id, rank_id in promotions.items()
+            ]
+        )
+
+        # 5️⃣ Bonos por Alcance de rangos intermedios (solo promovidos)
+        from .commission_service import CommissionService
+
+        for member_id, new_rank_id in promotions.items():
+            start_rank = current_ranks.get(member_id) or 1
+            for rank_id in sorted(rank_names):
+                if start_rank < rank_id <= new_rank_id and \
+                        rank_names[rank_id] in CommissionService.ACHIEVEMENT_BONUS_AMOUNTS:
+                    CommissionService.process_achievement_bonus(session, member_id, rank_names[rank_id])
+
+        session.flush()
+        DashboardSnapshotService.invalidate(promotions, session)
+        print(f"✅ Rangos evaluados para {len(users)} usuarios: {len(promotions)} promociones")
+        return list(promotions)
+
+    @classmethod
+    def _get_current_period(cls, session) -> Optional[PeriodInfo]:
+        """
+        Obtiene el período actual activo (desde ReferenceDataCache).
+        Principio KISS: Método helper simple.
+        """
+        try:
+            return ReferenceDataCache.get_current_period(session)
 
         except Exception as e:
             print(f"❌ Error obteniendo período actual: {e}")
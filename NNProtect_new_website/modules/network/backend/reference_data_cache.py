@@ -0,0 +1,216 @@
+"""
+Caché de datos de referencia a nivel de proceso.
+Rangos, porcentajes por rango y período activo cambian muy poco;
+se cargan una vez y se sirven desde memoria en el camino caliente.
+
+Invalidación:
+- TTL (TTL_SECONDS) como red de seguridad entre procesos
+- Explícita desde PeriodService al crear o finalizar períodos
+
+Principios aplicados: KISS, DRY, YAGNI, POO
+"""
+
+import time
+import sqlmodel
+from bisect import bisect_right
+from threading import Lock
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, List, Dict
+
+from database.ranks import Ranks
+from database.periods import Periods
+from NNProtect_new_website.utils.timezone_mx import get_mexico_now, to_naive_utc
+from NNProtect_new_website.utils.after_commit import run_after_commit
+
+
+@dataclass(frozen=True)
+class RankInfo:
+    """Rango en memoria (sin sesión)."""
+    id: int
+    name: str
+    pvg_required: int
+
+
+@dataclass(frozen=True)
+class PeriodInfo:
+    """Período en memoria (sin sesión). Mismos atributos de lectura que Periods."""
+    id: int
+    name: str
+    starts_on: datetime
+    ends_on: datetime
+    closed_at: Optional[datetime]
+
+
+class ReferenceDataCache:
+    """
+    Caché POO de rangos y período activo compartida por todos los servicios.
+    Principio POO: Encapsula carga, expiración e invalidación de datos de referencia.
+    """
+
+    TTL_SECONDS = 300           # 5 minutos
+    RECENT_PERIODS_LIMIT = 24   # Períodos recientes que se mantienen en memoria
+
+    _lock = Lock()
+    _ranks: Optional[List[RankInfo]] = None
+    _ranks_loaded_at: float = 0.0
+    _period: Optional[PeriodInfo] = None
+    _period_loaded_at: float = 0.0
+    _recent_periods: Optional[List[PeriodInfo]] = None
+    _recent_periods_loaded_at: float = 0.0
+
+    # ==================== INVALIDACIÓN ====================
+
+    @classmethod
+    def invalidate_periods(cls, session=None) -> None:
+        """
+        Descarta el período activo y los recientes en caché (crear/finalizar período).
+        Con session, se aplica tras su commit.
+        """
+        def _discard():
+            with cls._lock:
+                cls._period = None
+                cls._period_loaded_at = 0.0
+                cls._recent_periods = None
+                cls._recent_periods_loaded_at = 0.0
+
+        run_after_commit(session, _discard)
+
+    @classmethod
+    def invalidate_ranks(cls) -> None:
+        """Descarta los rangos en caché (cambios en la tabla ranks)."""
+        with cls._lock:
+            cls._ranks = None
+            cls._ranks_loaded_at = 0.0
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Descarta todos los datos de referencia."""
+        cls.invalidate_periods()
+        cls.invalidate_ranks()
+
+    @classmethod
+    def _is_fresh(cls, loaded_at: float) -> bool:
+        return (time.monotonic() - loaded_at) < cls.TTL_SECONDS
+
+    # ==================== RANGOS ====================
+
+    @classmethod
+    def get_ranks(cls, session) -> List[RankInfo]:
+        """
+        Rangos ordenados por pvg_required (ascendente) y id.
+
+        Args:
+            session: Sesión de base de datos (solo se usa si la caché expiró)
+        """
+        ranks = cls._ranks
+        if ranks is not None and cls._is_fresh(cls._ranks_loaded_at):
+            return ranks
+
+        rows = session.exec(
+            sqlmodel.select(Ranks.id, Ranks.name, Ranks.pvg_required)
+            .order_by(Ranks.pvg_required, Ranks.id)
+        ).all()
+        ranks = [RankInfo(rank_id, name, pvg_required) for rank_id, name, pvg_required in rows]
+
+        with cls._lock:
+            cls._ranks = ranks
+            cls._ranks_loaded_at = time.monotonic()
+        return ranks
+
+    @classmethod
+    def get_rank_names(cls, session) -> Dict[int, str]:
+        """Diccionario rank_id → nombre."""
+        return {rank.id: rank.name for rank in cls.get_ranks(session)}
+
+    @classmethod
+    def get_rank_name(cls, session, rank_id: Optional[int]) -> Optional[str]:
+        """Nombre del rango o None si no existe."""
+        return cls.get_rank_names(session).get(rank_id)
+
+    @classmethod
+    def get_rank_for_pvg(cls, session, pvg: int) -> Optional[int]:
+        """
+        Rango más alto cuyo pvg_required (> 0) cumple el PVG dado.
+
+        Returns:
+            rank_id o None si no alcanza ningún umbral
+        """
+        thresholds = [rank for rank in cls.get_ranks(session) if rank.pvg_required > 0]
+        index = bisect_right([rank.pvg_required for rank in thresholds], pvg)
+        return thresholds[index - 1].id if index else None
+
+    @classmethod
+    def get_unilevel_percentages(cls, session, rank_id: Optional[int]) -> List[float]:
+        """Porcentajes de Uninivel por nivel para un rank_id ([] si no aplica)."""
+        from .commission_service import CommissionService
+        return CommissionService.UNILEVEL_BONUS_PERCENTAGES.get(cls.get_rank_name(session, rank_id), [])
+
+    @classmethod
+    def get_matching_percentages(cls, session, rank_id: Optional[int]) -> List[float]:
+        """Porcentajes de Matching por nivel para un rank_id ([] si no aplica)."""
+        from .commission_service import CommissionService
+        return CommissionService.MATCHING_BONUS_PERCENTAGES.get(cls.get_rank_name(session, rank_id), [])
+
+    # ==================== PERÍODO ACTIVO ====================
+
+    @classmethod
+    def get_current_period(cls, session) -> Optional[PeriodInfo]:
+        """
+        Período cuyo rango de fechas contiene la fecha actual (México).
+        Se vuelve a resolver al expirar el TTL o cuando la fecha sale del período,
+        así el cambio de mes no espera al TTL. Ausencia de período no se guarda.
+
+        Args:
+            session: Sesión de base de datos (solo se usa si la caché no sirve)
+        """
+        now = get_mexico_now()
+        period = cls._period
+        if period is not None and cls._is_fresh(cls._period_loaded_at) and \
+                to_naive_utc(period.starts_on) <= now <= to_naive_utc(period.ends_on):
+            return period
+
+        row = session.exec(
+            sqlmodel.select(Periods)
+            .where(
+                (Periods.starts_on <= now) &
+                (Periods.ends_on >= now)
+            )
+        ).first()
+
+        if not row:
+            cls.invalidate_periods()
+            return None
+
+        period = PeriodInfo(row.id, row.name, row.starts_on, row.ends_on, row.closed_at)
+        with cls._lock:
+            cls._period = period
+            cls._period_loaded_at = time.monotonic()
+        return period
+
+    @classmethod
+    def get_recent_periods(cls, session, count: int) -> List[PeriodInfo]:
+        """
+        Últimos `count` períodos por starts_on (más reciente primero).
+        Hasta RECENT_PERIODS_LIMIT se sirven desde memoria; más allá se consultan.
+
+        Args:
+            session: Sesión de base de datos (solo se usa si la caché no sirve)
+            count: Número de períodos
+        """
+        periods = cls._recent_periods
+        if count <= cls.RECENT_PERIODS_LIMIT and periods is not None and \
+                cls._is_fresh(cls._recent_periods_loaded_at):
+            return periods[:count]
+
+        rows = session.exec(
+            sqlmodel.select(Periods)
+            .order_by(sqlmodel.desc(Periods.starts_on))
+            .limit(max(count, cls.RECENT_PERIODS_LIMIT))
+        ).all()
+        periods = [PeriodInfo(row.id, row.name, row.starts_on, row.ends_on, row.closed_at) for row in rows]
+
+        with cls._lock:
+            cls._recent_periods = periods[:cls.RECENT_PERIODS_LIMIT]
+            cls._recent_periods_loaded_at = time.monotonic()
+        return periods[:count]
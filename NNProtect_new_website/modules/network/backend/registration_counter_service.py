@@ -0,0 +1,203 @@
+"""
+Servicio POO para el rollup de inscripciones por (ancestro, día).
+Los contadores del reporte de red (hoy, mes, histórico) se resuelven con una
+suma sobre el rango de índice del ancestro en lugar de recorrer su red.
+
+Principios aplicados: KISS, DRY, YAGNI, POO
+"""
+
+import sqlmodel
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from database.users import Users
+from database.usertreepaths import UserTreePath
+from database.network_registration_counts import NetworkRegistrationCounts
+from NNProtect_new_website.utils.sql_upsert import dialect_insert
+
+
+def _as_date(value) -> date:
+    """Fecha de registro a partir de users.created_at (o de la fecha dada)."""
+    if value is None:
+        return datetime.now(timezone.utc).date()
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+class RegistrationCounterService:
+    """
+    Servicio POO para mantener y consultar network_registration_counts.
+    Principio POO: Encapsula incremento, reconstrucción y lectura del rollup.
+    """
+
+    UPSERT_CHUNK_SIZE = 1000  # Filas por INSERT ... ON CONFLICT
+
+    @classmethod
+    def record_registration(cls, session, member_id: int) -> int:
+        """
+        Suma la inscripción de un miembro al contador del día de cada ancestro.
+        Llamar después de insertar sus caminos en UserTreePath.
+
+        ⚠️ No hace commit: corre dentro de la transacción del llamador.
+
+        Args:
+            session: Sesión de base de datos
+            member_id: member_id del nuevo miembro
+
+        Returns:
+            Número de contadores incrementados
+        """
+        created_at = session.exec(
+            sqlmodel.select(Users.created_at).where(Users.member_id == member_id)
+        ).first()
+        registered_on = _as_date(created_at)
+
+        ancestor_ids = session.exec(
+            sqlmodel.select(UserTreePath.ancestor_id)
+            .where(
+                UserTreePath.descendant_id == member_id,
+                UserTreePath.depth > 0
+            )
+        ).all()
+
+        return cls.record_registrations(
+            session, Counter((ancestor_id, registered_on) for ancestor_id in ancestor_ids)
+        )
+
+    @classmethod
+    def record_registrations(cls, session, increments: Dict[Tuple[int, date], int]) -> int:
+        """
+        Aplica incrementos {(ancestor_id, día): n} con INSERT ... ON CONFLICT DO UPDATE:
+        crea o suma cada contador en el mismo statement, sin carrera entre dos
+        inscripciones que crean la fila del día al mismo tiempo.
+
+        ⚠️ No hace commit: corre dentro de la transacción del llamador.
+
+        Returns:
+            Número de contadores incrementados
+        """
+        if not increments:
+            return 0
+
+        rows = [
+            {"ancestor_id": ancestor_id, "registration_date": day, "registrations": amount}
+            for (ancestor_id, day), amount in sorted(increments.items())
+        ]
+
+        for start in range(0, len(rows), cls.UPSERT_CHUNK_SIZE):
+            statement = dialect_insert(session, NetworkRegistrationCounts).values(
+                rows[start:start + cls.UPSERT_CHUNK_SIZE]
+            )
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["ancestor_id", "registration_date"],
+                    set_={
+                        "registrations": NetworkRegistrationCounts.registrations + statement.excluded.registrations
+                    }
+                )
+            )
+
+        return len(rows)
+
+    @classmethod
+    def increments_for_paths(cls, session, paths: Iterable[Tuple[int, int, int]]) -> Dict[Tuple[int, date], int]:
+        """
+        Incrementos {(ancestor_id, día): n} para caminos (ancestor_id, descendant_id, depth)
+        recién insertados; las fechas de registro se leen en UNA query.
+        """
+        paths = [(ancestor_id, descendant_id) for ancestor_id, descendant_id, depth in paths if depth > 0]
+        if not paths:
+            return {}
+
+        registered_on = {
+            member_id: _as_date(created_at)
+            for member_id, created_at in session.exec(
+                sqlmodel.select(Users.member_id, Users.created_at)
+                .where(Users.member_id.in_({descendant_id for _, descendant_id in paths}))
+            ).all()
+        }
+
+        return Counter(
+            (ancestor_id, registered_on.get(descendant_id) or _as_date(None))
+            for ancestor_id, descendant_id in paths
+        )
+
+    @classmethod
+    def rebuild(cls, session) -> int:
+        """
+        Reconstruye el rollup completo desde usertreepath + users con un INSERT ... SELECT.
+
+        ⚠️ No hace commit: el llamador confirma.
+
+        Returns:
+            Número de contadores escritos
+        """
+        session.execute(sqlmodel.delete(NetworkRegistrationCounts))
+
+        registration_day = sqlmodel.func.date(Users.created_at)
+        session.execute(
+            sqlmodel.insert(NetworkRegistrationCounts).from_select(
+                ["ancestor_id", "registration_date", "registrations"],
+                sqlmodel.select(
+                    UserTreePath.ancestor_id,
+                    registration_day,
+                    sqlmodel.func.count()
+                )
+                .join(Users, Users.member_id == UserTreePath.descendant_id)
+                .where(UserTreePath.depth > 0)
+                .group_by(UserTreePath.ancestor_id, registration_day)
+            )
+        )
+
+        return session.exec(
+            sqlmodel.select(sqlmodel.func.count()).select_from(NetworkRegistrationCounts)
+        ).one()
+
+    @classmethod
+    def get_counts(cls, session, ancestor_id: int, today: date,
+                   period_start: Optional[date] = None, period_end: Optional[date] = None) -> Dict[str, int]:
+        """
+        Contadores del reporte de red en UNA query sobre el rango de índice del ancestro.
+
+        Args:
+            session: Sesión de base de datos
+            ancestor_id: member_id del sponsor
+            today: Día de "inscripciones de hoy" (date; un datetime se reduce a su día)
+            period_start: Inicio del período actual (inclusive, None = sin período)
+            period_end: Fin del período actual (inclusive)
+
+        Returns:
+            Dict con 'today', 'monthly' y 'all'
+        """
+        # registration_date es DATE: comparar contra un datetime nunca coincide
+        today = _as_date(today)
+
+        registrations = NetworkRegistrationCounts.registrations
+        registration_date = NetworkRegistrationCounts.registration_date
+
+        if period_start is not None and period_end is not None:
+            in_period = sqlmodel.and_(registration_date >= period_start, registration_date <= period_end)
+            monthly = sqlmodel.func.sum(sqlmodel.case((in_period, registrations), else_=0))
+        else:
+            monthly = sqlmodel.literal(0)
+
+        today_count, monthly_count, all_count = session.exec(
+            sqlmodel.select(
+                sqlmodel.func.sum(sqlmodel.case((registration_date == today, registrations), else_=0)),
+                monthly,
+                sqlmodel.func.sum(registrations)
+            )
+            .where(NetworkRegistrationCounts.ancestor_id == ancestor_id)
+        ).one()
+
+        return {
+            "today": int(today_count or 0),
+            "monthly": int(monthly_count or 0),
+            "all": int(all_count or 0),
+        }
@@ -8,6 +8,7 @@ Principios aplicados: KISS, DRY, YAGNI, POO
 import reflex as rx
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime, timezone
 
 from .period_service import PeriodService
@@ -23,6 +24,8 @@ class SchedulerService:
     _scheduler: BackgroundScheduler = None
     _started: bool = False
 
+    OUTBOX_POLL_SECONDS = 5  # Frecuencia de drenado del outbox de órdenes
+
     @classmethod
     def start_scheduler(cls):
         """
@@ -54,6 +57,17 @@ class SchedulerService:
                 replace_existing=True
             )
 
+            # Tarea: Drenar outbox de órdenes pagadas (PV/PVG, unilevel_report, comisiones)
+            cls._scheduler.add_job(
+                func=cls._drain_order_outbox_job,
+                trigger=IntervalTrigger(seconds=cls.OUTBOX_POLL_SECONDS),
+                id='drain_order_outbox',
+                name='Procesamiento post-pago de órdenes (outbox)',
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+
             cls._scheduler.start()
             cls._started = True
             print("✅ Scheduler iniciado correctamente")
@@ -121,17 +135,32 @@ class SchedulerService:
         except Exception as e:
             print(f"❌ Error finalizando periodos: {e}")
 
+    @classmethod
+    def _drain_order_outbox_job(cls):
+        """
+        Job que drena el outbox de órdenes cada OUTBOX_POLL_SECONDS.
+        El procesamiento en paralelo lo maneja OrderOutboxService.drain.
+        """
+        try:
+            from NNProtect_new_website.modules.store.backend.order_outbox_service import OrderOutboxService
+            OrderOutboxService.drain()
+
+        except Exception as e:
+            print(f"❌ Error drenando outbox de órdenes: {e}")
+
     @classmethod
     def run_job_manually(cls, job_id: str):
         """
         Ejecuta un job manualmente (útil para testing).
 
         Args:
-            job_id: 'monthly_period_and_reset' o 'finalize_periods'
+            job_id: 'monthly_period_and_reset', 'finalize_periods' o 'drain_order_outbox'
         """
         if job_id == 'monthly_period_and_reset':
             cls._monthly_period_and_reset_job()
         elif job_id == 'finalize_periods':
             cls._finalize_periods_job()
+        elif job_id == 'drain_order_outbox':
+            cls._drain_order_outbox_job()
         else:
             print(f"⚠️  Job ID '{job_id}' no reconocido")
@@ -6,13 +6,28 @@ Principios aplicados: KISS, DRY, YAGNI, POO
 """
 
 import sqlmodel
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
+from dataclasses import dataclass
 from datetime import datetime, timezone
 
 from database.travel_campaigns import (
     TravelCampaigns, NNTravelPoints, NNTravelPointsHistory,
     CampaignStatus, TravelEventType
 )
+from database.usertreepaths import UserTreePath
+from NNProtect_new_website.utils.sql_upsert import dialect_insert
+
+
+@dataclass(frozen=True)
+class TravelPointsAccrual:
+    """Puntos a acreditar a un miembro con los datos de su registro de historial."""
+    member_id: int
+    event_type: str
+    points: int
+    description: str
+    source_member_id: Optional[int] = None
+    source_order_id: Optional[int] = None
+    rank_achieved: Optional[str] = None
 
 
 class TravelPointsService:
@@ -28,6 +43,13 @@ class TravelPointsService:
         "full_protect": 4
     }
 
+    # Columna de NNTravelPoints que acumula cada tipo de evento
+    POINTS_COLUMN_BY_EVENT = {
+        TravelEventType.KIT_PURCHASE.value: "points_from_kits",
+        TravelEventType.SELF_RANK.value: "points_from_self_ranks",
+        TravelEventType.DIRECT_RANK.value: "points_from_direct_ranks",
+    }
+
     # Puntos por rangos del usuario (base y promo)
     RANK_POINTS = {
         "Visionario": {"base": 1, "promo": 2},
@@ -177,153 +199,309 @@ class TravelPointsService:
             return None
 
     @classmethod
-    def add_points_from_kit(
+    def _resolve_campaign(cls, session, campaign_id: Optional[int]) -> Optional[Tuple[int, bool, int]]:
+        """
+        Resuelve UNA vez la campaña de una acreditación.
+
+        Returns:
+            (campaign_id, is_promo, target_points) o None si no hay campaña activa
+        """
+        if campaign_id is None:
+            campaign = cls.get_active_campaign(session)
+            if not campaign:
+                print(f"⚠️  No hay campaña activa")
+                return None
+            return campaign.id, campaign.is_promo_active, campaign.target_points
+
+        campaign = session.get(TravelCampaigns, campaign_id)
+        return (
+            campaign_id,
+            campaign.is_promo_active if campaign else False,
+            campaign.target_points if campaign else 200
+        )
+
+    @classmethod
+    def accrue_points(
         cls,
         session,
-        member_id: int,
+        accruals: List[TravelPointsAccrual],
+        target_points: int = 200,
+        campaign_id: Optional[int] = None
+    ) -> int:
+        """
+        Acredita puntos a muchos miembros de una campaña con un número constante de statements:
+        un INSERT ... ON CONFLICT que crea o suma todos los NNTravelPoints afectados
+        (desglose, total y calificación) y un INSERT masivo del historial.
+
+        ⚠️ No hace commit: corre dentro de la transacción del llamador.
+
+        Args:
+            session: Sesión de base de datos
+            accruals: Acreditaciones (un miembro puede repetirse)
+            target_points: Meta de puntos de la campaña (calificación)
+            campaign_id: ID de la campaña ya resuelta
+
+        Returns:
+            Número de miembros acreditados
+        """
+        if not accruals:
+            return 0
+
+        # 1️⃣ Deltas por miembro y columna (una fila por miembro en el upsert)
+        columns = list(cls.POINTS_COLUMN_BY_EVENT.values())
+        deltas: Dict[int, Dict[str, int]] = {}
+        for accrual in accruals:
+            member_delta = deltas.setdefault(accrual.member_id, dict.fromkeys(columns, 0))
+            member_delta[cls.POINTS_COLUMN_BY_EVENT[accrual.event_type]] += accrual.points
+
+        # Orden por member_id: compras concurrentes de la misma rama bloquean las filas en el mismo orden
+        rows = []
+        for member_id, member_delta in sorted(deltas.items()):
+            total = sum(member_delta.values())
+            rows.append({
+                "member_id": member_id,
+                "campaign_id": campaign_id,
+                **member_delta,
+                "points_bonus": 0,
+                "total_points": total,
+                "qualifies_for_travel": total >= target_points,
+            })
+
+        # 2️⃣ Upsert en un solo statement (PostgreSQL en producción, SQLite en tests)
+        statement = dialect_insert(session, NNTravelPoints).values(rows)
+        table = NNTravelPoints.__table__.c
+        new_total = table.total_points + statement.excluded.total_points
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["member_id", "campaign_id"],
+                set_={
+                    **{column: table[column] + statement.excluded[column] for column in columns},
+                    "total_points": new_total,
+                    "qualifies_for_travel": new_total >= target_points,
+                    "updated_at": sqlmodel.func.now(),
+                }
+            )
+        )
+
+        # 3️⃣ Historial en un INSERT masivo
+        session.execute(sqlmodel.insert(NNTravelPointsHistory), [
+            {
+                "member_id": accrual.member_id,
+                "campaign_id": campaign_id,
+                "event_type": accrual.event_type,
+                "points_earned": accrual.points,
+                "source_member_id": accrual.source_member_id,
+                "source_order_id": accrual.source_order_id,
+                "rank_achieved": accrual.rank_achieved,
+                "description": accrual.description,
+            }
+            for accrual in accruals
+        ])
+
+        # Los NNTravelPoints ya cargados en la sesión quedan obsoletos tras el upsert
+        for instance in list(session.identity_map.values()):
+            if isinstance(instance, NNTravelPoints) and instance.campaign_id == campaign_id:
+                session.expire(instance)
+
+        return len(rows)
+
+    @classmethod
+    def add_points_from_kit_batch(
+        cls,
+        session,
+        member_ids: List[int],
         kit_type: str,
         order_id: int,
         buyer_member_id: int,
         campaign_id: Optional[int] = None
-    ) -> bool:
+    ) -> int:
         """
-        Añade puntos por compra de kit en la red.
+        Añade puntos por compra de kit a varios miembros de la red en un solo lote.
 
         Args:
             session: Sesión de base de datos
-            member_id: ID del usuario que recibe los puntos
+            member_ids: IDs de los usuarios que reciben los puntos
             kit_type: Tipo de kit (full_supplement, full_skin, full_protect)
             order_id: ID de la orden
             buyer_member_id: ID del comprador
             campaign_id: ID de campaña (si no se provee, usa la activa)
 
         Returns:
-            True si se añadieron exitosamente, False si falló
+            Número de miembros acreditados (0 si falló)
         """
         try:
-            # Obtener campaña activa si no se especificó
-            if campaign_id is None:
-                campaign = cls.get_active_campaign(session)
-                if not campaign:
-                    print(f"⚠️  No hay campaña activa")
-                    return False
-                campaign_id = campaign.id
-                is_promo = campaign.is_promo_active
-                target_points = campaign.target_points
-            else:
-                campaign = session.get(TravelCampaigns, campaign_id)
-                is_promo = campaign.is_promo_active if campaign else False
-                target_points = campaign.target_points if campaign else 200
-
-            # Obtener o crear registro de puntos
-            user_points = cls.get_or_create_user_points(session, member_id, campaign_id)
-            if not user_points:
-                return False
-
-            # Calcular puntos (promo duplica puntos)
             base_points = cls.KIT_POINTS.get(kit_type, 0)
             if base_points == 0:
                 print(f"⚠️  Tipo de kit desconocido: {kit_type}")
-                return False
+                return 0
 
-            points_to_add = base_points * 2 if is_promo else base_points
-
-            # Actualizar puntos
-            user_points.points_from_kits += points_to_add
-            user_points.recalculate_total()
-            user_points.update_qualification(target_points)
+            campaign = cls._resolve_campaign(session, campaign_id)
+            if not campaign:
+                return 0
+            campaign_id, is_promo, target_points = campaign
 
-            # Crear historial
-            history = NNTravelPointsHistory(
-                member_id=member_id,
-                campaign_id=campaign_id,
-                event_type=TravelEventType.KIT_PURCHASE.value,
-                points_earned=points_to_add,
-                source_member_id=buyer_member_id,
-                source_order_id=order_id,
-                description=f"Puntos por kit {kit_type} comprado por usuario {buyer_member_id}"
-            )
+            # Promo duplica puntos
+            points_to_add = base_points * 2 if is_promo else base_points
 
-            session.add(history)
-            session.flush()
+            credited = cls.accrue_points(session, [
+                TravelPointsAccrual(
+                    member_id=member_id,
+                    event_type=TravelEventType.KIT_PURCHASE.value,
+                    points=points_to_add,
+                    source_member_id=buyer_member_id,
+                    source_order_id=order_id,
+                    description=f"Puntos por kit {kit_type} comprado por usuario {buyer_member_id}"
+                )
+                for member_id in member_ids
+            ], target_points, campaign_id)
 
-            print(f"✅ Usuario {member_id} ganó {points_to_add} puntos por kit {kit_type}")
-            return True
+            print(f"✅ {credited} usuarios ganaron {points_to_add} puntos por kit {kit_type} de orden {order_id}")
+            return credited
 
         except Exception as e:
-            print(f"❌ Error añadiendo puntos de kit para usuario {member_id}: {e}")
+            print(f"❌ Error añadiendo puntos de kit de orden {order_id}: {e}")
             import traceback
             traceback.print_exc()
-            return False
+            return 0
 
     @classmethod
-    def add_points_from_rank(
+    def add_points_from_kit_to_upline(
+        cls,
+        session,
+        buyer_member_id: int,
+        kit_type: str,
+        order_id: int,
+        max_depth: Optional[int] = None,
+        campaign_id: Optional[int] = None
+    ) -> int:
+        """
+        Añade puntos por compra de kit a toda la línea ascendente del comprador
+        (ancestros en UNA query a UserTreePath + un lote de acreditación).
+
+        Args:
+            session: Sesión de base de datos
+            buyer_member_id: ID del comprador
+            kit_type: Tipo de kit (full_supplement, full_skin, full_protect)
+            order_id: ID de la orden
+            max_depth: Profundidad máxima de la línea ascendente (None = todos los niveles)
+            campaign_id: ID de campaña (si no se provee, usa la activa)
+
+        Returns:
+            Número de miembros acreditados
+        """
+        query = (
+            sqlmodel.select(UserTreePath.ancestor_id)
+            .where(
+                (UserTreePath.descendant_id == buyer_member_id) &
+                (UserTreePath.depth > 0)
+            )
+        )
+        if max_depth is not None:
+            query = query.where(UserTreePath.depth <= max_depth)
+
+        upline_ids = session.exec(query).all()
+        if not upline_ids:
+            return 0
+
+        return cls.add_points_from_kit_batch(
+            session, list(upline_ids), kit_type, order_id, buyer_member_id, campaign_id
+        )
+
+    @classmethod
+    def add_points_from_kit(
         cls,
         session,
         member_id: int,
-        rank_name: str,
+        kit_type: str,
+        order_id: int,
+        buyer_member_id: int,
         campaign_id: Optional[int] = None
     ) -> bool:
         """
-        Añade puntos por rango alcanzado por el usuario.
+        Añade puntos por compra de kit en la red.
 
         Args:
             session: Sesión de base de datos
-            member_id: ID del usuario
-            rank_name: Nombre del rango alcanzado
+            member_id: ID del usuario que recibe los puntos
+            kit_type: Tipo de kit (full_supplement, full_skin, full_protect)
+            order_id: ID de la orden
+            buyer_member_id: ID del comprador
             campaign_id: ID de campaña (si no se provee, usa la activa)
 
         Returns:
             True si se añadieron exitosamente, False si falló
         """
-        try:
-            # Obtener campaña activa si no se especificó
-            if campaign_id is None:
-                campaign = cls.get_active_campaign(session)
-                if not campaign:
-                    print(f"⚠️  No hay campaña activa")
-                    return False
-                campaign_id = campaign.id
-                is_promo = campaign.is_promo_active
-                target_points = campaign.target_points
-            else:
-                campaign = session.get(TravelCampaigns, campaign_id)
-                is_promo = campaign.is_promo_active if campaign else False
-                target_points = campaign.target_points if campaign else 200
-
-            # Obtener o crear registro de puntos
-            user_points = cls.get_or_create_user_points(session, member_id, campaign_id)
-            if not user_points:
-                return False
+        return cls.add_points_from_kit_batch(
+            session, [member_id], kit_type, order_id, buyer_member_id, campaign_id
+        ) == 1
 
-            # Obtener puntos del rango
-            rank_config = cls.RANK_POINTS.get(rank_name)
-            if not rank_config:
-                print(f"⚠️  Rango desconocido: {rank_name}")
-                return False
+    @classmethod
+    def _add_rank_points(
+        cls,
+        session,
+        member_id: int,
+        event_type: str,
+        rank_name: str,
+        description: str,
+        source_member_id: Optional[int],
+        campaign_id: Optional[int]
+    ) -> bool:
+        """
+        Acredita puntos de rango (propio o de directo) a un miembro.
+        """
+        # Obtener puntos del rango
+        # Nota: Los puntos por directos usan la misma tabla que los rangos propios
+        rank_config = cls.RANK_POINTS.get(rank_name)
+        if not rank_config:
+            print(f"⚠️  Rango desconocido: {rank_name}")
+            return False
 
-            points_to_add = rank_config["promo"] if is_promo else rank_config["base"]
+        campaign = cls._resolve_campaign(session, campaign_id)
+        if not campaign:
+            return False
+        campaign_id, is_promo, target_points = campaign
 
-            # Actualizar puntos
-            user_points.points_from_self_ranks += points_to_add
-            user_points.recalculate_total()
-            user_points.update_qualification(target_points)
+        points_to_add = rank_config["promo"] if is_promo else rank_config["base"]
 
-            # Crear historial
-            history = NNTravelPointsHistory(
+        cls.accrue_points(session, [
+            TravelPointsAccrual(
                 member_id=member_id,
-                campaign_id=campaign_id,
-                event_type=TravelEventType.SELF_RANK.value,
-                points_earned=points_to_add,
+                event_type=event_type,
+                points=points_to_add,
+                source_member_id=source_member_id,
                 rank_achieved=rank_name,
-                description=f"Puntos por alcanzar rango {rank_name}"
+                description=description
             )
+        ], target_points, campaign_id)
 
-            session.add(history)
-            session.flush()
+        print(f"✅ Usuario {member_id} ganó {points_to_add} puntos: {description}")
+        return True
 
-            print(f"✅ Usuario {member_id} ganó {points_to_add} puntos por rango {rank_name}")
-            return True
+    @classmethod
+    def add_points_from_rank(
+        cls,
+        session,
+        member_id: int,
+        rank_name: str,
+        campaign_id: Optional[int] = None
+    ) -> bool:
+        """
+        Añade puntos por rango alcanzado por el usuario.
+
+        Args:
+            session: Sesión de base de datos
+            member_id: ID del usuario
+            rank_name: Nombre del rango alcanzado
+            campaign_id: ID de campaña (si no se provee, usa la activa)
+
+        Returns:
+            True si se añadieron exitosamente, False si falló
+        """
+        try:
+            return cls._add_rank_points(
+                session, member_id, TravelEventType.SELF_RANK.value, rank_name,
+                f"Puntos por alcanzar rango {rank_name}", None, campaign_id
+            )
 
         except Exception as e:
             print(f"❌ Error añadiendo puntos de rango para usuario {member_id}: {e}")
@@ -354,57 +532,12 @@ class TravelPointsService:
             True si se añadieron exitosamente, False si falló
         """
         try:
-            # Obtener campaña activa si no se especificó
-            if campaign_id is None:
-                campaign = cls.get_active_campaign(session)
-                if not campaign:
-                    print(f"⚠️  No hay campaña activa")
-                    return False
-                campaign_id = campaign.id
-                is_promo = campaign.is_promo_active
-                target_points = campaign.target_points
-            else:
-                campaign = session.get(TravelCampaigns, campaign_id)
-                is_promo = campaign.is_promo_active if campaign else False
-                target_points = campaign.target_points if campaign else 200
-
-            # Obtener o crear registro de puntos
-            sponsor_points = cls.get_or_create_user_points(session, sponsor_id, campaign_id)
-            if not sponsor_points:
-                return False
-
-            # Obtener puntos del rango (para directos)
-            # Nota: Los puntos por directos pueden tener valores diferentes
-            # Por ahora usamos la misma tabla, pero podrías tener una configuración separada
-            rank_config = cls.RANK_POINTS.get(rank_name)
-            if not rank_config:
-                print(f"⚠️  Rango desconocido: {rank_name}")
-                return False
-
-            points_to_add = rank_config["promo"] if is_promo else rank_config["base"]
-
-            # Actualizar puntos
-            sponsor_points.points_from_direct_ranks += points_to_add
-            sponsor_points.recalculate_total()
-            sponsor_points.update_qualification(target_points)
-
-            # Crear historial
-            history = NNTravelPointsHistory(
-                member_id=sponsor_id,
-                campaign_id=campaign_id,
-                event_type=TravelEventType.DIRECT_RANK.value,
-                points_earned=points_to_add,
-                source_member_id=direct_member_id,
-                rank_achieved=rank_name,
-                description=f"Puntos por rango {rank_name} alcanzado por directo {direct_member_id}"
+            return cls._add_rank_points(
+                session, sponsor_id, TravelEventType.DIRECT_RANK.value, rank_name,
+                f"Puntos por rango {rank_name} alcanzado por directo {direct_member_id}",
+                direct_member_id, campaign_id
             )
 
-            session.add(history)
-            session.flush()
-
-            print(f"✅ Sponsor {sponsor_id} ganó {points_to_add} puntos por rango {rank_name} de directo {direct_member_id}")
-            return True
-
         except Exception as e:
             print(f"❌ Error añadiendo puntos de directo para sponsor {sponsor_id}: {e}")
             import traceback
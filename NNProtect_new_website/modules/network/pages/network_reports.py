@@ -50,8 +50,12 @@ class NetworkReportsState(rx.State):
 	"""State para manejar datos de reportes de red."""
 	todays_registrations: List[Dict[str, Any]] = []
 	monthly_registrations: List[Dict[str, Any]] = []
-	all_registrations: List[Dict[str, Any]] = []
 	is_loading: bool = False
+
+	# Contadores desde el rollup por (ancestro, día)
+	todays_registrations_total: int = 0
+	monthly_registrations_total: int = 0
+	all_registrations_total: int = 0
 	
 	# Progresión de rango
 	current_pvg: int = 0
@@ -123,18 +127,38 @@ class NetworkReportsState(rx.State):
 	@rx.var
 	def today_registrations_count(self) -> str:
 		"""Cuenta de inscripciones del día."""
-		return str(len(self.todays_registrations))
+		return str(self.todays_registrations_total)
 
 	@rx.var
 	def monthly_registrations_count(self) -> str:
 		"""Cuenta de inscripciones del mes."""
-		return str(len(self.monthly_registrations))
+		return str(self.monthly_registrations_total)
 	
 	@rx.var
 	def all_registrations_count(self) -> str:
-		"""Cuenta de todas las inscripciones (histórico completo)."""
-		return str(len(self.all_registrations))
+		"""Cuenta de todas las inscripciones (histórico completo, desde el rollup)."""
+		return str(self.all_registrations_total)
 	
+	@rx.event
+	async def load_registration_counts(self):
+		"""Carga los contadores de inscripciones (hoy, mes, histórico) desde el rollup."""
+		try:
+			auth_state = await self.get_state(AuthState)
+			member_id = auth_state.profile_data.get("member_id") if auth_state.profile_data else None
+			if not member_id:
+				print("❌ Usuario no autenticado o member_id no encontrado")
+				return
+
+			counts = MLMUserManager.get_registration_counts(member_id)
+			self.todays_registrations_total = counts["today"]
+			self.monthly_registrations_total = counts["monthly"]
+			self.all_registrations_total = counts["all"]
+
+			print(f"✅ Contadores de inscripciones: hoy={counts['today']}, mes={counts['monthly']}, total={counts['all']}")
+
+		except Exception as e:
+			print(f"❌ Error cargando contadores de inscripciones: {e}")
+
 	@rx.event
 	async def load_todays_registrations(self):
 		"""Carga las inscripciones del día de la red del usuario autenticado."""
@@ -197,37 +221,6 @@ class NetworkReportsState(rx.State):
 		finally:
 			self.is_loading = False
 
-	@rx.event
-	async def load_all_registrations(self):
-		"""Carga TODAS las inscripciones de la red del usuario autenticado (histórico completo)."""
-		self.is_loading = True
-		yield
-		
-		try:
-			# Obtener el member_id del usuario autenticado
-			auth_state = await self.get_state(AuthState)
-			
-			# ✅ VALIDACIÓN SIMPLIFICADA - Solo lo necesario
-			member_id = auth_state.profile_data.get("member_id") if auth_state.profile_data else None
-			if not member_id:
-				print("❌ Usuario no autenticado o member_id no encontrado")
-				self.all_registrations = []
-				return
-				
-			print(f"🔄 Cargando TODAS las inscripciones para member_id: {member_id}")
-			
-			# Obtener TODAS las inscripciones de la red (sin filtro de fecha)
-			registrations = MLMUserManager.get_all_registrations(member_id)
-			self.all_registrations = registrations
-			
-			print(f"✅ Cargadas {len(registrations)} inscripciones totales")
-			
-		except Exception as e:
-			print(f"❌ Error cargando todas las inscripciones: {e}")
-			self.all_registrations = []
-		finally:
-			self.is_loading = False
-
 	@rx.event
 	async def load_period_volumes(self):
 		"""Carga volúmenes (PV/PVG) por periodo del usuario autenticado."""
@@ -1302,7 +1295,7 @@ def network_reports() -> rx.Component:
 			width="100%",
 		),
 		on_mount=[
-			NetworkReportsState.load_all_registrations,
+			NetworkReportsState.load_registration_counts,
 			NetworkReportsState.load_period_volumes,
 			NetworkReportsState.load_rank_progression
 		],
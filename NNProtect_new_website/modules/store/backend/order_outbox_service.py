@@ -0,0 +1,208 @@
+"""
+Servicio POO para el outbox transaccional de órdenes.
+El pago solo registra el evento; un worker en segundo plano ejecuta el trabajo
+post-pago (PV/PVG, unilevel_report, rangos y comisiones) fuera del request.
+
+Principios aplicados: KISS, DRY, YAGNI, POO
+"""
+
+import reflex as rx
+import sqlmodel
+from typing import List
+from datetime import datetime, timezone, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from database.orders import Orders
+from database.order_outbox import OrderEventOutbox, OutboxEventType, OutboxStatus
+
+
+class OrderOutboxService:
+    """
+    Servicio POO para encolar y drenar eventos de órdenes.
+    Principio POO: Encapsula el ciclo de vida del outbox (encolar, tomar, procesar, reintentar).
+    """
+
+    BATCH_SIZE = 50             # Eventos tomados por pasada
+    WORKERS = 4                 # Hilos del pool de procesamiento
+    MAX_ATTEMPTS = 5            # Reintentos antes de marcar FAILED
+    RETRY_BACKOFF_SECONDS = 30  # Backoff exponencial: 30s, 60s, 120s...
+    LOCK_TIMEOUT_MINUTES = 10   # Eventos PROCESSING más viejos se consideran abandonados
+
+    @classmethod
+    def enqueue_payment_confirmed(cls, session, order_id: int) -> None:
+        """
+        Registra el evento de pago confirmado en la transacción del llamador.
+        Idempotente: si la orden ya tiene evento, no crea otro.
+
+        Args:
+            session: Sesión de base de datos (la misma del pago)
+            order_id: ID de la orden confirmada
+        """
+        existing = session.exec(
+            sqlmodel.select(OrderEventOutbox.id)
+            .where(
+                (OrderEventOutbox.order_id == order_id) &
+                (OrderEventOutbox.event_type == OutboxEventType.PAYMENT_CONFIRMED.value)
+            )
+        ).first()
+
+        if existing:
+            return
+
+        session.add(OrderEventOutbox(
+            order_id=order_id,
+            event_type=OutboxEventType.PAYMENT_CONFIRMED.value
+        ))
+        session.flush()
+
+    @classmethod
+    def claim_batch(cls, session, limit: int = None) -> List[int]:
+        """
+        Toma un lote de eventos disponibles y los marca PROCESSING.
+        Usa FOR UPDATE SKIP LOCKED para que varios workers no tomen el mismo evento.
+
+        Returns:
+            IDs de los eventos tomados
+        """
+        now = datetime.now(timezone.utc)
+        stale_before = now - timedelta(minutes=cls.LOCK_TIMEOUT_MINUTES)
+
+        events = session.exec(
+            sqlmodel.select(OrderEventOutbox)
+            .where(
+                (
+                    (OrderEventOutbox.status == OutboxStatus.PENDING.value) &
+                    (OrderEventOutbox.available_at <= now)
+                ) |
+                (
+                    (OrderEventOutbox.status == OutboxStatus.PROCESSING.value) &
+                    (OrderEventOutbox.locked_at < stale_before)
+                )
+            )
+            .order_by(OrderEventOutbox.id)
+            .limit(limit or cls.BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        ).all()
+
+        for event in events:
+            event.status = OutboxStatus.PROCESSING.value
+            event.locked_at = now
+            event.attempts += 1
+            session.add(event)
+
+        session.commit()
+        return [event.id for event in events]
+
+    @classmethod
+    def process_event(cls, session, event_id: int) -> bool:
+        """
+        Ejecuta el trabajo post-pago de un evento y lo marca DONE en la misma transacción.
+        Si falla, revierte todo y programa reintento (o FAILED al agotar MAX_ATTEMPTS).
+
+        Args:
+            session: Sesión de base de datos (dedicada al evento)
+            event_id: ID del evento del outbox
+
+        Returns:
+            True si el evento quedó procesado
+        """
+        from NNProtect_new_website.modules.network.backend.pv_update_service import PVUpdateService
+        from .payment_service import PaymentService
+
+        try:
+            event = session.exec(
+                sqlmodel.select(OrderEventOutbox)
+                .where(OrderEventOutbox.id == event_id)
+                .with_for_update()
+            ).first()
+
+            # Idempotencia por orden: un evento ya procesado no se repite
+            if not event or event.status == OutboxStatus.DONE.value:
+                return True
+
+            order = session.get(Orders, event.order_id)
+            if not order:
+                raise ValueError(f"Orden {event.order_id} no encontrada")
+
+            # 1. PV/PVG del comprador y ancestros, unilevel_report y rangos
+            if not PVUpdateService.process_order_pv_update(session, order.id):
+                raise RuntimeError(f"Error actualizando PV para orden {order.id}")
+
+            # 2. Comisiones instantáneas (Directo, Rápido, Uninivel, Matching)
+            # raise_errors: un fallo revierte el evento completo y queda para reintento
+            PaymentService._trigger_commissions(session, order, raise_errors=True)
+
+            event.status = OutboxStatus.DONE.value
+            event.processed_at = datetime.now(timezone.utc)
+            event.last_error = None
+            session.add(event)
+            order_id = order.id
+            # El commit también aplica las invalidaciones de caché diferidas (snapshots, volúmenes)
+            session.commit()
+
+            print(f"✅ Outbox: orden {order_id} procesada (evento {event_id})")
+            return True
+
+        except Exception as e:
+            session.rollback()
+            print(f"❌ Outbox: error procesando evento {event_id}: {e}")
+            cls._schedule_retry(session, event_id, str(e))
+            return False
+
+    @classmethod
+    def _schedule_retry(cls, session, event_id: int, error: str) -> None:
+        """
+        Programa el reintento de un evento con backoff exponencial.
+        """
+        event = session.get(OrderEventOutbox, event_id)
+        if not event:
+            return
+
+        event.last_error = error[:1000]
+        event.locked_at = None
+
+        if event.attempts >= cls.MAX_ATTEMPTS:
+            event.status = OutboxStatus.FAILED.value
+            print(f"🛑 Outbox: evento {event_id} marcado FAILED tras {event.attempts} intentos")
+        else:
+            event.status = OutboxStatus.PENDING.value
+            delay = cls.RETRY_BACKOFF_SECONDS * (2 ** (event.attempts - 1))
+            event.available_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+
+        session.add(event)
+        session.commit()
+
+    @classmethod
+    def _process_event_in_own_session(cls, event_id: int) -> bool:
+        """
+        Procesa un evento con su propia sesión (una por hilo del pool).
+        """
+        with rx.session() as session:
+            return cls.process_event(session, event_id)
+
+    @classmethod
+    def drain(cls, batch_size: int = None, workers: int = None) -> int:
+        """
+        Drena el outbox: toma lotes de eventos y los procesa en un pool de hilos
+        hasta que no queden eventos disponibles.
+        Pensado para correr como job periódico del SchedulerService.
+
+        Returns:
+            Número de eventos procesados exitosamente
+        """
+        processed = 0
+
+        with ThreadPoolExecutor(max_workers=workers or cls.WORKERS) as pool:
+            while True:
+                with rx.session() as session:
+                    event_ids = cls.claim_batch(session, batch_size)
+
+                if not event_ids:
+                    break
+
+                results = pool.map(cls._process_event_in_own_session, event_ids)
+                processed += sum(1 for ok in results if ok)
+
+        if processed:
+            print(f"✅ Outbox: {processed} eventos procesados")
+        return processed
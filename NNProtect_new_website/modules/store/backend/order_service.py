@@ -2,10 +2,10 @@
 Servicio de gestión de órdenes.
 Maneja queries a la base de datos y lógica de negocio para órdenes.
 """
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime, timezone
 from decimal import Decimal
-from sqlmodel import Session, select, and_, desc, asc
+from sqlmodel import Session, select, and_, or_, desc, asc, func, cast, String
 from database.orders import Orders, OrderStatus
 from database.order_items import OrderItems
 from database.products import Products
@@ -21,6 +21,56 @@ class OrderService:
     Implementa queries optimizadas con JOINs y formateo de datos.
     """
 
+    # Ordenamientos soportados por la paginación keyset: clave → (columna, descendente)
+    SORT_OPTIONS = {
+        "newest": (Orders.created_at, True),
+        "oldest": (Orders.created_at, False),
+        "amount_desc": (Orders.total, True),
+        "amount_asc": (Orders.total, False),
+    }
+
+    @staticmethod
+    def get_user_orders_page(
+        member_id: int,
+        limit: int = 10,
+        cursor: Optional[Tuple[Any, int]] = None,
+        statuses: Optional[List[str]] = None,
+        order_number: Optional[str] = None,
+        sort: str = "newest"
+    ) -> Dict:
+        """
+        Obtiene una página de órdenes de un usuario con paginación keyset.
+        Filtros y ordenamiento se resuelven en SQL; los productos de la página
+        se cargan con un solo IN.
+
+        Args:
+            member_id: ID del miembro del usuario
+            limit: Órdenes por página
+            cursor: (valor de ordenamiento, id) de la última orden de la página anterior
+            statuses: Estados de BD a incluir (None = todos)
+            order_number: Búsqueda parcial por número de orden ("#12" o "12")
+            sort: Clave de SORT_OPTIONS
+
+        Returns:
+            Dict con 'orders', 'next_cursor' (None si no hay más) y 'total' (órdenes que cumplen filtros)
+
+        Performance:
+        - Índice (member_id, created_at, id) para el ordenamiento por fecha
+        - 3 queries por página: conteo, página (limit + 1) e items
+        """
+        try:
+            engine = get_configured_engine()
+            with Session(engine) as session:
+                return OrderService._query_orders_page(
+                    session, member_id, limit, cursor, statuses, order_number, sort
+                )
+
+        except Exception as e:
+            print(f"❌ Error obteniendo página de órdenes del usuario {member_id}: {e}")
+            import traceback
+            traceback.print_exc()
+            return {"orders": [], "next_cursor": None, "total": 0}
+
     @staticmethod
     def get_user_orders(member_id: int) -> List[Dict]:
         """
@@ -49,33 +99,10 @@ class OrderService:
 
                 results = session.exec(statement).all()
 
-                orders = []
-                for order, address in results:
-                    # Formatear cada orden
-                    formatted_order = OrderService._format_order(order, address)
+                orders = [OrderService._format_order(order, address) for order, address in results]
 
-                    # Obtener productos de la orden para el resumen (Optimización N+1 aceptable por paginación pequeña)
-                    items_statement = (
-                        select(OrderItems, Products)
-                        .join(Products, OrderItems.product_id == Products.id)
-                        .where(OrderItems.order_id == order.id)
-                    )
-                    items_results = session.exec(items_statement).all()
-                    
-                    products_list = []
-                    summary_lines = []
-                    
-                    for item, product in items_results:
-                        products_list.append({
-                            "name": product.product_name,
-                            "quantity": item.quantity
-                        })
-                        summary_lines.append(f"{item.quantity}x {product.product_name}")
-                    
-                    formatted_order["products"] = products_list
-                    formatted_order["products_summary"] = "\n".join(summary_lines) if summary_lines else "Sin productos"
-
-                    orders.append(formatted_order)
+                # Productos de todas las órdenes en un solo IN (sin N+1)
+                OrderService._attach_products(session, orders)
 
                 return orders
 
@@ -85,6 +112,70 @@ class OrderService:
             traceback.print_exc()
             return []
 
+    @staticmethod
+    def _query_orders_page(
+        session,
+        member_id: int,
+        limit: int,
+        cursor: Optional[Tuple[Any, int]],
+        statuses: Optional[List[str]],
+        order_number: Optional[str],
+        sort: str
+    ) -> Dict:
+        """
+        Consulta de get_user_orders_page sobre una sesión existente.
+        """
+        sort_column, descending = OrderService.SORT_OPTIONS.get(sort, OrderService.SORT_OPTIONS["newest"])
+
+        filters = [Orders.member_id == member_id]
+        if statuses:
+            filters.append(Orders.status.in_(statuses))
+
+        search = (order_number or "").strip().lstrip("#")
+        if search:
+            filters.append(cast(Orders.id, String).like(f"%{search}%"))
+
+        total = session.exec(
+            select(func.count(Orders.id)).where(and_(*filters))
+        ).one()
+
+        # Keyset: continuar después de (valor, id) de la última orden vista
+        page_filters = list(filters)
+        if cursor:
+            last_value, last_id = cursor
+            if descending:
+                page_filters.append(or_(
+                    sort_column < last_value,
+                    and_(sort_column == last_value, Orders.id < last_id)
+                ))
+            else:
+                page_filters.append(or_(
+                    sort_column > last_value,
+                    and_(sort_column == last_value, Orders.id > last_id)
+                ))
+
+        direction = desc if descending else asc
+        results = session.exec(
+            select(Orders, Addresses)
+            .outerjoin(Addresses, Orders.shipping_address_id == Addresses.id)
+            .where(and_(*page_filters))
+            .order_by(direction(sort_column), direction(Orders.id))
+            .limit(limit + 1)
+        ).all()
+
+        has_more = len(results) > limit
+        results = results[:limit]
+
+        orders = [OrderService._format_order(order, address) for order, address in results]
+        OrderService._attach_products(session, orders)
+
+        next_cursor = None
+        if has_more and results:
+            last_order = results[-1][0]
+            next_cursor = (getattr(last_order, sort_column.key), last_order.id)
+
+        return {"orders": orders, "next_cursor": next_cursor, "total": total}
+
     @staticmethod
     def get_order_details(order_id: int) -> Optional[Dict]:
         """
@@ -173,32 +264,10 @@ class OrderService:
 
                 results = session.exec(statement).all()
 
-                orders = []
-                for order, address in results:
-                    formatted_order = OrderService._format_order(order, address)
-                    
-                    # Obtener productos de la orden para el resumen
-                    items_statement = (
-                        select(OrderItems, Products)
-                        .join(Products, OrderItems.product_id == Products.id)
-                        .where(OrderItems.order_id == order.id)
-                    )
-                    items_results = session.exec(items_statement).all()
-                    
-                    products_list = []
-                    summary_lines = []
-                    
-                    for item, product in items_results:
-                        products_list.append({
-                            "name": product.product_name,
-                            "quantity": item.quantity
-                        })
-                        summary_lines.append(f"{item.quantity}x {product.product_name}")
-                    
-                    formatted_order["products"] = products_list
-                    formatted_order["products_summary"] = "\n".join(summary_lines) if summary_lines else "Sin productos"
-                    
-                    orders.append(formatted_order)
+                orders = [OrderService._format_order(order, address) for order, address in results]
+
+                # Productos de todas las órdenes en un solo IN (sin N+1)
+                OrderService._attach_products(session, orders)
 
                 return orders
 
@@ -223,45 +292,24 @@ class OrderService:
         try:
             engine = get_configured_engine()
             with Session(engine) as session:
-                # Buscar por ID que contenga la query
+                # Buscar por ID que contenga la query (filtro en SQL)
+                search = search_query.strip().lstrip("#")
                 statement = (
                     select(Orders, Addresses)
                     .outerjoin(Addresses, Orders.shipping_address_id == Addresses.id)
-                    .where(Orders.member_id == member_id)
+                    .where(
+                        and_(
+                            Orders.member_id == member_id,
+                            cast(Orders.id, String).like(f"%{search}%")
+                        )
+                    )
                     .order_by(desc(Orders.created_at))
                 )
 
                 results = session.exec(statement).all()
 
-                # Filtrar en Python para búsqueda flexible
-                orders = []
-                search_lower = search_query.lower().strip()
-                for order, address in results:
-                    if search_lower in str(order.id).lower():
-                        formatted_order = OrderService._format_order(order, address)
-
-                        # Obtener productos de la orden para el resumen
-                        items_statement = (
-                            select(OrderItems, Products)
-                            .join(Products, OrderItems.product_id == Products.id)
-                            .where(OrderItems.order_id == order.id)
-                        )
-                        items_results = session.exec(items_statement).all()
-                        
-                        products_list = []
-                        summary_lines = []
-                        
-                        for item, product in items_results:
-                            products_list.append({
-                                "name": product.product_name,
-                                "quantity": item.quantity
-                            })
-                            summary_lines.append(f"{item.quantity}x {product.product_name}")
-                        
-                        formatted_order["products"] = products_list
-                        formatted_order["products_summary"] = "\n".join(summary_lines) if summary_lines else "Sin productos"
-
-                        orders.append(formatted_order)
+                orders = [OrderService._format_order(order, address) for order, address in results]
+                OrderService._attach_products(session, orders)
 
                 return orders
 
@@ -273,6 +321,39 @@ class OrderService:
 
     # Métodos privados de formateo
 
+    @staticmethod
+    def _attach_products(session, orders: List[Dict]) -> None:
+        """
+        Agrega 'products' y 'products_summary' a órdenes ya formateadas
+        con una sola query IN para todas las órdenes.
+
+        Args:
+            session: Sesión de base de datos
+            orders: Órdenes formateadas por _format_order (se modifican en sitio)
+        """
+        if not orders:
+            return
+
+        items_by_order: Dict[int, List[Tuple[OrderItems, Products]]] = {}
+        items_results = session.exec(
+            select(OrderItems, Products)
+            .join(Products, OrderItems.product_id == Products.id)
+            .where(OrderItems.order_id.in_([order["order_id"] for order in orders]))
+            .order_by(OrderItems.order_id, OrderItems.id)
+        ).all()
+
+        for item, product in items_results:
+            items_by_order.setdefault(item.order_id, []).append((item, product))
+
+        for formatted_order in orders:
+            items = items_by_order.get(formatted_order["order_id"], [])
+            formatted_order["products"] = [
+                {"name": product.product_name, "quantity": item.quantity}
+                for item, product in items
+            ]
+            summary_lines = [f"{item.quantity}x {product.product_name}" for item, product in items]
+            formatted_order["products_summary"] = "\n".join(summary_lines) if summary_lines else "Sin productos"
+
     @staticmethod
     def _format_order(order: Orders, address: Optional[Addresses] = None) -> Dict:
         """
@@ -6,15 +6,28 @@ Principios aplicados: KISS, DRY, YAGNI, POO
 """
 
 import sqlmodel
-from typing import Optional
+from typing import Optional, List
+from dataclasses import dataclass
 from datetime import datetime, timezone
 
 from database.orders import Orders, OrderStatus
 from database.wallet import Wallets
+from database.query_profiler import QueryProfiler
 from NNProtect_new_website.modules.finance.backend.wallet_service import WalletService
-from NNProtect_new_website.modules.network.backend.pv_update_service import PVUpdateService
 from NNProtect_new_website.modules.network.backend.commission_service import CommissionService
 from NNProtect_new_website.modules.network.backend.period_service import PeriodService
+from NNProtect_new_website.modules.network.backend.dashboard_snapshot_service import DashboardSnapshotService
+from .order_outbox_service import OrderOutboxService
+
+
+@dataclass
+class UplineContext:
+    """Ancestro del comprador con su profundidad, rango del período y país."""
+    ancestor_id: int
+    depth: int
+    rank_id: Optional[int]
+    rank_name: Optional[str]
+    country_cache: Optional[str]
 
 
 class PaymentService:
@@ -24,6 +37,7 @@ class PaymentService:
     """
 
     @classmethod
+    @QueryProfiler.profiled("PaymentService.process_wallet_payment")
     def process_wallet_payment(
         cls,
         session,
@@ -37,11 +51,12 @@ class PaymentService:
         1. Validar orden y estado
         2. Validar balance de wallet
         3. Debitar monto de wallet
-        4. Confirmar pago de orden (cambiar estado + timestamp)
-        5. Actualizar PV del comprador y ancestros
-        6. Disparar cálculo de comisiones
+        4. Confirmar pago de orden (cambiar estado + timestamp + evento en outbox)
+        5. (Worker) Actualizar PV del comprador y ancestros
+        6. (Worker) Disparar cálculo de comisiones
 
-        Principio: Atomicidad - todo o nada.
+        Principio: Atomicidad - pago, confirmación y evento del outbox en una sola transacción.
+        El trabajo post-pago no depende de la profundidad del comprador en la red.
 
         Args:
             session: Sesión de base de datos
@@ -132,32 +147,11 @@ class PaymentService:
                     "message": "Error al debitar wallet"
                 }
 
-            # 4. Confirmar pago de orden
+            # 4. Confirmar pago de orden (registra el evento en el outbox, misma transacción)
             cls._confirm_order_payment(session, order)
 
-            # 5. Actualizar PV del comprador y ancestros (CRÍTICO)
-            pv_updated = PVUpdateService.process_order_pv_update(session, order_id)
-
-            if not pv_updated:
-                session.rollback()  # ⚠️ Revertir TODO (pago, confirmación, wallet)
-                print(f"❌ Error crítico actualizando PV para orden {order_id}")
-                return {
-                    "success": False,
-                    "message": "Error procesando puntos. Pago no completado. Intente nuevamente."
-                }
-
-            # 6. Disparar cálculo de comisiones
-            try:
-                cls._trigger_commissions(session, order)
-            except Exception as e:
-                session.rollback()  # ⚠️ Revertir TODO si falla comisiones
-                print(f"❌ Error disparando comisiones: {e}")
-                import traceback
-                traceback.print_exc()
-                return {
-                    "success": False,
-                    "message": "Error procesando comisiones. Pago no completado."
-                }
+            # 5-6. PV/PVG, unilevel_report, rangos y comisiones se procesan fuera del request
+            #      por el worker del outbox (OrderOutboxService.drain)
 
             # Commit final
             session.commit()
@@ -207,6 +201,9 @@ class PaymentService:
             session.add(order)
             session.flush()
 
+            # Evento post-pago en el outbox (atómico con la confirmación)
+            OrderOutboxService.enqueue_payment_confirmed(session, order.id)
+
             print(f"✅ Pago confirmado para orden {order.id} en período {order.period_id}")
 
         except Exception as e:
@@ -214,7 +211,8 @@ class PaymentService:
             raise
 
     @classmethod
-    def _trigger_commissions(cls, session, order: Orders) -> None:
+    @QueryProfiler.profiled("PaymentService._trigger_commissions")
+    def _trigger_commissions(cls, session, order: Orders, raise_errors: bool = False) -> None:
         """
         Dispara cálculo de comisiones para una orden confirmada.
 
@@ -232,6 +230,8 @@ class PaymentService:
         Args:
             session: Sesión de base de datos
             order: Orden confirmada
+            raise_errors: Si True, propaga cualquier error sin revertir la sesión
+                (el outbox revierte el evento completo y lo reintenta)
         """
         try:
             print(f"\n💰 Disparando comisiones para orden {order.id}...")
@@ -247,7 +247,8 @@ class PaymentService:
                     session=session,
                     buyer_id=order.member_id,
                     order_id=order.id,
-                    vn_amount=order.total_vn
+                    vn_amount=order.total_vn,
+                    raise_errors=raise_errors
                 )
 
                 if direct_commission_id:
@@ -257,7 +258,8 @@ class PaymentService:
             # Los kits pagan bono rápido instantáneo a 3 niveles
             commission_ids = CommissionService.process_fast_start_bonus(
                 session=session,
-                order_id=order.id
+                order_id=order.id,
+                raise_errors=raise_errors
             )
 
             if commission_ids:
@@ -266,24 +268,86 @@ class PaymentService:
             # 3. Bono Uninivel - NUEVO: Se calcula INSTANTÁNEAMENTE
             # Se calcula para TODOS los ancestros del comprador según su rango
             # Esto permite que los usuarios vean sus ganancias proyectadas en tiempo real
+            # La línea ascendente (rango + país) se carga una vez para Uninivel y Matching
+            upline = cls._load_upline_context(session, order) if order.period_id else []
+
             print(f"\n   🔄 Calculando Bono Uninivel para ancestros del comprador...")
-            cls._trigger_unilevel_for_ancestors(session, order)
+            cls._trigger_unilevel_for_ancestors(session, order, upline, raise_errors)
 
             # 4. Bono Matching - NUEVO: Se calcula INSTANTÁNEAMENTE
             # Solo para embajadores en la línea ascendente
             print(f"\n   🔄 Calculando Bono Matching para embajadores...")
-            cls._trigger_matching_for_ambassadors(session, order)
+            cls._trigger_matching_for_ambassadors(session, order, upline, raise_errors)
 
             print(f"\n✅ TODAS las comisiones disparadas para orden {order.id}")
 
         except Exception as e:
             print(f"❌ Error disparando comisiones para orden {order.id}: {e}")
+            if raise_errors:
+                raise
             # No lanzar excepción, comisiones se pueden recalcular
             import traceback
             traceback.print_exc()
 
     @classmethod
-    def _trigger_unilevel_for_ancestors(cls, session, order: Orders) -> None:
+    def _load_upline_context(cls, session, order: Orders) -> List[UplineContext]:
+        """
+        Carga la línea ascendente del comprador en UNA consulta:
+        UserTreePath + Users (país) + rango del período (UserRankHistory) + Ranks.
+
+        Compartida por Uninivel y Matching para no repetir 3 consultas por ancestro.
+
+        Args:
+            session: Sesión de base de datos
+            order: Orden confirmada
+
+        Returns:
+            Lista de UplineContext ordenada por profundidad (ancestros sin rango con rank_id=None)
+        """
+        from database.usertreepaths import UserTreePath
+        from database.users import Users
+        from database.ranks import Ranks
+        from database.user_rank_history import UserRankHistory
+
+        # Rango más alto de cada miembro en el período de la orden
+        period_rank = (
+            sqlmodel.select(
+                UserRankHistory.member_id,
+                sqlmodel.func.max(UserRankHistory.rank_id).label("rank_id")
+            )
+            .where(UserRankHistory.period_id == order.period_id)
+            .group_by(UserRankHistory.member_id)
+            .subquery()
+        )
+
+        rows = session.exec(
+            sqlmodel.select(
+                UserTreePath.ancestor_id,
+                UserTreePath.depth,
+                period_rank.c.rank_id,
+                Ranks.name,
+                Users.country_cache
+            )
+            .join(Users, Users.member_id == UserTreePath.ancestor_id)
+            .outerjoin(period_rank, period_rank.c.member_id == UserTreePath.ancestor_id)
+            .outerjoin(Ranks, Ranks.id == period_rank.c.rank_id)
+            .where(
+                (UserTreePath.descendant_id == order.member_id) &
+                (UserTreePath.depth > 0)
+            )
+            .order_by(UserTreePath.depth)
+        ).all()
+
+        return [UplineContext(*row) for row in rows]
+
+    @classmethod
+    def _trigger_unilevel_for_ancestors(
+        cls,
+        session,
+        order: Orders,
+        upline: Optional[List[UplineContext]] = None,
+        raise_errors: bool = False
+    ) -> None:
         """
         Calcula el Bono Uninivel INCREMENTALMENTE para los ancestros del comprador.
         
@@ -291,41 +355,27 @@ class PaymentService:
         - Calcula comisiones SOLO para los ancestros directos del comprador
         - AGREGA comisiones nuevas (no borra las existentes)
         - Usa el VN de ESTA orden específica
-        - Escalable: O(ancestros) en lugar de O(todos los usuarios)
+        - Línea ascendente (rango + país) en una sola consulta e inserción masiva
         
         Flujo:
-        1. Obtener ancestros del comprador con su profundidad
+        1. Obtener contexto de la línea ascendente (UplineContext)
         2. Para cada ancestro:
-           - Verificar su rango actual
            - Calcular % según rango y profundidad
-           - Crear comisión Uninivel con VN de esta orden
+           - Preparar comisión Uninivel con VN de esta orden
+        3. Insertar todas las comisiones en bloque
         
         Arquitectura: Adrian (Senior Dev) + Elena (Backend) + Giovanni (QA Financial)
         
         Args:
             session: Sesión de base de datos
             order: Orden confirmada
+            upline: Contexto ya cargado (opcional, se carga si no se proporciona)
+            raise_errors: Si True, propaga el error sin rollback (lo maneja el llamador)
         """
         try:
             from database.comissions import Commissions, BonusType, CommissionStatus
-            from database.usertreepaths import UserTreePath
-            from database.users import Users
-            from database.ranks import Ranks
-            from database.user_rank_history import UserRankHistory
             from NNProtect_new_website.modules.finance.backend.exchange_service import ExchangeService
             
-            # Porcentajes del Bono Uninivel por rango
-            UNILEVEL_BONUS_PERCENTAGES = {
-                "Visionario": [5, 8, 10],
-                "Emprendedor": [5, 8, 10, 10],
-                "Creativo": [5, 8, 10, 10, 5],
-                "Innovador": [5, 8, 10, 10, 5, 4],
-                "Embajador Transformador": [5, 8, 10, 10, 5, 4, 4, 3, 3, 0.5],
-                "Embajador Inspirador": [5, 8, 10, 10, 5, 4, 4, 3, 3, 1.0],
-                "Embajador Consciente": [5, 8, 10, 10, 5, 4, 4, 3, 3, 1.5],
-                "Embajador Solidario": [5, 8, 10, 10, 5, 4, 4, 3, 3, 2.0]
-            }
-            
             if not order.period_id:
                 print(f"   ⚠️  Orden {order.id} no tiene period_id asignado")
                 return
@@ -334,108 +384,66 @@ class PaymentService:
                 print(f"   ⚠️  Orden {order.id} no tiene VN")
                 return
 
-            # 1. Obtener todos los ancestros del comprador con su profundidad
-            ancestor_paths = session.exec(
-                sqlmodel.select(UserTreePath)
-                .where(
-                    (UserTreePath.descendant_id == order.member_id) &
-                    (UserTreePath.depth > 0)
-                )
-                .order_by(UserTreePath.depth)
-            ).all()
+            # 1. Línea ascendente con rango y país en una sola consulta
+            if upline is None:
+                upline = cls._load_upline_context(session, order)
 
-            print(f"   📊 Calculando Uninivel para {len(ancestor_paths)} ancestros del comprador...")
-            
-            commissions_created = 0
+            print(f"   📊 Calculando Uninivel para {len(upline)} ancestros del comprador...")
 
-            for ancestor_path in ancestor_paths:
-                ancestor_id = ancestor_path.ancestor_id
-                depth = ancestor_path.depth
-                
-                # 2. Obtener rango actual del ancestro en este período
-                rank_history = session.exec(
-                    sqlmodel.select(UserRankHistory)
-                    .where(
-                        (UserRankHistory.member_id == ancestor_id) &
-                        (UserRankHistory.period_id == order.period_id)
-                    )
-                    .order_by(sqlmodel.desc(UserRankHistory.rank_id))
-                ).first()
-                
-                if not rank_history:
-                    continue  # Usuario no tiene rango en este período
-                
-                # 3. Obtener información del rango
-                rank = session.exec(
-                    sqlmodel.select(Ranks).where(Ranks.id == rank_history.rank_id)
-                ).first()
-                
-                if not rank:
-                    continue
-                
-                # 4. Obtener porcentajes de Uninivel según rango
-                percentages = UNILEVEL_BONUS_PERCENTAGES.get(rank.name, [])
+            now = datetime.now(timezone.utc)
+            rows = []
+
+            for ancestor in upline:
+                depth = ancestor.depth
+
+                # 2. Porcentajes de Uninivel según rango (sin rango → sin porcentajes)
+                percentages = CommissionService.UNILEVEL_BONUS_PERCENTAGES.get(ancestor.rank_name, [])
                 
                 if not percentages:
-                    continue  # Rango sin porcentajes (ej: "Sin rango")
-                
-                # 5. Verificar si este ancestro puede recibir comisión de este nivel
-                if depth > len(percentages) and depth <= 9:
-                    continue  # Fuera del alcance del rango
+                    continue
                 
-                # 6. Obtener porcentaje según profundidad
+                # 3. Porcentaje según profundidad (nivel 10+ solo embajadores)
                 if depth <= 9:
+                    if depth > len(percentages):
+                        continue  # Fuera del alcance del rango
                     percentage = percentages[depth - 1]
-                elif depth >= 10 and len(percentages) >= 10:
-                    # Nivel 10+ para embajadores
+                elif len(percentages) >= 10:
                     percentage = percentages[9]
                 else:
                     continue
                 
-                # 7. Calcular comisión para este ancestro
-                commission_amount = order.total_vn * (percentage / 100)
-                
-                # 8. Obtener moneda del ancestro
-                ancestor_user = session.exec(
-                    sqlmodel.select(Users).where(Users.member_id == ancestor_id)
-                ).first()
-                
-                if not ancestor_user:
-                    continue
-                
-                ancestor_currency = ExchangeService.get_country_currency(
-                    ancestor_user.country_cache or "MX"
-                )
-                
-                # 9. Crear comisión Uninivel INCREMENTAL
-                commission = Commissions(
-                    member_id=ancestor_id,
-                    bonus_type=BonusType.BONO_UNINIVEL.value,
-                    source_member_id=order.member_id,
-                    source_order_id=order.id,
-                    period_id=order.period_id,
-                    level_depth=depth if depth <= 10 else 10,
-                    amount_vn=order.total_vn,
-                    currency_origin=order.currency,
-                    amount_converted=commission_amount,
-                    currency_destination=ancestor_currency,
-                    exchange_rate=1.0,
-                    status=CommissionStatus.PENDING.value,
-                    calculated_at=datetime.now(timezone.utc),
-                    notes=f"Uninivel {percentage}% - Nivel {depth} - Orden {order.id} - VN: ${order.total_vn:.2f}"
-                )
-                
-                session.add(commission)
-                commissions_created += 1
-
-            if commissions_created > 0:
-                session.flush()
-                print(f"   ✅ Uninivel: {commissions_created} comisiones creadas incrementalmente")
+                # 4. Preparar comisión Uninivel INCREMENTAL
+                rows.append({
+                    "member_id": ancestor.ancestor_id,
+                    "bonus_type": BonusType.BONO_UNINIVEL.value,
+                    "source_member_id": order.member_id,
+                    "source_order_id": order.id,
+                    "period_id": order.period_id,
+                    "level_depth": depth if depth <= 10 else 10,
+                    "amount_vn": order.total_vn,
+                    "currency_origin": order.currency,
+                    "amount_converted": order.total_vn * (percentage / 100),
+                    "currency_destination": ExchangeService.get_country_currency(
+                        ancestor.country_cache or "MX"
+                    ),
+                    "exchange_rate": 1.0,
+                    "status": CommissionStatus.PENDING.value,
+                    "calculated_at": now,
+                    "notes": f"Uninivel {percentage}% - Nivel {depth} - Orden {order.id} - VN: ${order.total_vn:.2f}"
+                })
+
+            # 5. Inserción masiva
+            if rows:
+                session.execute(sqlmodel.insert(Commissions), rows)
+                DashboardSnapshotService.invalidate({row["member_id"] for row in rows}, session)
+                print(f"   ✅ Uninivel: {len(rows)} comisiones creadas incrementalmente")
             else:
                 print(f"   ℹ️  No se generaron comisiones Uninivel (ancestros sin rango elegible)")
 
         except Exception as e:
             print(f"   ❌ Error calculando Uninivel incremental: {e}")
+            if raise_errors:
+                raise
             import traceback
             traceback.print_exc()
             # Hacer rollback para evitar transacciones inválidas
@@ -445,7 +453,13 @@ class PaymentService:
                 pass
 
     @classmethod
-    def _trigger_matching_for_ambassadors(cls, session, order: Orders) -> None:
+    def _trigger_matching_for_ambassadors(
+        cls,
+        session,
+        order: Orders,
+        upline: Optional[List[UplineContext]] = None,
+        raise_errors: bool = False
+    ) -> None:
         """
         Calcula el Bono Matching INCREMENTALMENTE para embajadores ancestros del comprador.
         
@@ -453,14 +467,14 @@ class PaymentService:
         - El Matching se calcula SOLO cuando se crea una comisión Uninivel
         - Solo se calcula para embajadores (rank_id >= 6) en la línea ascendente
         - Se aplica % del Matching sobre el Uninivel recién generado
-        - Escalable: O(embajadores en línea) en lugar de O(todos los embajadores)
+        - Reutiliza el UplineContext del Uninivel e inserta en bloque
         
         Flujo:
-        1. Buscar embajadores en la línea ascendente del comprador
-        2. Para cada embajador:
-           - Buscar comisiones Uninivel recién creadas de sus patrocinados directos
-           - Aplicar % de Matching según su rango
-           - Crear comisión Matching incremental
+        1. Cargar las comisiones Uninivel de esta orden (una consulta)
+        2. Para cada embajador de la línea ascendente:
+           - Su patrocinado directo en la línea es el ancestro un nivel abajo
+           - Aplicar % de Matching según su rango sobre el Uninivel de ese patrocinado
+        3. Insertar todas las comisiones Matching en bloque
         
         Nota: El Matching se ejecuta DESPUÉS del Uninivel porque depende de él.
         
@@ -469,149 +483,100 @@ class PaymentService:
         Args:
             session: Sesión de base de datos
             order: Orden confirmada
+            upline: Contexto ya cargado (opcional, se carga si no se proporciona)
+            raise_errors: Si True, propaga el error sin rollback (lo maneja el llamador)
         """
         try:
             from database.comissions import Commissions, BonusType, CommissionStatus
-            from database.usertreepaths import UserTreePath
-            from database.users import Users
-            from database.ranks import Ranks
-            from database.user_rank_history import UserRankHistory
             from NNProtect_new_website.modules.finance.backend.exchange_service import ExchangeService
             
-            # Porcentajes del Bono Matching por rango
-            MATCHING_BONUS_PERCENTAGES = {
-                "Embajador Transformador": [30],
-                "Embajador Inspirador": [30, 20],
-                "Embajador Consciente": [30, 20, 10],
-                "Embajador Solidario": [30, 20, 10, 5]
-            }
-            
             if not order.period_id:
                 print(f"   ⚠️  Orden {order.id} no tiene period_id asignado")
                 return
 
-            # 1. Obtener ancestros del comprador que sean embajadores (rank_id >= 6)
-            ancestor_paths = session.exec(
-                sqlmodel.select(UserTreePath)
-                .where(
-                    (UserTreePath.descendant_id == order.member_id) &
-                    (UserTreePath.depth > 0)
-                )
-            ).all()
-            
-            if not ancestor_paths:
+            if upline is None:
+                upline = cls._load_upline_context(session, order)
+
+            if not upline:
                 print(f"   ℹ️  Comprador no tiene ancestros (usuario raíz)")
                 return
 
-            print(f"   📊 Verificando {len(ancestor_paths)} ancestros para Matching...")
-            
-            commissions_created = 0
+            print(f"   📊 Verificando {len(upline)} ancestros para Matching...")
 
-            for ancestor_path in ancestor_paths:
-                ancestor_id = ancestor_path.ancestor_id
-                
-                # 2. Verificar si el ancestro es embajador (rank_id >= 6)
-                rank_history = session.exec(
-                    sqlmodel.select(UserRankHistory)
-                    .where(
-                        (UserRankHistory.member_id == ancestor_id) &
-                        (UserRankHistory.period_id == order.period_id)
-                    )
-                    .order_by(sqlmodel.desc(UserRankHistory.rank_id))
-                ).first()
-                
-                if not rank_history or rank_history.rank_id < 6:
-                    continue  # No es embajador
-                
-                # 3. Obtener información del rango
-                rank = session.exec(
-                    sqlmodel.select(Ranks).where(Ranks.id == rank_history.rank_id)
-                ).first()
-                
-                if not rank:
+            # 1. Comisiones Uninivel de ESTA orden agrupadas por miembro
+            unilevel_by_member = {}
+            for member_id, amount, currency in session.exec(
+                sqlmodel.select(
+                    Commissions.member_id,
+                    Commissions.amount_converted,
+                    Commissions.currency_destination
+                )
+                .where(
+                    (Commissions.source_order_id == order.id) &
+                    (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value) &
+                    (Commissions.status == CommissionStatus.PENDING.value)
+                )
+            ).all():
+                unilevel_by_member.setdefault(member_id, []).append((amount, currency))
+
+            # Patrocinado directo en la línea: el ancestro de profundidad depth - 1
+            upline_by_depth = {ancestor.depth: ancestor.ancestor_id for ancestor in upline}
+
+            now = datetime.now(timezone.utc)
+            rows = []
+
+            for ancestor in upline:
+                # 2. Solo embajadores (rank_id >= 6) con porcentajes de Matching
+                if not ancestor.rank_id or ancestor.rank_id < 6:
                     continue
-                
-                # 4. Obtener porcentajes de Matching según rango
-                matching_percentages = MATCHING_BONUS_PERCENTAGES.get(rank.name, [])
-                
+
+                matching_percentages = CommissionService.MATCHING_BONUS_PERCENTAGES.get(ancestor.rank_name, [])
+
                 if not matching_percentages:
-                    continue  # Rango sin Matching
-                
-                # 5. Obtener patrocinados DIRECTOS del embajador
-                direct_sponsored = session.exec(
-                    sqlmodel.select(UserTreePath.descendant_id)
-                    .where(
-                        (UserTreePath.ancestor_id == ancestor_id) &
-                        (UserTreePath.depth == 1)
-                    )
-                ).all()
-                
-                if not direct_sponsored:
                     continue
-                
-                # 6. Para cada patrocinado directo, buscar sus comisiones Uninivel de ESTA orden
-                for sponsored_id in direct_sponsored:
-                    uninivel_commissions = session.exec(
-                        sqlmodel.select(Commissions)
-                        .where(
-                            (Commissions.member_id == sponsored_id) &
-                            (Commissions.source_order_id == order.id) &
-                            (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value) &
-                            (Commissions.status == CommissionStatus.PENDING.value)
-                        )
-                    ).all()
-                    
-                    if not uninivel_commissions:
-                        continue
-                    
-                    # 7. Calcular Matching: % del Uninivel del patrocinado directo
-                    # Nivel 1 de Matching = 30% del Uninivel
-                    matching_percentage = matching_percentages[0]  # Primer nivel de Matching
-                    
-                    for uninivel_comm in uninivel_commissions:
-                        matching_amount = uninivel_comm.amount_converted * (matching_percentage / 100)
-                        
-                        # 8. Obtener moneda del embajador
-                        ancestor_user = session.exec(
-                            sqlmodel.select(Users).where(Users.member_id == ancestor_id)
-                        ).first()
-                        
-                        if not ancestor_user:
-                            continue
-                        
-                        ancestor_currency = ExchangeService.get_country_currency(
-                            ancestor_user.country_cache or "MX"
-                        )
-                        
-                        # 9. Crear comisión Matching INCREMENTAL
-                        matching_commission = Commissions(
-                            member_id=ancestor_id,
-                            bonus_type=BonusType.BONO_MATCHING.value,
-                            source_member_id=sponsored_id,
-                            source_order_id=order.id,
-                            period_id=order.period_id,
-                            level_depth=1,  # Nivel 1 de Matching
-                            amount_vn=uninivel_comm.amount_converted,
-                            currency_origin=uninivel_comm.currency_destination,
-                            amount_converted=matching_amount,
-                            currency_destination=ancestor_currency,
-                            exchange_rate=1.0,
-                            status=CommissionStatus.PENDING.value,
-                            calculated_at=datetime.now(timezone.utc),
-                            notes=f"Matching {matching_percentage}% del Uninivel de {sponsored_id} - Orden {order.id}"
-                        )
-                        
-                        session.add(matching_commission)
-                        commissions_created += 1
-
-            if commissions_created > 0:
-                session.flush()
-                print(f"   ✅ Matching: {commissions_created} comisiones creadas incrementalmente")
+
+                sponsored_id = upline_by_depth.get(ancestor.depth - 1)
+                uninivel_commissions = unilevel_by_member.get(sponsored_id)
+
+                if not uninivel_commissions:
+                    continue
+
+                # 3. Matching nivel 1: % del Uninivel del patrocinado directo
+                matching_percentage = matching_percentages[0]
+                ancestor_currency = ExchangeService.get_country_currency(
+                    ancestor.country_cache or "MX"
+                )
+
+                for amount, currency in uninivel_commissions:
+                    rows.append({
+                        "member_id": ancestor.ancestor_id,
+                        "bonus_type": BonusType.BONO_MATCHING.value,
+                        "source_member_id": sponsored_id,
+                        "source_order_id": order.id,
+                        "period_id": order.period_id,
+                        "level_depth": 1,  # Nivel 1 de Matching
+                        "amount_vn": amount,
+                        "currency_origin": currency,
+                        "amount_converted": amount * (matching_percentage / 100),
+                        "currency_destination": ancestor_currency,
+                        "exchange_rate": 1.0,
+                        "status": CommissionStatus.PENDING.value,
+                        "calculated_at": now,
+                        "notes": f"Matching {matching_percentage}% del Uninivel de {sponsored_id} - Orden {order.id}"
+                    })
+
+            # 4. Inserción masiva
+            if rows:
+                session.execute(sqlmodel.insert(Commissions), rows)
+                DashboardSnapshotService.invalidate({row["member_id"] for row in rows}, session)
+                print(f"   ✅ Matching: {len(rows)} comisiones creadas incrementalmente")
             else:
                 print(f"   ℹ️  No se generaron comisiones Matching (no hay embajadores elegibles)")
 
         except Exception as e:
             print(f"   ❌ Error calculando Matching incremental: {e}")
+            if raise_errors:
+                raise
             import traceback
             traceback.print_exc()
             # Hacer rollback para evitar transacciones inválidas
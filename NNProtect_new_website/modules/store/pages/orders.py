@@ -502,7 +502,7 @@ def orders() -> rx.Component:
 										"Siguiente",
 										rx.icon("chevron-right", size=16),
 										variant="soft",
-										disabled=OrderState.current_page == OrderState.total_pages,
+										disabled=~OrderState.has_next_page,
 										on_click=OrderState.next_page
 									),
 									spacing="2"
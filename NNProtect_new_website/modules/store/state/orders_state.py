@@ -1,24 +1,48 @@
 """
 Estado para la gestión de órdenes del usuario.
-Maneja carga, filtrado, búsqueda y paginación de órdenes.
+Maneja carga, filtrado, búsqueda y paginación (en servidor) de órdenes.
 """
 import reflex as rx
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime, timezone
 from ..backend.order_service import OrderService
 from ...auth.state.auth_state import AuthState
 
 
+# Mapeo de estados UI -> BD (constantes de módulo: no forman parte del estado sincronizado)
+STATUS_MAP = {
+    "Pendiente de pago": ["draft", "pending_payment"],
+    "Pagado / En proceso": ["payment_confirmed", "processing"],
+    "Enviado": ["shipped"],
+    "Entregado": ["delivered"],
+    "Cancelado": ["cancelled", "refunded"]
+}
+
+# Mapeo de ordenamientos UI -> OrderService.SORT_OPTIONS
+SORT_MAP = {
+    "Más reciente": "newest",
+    "Más antiguo": "oldest",
+    "Mayor monto": "amount_desc",
+    "Menor monto": "amount_asc"
+}
+
+
 class OrderState(rx.State):
     """
     Estado reactivo para gestión de órdenes del usuario.
     Sigue principios POO y arquitectura service-oriented del proyecto.
+    Filtros, ordenamiento y paginación (keyset) se resuelven en el servidor:
+    solo la página visible vive en el estado.
     """
 
-    # Lista de órdenes del usuario
+    # Página actual de órdenes del usuario
     _orders: List[Dict[str, Any]] = []
     _orders_loaded: bool = False
 
+    # Cursor de inicio de cada página visitada (índice 0 = primera página)
+    _page_cursors: List[Optional[Tuple[Any, int]]] = [None]
+    _next_cursor: Optional[Tuple[Any, int]] = None
+
     # Filtros activos
     selected_status: str = "Todas"
     search_query: str = ""
@@ -28,6 +52,7 @@ class OrderState(rx.State):
     current_page: int = 1
     items_per_page: int = 6
     total_orders: int = 0
+    has_next_page: bool = False
 
     # Estados de carga
     is_loading: bool = False
@@ -39,29 +64,9 @@ class OrderState(rx.State):
     @rx.var
     def orders(self) -> List[Dict[str, Any]]:
         """
-        Propiedad computada que retorna órdenes filtradas y paginadas.
-        Aplica filtros, búsqueda, ordenamiento y paginación.
+        Órdenes de la página actual (ya filtradas y ordenadas por el servidor).
         """
-        if not self._orders:
-            return []
-
-        # Aplicar filtrado por estado
-        filtered_orders = self._filter_by_status(self._orders, self.selected_status)
-
-        # Aplicar búsqueda por número de orden
-        if self.search_query.strip():
-            filtered_orders = self._filter_by_search(filtered_orders, self.search_query)
-
-        # Aplicar ordenamiento
-        sorted_orders = self._apply_sorting(filtered_orders, self.sort_by)
-
-        # Actualizar total de órdenes después de filtros
-        self.total_orders = len(sorted_orders)
-
-        # Aplicar paginación
-        paginated_orders = self._apply_pagination(sorted_orders, self.current_page, self.items_per_page)
-
-        return paginated_orders
+        return self._orders
 
     @rx.var
     def total_pages(self) -> int:
@@ -117,39 +122,19 @@ class OrderState(rx.State):
     @rx.event
     def load_orders(self):
         """
-        Carga todas las órdenes del usuario desde la base de datos.
+        Carga la primera página de órdenes con los filtros actuales.
         """
-        if self.user_member_id is None:
-            self.error_message = "Usuario no identificado"
-            return
-
-        self.is_loading = True
-        self.error_message = ""
-
-        try:
-            # Cargar órdenes usando el servicio
-            self._orders = OrderService.get_user_orders(self.user_member_id)
-            self._orders_loaded = True
-            self.total_orders = len(self._orders)
-
-            print(f"✅ Cargadas {len(self._orders)} órdenes para member_id={self.user_member_id}")
-
-        except Exception as e:
-            self.error_message = f"Error cargando órdenes: {str(e)}"
-            print(f"❌ {self.error_message}")
-            import traceback
-            traceback.print_exc()
-
-        finally:
-            self.is_loading = False
+        self._page_cursors = [None]
+        self.current_page = 1
+        self._load_page()
 
     @rx.event
     def filter_by_status(self, status: str):
         """
-        Cambia el filtro de estado y resetea a la primera página.
+        Cambia el filtro de estado y recarga desde la primera página.
         """
         self.selected_status = status
-        self.current_page = 1  # Resetear a primera página al cambiar filtro
+        self.load_orders()
 
     @rx.event
     def search_orders(self, query: str):
@@ -157,7 +142,7 @@ class OrderState(rx.State):
         Busca órdenes por número de orden.
         """
         self.search_query = query
-        self.current_page = 1  # Resetear a primera página al buscar
+        self.load_orders()
 
     @rx.event
     def sort_orders(self, sort_option: str):
@@ -165,85 +150,62 @@ class OrderState(rx.State):
         Cambia el ordenamiento de las órdenes.
         """
         self.sort_by = sort_option
-        self.current_page = 1  # Resetear a primera página al cambiar ordenamiento
-
-    @rx.event
-    def go_to_page(self, page_number: int):
-        """
-        Navega a una página específica.
-        """
-        if 1 <= page_number <= self.total_pages:
-            self.current_page = page_number
+        self.load_orders()
 
     @rx.event
     def next_page(self):
         """Avanza a la siguiente página"""
-        if self.current_page < self.total_pages:
+        if self.has_next_page and self._next_cursor is not None:
+            self._page_cursors = self._page_cursors[:self.current_page] + [self._next_cursor]
             self.current_page += 1
+            self._load_page()
 
     @rx.event
     def previous_page(self):
         """Retrocede a la página anterior"""
         if self.current_page > 1:
             self.current_page -= 1
+            self._load_page()
 
     # Métodos helper privados (no reactivos)
 
-    def _filter_by_status(self, orders: List[Dict[str, Any]], status: str):
+    def _load_page(self):
         """
-        Filtra órdenes por estado.
-        Mapea estados del UI a estados de la BD.
+        Carga la página current_page desde el servidor usando su cursor de inicio.
         """
-        if status == "Todas":
-            return orders
+        if self.user_member_id is None:
+            self.error_message = "Usuario no identificado"
+            return
 
-        # Mapeo de estados UI -> BD
-        status_map = {
-            "Pendiente de pago": ["draft", "pending_payment"],
-            "Pagado / En proceso": ["payment_confirmed", "processing"],
-            "Enviado": ["shipped"],
-            "Entregado": ["delivered"],
-            "Cancelado": ["cancelled", "refunded"]
-        }
+        self.is_loading = True
+        self.error_message = ""
 
-        db_statuses = status_map.get(status, [])
-        if not db_statuses:
-            return orders
+        try:
+            page = OrderService.get_user_orders_page(
+                self.user_member_id,
+                limit=self.items_per_page,
+                cursor=self._page_cursors[self.current_page - 1],
+                statuses=STATUS_MAP.get(self.selected_status),
+                order_number=self.search_query,
+                sort=SORT_MAP.get(self.sort_by, "newest")
+            )
+
+            self._orders = page["orders"]
+            self._next_cursor = page["next_cursor"]
+            self.has_next_page = page["next_cursor"] is not None
+            self.total_orders = page["total"]
+            self._orders_loaded = True
 
-        return [order for order in orders if order["status_raw"] in db_statuses]
+            print(f"✅ Cargada página {self.current_page} ({len(self._orders)} de {self.total_orders} órdenes) para member_id={self.user_member_id}")
 
-    def _filter_by_search(self, orders: List[Dict[str, Any]], query: str):
-        """
-        Filtra órdenes por número de orden (búsqueda parcial).
-        """
-        query_lower = query.lower().strip()
-        return [
-            order for order in orders
-            if query_lower in str(order["order_number"]).lower()
-        ]
-
-    def _apply_sorting(self, orders: List[Dict[str, Any]], sort_option: str):
-        """
-        Ordena órdenes según el criterio seleccionado.
-        """
-        if sort_option == "Más reciente":
-            return sorted(orders, key=lambda x: x["created_at_raw"], reverse=True)
-        elif sort_option == "Más antiguo":
-            return sorted(orders, key=lambda x: x["created_at_raw"])
-        elif sort_option == "Mayor monto":
-            return sorted(orders, key=lambda x: x["total"], reverse=True)
-        elif sort_option == "Menor monto":
-            return sorted(orders, key=lambda x: x["total"])
-        else:
-            return orders
+        except Exception as e:
+            self.error_message = f"Error cargando órdenes: {str(e)}"
+            print(f"❌ {self.error_message}")
+            import traceback
+            traceback.print_exc()
 
-    def _apply_pagination(self, orders: List[Dict[str, Any]], page: int, per_page: int):
-        """
-        Aplica paginación a la lista de órdenes.
-        """
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        return orders[start_idx:end_idx]
+        finally:
+            self.is_loading = False
 
 
 class OrderDetailState(rx.State):
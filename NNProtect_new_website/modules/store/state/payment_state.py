@@ -6,6 +6,7 @@ from datetime import datetime, timezone
 
 from database.orders import Orders, OrderStatus
 from database.order_items import OrderItems
+from database.query_profiler import QueryProfiler
 
 
 from .store_state import CountProducts
@@ -42,6 +43,7 @@ class PaymentState(rx.State):
         self.error_message = ""
 
     @rx.event
+    @QueryProfiler.profiled("PaymentState.confirm_payment")
     async def confirm_payment(self):
         """
         Confirma el pago y crea la orden con sus items.
@@ -222,36 +224,8 @@ class PaymentState(rx.State):
                         self.success_message = payment_result["message"]
                         self.order_result = payment_result
                         
-                        print("\n📊 Paso 7: Actualizando UnilevelReports para usuario y ancestros...")
-                        try:
-                            from NNProtect_new_website.modules.network.backend.mlm_user_manager import MLMUserManager
-                            from database.periods import Periods
-                            from sqlmodel import desc
-                            
-                            # Obtener período actual
-                            current_period = session.exec(
-                                sqlmodel.select(Periods).order_by(desc(Periods.starts_on)).limit(1)
-                            ).first()
-                            
-                            if not current_period:
-                                print("   ⚠️  No se encontró período actual")
-                            else:
-                                print(f"   ✓ Período actual: {current_period.name} (ID={current_period.id})")
-                                print(f"   🔄 Llamando a update_unilevel_report_for_order...")
-                                
-                                # Llamar al método que actualiza PV del comprador Y PVG de todos los ancestros por nivel
-                                MLMUserManager.update_unilevel_report_for_order(
-                                    order_member_id=member_id,
-                                    period_id=current_period.id
-                                )
-                                
-                                print("   ✅ UnilevelReports actualizado para usuario y todos los ancestros")
-                                    
-                        except Exception as e_unilevel:
-                            print(f"   ⚠️  Error actualizando UnilevelReports: {e_unilevel}")
-                            import traceback
-                            traceback.print_exc()
-                            # No fallar el proceso si esto falla
+                        # 📊 PV/PVG, UnilevelReports y comisiones los procesa el worker del outbox
+                        # (PaymentService registra el evento en la misma transacción del pago)
                         
                         print("\n   🧹 Limpiando carrito...")
                         # Limpiar carrito
@@ -0,0 +1,44 @@
+"""
+Callbacks diferidos hasta el commit de la sesión.
+
+Las cachés de proceso (tasas, snapshots del dashboard, volúmenes, períodos) deben
+invalidarse DESPUÉS del commit: si se invalidan con la transacción abierta, otro
+request puede recargarlas con los datos previos y dejarlas obsoletas hasta el TTL.
+"""
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_CALLBACKS_KEY = "after_commit_callbacks"
+
+
+def run_after_commit(session, callback: Callable[[], None]) -> None:
+    """
+    Ejecuta callback cuando la transacción de la sesión haga commit; se descarta si
+    termina en rollback. Sin sesión o sin transacción abierta se ejecuta de inmediato.
+
+    Args:
+        session: Sesión de base de datos (o None)
+        callback: Función sin argumentos
+    """
+    if session is None or not session.in_transaction():
+        callback()
+        return
+    session.info.setdefault(_CALLBACKS_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_callbacks(session) -> None:
+    # after_commit también se emite al liberar un savepoint (begin_nested): esperar a la raíz
+    if session.in_nested_transaction():
+        return
+    for callback in session.info.pop(_CALLBACKS_KEY, []):
+        callback()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_callbacks(session, transaction) -> None:
+    # Fin de la transacción raíz sin commit (rollback/close): los cambios no se publicaron
+    if transaction.parent is None:
+        session.info.pop(_CALLBACKS_KEY, None)
@@ -0,0 +1,17 @@
+"""
+Utilidad para INSERT ... ON CONFLICT portable entre PostgreSQL (producción) y SQLite (tests).
+"""
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(session, model):
+    """
+    Retorna el insert del dialecto de la sesión, que expone on_conflict_do_update/do_nothing
+    y la pseudo-tabla excluded.
+
+    Args:
+        session: Sesión de base de datos
+        model: Modelo (tabla) destino
+    """
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
@@ -18,6 +18,15 @@ def get_mexico_date() -> datetime:
     """Alias para compatibilidad."""
     return get_mexico_now()
 
+def to_naive_utc(value: datetime) -> datetime:
+    """
+    Normaliza a datetime naive en UTC para comparar fechas con y sin tzinfo
+    (p. ej. columnas timestamptz contra get_mexico_now()).
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 def get_mexico_datetime_naive() -> datetime:
     """
     Retorna datetime México Central sin tzinfo (naive).
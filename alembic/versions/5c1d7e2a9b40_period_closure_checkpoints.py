@@ -0,0 +1,49 @@
+"""period closure checkpoints
+
+Revision ID: 5c1d7e2a9b40
+Revises: 38145bb69fdb
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1d7e2a9b40'
+down_revision: Union[str, Sequence[str], None] = '38145bb69fdb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('period_closure_checkpoints',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('period_id', sa.Integer(), nullable=False),
+    sa.Column('stage', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('last_member_id', sa.Integer(), nullable=False),
+    sa.Column('chunks_done', sa.Integer(), nullable=False),
+    sa.Column('deposited_count', sa.Integer(), nullable=False),
+    sa.Column('deposited_total', sa.Float(), nullable=False),
+    sa.Column('failed_count', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['period_id'], ['periods.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('period_closure_checkpoints', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_period_closure_checkpoints_period_id'), ['period_id'], unique=True)
+        batch_op.create_index(batch_op.f('ix_period_closure_checkpoints_stage'), ['stage'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('period_closure_checkpoints', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_period_closure_checkpoints_stage'))
+        batch_op.drop_index(batch_op.f('ix_period_closure_checkpoints_period_id'))
+
+    op.drop_table('period_closure_checkpoints')
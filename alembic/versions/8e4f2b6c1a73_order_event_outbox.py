@@ -0,0 +1,51 @@
+"""order event outbox
+
+Revision ID: 8e4f2b6c1a73
+Revises: 5c1d7e2a9b40
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4f2b6c1a73'
+down_revision: Union[str, Sequence[str], None] = '5c1d7e2a9b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('order_event_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(length=1000), nullable=True),
+    sa.Column('available_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('order_id', 'event_type', name='uq_outbox_order_event')
+    )
+    with op.batch_alter_table('order_event_outbox', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_order_event_outbox_order_id'), ['order_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_order_event_outbox_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_order_event_outbox_available_at'), ['available_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('order_event_outbox', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_order_event_outbox_available_at'))
+        batch_op.drop_index(batch_op.f('ix_order_event_outbox_status'))
+        batch_op.drop_index(batch_op.f('ix_order_event_outbox_order_id'))
+
+    op.drop_table('order_event_outbox')
@@ -0,0 +1,44 @@
+"""network registration counts
+
+Revision ID: d4a9c2f7e611
+Revises: b7d3e9a4c215
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9c2f7e611'
+down_revision: Union[str, Sequence[str], None] = 'b7d3e9a4c215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('network_registration_counts',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('registration_date', sa.Date(), nullable=False),
+    sa.Column('registrations', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['users.member_id'], ),
+    sa.PrimaryKeyConstraint('ancestor_id', 'registration_date')
+    )
+
+    # Backfill desde la closure table (misma agregación que RegistrationCounterService.rebuild)
+    op.execute("""
+        INSERT INTO network_registration_counts (ancestor_id, registration_date, registrations)
+        SELECT utp.ancestor_id, DATE(u.created_at), COUNT(*)
+        FROM usertreepath utp
+        JOIN users u ON u.member_id = utp.descendant_id
+        WHERE utp.depth > 0
+        GROUP BY utp.ancestor_id, DATE(u.created_at)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('network_registration_counts')
@@ -0,0 +1,30 @@
+"""cashback status expires index
+
+Revision ID: e2b6f8a4c907
+Revises: d4a9c2f7e611
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b6f8a4c907'
+down_revision: Union[str, Sequence[str], None] = 'd4a9c2f7e611'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('cashback', schema=None) as batch_op:
+        batch_op.create_index('idx_cb_status_expires', ['status', 'expires_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('cashback', schema=None) as batch_op:
+        batch_op.drop_index('idx_cb_status_expires')
@@ -0,0 +1,56 @@
+"""unilevel report unique user period
+
+Revision ID: f7c3a1d9b254
+Revises: e2b6f8a4c907
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7c3a1d9b254'
+down_revision: Union[str, Sequence[str], None] = 'e2b6f8a4c907'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+VOLUME_COLUMNS = ["pv", "vn", "pvg_total", "vng_total"] + [
+    f"{prefix}_{bucket}"
+    for bucket in [str(level) for level in range(1, 10)] + ["10_plus"]
+    for prefix in ("pvg", "vng")
+]
+
+DUPLICATES = (
+    "SELECT user_id, period_id, MIN(id) AS keep_id, "
+    + ", ".join(f"SUM({column}) AS {column}" for column in VOLUME_COLUMNS)
+    + " FROM unilevelreports GROUP BY user_id, period_id HAVING COUNT(*) > 1"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Las órdenes concurrentes pudieron repartir volumen en filas duplicadas:
+    # se suman en la fila más antigua y se eliminan las demás
+    op.execute(
+        f"UPDATE unilevelreports SET "
+        + ", ".join(f"{column} = dup.{column}" for column in VOLUME_COLUMNS)
+        + f" FROM ({DUPLICATES}) AS dup WHERE unilevelreports.id = dup.keep_id"
+    )
+    op.execute(
+        f"DELETE FROM unilevelreports WHERE id IN ("
+        f"SELECT u.id FROM unilevelreports u JOIN ({DUPLICATES}) AS dup "
+        f"ON u.user_id = dup.user_id AND u.period_id = dup.period_id AND u.id <> dup.keep_id)"
+    )
+
+    with op.batch_alter_table('unilevelreports', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_unilevel_report_user_period', ['user_id', 'period_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('unilevelreports', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_unilevel_report_user_period', type_='unique')
@@ -25,6 +25,9 @@ from .wallet import Wallets, WalletTransactions, WalletWithdrawals, WalletStatus
 from .cashback import Cashback, CashbackUsage, CashbackStatus
 from .loyalty_points import LoyaltyPoints, LoyaltyPointsHistory, LoyaltyRewards, LoyaltyStatus, LoyaltyEventType, RewardType, RewardStatus
 from .travel_campaigns import TravelCampaigns, NNTravelPoints, NNTravelPointsHistory, CampaignStatus, TravelEventType
+from .period_closures import PeriodClosureCheckpoints, ClosureStage
+from .order_outbox import OrderEventOutbox, OutboxEventType, OutboxStatus
+from .network_registration_counts import NetworkRegistrationCounts
 
 # Inicialización de base de datos
 from .db_init import initialize_database
@@ -59,4 +62,10 @@ __all__ = [
     # Travel campaigns system
     "TravelCampaigns", "NNTravelPoints", "NNTravelPointsHistory",
     "CampaignStatus", "TravelEventType",
+    # Monthly closure checkpoints
+    "PeriodClosureCheckpoints", "ClosureStage",
+    # Order events outbox
+    "OrderEventOutbox", "OutboxEventType", "OutboxStatus",
+    # Network registration rollup
+    "NetworkRegistrationCounts",
 ]
\ No newline at end of file
@@ -31,6 +31,7 @@ class Cashback(SQLModel, table=True):
         Index('idx_cb_member_period', 'member_id', 'period_id'),
         Index('idx_cb_status', 'status'),
         Index('idx_cb_expires', 'expires_at'),
+        Index('idx_cb_status_expires', 'status', 'expires_at', 'id'),  # Expiración por lotes
         Index('idx_cb_generated_order', 'generated_by_order_id'),
         Index('idx_cb_applied_order', 'applied_to_order_id'),
     )
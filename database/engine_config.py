@@ -1,5 +1,5 @@
 """
-🔧 Configuración del Engine de SQLAlchemy con Pool Optimizado
+🔧 Registro único del Engine de SQLAlchemy con Pool Optimizado
 
 Este módulo configura el engine de base de datos con parámetros de pool
 optimizados para prevenir errores de "SSL connection has been closed unexpectedly".
@@ -9,59 +9,282 @@ inesperadamente causando reintentos y delays de 50-60 segundos.
 
 La solución: Pool de conexiones con pre-ping para detectar conexiones muertas
 antes de usarlas.
+
+Un solo engine por URL y por proceso: rx.session(), rx.Model.get_db_engine() y
+Session(get_configured_engine()) comparten el mismo pool, que expone métricas
+(conexiones en uso, overflow, espera, latencia de checkout y fallos de pre-ping)
+para dimensionarlo con datos reales.
 """
 
-from sqlalchemy import create_engine, event
-from sqlalchemy.pool import QueuePool, Pool
+import os
+import time
+from threading import Lock, local
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
 from NNProtect_new_website.utils.environment import Environment
+from database.query_profiler import QueryProfiler
+
+
+class PoolMetrics:
+    """
+    Métricas acumuladas de un pool de conexiones.
+    Principio KISS: contadores en memoria protegidos por un Lock.
+    """
+
+    # Límites superiores (ms) del histograma de latencia de checkout
+    LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Reinicia todos los contadores."""
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_errors = 0
+            self.connections_opened = 0
+            self.pre_ping_failures = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+            self.latency_seconds_total = 0.0
+            self.latency_histogram = [0] * (len(self.LATENCY_BUCKETS_MS) + 1)
+
+    def record_checkout(self, wait_seconds: float, latency_seconds: float) -> None:
+        """Registra un checkout: espera en la cola del pool y latencia total (incluye pre-ping)."""
+        latency_ms = latency_seconds * 1000
+        bucket = next(
+            (index for index, limit in enumerate(self.LATENCY_BUCKETS_MS) if latency_ms <= limit),
+            len(self.LATENCY_BUCKETS_MS)
+        )
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+            self.latency_seconds_total += latency_seconds
+            self.latency_histogram[bucket] += 1
+
+    def record_checkout_error(self) -> None:
+        with self._lock:
+            self.checkout_errors += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connections_opened += 1
+
+    def record_pre_ping_failure(self) -> None:
+        with self._lock:
+            self.pre_ping_failures += 1
 
+    def snapshot(self) -> Dict:
+        """Copia de los contadores con promedios en milisegundos."""
+        with self._lock:
+            checkouts = self.checkouts
+            return {
+                "checkouts": checkouts,
+                "checkout_errors": self.checkout_errors,
+                "connections_opened": self.connections_opened,
+                "pre_ping_failures": self.pre_ping_failures,
+                "wait_ms_avg": round(self.wait_seconds_total * 1000 / checkouts, 3) if checkouts else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+                "checkout_latency_ms_avg": round(self.latency_seconds_total * 1000 / checkouts, 3) if checkouts else 0.0,
+                "checkout_latency_histogram": {
+                    **{f"<={limit}ms": count for limit, count in zip(self.LATENCY_BUCKETS_MS, self.latency_histogram)},
+                    f">{self.LATENCY_BUCKETS_MS[-1]}ms": self.latency_histogram[-1],
+                },
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool que mide la espera por una conexión (cola del pool o apertura de una nueva)
+    y la latencia total de cada checkout.
+    """
+
+    def __init__(self, *args, metrics: Optional[PoolMetrics] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics or PoolMetrics()
+        self._timing = local()
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        # engine.dispose() recrea el pool: se conservan las métricas acumuladas
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
 
-# Variable global para almacenar el engine configurado
-_configured_engine = None
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self._timing.wait = time.perf_counter() - started
 
+    def connect(self):
+        started = time.perf_counter()
+        self._timing.wait = 0.0
+        try:
+            connection = super().connect()
+        except Exception:
+            self.metrics.record_checkout_error()
+            raise
+        self.metrics.record_checkout(self._timing.wait, time.perf_counter() - started)
+        return connection
 
-def get_configured_engine():
+
+class EngineRegistry:
     """
-    Retorna un engine de SQLAlchemy con pool optimizado.
-    
-    Configuración:
-    - pool_size=10: Mantener 10 conexiones persistentes
-    - max_overflow=20: Permitir hasta 30 conexiones totales
-    - pool_pre_ping=True: 🔥 CRÍTICO - Testear conexión antes de usar
-    - pool_recycle=3600: Reciclar conexiones cada hora
+    Registro de engines por URL: un solo pool por proceso para toda la app.
+    Principio DRY: toda sesión (rx.session() o Session(engine)) pasa por aquí.
     """
-    global _configured_engine
-    
-    if _configured_engine is None:
-        DATABASE_URL = Environment.get_database_url()
-        
-        _configured_engine = create_engine(
-            DATABASE_URL,
-            poolclass=QueuePool,
-            pool_size=10,              # Mantener 10 conexiones persistentes
-            max_overflow=20,           # Permitir hasta 30 conexiones en picos
+
+    # Dimensionamiento del pool (sobrescribible por variables de entorno)
+    POOL_SIZE = 5
+    MAX_OVERFLOW = 10
+    POOL_TIMEOUT_SECONDS = 30
+    POOL_RECYCLE_SECONDS = 3600
+
+    _engines: Dict[str, Engine] = {}
+    _lock = Lock()
+
+    @classmethod
+    def _pool_settings(cls) -> Dict[str, int]:
+        return {
+            "pool_size": int(os.getenv("DB_POOL_SIZE", cls.POOL_SIZE)),
+            "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", cls.MAX_OVERFLOW)),
+            "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", cls.POOL_TIMEOUT_SECONDS)),
+            "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", cls.POOL_RECYCLE_SECONDS)),
+        }
+
+    @classmethod
+    def get_engine(cls, url: Optional[str] = None) -> Engine:
+        """
+        Retorna el engine compartido de la URL (la del entorno por defecto), creándolo una sola vez.
+        """
+        url = url or Environment.get_database_url()
+
+        engine = cls._engines.get(url)
+        if engine is not None:
+            return engine
+
+        with cls._lock:
+            engine = cls._engines.get(url)
+            if engine is None:
+                engine = cls._create_engine(url)
+                cls._engines[url] = engine
+                cls._share_with_reflex(url, engine)
+        return engine
+
+    @classmethod
+    def _create_engine(cls, url: str) -> Engine:
+        settings = cls._pool_settings()
+
+        # Configurar argumentos de conexión según el tipo de base de datos
+        connect_args = {}
+        if url.startswith("postgresql"):
+            connect_args["connect_timeout"] = 10  # Timeout de 10s para conexión inicial
+        elif url.startswith("sqlite"):
+            connect_args["check_same_thread"] = False
+
+        metrics = PoolMetrics()
+        engine = create_engine(
+            url,
+            poolclass=InstrumentedQueuePool,
             pool_pre_ping=True,        # 🔥 CRÍTICO: Testear antes de usar
-            pool_recycle=3600,         # Reciclar cada hora
             echo=False,                # No mostrar queries SQL
-            connect_args={
-                "connect_timeout": 10  # Timeout de 10s para conexión inicial
-            }
+            connect_args=connect_args,
+            **settings
         )
-        
-        # Event listener para logging de pool
-        @event.listens_for(_configured_engine, "connect")
+        engine.pool.metrics = metrics
+
+        @event.listens_for(engine, "connect")
         def receive_connect(dbapi_conn, connection_record):
-            print("🔌 Nueva conexión a BD establecida")
-        
-        @event.listens_for(_configured_engine, "checkout")
-        def receive_checkout(dbapi_conn, connection_record, connection_proxy):
-            # Se ejecuta cuando se obtiene una conexión del pool
-            pass
-        
+            metrics.record_connect()
+
+        @event.listens_for(engine, "invalidate")
+        def receive_invalidate(dbapi_conn, connection_record, exception):
+            # Un pre-ping fallido invalida la conexión con InvalidatePoolError (DisconnectionError)
+            if isinstance(exception, exc.DisconnectionError):
+                metrics.record_pre_ping_failure()
+
+        # Perfilador de queries por request (opt-in: DB_QUERY_PROFILING=1)
+        QueryProfiler.install(engine)
+
         print("✅ Database engine configurado con pool optimizado")
-        print(f"   • Pool size: 10 conexiones")
-        print(f"   • Max overflow: 20 conexiones")
+        print(f"   • Pool size: {settings['pool_size']} conexiones")
+        print(f"   • Max overflow: {settings['max_overflow']} conexiones")
         print(f"   • Pre-ping: Habilitado ✅")
-        print(f"   • Pool recycle: 3600s (1 hora)")
-    
-    return _configured_engine
+        print(f"   • Pool recycle: {settings['pool_recycle']}s")
+
+        return engine
+
+    @staticmethod
+    def _share_with_reflex(url: str, engine: Engine) -> None:
+        """Registra el engine en reflex para que rx.session() use el mismo pool."""
+        try:
+            import reflex.model
+            reflex.model._ENGINE[url] = engine
+        except (ImportError, AttributeError):
+            pass
+
+    @classmethod
+    def get_pool_metrics(cls, url: Optional[str] = None) -> Dict:
+        """
+        Métricas del pool: estado actual (en uso, overflow, disponibles) más contadores acumulados.
+
+        Returns:
+            Dict vacío si el engine de la URL aún no se ha creado
+        """
+        engine = cls._engines.get(url or Environment.get_database_url())
+        if engine is None:
+            return {}
+
+        pool = engine.pool
+        return {
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            **pool.metrics.snapshot(),
+        }
+
+    @classmethod
+    def urls(cls) -> List[str]:
+        return list(cls._engines)
+
+    @classmethod
+    def dispose(cls, url: Optional[str] = None) -> None:
+        """Cierra y olvida el engine de la URL (o todos si url es None)."""
+        with cls._lock:
+            urls = [url] if url else list(cls._engines)
+            for engine_url in urls:
+                engine = cls._engines.pop(engine_url, None)
+                if engine is not None:
+                    engine.dispose()
+                    try:
+                        import reflex.model
+                        if reflex.model._ENGINE.get(engine_url) is engine:
+                            del reflex.model._ENGINE[engine_url]
+                    except (ImportError, AttributeError):
+                        pass
+
+
+def get_configured_engine(url: Optional[str] = None) -> Engine:
+    """
+    Retorna el engine compartido de SQLAlchemy con pool optimizado.
+
+    Configuración (ver EngineRegistry, sobrescribible con DB_POOL_SIZE / DB_MAX_OVERFLOW /
+    DB_POOL_TIMEOUT / DB_POOL_RECYCLE):
+    - pool_size=5: Conexiones persistentes
+    - max_overflow=10: Conexiones adicionales en picos
+    - pool_pre_ping=True: 🔥 CRÍTICO - Testear conexión antes de usar
+    - pool_recycle=3600: Reciclar conexiones cada hora
+    """
+    return EngineRegistry.get_engine(url)
+
+
+# Alias usado por scripts de verificación
+get_engine = get_configured_engine
@@ -0,0 +1,25 @@
+import reflex as rx
+from sqlmodel import SQLModel, Field
+from datetime import date
+
+
+class NetworkRegistrationCounts(SQLModel, table=True):
+    """
+    Rollup de inscripciones por (ancestro, día).
+    Cada registro cuenta los descendientes (depth > 0) de ancestor_id registrados
+    en registration_date (fecha UTC de users.created_at).
+
+    Reglas críticas:
+    - Se incrementa en la misma transacción que crea los caminos en UserTreePath
+    - Reconstruible desde usertreepath + users (RegistrationCounterService.rebuild)
+    """
+    __tablename__ = "network_registration_counts"
+
+    # Clave primaria compuesta: rango por ancestor_id → suma por índice
+    ancestor_id: int = Field(primary_key=True, foreign_key="users.member_id")
+    registration_date: date = Field(primary_key=True)
+
+    registrations: int = Field(default=0)
+
+    def __repr__(self):
+        return f"<NetworkRegistrationCounts(ancestor_id={self.ancestor_id}, date={self.registration_date}, registrations={self.registrations})>"
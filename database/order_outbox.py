@@ -0,0 +1,61 @@
+import reflex as rx
+from sqlmodel import SQLModel, Field, func, UniqueConstraint
+from datetime import datetime, timezone
+from enum import Enum
+
+
+class OutboxEventType(Enum):
+    """Tipos de evento del outbox de órdenes"""
+    PAYMENT_CONFIRMED = "payment_confirmed"   # PV/PVG, unilevel_report, rangos y comisiones
+
+
+class OutboxStatus(Enum):
+    """Estados de un evento del outbox"""
+    PENDING = "pending"         # Pendiente (o reintento programado en available_at)
+    PROCESSING = "processing"   # Tomado por un worker
+    DONE = "done"               # Procesado
+    FAILED = "failed"           # Agotó reintentos
+
+
+class OrderEventOutbox(SQLModel, table=True):
+    """
+    Outbox transaccional de eventos de órdenes.
+    Se escribe en la MISMA transacción que confirma el pago; un worker en segundo
+    plano lo drena y ejecuta el trabajo post-pago fuera del request.
+
+    Reglas críticas:
+    - Un evento por (order_id, event_type): idempotencia por orden
+    - Reintentos con backoff usando attempts + available_at
+    """
+    __tablename__ = "order_event_outbox"
+
+    __table_args__ = (
+        UniqueConstraint('order_id', 'event_type', name='uq_outbox_order_event'),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+
+    # Evento
+    order_id: int = Field(foreign_key="orders.id", index=True)
+    event_type: str = Field(default=OutboxEventType.PAYMENT_CONFIRMED.value, max_length=50)
+
+    # Procesamiento
+    status: str = Field(default=OutboxStatus.PENDING.value, max_length=20, index=True)
+    attempts: int = Field(default=0)
+    last_error: str | None = Field(default=None, max_length=1000)
+    available_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column_kwargs={"server_default": func.now()},
+        index=True
+    )
+    locked_at: datetime | None = Field(default=None)
+
+    # Timestamps
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column_kwargs={"server_default": func.now()}
+    )
+    processed_at: datetime | None = Field(default=None)
+
+    def __repr__(self):
+        return f"<OrderEventOutbox(order_id={self.order_id}, event={self.event_type}, status={self.status}, attempts={self.attempts})>"
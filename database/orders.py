@@ -1,5 +1,6 @@
 import reflex as rx
 from sqlmodel import SQLModel, Field, func
+from sqlalchemy import Index
 from datetime import datetime, timezone
 from enum import Enum
 
@@ -22,6 +23,11 @@ class Orders(SQLModel, table=True):
     Una orden puede contener múltiples productos (OrderItems).
     Reemplaza completamente la tabla Transactions.
     """
+    __table_args__ = (
+        # Historial paginado por keyset: (member_id, created_at, id)
+        Index('idx_orders_member_created', 'member_id', 'created_at', 'id'),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
 
     # Comprador
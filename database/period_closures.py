@@ -0,0 +1,52 @@
+import reflex as rx
+from sqlmodel import SQLModel, Field, func
+from datetime import datetime, timezone
+from enum import Enum
+
+
+class ClosureStage(Enum):
+    """Etapas del cierre mensual"""
+    PAYOUT = "payout"           # Depositando comisiones por lotes de miembros
+    COMPLETED = "completed"     # Período cerrado, nuevo período creado y usuarios reseteados
+
+
+class PeriodClosureCheckpoints(SQLModel, table=True):
+    """
+    Checkpoint del cierre mensual por período.
+    Permite reanudar un cierre interrumpido desde el último lote confirmado.
+
+    Reglas críticas:
+    - Un registro por período (period_id único)
+    - last_member_id: último member_id cuyo lote fue pagado y confirmado
+    - Idempotencia por comisión: solo se depositan comisiones PENDING
+    """
+    __tablename__ = "period_closure_checkpoints"
+
+    id: int | None = Field(default=None, primary_key=True)
+
+    # Período que se está cerrando
+    period_id: int = Field(foreign_key="periods.id", unique=True, index=True)
+
+    # Progreso
+    stage: str = Field(default=ClosureStage.PAYOUT.value, max_length=20, index=True)
+    last_member_id: int = Field(default=0)
+    chunks_done: int = Field(default=0)
+
+    # Acumulados de depósitos
+    deposited_count: int = Field(default=0)
+    deposited_total: float = Field(default=0.0)
+    failed_count: int = Field(default=0)
+
+    # Timestamps
+    started_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column_kwargs={"server_default": func.now()}
+    )
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column_kwargs={"server_default": func.now()}
+    )
+    completed_at: datetime | None = Field(default=None)
+
+    def __repr__(self):
+        return f"<PeriodClosureCheckpoint(period_id={self.period_id}, stage={self.stage}, last_member_id={self.last_member_id})>"
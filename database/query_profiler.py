@@ -0,0 +1,307 @@
+"""
+📊 Perfilador de queries por request (opt-in)
+
+Cuenta statements y tiempo total de BD por handler de Reflex o llamada a servicio
+y conserva las huellas (fingerprints) de los statements más lentos, usando los
+eventos before/after_cursor_execute del engine compartido (database.engine_config).
+
+Activación: variable de entorno DB_QUERY_PROFILING=1 o QueryProfiler.enable().
+Desactivado, cada statement solo paga la verificación de un booleano.
+
+Uso:
+    @QueryProfiler.profiled("NetworkReportsState.load_registration_counts")
+    def handler(...): ...
+
+    with QueryProfiler.track("payment.process_wallet_payment"):
+        ...
+
+Cada scope cerrado emite una línea de log estructurada:
+    📊 DB_PROFILE {"scope": "...", "statements": 12, "db_ms": 35.2, "duration_ms": 80.1}
+"""
+
+import functools
+import inspect
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class ProfileScope:
+    """Contadores de un scope (handler o servicio) en curso."""
+
+    __slots__ = ("name", "parent", "statements", "db_seconds", "started")
+
+    def __init__(self, name: str, parent: Optional["ProfileScope"] = None):
+        self.name = name
+        self.parent = parent
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.started = time.perf_counter()
+
+
+class QueryProfiler:
+    """
+    Perfilador de queries por scope y registro de statements lentos.
+    Principio KISS: estado de clase protegido por un Lock; el scope activo vive en un ContextVar
+    (aislado por hilo y por tarea asyncio).
+    """
+
+    enabled: bool = os.getenv("DB_QUERY_PROFILING", "").lower() in ("1", "true", "yes")
+
+    # Umbral para registrar un statement como lento y tamaño del top-N
+    SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+    TOP_N = 20
+    MAX_FINGERPRINTS = 500
+
+    _current: ContextVar[Optional[ProfileScope]] = ContextVar("db_profile_scope", default=None)
+    _STARTED_KEY = "query_profiler_started"  # conn.info: inicio del statement en curso
+    _lock = Lock()
+    _scopes: Dict[str, Dict] = {}
+    _slow_statements: Dict[str, Dict] = {}
+
+    # Normalización de statements: literales y listas IN colapsadas
+    _STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+    _NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+    _PARAM_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*\)")
+    _WHITESPACE = re.compile(r"\s+")
+
+    @classmethod
+    def enable(cls) -> None:
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls) -> None:
+        cls.enabled = False
+
+    @classmethod
+    def reset(cls) -> None:
+        """Olvida los agregados por scope y el registro de statements lentos."""
+        with cls._lock:
+            cls._scopes.clear()
+            cls._slow_statements.clear()
+
+    # ------------------------------------------------------------------ engine hooks
+
+    @classmethod
+    def install(cls, engine: Engine) -> None:
+        """Registra los listeners de cursor en el engine (idempotente)."""
+        if not event.contains(engine, "before_cursor_execute", cls._before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", cls._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", cls._after_cursor_execute)
+            event.listen(engine, "handle_error", cls._handle_error)
+
+    @classmethod
+    def _before_cursor_execute(cls, conn, cursor, statement, parameters, context, executemany):
+        if cls.enabled:
+            conn.info[cls._STARTED_KEY] = time.perf_counter()
+
+    @classmethod
+    def _after_cursor_execute(cls, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop(cls._STARTED_KEY, None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+
+        scope = cls._current.get()
+        if scope is not None:
+            scope.statements += 1
+            scope.db_seconds += elapsed
+
+        if elapsed * 1000 >= cls.SLOW_QUERY_MS:
+            cls._record_slow_statement(statement, elapsed, scope.name if scope else None)
+
+    @classmethod
+    def _handle_error(cls, exception_context) -> None:
+        # Un statement fallido no llega a after_cursor_execute: descartar su inicio
+        if exception_context.connection is not None:
+            exception_context.connection.info.pop(cls._STARTED_KEY, None)
+
+    @classmethod
+    def fingerprint(cls, statement: str) -> str:
+        """Statement normalizado: sin literales, listas de parámetros colapsadas y espacios simples."""
+        normalized = cls._STRING_LITERAL.sub("?", statement)
+        normalized = cls._NUMBER_LITERAL.sub("?", normalized)
+        normalized = cls._PARAM_LIST.sub("(?, ...)", normalized)
+        return cls._WHITESPACE.sub(" ", normalized).strip()
+
+    @classmethod
+    def _record_slow_statement(cls, statement: str, elapsed: float, scope_name: Optional[str]) -> None:
+        fingerprint = cls.fingerprint(statement)
+        elapsed_ms = elapsed * 1000
+
+        with cls._lock:
+            entry = cls._slow_statements.get(fingerprint)
+            if entry is None:
+                if len(cls._slow_statements) >= cls.MAX_FINGERPRINTS:
+                    # Descartar la huella menos relevante para acotar memoria
+                    weakest = min(cls._slow_statements, key=lambda key: cls._slow_statements[key]["max_ms"])
+                    del cls._slow_statements[weakest]
+                entry = cls._slow_statements[fingerprint] = {
+                    "fingerprint": fingerprint, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_scope": None
+                }
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["last_scope"] = scope_name
+
+    # ------------------------------------------------------------------ scopes
+
+    @classmethod
+    def _open(cls, name: str) -> ProfileScope:
+        scope = ProfileScope(name, cls._current.get())
+        cls._current.set(scope)
+        return scope
+
+    @classmethod
+    def _close(cls, scope: ProfileScope) -> Dict:
+        cls._current.set(scope.parent)
+
+        # Los statements de un scope anidado también cuentan para su padre
+        if scope.parent is not None:
+            scope.parent.statements += scope.statements
+            scope.parent.db_seconds += scope.db_seconds
+
+        record = {
+            "scope": scope.name,
+            "statements": scope.statements,
+            "db_ms": round(scope.db_seconds * 1000, 3),
+            "duration_ms": round((time.perf_counter() - scope.started) * 1000, 3),
+        }
+
+        with cls._lock:
+            totals = cls._scopes.setdefault(scope.name, {
+                "scope": scope.name, "calls": 0, "statements": 0, "db_ms": 0.0,
+                "max_statements": 0, "max_db_ms": 0.0,
+            })
+            totals["calls"] += 1
+            totals["statements"] += record["statements"]
+            totals["db_ms"] += record["db_ms"]
+            totals["max_statements"] = max(totals["max_statements"], record["statements"])
+            totals["max_db_ms"] = max(totals["max_db_ms"], record["db_ms"])
+
+        print(f"📊 DB_PROFILE {json.dumps(record, ensure_ascii=False)}")
+        return record
+
+    @classmethod
+    @contextmanager
+    def track(cls, name: str) -> Iterator[Optional[ProfileScope]]:
+        """
+        Perfila el bloque: cuenta statements y tiempo de BD y emite la línea DB_PROFILE al salir.
+        Sin perfilado activo no hace nada (yield None).
+        """
+        if not cls.enabled:
+            yield None
+            return
+
+        scope = cls._open(name)
+        try:
+            yield scope
+        finally:
+            cls._close(scope)
+
+    @classmethod
+    def profiled(cls, name: Optional[str] = None) -> Callable:
+        """
+        Decorador para handlers de Reflex y servicios (funciones, corrutinas y generadores,
+        sync o async). En generadores el scope solo está activo mientras corre el handler,
+        no entre yields.
+        """
+        def decorator(fn: Callable) -> Callable:
+            scope_name = name or fn.__qualname__
+
+            if inspect.isasyncgenfunction(fn):
+                @functools.wraps(fn)
+                async def async_gen_wrapper(*args, **kwargs):
+                    if not cls.enabled:
+                        async for item in fn(*args, **kwargs):
+                            yield item
+                        return
+
+                    generator = fn(*args, **kwargs)
+                    scope = ProfileScope(scope_name, cls._current.get())
+                    try:
+                        while True:
+                            cls._current.set(scope)
+                            try:
+                                item = await generator.__anext__()
+                            except StopAsyncIteration:
+                                break
+                            finally:
+                                cls._current.set(scope.parent)
+                            yield item
+                    finally:
+                        cls._close(scope)
+                return async_gen_wrapper
+
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with cls.track(scope_name):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            if inspect.isgeneratorfunction(fn):
+                @functools.wraps(fn)
+                def gen_wrapper(*args, **kwargs):
+                    if not cls.enabled:
+                        yield from fn(*args, **kwargs)
+                        return
+
+                    generator = fn(*args, **kwargs)
+                    scope = ProfileScope(scope_name, cls._current.get())
+                    try:
+                        while True:
+                            cls._current.set(scope)
+                            try:
+                                item = next(generator)
+                            except StopIteration:
+                                break
+                            finally:
+                                cls._current.set(scope.parent)
+                            yield item
+                    finally:
+                        cls._close(scope)
+                return gen_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with cls.track(scope_name):
+                    return fn(*args, **kwargs)
+            return wrapper
+
+        return decorator
+
+    # ------------------------------------------------------------------ reporte
+
+    @classmethod
+    def get_report(cls, top_n: Optional[int] = None) -> Dict:
+        """
+        Agregados por scope (ordenados por tiempo de BD) y top-N de statements lentos
+        (ordenados por tiempo máximo).
+        """
+        top_n = top_n or cls.TOP_N
+        with cls._lock:
+            scopes: List[Dict] = [
+                {**totals, "db_ms": round(totals["db_ms"], 3),
+                 "avg_statements": round(totals["statements"] / totals["calls"], 2)}
+                for totals in cls._scopes.values()
+            ]
+            slow: List[Dict] = [
+                {**entry, "total_ms": round(entry["total_ms"], 3), "max_ms": round(entry["max_ms"], 3)}
+                for entry in cls._slow_statements.values()
+            ]
+
+        return {
+            "enabled": cls.enabled,
+            "slow_query_ms": cls.SLOW_QUERY_MS,
+            "scopes": sorted(scopes, key=lambda row: row["db_ms"], reverse=True),
+            "slow_statements": sorted(slow, key=lambda row: row["max_ms"], reverse=True)[:top_n],
+        }
@@ -1,11 +1,17 @@
 import reflex as rx
 from sqlmodel import SQLModel, Field, ForeignKey
+from sqlalchemy import UniqueConstraint
 
 class UnilevelReports(SQLModel, table=True):
     """
     Tabla de reportes unilevel.
     Contiene información de reportes unilevel asociados a usuarios.
+    Un reporte por (usuario, período).
     """
+    __table_args__ = (
+        UniqueConstraint('user_id', 'period_id', name='uq_unilevel_report_user_period'),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
 
     # Vinculo con usuario
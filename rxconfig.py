@@ -1,7 +1,6 @@
 import reflex as rx
+import reflex.model
 from NNProtect_new_website.utils.environment import Environment
-from sqlalchemy import create_engine
-from sqlalchemy.pool import QueuePool
 
 # Obtener configuración según el entorno (Principio DRY)
 DATABASE_URL = Environment.get_database_url()
@@ -13,44 +12,23 @@ config = rx.Config(
     db_url=DATABASE_URL
 )
 
-# 🔧 FIX: Monkey-patch del método get_db_engine para usar pool optimizado
-_original_get_db_engine = rx.Model.get_db_engine
+# 🔧 FIX: Un solo engine por proceso. rx.session() usa reflex.model.get_engine y
+# rx.Model.get_db_engine; ambos se redirigen al registro de database.engine_config
+# para compartir el pool (y sus métricas) con Session(get_configured_engine()).
 
 
-def _get_db_engine_with_pool():
+def _get_registered_engine(url=None):
     """
-    Sobrescribe get_db_engine para retornar un engine con pool optimizado.
-    
+    Sobrescribe get_engine para retornar el engine compartido con pool optimizado.
+
     Esto previene errores de "SSL connection has been closed unexpectedly"
+    y evita abrir un pool independiente por cada punto de entrada.
     """
-    # Verificar si ya existe un engine configurado
-    if hasattr(rx.Model, '_engine') and rx.Model._engine is not None:
-        return rx.Model._engine
-    
-    # Crear engine con pool optimizado
-    # Configurar argumentos de conexión según el tipo de base de datos
-    connect_args = {}
-    if DATABASE_URL.startswith("postgresql"):
-        connect_args["connect_timeout"] = 10
-    
-    engine = create_engine(
-        DATABASE_URL,
-        poolclass=QueuePool,
-        pool_size=10,              # Mantener 10 conexiones persistentes
-        max_overflow=20,           # Permitir hasta 30 conexiones en picos
-        pool_pre_ping=True,        # 🔥 CRÍTICO: Testear antes de usar
-        pool_recycle=3600,         # Reciclar cada hora
-        echo=False,                # No mostrar queries SQL
-        connect_args=connect_args
-    )
-    
-    # Guardar el engine en rx.Model
-    rx.Model._engine = engine
-    
-    print("✅ Database engine configurado con pool optimizado")
-    
-    return engine
+    # Import diferido: database importa los modelos de reflex
+    from database.engine_config import get_configured_engine
+    return get_configured_engine(url or DATABASE_URL)
 
 
 # Aplicar monkey-patch
-rx.Model.get_db_engine = staticmethod(_get_db_engine_with_pool)
\ No newline at end of file
+reflex.model.get_engine = _get_registered_engine
+rx.Model.get_db_engine = staticmethod(_get_registered_engine)
@@ -59,6 +59,7 @@ from database.ranks import Ranks
 
 # Imports de servicios
 from NNProtect_new_website.modules.network.backend.period_service import PeriodService
+from NNProtect_new_website.modules.network.backend.genealogy_service import GenealogyService
 
 
 class MLMSeeder2x2:
@@ -88,6 +89,9 @@ class MLMSeeder2x2:
         self.created_rank_history = 0
         self.created_orders = 0
         self.created_tree_paths = 0
+        
+        # Genealogía pendiente: [(member_id, sponsor_id)] en orden BFS
+        self.pending_tree_pairs = []
     
     def run(self) -> bool:
         """Ejecuta el proceso completo de seeding."""
@@ -213,10 +217,12 @@ class MLMSeeder2x2:
                     
                     # Commit en lotes para performance
                     if self.created_users % self.COMMIT_BATCH_SIZE == 0:
+                        self._flush_tree_paths()
                         self.session.commit()
                         print(f"   [{self.created_users}/{self.TOTAL_USERS}] Guardado lote...")
             
             # Flush final antes de commit
+            self._flush_tree_paths()
             self.session.flush()
             print(f"\n✅ {self.created_users} usuarios creados")
             return True
@@ -227,6 +233,16 @@ class MLMSeeder2x2:
             traceback.print_exc()
             return False
     
+    def _flush_tree_paths(self):
+        """Inserta la genealogía del lote pendiente con pocos statements."""
+        if not self.pending_tree_pairs:
+            return
+        
+        self.created_tree_paths += GenealogyService.add_members_to_tree(
+            self.session, self.pending_tree_pairs
+        )
+        self.pending_tree_pairs = []
+    
     def _create_complete_user(
         self,
         member_id: int,
@@ -294,42 +310,8 @@ class MLMSeeder2x2:
         )
         self.session.add(user_address)
         
-        # 4. USERTREEPATHS
-        if sponsor_id is None:
-            # Usuario raíz: solo auto-referencia (sin sponsor_id ya que es opcional)
-            self_path = UserTreePath(
-                ancestor_id=member_id,
-                descendant_id=member_id,
-                depth=0
-            )
-            self.session.add(self_path)
-            self.created_tree_paths += 1
-        else:
-            # Usuario con sponsor: copiar árbol del sponsor + agregar sponsor directo
-            # Auto-referencia
-            self_path = UserTreePath(
-                sponsor_id=sponsor_id,
-                ancestor_id=member_id,
-                descendant_id=member_id,
-                depth=0
-            )
-            self.session.add(self_path)
-            self.created_tree_paths += 1
-            
-            # Copiar ancestros del sponsor
-            sponsor_ancestors = self.session.exec(
-                select(UserTreePath).where(UserTreePath.descendant_id == sponsor_id)
-            ).all()
-            
-            for ancestor_path in sponsor_ancestors:
-                new_path = UserTreePath(
-                    sponsor_id=sponsor_id,
-                    ancestor_id=ancestor_path.ancestor_id,
-                    descendant_id=member_id,
-                    depth=ancestor_path.depth + 1
-                )
-                self.session.add(new_path)
-                self.created_tree_paths += 1
+        # 4. USERTREEPATHS (se insertan por lote en _flush_tree_paths)
+        self.pending_tree_pairs.append((member_id, sponsor_id))
         
         # 5. WALLETS
         currency = self._get_currency(country)
@@ -5,6 +5,7 @@ Verificar el PVG real del usuario 1
 import reflex as rx
 import sqlmodel
 from database.users import Users
+from NNProtect_new_website.modules.network.backend.rank_service import RankService
 
 print("\n" + "="*80)
 print("🔍 Verificar PVG del Usuario 1")
@@ -20,6 +21,14 @@ with rx.session() as session:
         print(f"📊 PV (Personal): {user.pv_cache:,}")
         print(f"📊 PVG (Grupal): {user.pvg_cache:,}")
         print(f"📊 VN: {user.vn_cache:,}")
+
+        # PVG real del período actual (una sola query agregada) para detectar drift del cache
+        current_period = RankService._get_current_period(session)
+        if current_period:
+            real_pvg = RankService.get_pvg(session, user.member_id, current_period.id)
+            print(f"📊 PVG real ({current_period.name}): {real_pvg:,}")
+            if real_pvg != user.pvg_cache:
+                print(f"⚠️  Drift en pvg_cache: {user.pvg_cache - real_pvg:+,}")
         print()
     else:
         print("❌ Usuario no encontrado")
@@ -8,7 +8,6 @@ def process_uninivel_for_period():
     import reflex as rx
     import sqlmodel
     from database.periods import Periods
-    from database.users import Users
     from NNProtect_new_website.utils.timezone_mx import get_mexico_now
     from NNProtect_new_website.modules.network.backend.commission_service import CommissionService
     
@@ -33,53 +32,22 @@ def process_uninivel_for_period():
         
         print(f"\n📅 Período: {current_period.name} (ID={current_period.id})")
         
-        # 2. Obtener todos los usuarios activos
-        users = session.exec(
-            sqlmodel.select(Users)
-            .where(Users.active == True)  # Solo usuarios activos
-        ).all()
-        
-        print(f"\n� Usuarios activos: {len(users)}")
-        
-        if len(users) == 0:
-            print("⚠️  No hay usuarios activos")
-            return
-        
-        # 3. Calcular comisiones Uninivel para cada usuario
-        print(f"\n💰 Calculando comisiones Uninivel...")
-        
-        processed = 0
-        errors = 0
-        total_commissions = 0
-        
-        for user in users:
-            try:
-                # Usar CommissionService.calculate_unilevel_bonus
-                # Este método calcula Uninivel basado en el VN de la red
-                commission_ids = CommissionService.calculate_unilevel_bonus(
-                    session=session,
-                    member_id=user.member_id,
-                    period_id=current_period.id
-                )
-                
-                if commission_ids and len(commission_ids) > 0:
-                    processed += 1
-                    total_commissions += len(commission_ids)
-                    print(f"   ✅ {user.full_name or user.email}: {len(commission_ids)} comisiones")
-                
-            except Exception as e:
-                errors += 1
-                print(f"   ❌ {user.full_name or user.email}: {str(e)}")
-        
-        # 4. Commit cambios
+        # 2. Calcular comisiones Uninivel de toda la red en una sola pasada (solo usuarios activos)
+        print(f"\n💰 Calculando comisiones Uninivel (modo masivo)...")
+
+        commission_ids = CommissionService.calculate_unilevel_for_period(
+            session=session,
+            period_id=current_period.id,
+            active_only=True
+        )
+
+        # 3. Commit cambios
         session.commit()
         
         print(f"\n📊 RESUMEN:")
-        print(f"   Usuarios con comisiones: {processed}/{len(users)}")
-        print(f"   Total comisiones creadas: {total_commissions}")
-        print(f"   Errores: {errors}")
+        print(f"   Total comisiones creadas: {len(commission_ids)}")
         
-        # 5. Verificar comisiones creadas
+        # 4. Verificar comisiones creadas
         from database.comissions import Commissions, BonusType
         
         total_uninivel = session.exec(
@@ -102,7 +70,7 @@ def process_uninivel_for_period():
         print(f"   Total: ${total_uninivel:,.2f}")
         print(f"   Cantidad: {count} comisiones")
         
-        # 6. Mostrar detalle del usuario principal (member_id=1)
+        # 5. Mostrar detalle del usuario principal (member_id=1)
         user_uninivel = session.exec(
             sqlmodel.select(sqlmodel.func.sum(Commissions.amount_converted))
             .where(
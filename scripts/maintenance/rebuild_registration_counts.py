@@ -0,0 +1,28 @@
+"""
+Script para reconstruir la tabla network_registration_counts.
+La tabla se mantiene de forma incremental al crear la genealogía de cada
+miembro; este script la recalcula desde usertreepath + users para reconciliar.
+
+Uso:
+    python -m scripts.maintenance.rebuild_registration_counts
+"""
+
+
+def rebuild_registration_counts():
+    import reflex as rx
+    from NNProtect_new_website.modules.network.backend.registration_counter_service import RegistrationCounterService
+
+    print("="*70)
+    print("RECONSTRUCCIÓN: network_registration_counts")
+    print("="*70)
+
+    with rx.session() as session:
+        written = RegistrationCounterService.rebuild(session)
+        session.commit()
+
+        print(f"\n📊 RESUMEN:")
+        print(f"   Contadores escritos: {written}")
+
+
+if __name__ == "__main__":
+    rebuild_registration_counts()
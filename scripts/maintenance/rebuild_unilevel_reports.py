@@ -0,0 +1,54 @@
+"""
+Script para reconstruir la tabla unilevel_report de un período.
+La tabla se mantiene de forma incremental en cada orden pagada; este script
+la recalcula desde las órdenes para reconciliar diferencias.
+
+Uso:
+    python -m scripts.maintenance.rebuild_unilevel_reports [period_id]
+    (sin period_id reconstruye el período actual)
+"""
+
+import sys
+
+
+def rebuild_unilevel_reports(period_id=None):
+    import reflex as rx
+    import sqlmodel
+    from database.periods import Periods
+    from NNProtect_new_website.utils.timezone_mx import get_mexico_now
+    from NNProtect_new_website.modules.network.backend.mlm_user_manager import MLMUserManager
+
+    print("="*70)
+    print("RECONSTRUCCIÓN: unilevel_report")
+    print("="*70)
+
+    with rx.session() as session:
+        # 1. Resolver período
+        if period_id is None:
+            now = get_mexico_now()
+            period = session.exec(
+                sqlmodel.select(Periods)
+                .where(
+                    (Periods.starts_on <= now) &
+                    (Periods.ends_on >= now)
+                )
+            ).first()
+        else:
+            period = session.get(Periods, period_id)
+
+        if not period:
+            print("❌ Período no encontrado")
+            return
+
+        print(f"\n📅 Período: {period.name} (ID={period.id})")
+
+        # 2. Reconstruir y confirmar
+        written = MLMUserManager.rebuild_unilevel_reports(session, period.id)
+        session.commit()
+
+        print(f"\n📊 RESUMEN:")
+        print(f"   Reportes escritos: {written}")
+
+
+if __name__ == "__main__":
+    rebuild_unilevel_reports(int(sys.argv[1]) if len(sys.argv) > 1 else None)
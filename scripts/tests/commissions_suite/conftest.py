@@ -12,6 +12,7 @@ import os
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Tuple, Optional
 from sqlmodel import Session, create_engine, SQLModel, select
+from sqlalchemy import event
 from sqlalchemy.pool import StaticPool
 
 # Agregar path del proyecto
@@ -32,6 +33,11 @@ from database.wallet import Wallets
 from database.exchange_rates import ExchangeRates
 
 from NNProtect_new_website.modules.network.backend.genealogy_service import GenealogyService
+from NNProtect_new_website.modules.network.backend.reference_data_cache import ReferenceDataCache
+from NNProtect_new_website.modules.finance.backend.exchange_service import ExchangeService
+from NNProtect_new_website.modules.network.backend.dashboard_snapshot_service import DashboardSnapshotService
+from NNProtect_new_website.modules.network.backend.mlm_user_manager import MLMUserManager
+from NNProtect_new_website.utils.timezone_mx import get_mexico_now
 
 
 # ==================== DATABASE SETUP ====================
@@ -48,6 +54,15 @@ def engine():
         poolclass=StaticPool,
     )
 
+    # pysqlite no emite BEGIN propio: sin esto los SAVEPOINT de cada test no aíslan
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
     # Crear todas las tablas
     SQLModel.metadata.create_all(engine)
 
@@ -65,7 +80,15 @@ def db_session(engine):
     """
     connection = engine.connect()
     transaction = connection.begin()
-    session = Session(bind=connection)
+    # create_savepoint: un session.rollback() del código bajo prueba solo revierte
+    # hasta el savepoint y conserva los fixtures del test
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+
+    # Rangos/período/tasas/snapshots/volúmenes en caché de proceso pertenecen a tests anteriores
+    ReferenceDataCache.invalidate()
+    ExchangeService.invalidate_rates()
+    DashboardSnapshotService.invalidate_all()
+    MLMUserManager.invalidate_all_period_volumes()
 
     yield session
 
@@ -75,6 +98,24 @@ def db_session(engine):
     connection.close()
 
 
+class NoQuerySession:
+    """Sesión que falla si se consulta: prueba que el dato salió de una caché en memoria."""
+
+    def exec(self, *args, **kwargs):
+        raise AssertionError("El dato en caché no debería consultar la BD")
+
+
+@pytest.fixture
+def no_query_session():
+    """
+    Sesión que falla en cualquier consulta.
+
+    Uso:
+        assert Service.get_cached(no_query_session, ...) == valor_previo
+    """
+    return NoQuerySession()
+
+
 # ==================== RANK FIXTURES ====================
 
 @pytest.fixture(scope="session")
@@ -139,6 +180,25 @@ def test_period_current(db_session):
     return period
 
 
+@pytest.fixture
+def test_period_open(db_session):
+    """
+    Crea período abierto que contiene la fecha actual (get_mexico_now() ± 1 día).
+    Requerido por lo que resuelve el período activo (comisiones instantáneas, Alcance, cachés).
+    """
+    now = get_mexico_now()
+    period = Periods(
+        name="Test Period Actual",
+        starts_on=now - timedelta(days=1),
+        ends_on=now + timedelta(days=1),
+        closed_at=None
+    )
+    db_session.add(period)
+    db_session.flush()
+
+    return period
+
+
 @pytest.fixture
 def test_period_closed(db_session):
     """
@@ -210,6 +270,28 @@ def create_test_user(db_session):
     return _create_user
 
 
+@pytest.fixture
+def assign_rank(db_session):
+    """
+    Factory fixture para asignar un rango (nueva fila en UserRankHistory).
+
+    Uso:
+        assign_rank(user_a.member_id, ranks["Visionario"].id)
+    """
+    def _assign_rank(member_id: int, rank_id: int, period_id: Optional[int] = None) -> UserRankHistory:
+        rank_history = UserRankHistory(
+            member_id=member_id,
+            rank_id=rank_id,
+            achieved_on=datetime.now(timezone.utc),
+            period_id=period_id
+        )
+        db_session.add(rank_history)
+        db_session.flush()
+        return rank_history
+
+    return _assign_rank
+
+
 @pytest.fixture
 def test_network_simple(create_test_user):
     """
@@ -328,6 +410,47 @@ def test_product_dna_60(db_session):
     return product
 
 
+@pytest.fixture
+def create_regular_product(db_session):
+    """
+    Factory fixture para productos regulares (no kit) con todos los campos obligatorios.
+    Mismo PV/VN en los tres países.
+
+    Uso:
+        product = create_regular_product(pv=500, vn=1000)
+    """
+    def _create_product(
+        pv: int = 1000,
+        vn: float = 1000,
+        sku: str = "REGULAR-TEST",
+        product_name: str = "Producto Regular (Test)"
+    ) -> Products:
+        product = Products(
+            SKU=sku,
+            product_name=product_name,
+            active_ingredient="Test",
+            quantity="60 cápsulas",
+            presentation="cápsulas",
+            type="suplemento",
+            pv_mx=pv, pv_usa=pv, pv_colombia=pv,
+            vn_mx=vn, vn_usa=vn, vn_colombia=vn,
+            price_mx=1500, price_usa=80, price_colombia=300000,
+            public_mx=2000, public_usa=110, public_colombia=400000,
+            is_new=False
+        )
+        db_session.add(product)
+        db_session.flush()
+        return product
+
+    return _create_product
+
+
+@pytest.fixture
+def regular_product(create_regular_product):
+    """Producto regular (PV=1,000, VN=1,000). Los módulos que necesitan otro volumen lo sobrescriben."""
+    return create_regular_product()
+
+
 # ==================== ORDER FIXTURES ====================
 
 @pytest.fixture
@@ -0,0 +1,89 @@
+"""
+Tests Unitarios - Expiración masiva de cashback
+
+Objetivo: Validar que CashbackService.expire_old_cashbacks expira con UPDATE ... RETURNING
+solo los cashbacks AVAILABLE vencidos, tanto en un solo statement como por lotes,
+y que envía (cashback_id, member_id) de cada lote al registro de auditoría.
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from datetime import datetime, timezone, timedelta
+from sqlmodel import select
+
+from database.cashback import Cashback, CashbackStatus
+from database.orders import Orders
+from NNProtect_new_website.modules.network.backend.cashback_service import CashbackService
+
+
+@pytest.fixture
+def cashbacks(db_session, test_network_simple, test_period_current):
+    """
+    5 cashbacks vencidos AVAILABLE, 1 vencido ya USED y 1 vigente.
+    """
+    member_id = test_network_simple['A'].member_id
+    order = Orders(member_id=member_id, country="Mexico", currency="MXN")
+    db_session.add(order)
+    db_session.flush()
+
+    now = datetime.now(timezone.utc)
+    rows = [(CashbackStatus.AVAILABLE, now - timedelta(days=1))] * 5 + [
+        (CashbackStatus.USED, now - timedelta(days=1)),
+        (CashbackStatus.AVAILABLE, now + timedelta(days=10)),
+    ]
+
+    created = []
+    for status, expires_at in rows:
+        cashback = Cashback(
+            member_id=member_id,
+            period_id=test_period_current.id,
+            generated_by_order_id=order.id,
+            pv_accumulated=2930,
+            discount_amount=100.0,
+            currency="MXN",
+            issued_at=now - timedelta(days=20),
+            expires_at=expires_at,
+            status=status.value
+        )
+        db_session.add(cashback)
+        created.append(cashback)
+    db_session.flush()
+    return created
+
+
+def _statuses(db_session) -> dict:
+    db_session.expire_all()
+    return {cashback.id: cashback.status for cashback in db_session.exec(select(Cashback)).all()}
+
+
+class TestCashbackExpiry:
+    """
+    Suite de tests para la expiración masiva de cashback.
+    """
+
+    @pytest.mark.parametrize("chunk_size, expected_batches", [(None, [5]), (2, [2, 2, 1])])
+    def test_expires_only_available_past_due(self, db_session, cashbacks, chunk_size, expected_batches):
+        """
+        Escenario:
+            5 vencidos AVAILABLE, 1 vencido USED, 1 vigente
+
+        Esperado:
+            - Se expiran exactamente los 5 vencidos AVAILABLE ✅
+            - Auditoría recibe lotes de (id, member_id) del tamaño esperado ✅
+            - USED y vigente no cambian ✅
+        """
+        batches = []
+        expired = CashbackService.expire_old_cashbacks(db_session, chunk_size=chunk_size, on_expired=batches.append)
+
+        assert expired == 5
+        assert [len(batch) for batch in batches] == expected_batches
+
+        expired_ids = sorted(cashback_id for batch in batches for cashback_id, _ in batch)
+        assert expired_ids == sorted(cashback.id for cashback in cashbacks[:5])
+        assert {member_id for batch in batches for _, member_id in batch} == {cashbacks[0].member_id}
+
+        statuses = _statuses(db_session)
+        assert all(statuses[cashback_id] == CashbackStatus.EXPIRED.value for cashback_id in expired_ids)
+        assert statuses[cashbacks[5].id] == CashbackStatus.USED.value
+        assert statuses[cashbacks[6].id] == CashbackStatus.AVAILABLE.value
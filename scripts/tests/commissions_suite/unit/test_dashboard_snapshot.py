@@ -0,0 +1,84 @@
+"""
+Tests Unitarios - Snapshot del dashboard
+
+Objetivo: Validar que DashboardSnapshotService calcula PVG, progreso de rango
+y totales por tipo de bono en una consulta, y que la caché por miembro se
+invalida al cambiar sus comisiones.
+
+Reglas de Negocio:
+- Proyección mensual = Uninivel + Matching + Alcance del período activo
+- PVG = 0 (usuario reseteado) → proyección $0
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+
+from database.comissions import Commissions, BonusType
+from NNProtect_new_website.modules.network.backend.dashboard_snapshot_service import DashboardSnapshotService
+
+
+def _add_commission(db_session, member_id: int, period_id: int, bonus_type: str, amount: float):
+    db_session.add(Commissions(
+        member_id=member_id,
+        bonus_type=bonus_type,
+        period_id=period_id,
+        amount_vn=amount,
+        currency_origin="MXN",
+        amount_converted=amount,
+        currency_destination="MXN"
+    ))
+    db_session.flush()
+
+
+class TestDashboardSnapshot:
+    """
+    Suite de tests para DashboardSnapshotService.
+    """
+
+    def test_snapshot_totals_and_progress(self, db_session, ranks, create_test_user, test_period_open):
+        """
+        Escenario:
+            Usuario con PVG 1,000 "Sin rango"; Uninivel 100 + 50, Matching 30,
+            Alcance 1,500 y Directo 200 en el período
+
+        Esperado:
+            - Totales agrupados por tipo de bono ✅
+            - Proyección = Uninivel + Matching + Alcance (sin Directo) ✅
+            - Progreso hacia el rango 2 ✅
+        """
+        user = create_test_user(member_id=2000, pvg_cache=1000)
+        for bonus_type, amount in (
+            (BonusType.BONO_UNINIVEL.value, 100.0),
+            (BonusType.BONO_UNINIVEL.value, 50.0),
+            (BonusType.BONO_MATCHING.value, 30.0),
+            (BonusType.BONO_ALCANCE.value, 1500.0),
+            (BonusType.BONO_DIRECTO.value, 200.0),
+        ):
+            _add_commission(db_session, user.member_id, test_period_open.id, bonus_type, amount)
+
+        snapshot = DashboardSnapshotService.get_snapshot(db_session, user.member_id)
+
+        assert snapshot.earnings_by_type[BonusType.BONO_UNINIVEL.value] == pytest.approx(150.0)
+        assert snapshot.estimated_monthly_earnings == pytest.approx(1680.0)
+        assert snapshot.current_rank_id == 1
+        next_rank = next(rank for rank in ranks.values() if rank.id == 2)
+        assert snapshot.next_rank_pvg == next_rank.pvg_required
+        assert snapshot.rank_progress_percentage == int(1000 / next_rank.pvg_required * 100)
+
+    def test_cache_hit_and_invalidation(self, db_session, ranks, create_test_user, test_period_open, no_query_session):
+        """
+        Esperado:
+            - Segunda lectura sin consultar la BD ✅
+            - Tras invalidate, la nueva comisión aparece ✅
+        """
+        user = create_test_user(member_id=2001, pvg_cache=500)
+        _add_commission(db_session, user.member_id, test_period_open.id, BonusType.BONO_UNINIVEL.value, 100.0)
+
+        first = DashboardSnapshotService.get_snapshot(db_session, user.member_id)
+        assert DashboardSnapshotService.get_snapshot(no_query_session, user.member_id) is first
+
+        _add_commission(db_session, user.member_id, test_period_open.id, BonusType.BONO_MATCHING.value, 40.0)
+        DashboardSnapshotService.invalidate([user.member_id])
+
+        assert DashboardSnapshotService.get_snapshot(db_session, user.member_id).estimated_monthly_earnings == pytest.approx(140.0)
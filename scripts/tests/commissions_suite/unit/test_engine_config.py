@@ -0,0 +1,75 @@
+"""
+Tests Unitarios - Registro único de engines y métricas del pool
+
+Objetivo: Validar que EngineRegistry crea un solo engine por URL, lo comparte con
+reflex (rx.session()) y que el pool instrumentado reporta conexiones en uso,
+checkouts, histograma de latencia y fallos de pre-ping.
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+import reflex.model
+from sqlalchemy import text
+
+from database.engine_config import EngineRegistry, get_configured_engine
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'registry.db'}"
+    yield url
+    EngineRegistry.dispose(url)
+
+
+class TestEngineRegistry:
+    """
+    Suite de tests para el registro de engines y su telemetría.
+    """
+
+    def test_single_engine_shared_with_reflex(self, db_url):
+        """
+        Esperado:
+            - Llamadas repetidas devuelven el mismo engine ✅
+            - reflex.model._ENGINE apunta al mismo engine (rx.session() comparte el pool) ✅
+            - dispose lo retira de ambos registros ✅
+        """
+        engine = get_configured_engine(db_url)
+
+        assert get_configured_engine(db_url) is engine
+        assert reflex.model._ENGINE[db_url] is engine
+
+        EngineRegistry.dispose(db_url)
+        assert db_url not in EngineRegistry.urls()
+        assert db_url not in reflex.model._ENGINE
+
+    def test_pool_metrics_track_checkouts_and_pre_ping_failures(self, db_url, monkeypatch):
+        """
+        Escenario:
+            2 conexiones abiertas a la vez; luego un checkout cuyo pre-ping falla
+
+        Esperado:
+            - checked_out = 2 mientras están abiertas, 0 al cerrarlas ✅
+            - checkouts e histograma cuentan cada checkout ✅
+            - El pre-ping fallido se cuenta y la conexión se reabre ✅
+        """
+        engine = get_configured_engine(db_url)
+
+        first, second = engine.connect(), engine.connect()
+        assert EngineRegistry.get_pool_metrics(db_url)["checked_out"] == 2
+        first.close()
+        second.close()
+
+        metrics = EngineRegistry.get_pool_metrics(db_url)
+        assert metrics["checked_out"] == 0
+        assert metrics["checkouts"] == 2
+        assert sum(metrics["checkout_latency_histogram"].values()) == 2
+
+        monkeypatch.setattr(engine.dialect, "do_ping", lambda dbapi_connection: False)
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT 1")).scalar() == 1
+
+        metrics = EngineRegistry.get_pool_metrics(db_url)
+        assert metrics["pre_ping_failures"] == 1
+        assert metrics["checkouts"] == 3
+        assert metrics["connections_opened"] == 3
@@ -0,0 +1,118 @@
+"""
+Tests Unitarios - ExchangeService con índice de tasas en memoria
+
+Objetivo: Validar que la búsqueda por vigencia en memoria respeta las mismas
+reglas que la consulta original y que create_exchange_rate refresca el índice
+tras el commit.
+
+Reglas de Negocio:
+- Aplica la vigencia más reciente con effective_from <= fecha
+- Una vigencia cerrada (effective_until < fecha) no aplica
+- Sin tasa vigente se conserva el monto original
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from datetime import datetime, timezone
+
+from NNProtect_new_website.modules.finance.backend.exchange_service import ExchangeService
+
+
+@pytest.mark.integration
+class TestExchangeRateIndex:
+    """
+    Suite de tests para el índice de tasas de ExchangeService.
+    """
+
+    def test_convert_uses_effective_rate_by_date(self, db_session, setup_exchange_rates, no_query_session):
+        """
+        Escenario:
+            USD→MXN 18.0 desde 2025-01-01; nueva tasa 20.0 desde 2025-07-01
+
+        Esperado:
+            - Marzo 2025 convierte a 18.0 y agosto 2025 a 20.0 ✅
+            - Antes de 2025 no hay tasa → monto original ✅
+            - Segunda conversión sin consultar la BD ✅
+        """
+        ExchangeService.create_exchange_rate(
+            db_session, "USD", "MXN", 20.0,
+            effective_from=datetime(2025, 7, 1, tzinfo=timezone.utc)
+        )
+
+        march = datetime(2025, 3, 15, tzinfo=timezone.utc)
+        august = datetime(2025, 8, 15, tzinfo=timezone.utc)
+
+        assert ExchangeService.convert_amount(db_session, 10, "USD", "MXN", march) == pytest.approx(180.0)
+        assert ExchangeService.convert_amount(db_session, 10, "USD", "MXN", august) == pytest.approx(200.0)
+        assert ExchangeService.convert_amount(db_session, 10, "USD", "MXN", datetime(2024, 6, 1)) == 10
+        assert ExchangeService.convert_amount(no_query_session, 10, "USD", "MXN", march) == pytest.approx(180.0)
+
+    def test_closed_interval_falls_back_to_previous_rate(self, db_session, setup_exchange_rates):
+        """
+        Escenario:
+            Tasa temporal MXN→USD 0.06 solo en junio 2025
+
+        Esperado:
+            - Junio usa 0.06; julio vuelve a 0.055 ✅
+        """
+        ExchangeService.create_exchange_rate(
+            db_session, "MXN", "USD", 0.06,
+            effective_from=datetime(2025, 6, 1, tzinfo=timezone.utc),
+            effective_until=datetime(2025, 6, 30, 23, 59, 59, tzinfo=timezone.utc)
+        )
+
+        june = datetime(2025, 6, 15, tzinfo=timezone.utc)
+        july = datetime(2025, 7, 15, tzinfo=timezone.utc)
+
+        assert ExchangeService.convert_amount(db_session, 1000, "MXN", "USD", june) == pytest.approx(60.0)
+        assert ExchangeService.convert_amount(db_session, 1000, "MXN", "USD", july) == pytest.approx(55.0)
+
+    def test_convert_many_matches_convert_amount(self, db_session, setup_exchange_rates):
+        """
+        Esperado:
+            - convert_many con fechas por monto = convert_amount uno por uno ✅
+            - Misma moneda regresa los montos sin cambios ✅
+        """
+        ExchangeService.create_exchange_rate(
+            db_session, "USD", "MXN", 20.0,
+            effective_from=datetime(2025, 7, 1, tzinfo=timezone.utc)
+        )
+
+        amounts = [10.0, 20.0, 30.0, 40.0]
+        dates = [
+            datetime(2025, 3, 1, tzinfo=timezone.utc),
+            datetime(2025, 8, 1, tzinfo=timezone.utc),
+            None,
+            datetime(2025, 3, 1),
+        ]
+
+        expected = [
+            ExchangeService.convert_amount(db_session, amount, "USD", "MXN", date)
+            for amount, date in zip(amounts, dates)
+        ]
+
+        assert ExchangeService.convert_many(db_session, amounts, "USD", "MXN", dates) == pytest.approx(expected)
+        assert ExchangeService.convert_many(db_session, amounts, "MXN", "MXN") == amounts
+
+    def test_new_rate_visible_only_after_commit(self, db_session, setup_exchange_rates, no_query_session):
+        """
+        Escenario:
+            Índice ya cargado; se crea USD→MXN 20.0 desde 2025-07-01 sin commit
+
+        Esperado:
+            - Con la transacción abierta sigue el índice previo (18.0, sin consultar la BD) ✅
+            - Tras el commit el índice se recarga con la nueva tasa ✅
+        """
+        august = datetime(2025, 8, 15, tzinfo=timezone.utc)
+        assert ExchangeService.convert_amount(db_session, 10, "USD", "MXN", august) == pytest.approx(180.0)
+
+        ExchangeService.create_exchange_rate(
+            db_session, "USD", "MXN", 20.0,
+            effective_from=datetime(2025, 7, 1, tzinfo=timezone.utc)
+        )
+        assert ExchangeService.convert_amount(no_query_session, 10, "USD", "MXN", august) == pytest.approx(180.0)
+
+        db_session.commit()
+
+        assert ExchangeService.convert_amount(db_session, 10, "USD", "MXN", august) == pytest.approx(200.0)
@@ -0,0 +1,73 @@
+"""
+Tests Unitarios - Genealogía (UserTreePath)
+
+Objetivo: Validar que la inserción set-based y la inserción masiva de caminos
+producen exactamente la misma closure table que la inserción miembro por miembro.
+
+Reglas de Negocio:
+- Cada miembro tiene su auto-referencia (depth=0)
+- Cada miembro hereda todos los caminos de su sponsor con depth + 1
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from sqlmodel import select
+
+from database.usertreepaths import UserTreePath
+from NNProtect_new_website.modules.network.backend.genealogy_service import GenealogyService
+
+
+def _paths(db_session, member_ids):
+    return set(db_session.exec(
+        select(UserTreePath.ancestor_id, UserTreePath.descendant_id, UserTreePath.depth)
+        .where(UserTreePath.descendant_id.in_(member_ids))
+    ).all())
+
+
+@pytest.mark.genealogy
+class TestGenealogyInserts:
+    """
+    Suite de tests para add_member_to_tree / add_members_to_tree.
+    """
+
+    def test_add_member_copies_sponsor_paths(self, db_session):
+        """
+        Escenario:
+            1 → 2 → 3
+
+        Esperado:
+            - 3 tiene caminos (3,0), (2,1), (1,2) ✅
+        """
+        GenealogyService.add_member_to_tree(db_session, 1, None)
+        GenealogyService.add_member_to_tree(db_session, 2, 1)
+        GenealogyService.add_member_to_tree(db_session, 3, 2)
+        db_session.flush()
+
+        assert _paths(db_session, [3]) == {(3, 3, 0), (2, 3, 1), (1, 3, 2)}
+
+    def test_bulk_matches_single_inserts(self, db_session):
+        """
+        Escenario:
+            Raíz 10 existente; lote 2x2 de 6 miembros con sponsors dentro del lote
+
+        Esperado:
+            - Misma closure table que insertar uno por uno ✅
+            - Retorna el total de caminos insertados ✅
+        """
+        GenealogyService.add_member_to_tree(db_session, 10, None)
+        db_session.flush()
+
+        pairs = [(11, 10), (12, 10), (13, 11), (14, 11), (15, 12), (16, 12)]
+        inserted = GenealogyService.add_members_to_tree(db_session, pairs)
+
+        expected = {(10, 10, 0)}
+        for member_id, sponsor_id in pairs:
+            expected.add((member_id, member_id, 0))
+            for ancestor_id, descendant_id, depth in list(expected):
+                if descendant_id == sponsor_id:
+                    expected.add((ancestor_id, member_id, depth + 1))
+
+        new_ids = [member_id for member_id, _ in pairs]
+        assert inserted == 6 + 2 * 1 + 4 * 2
+        assert _paths(db_session, new_ids) == {p for p in expected if p[1] in new_ids}
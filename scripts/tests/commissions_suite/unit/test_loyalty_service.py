@@ -0,0 +1,93 @@
+"""
+Tests Unitarios - Reset masivo de lealtad
+
+Objetivo: Validar que LoyaltyService.bulk_reset_inactive_users resetea en bloque
+solo a los usuarios con puntos sin compra válida en el mes evaluado y registra
+un historial RESET por cada uno con los puntos previos.
+
+Reglas de Negocio:
+- Compra dentro del mes evaluado → conserva puntos
+- Compra fuera del mes evaluado o sin compra → puntos, meses y estado se reinician
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from datetime import datetime, timezone
+from sqlmodel import select
+
+from database.loyalty_points import LoyaltyPoints, LoyaltyPointsHistory, LoyaltyStatus, LoyaltyEventType
+from NNProtect_new_website.modules.network.backend.loyalty_service import LoyaltyService
+
+
+@pytest.fixture
+def loyalty_members(db_session, test_network_4_levels):
+    """
+    A: 50 pts, compró el 3 oct (activo)
+    B: 75 pts, compró el 4 sep (inactivo)
+    C: 25 pts, sin compra registrada (inactivo)
+    D: 0 pts (no se toca)
+    """
+    users = test_network_4_levels
+    records = {
+        'A': (50, 2, datetime(2025, 10, 3, 12, tzinfo=timezone.utc)),
+        'B': (75, 3, datetime(2025, 9, 4, 12, tzinfo=timezone.utc)),
+        'C': (25, 1, None),
+        'D': (0, 0, None),
+    }
+    for name, (points, months, last_purchase) in records.items():
+        db_session.add(LoyaltyPoints(
+            member_id=users[name].member_id,
+            current_points=points,
+            consecutive_months=months,
+            last_valid_purchase_date=last_purchase,
+            status=LoyaltyStatus.ACUMULANDO.value
+        ))
+    db_session.flush()
+    return users
+
+
+class TestLoyaltyBulkReset:
+    """
+    Suite de tests para el reset masivo de lealtad.
+    """
+
+    def test_resets_only_inactive_members_with_history(
+        self, db_session, loyalty_members, test_period_current
+    ):
+        """
+        Escenario:
+            Job del 8 de octubre 2025 (ventana = octubre)
+
+        Esperado:
+            - B y C reseteados; A conserva 50 pts; D intacto ✅
+            - Historial RESET con puntos previos de B (75) y C (25) ✅
+        """
+        users = loyalty_members
+        reset_ids = LoyaltyService.bulk_reset_inactive_users(
+            db_session, test_period_current.id, window_start=datetime(2025, 10, 1, tzinfo=timezone.utc)
+        )
+
+        assert sorted(reset_ids) == sorted([users['B'].member_id, users['C'].member_id])
+
+        records = {
+            record.member_id: record
+            for record in db_session.exec(select(LoyaltyPoints)).all()
+        }
+        assert records[users['A'].member_id].current_points == 50
+        assert records[users['D'].member_id].status == LoyaltyStatus.ACUMULANDO.value
+        for name in ('B', 'C'):
+            record = records[users[name].member_id]
+            assert (record.current_points, record.consecutive_months, record.status) == \
+                (0, 0, LoyaltyStatus.REINICIADO.value)
+
+        history = {
+            row.member_id: row
+            for row in db_session.exec(
+                select(LoyaltyPointsHistory).where(LoyaltyPointsHistory.event_type == LoyaltyEventType.RESET.value)
+            ).all()
+        }
+        assert set(history) == set(reset_ids)
+        assert (history[users['B'].member_id].points_before, history[users['B'].member_id].points_change) == (75, -75)
+        assert history[users['C'].member_id].points_before == 25
+        assert history[users['C'].member_id].description == "Reinicio automático por falta de compra"
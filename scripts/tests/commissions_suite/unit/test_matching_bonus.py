@@ -0,0 +1,95 @@
+"""
+Tests Unitarios - Bono Matching en modo masivo
+
+Objetivo: Validar que calculate_matching_for_period produce las mismas comisiones
+que calculate_matching_bonus por embajador, resolviendo rangos y totales en bloque.
+
+Reglas de Negocio:
+- Solo Embajadores reciben y generan Matching
+- Porcentajes 30%/20%/10%/5% según rango y profundidad
+- Re-ejecutar el cálculo del período no duplica comisiones
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from sqlmodel import select
+
+from database.comissions import Commissions, BonusType
+from NNProtect_new_website.modules.network.backend.commission_service import CommissionService
+
+
+def _add_unilevel(db_session, member_id: int, period_id: int, amount: float):
+    db_session.add(Commissions(
+        member_id=member_id,
+        bonus_type=BonusType.BONO_UNINIVEL.value,
+        period_id=period_id,
+        level_depth=1,
+        amount_vn=amount,
+        currency_origin="MXN",
+        amount_converted=amount,
+        currency_destination="MXN"
+    ))
+    db_session.flush()
+
+
+@pytest.mark.matching_bonus
+class TestMatchingForPeriod:
+    """
+    Suite de tests para el cálculo masivo del Bono Matching.
+    """
+
+    @pytest.fixture
+    def matching_network(self, db_session, ranks, assign_rank, test_network_4_levels, test_period_current):
+        """
+        A (Consciente) → B (Transformador) → C (Visionario) → D (Transformador)
+        Uninivel del período: B=100, C=50, D=200
+        """
+        users = test_network_4_levels
+        assign_rank(users['A'].member_id, ranks["Embajador Consciente"].id)
+        assign_rank(users['B'].member_id, ranks["Embajador Transformador"].id)
+        assign_rank(users['C'].member_id, ranks["Visionario"].id)
+        assign_rank(users['D'].member_id, ranks["Embajador Transformador"].id)
+
+        _add_unilevel(db_session, users['B'].member_id, test_period_current.id, 100.0)
+        _add_unilevel(db_session, users['C'].member_id, test_period_current.id, 50.0)
+        _add_unilevel(db_session, users['D'].member_id, test_period_current.id, 200.0)
+
+        return users
+
+    def test_batch_matching_amounts(self, db_session, matching_network, test_period_current):
+        """
+        Esperado:
+            - A recibe 30% del Uninivel de B (nivel 1) = 30 ✅
+            - A recibe 10% del Uninivel de D (nivel 3) = 20 ✅
+            - C no genera Matching (no es Embajador) ✅
+            - B no recibe de D (Transformador solo cubre nivel 1) ✅
+        """
+        users = matching_network
+
+        commission_ids = CommissionService.calculate_matching_for_period(
+            db_session, test_period_current.id
+        )
+
+        matching = {
+            (c.member_id, c.source_member_id, c.level_depth): c.amount_converted
+            for c in db_session.exec(
+                select(Commissions).where(Commissions.id.in_(commission_ids))
+            ).all()
+        }
+
+        assert matching == {
+            (users['A'].member_id, users['B'].member_id, 1): pytest.approx(30.0),
+            (users['A'].member_id, users['D'].member_id, 3): pytest.approx(20.0),
+        }
+
+    def test_batch_matching_is_idempotent(self, db_session, matching_network, test_period_current):
+        """
+        Esperado:
+            - Segunda ejecución no crea comisiones nuevas ✅
+        """
+        first_run = CommissionService.calculate_matching_for_period(db_session, test_period_current.id)
+        second_run = CommissionService.calculate_matching_for_period(db_session, test_period_current.id)
+
+        assert len(first_run) == 2
+        assert second_run == []
@@ -0,0 +1,99 @@
+"""
+Tests Unitarios - Cierre mensual por lotes
+
+Objetivo: Validar que el pago de comisiones del cierre avanza por lotes de
+miembros, registra progreso en el checkpoint y reanuda sin pagar dos veces.
+
+Reglas de Negocio:
+- Lotes por member_id ascendente, commit por lote
+- Checkpoint por período con último member_id confirmado
+- Idempotencia por comisión (solo PENDING se depositan)
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from sqlmodel import select
+
+from database.comissions import Commissions, BonusType
+from database.period_closures import PeriodClosureCheckpoints, ClosureStage
+from NNProtect_new_website.jobs.monthly_closure import MonthlyClosureJob
+from NNProtect_new_website.modules.finance.backend.wallet_service import WalletService
+
+
+@pytest.fixture
+def members_with_commissions(db_session, create_test_user, test_period_current):
+    """3 miembros con wallet activa y 2 comisiones de 100 MXN cada uno."""
+    for member_id in (1000, 1001, 1002):
+        create_test_user(member_id=member_id)
+        WalletService.create_wallet(db_session, member_id, "MXN")
+        for _ in range(2):
+            db_session.add(Commissions(
+                member_id=member_id,
+                bonus_type=BonusType.BONO_UNINIVEL.value,
+                period_id=test_period_current.id,
+                level_depth=1,
+                amount_vn=100.0,
+                currency_origin="MXN",
+                amount_converted=100.0,
+                currency_destination="MXN"
+            ))
+    db_session.flush()
+    return [1000, 1001, 1002]
+
+
+@pytest.mark.periods
+class TestChunkedClosure:
+    """
+    Suite de tests para el pago por lotes del cierre mensual.
+    """
+
+    def test_pays_in_chunks_and_records_checkpoint(self, db_session, members_with_commissions, test_period_current):
+        """
+        Escenario:
+            3 miembros, lotes de 2 miembros
+
+        Esperado:
+            - 2 lotes, 6 comisiones, $600 ✅
+            - last_member_id = 1002, etapa PAYOUT ✅
+        """
+        checkpoint = MonthlyClosureJob._get_or_create_checkpoint(db_session, test_period_current.id)
+        MonthlyClosureJob._pay_commissions_in_chunks(db_session, test_period_current.id, checkpoint, 2)
+
+        assert checkpoint.chunks_done == 2
+        assert checkpoint.deposited_count == 6
+        assert checkpoint.deposited_total == pytest.approx(600.0)
+        assert checkpoint.last_member_id == 1002
+        assert checkpoint.stage == ClosureStage.PAYOUT.value
+        for member_id in members_with_commissions:
+            assert WalletService.get_wallet_balance(db_session, member_id) == pytest.approx(200.0)
+
+    def test_resume_skips_finished_chunks(self, db_session, members_with_commissions, test_period_current):
+        """
+        Escenario:
+            Checkpoint existente con el lote de 1000 ya confirmado (last_member_id=1000)
+
+        Esperado:
+            - Mismo checkpoint reutilizado (uno por período) ✅
+            - Solo se pagan 1001 y 1002 ✅
+            - Re-ejecutar no vuelve a pagar ✅
+        """
+        checkpoint = MonthlyClosureJob._get_or_create_checkpoint(db_session, test_period_current.id)
+        checkpoint.last_member_id = 1000
+        checkpoint.chunks_done = 1
+        db_session.flush()
+
+        resumed = MonthlyClosureJob._get_or_create_checkpoint(db_session, test_period_current.id)
+        assert resumed.id == checkpoint.id
+
+        MonthlyClosureJob._pay_commissions_in_chunks(db_session, test_period_current.id, resumed, 1)
+
+        assert resumed.chunks_done == 3
+        assert resumed.deposited_count == 4
+        assert WalletService.get_wallet_balance(db_session, 1000) == pytest.approx(0.0)
+        assert WalletService.get_wallet_balance(db_session, 1002) == pytest.approx(200.0)
+
+        MonthlyClosureJob._pay_commissions_in_chunks(db_session, test_period_current.id, resumed, 1)
+
+        assert resumed.deposited_count == 4
+        assert len(db_session.exec(select(PeriodClosureCheckpoints)).all()) == 1
@@ -0,0 +1,144 @@
+"""
+Tests Unitarios - Outbox transaccional de órdenes
+
+Objetivo: Validar que el evento post-pago se registra una sola vez por orden,
+que el worker lo procesa fuera del request y que reintentos no duplican volumen.
+
+Reglas de Negocio:
+- Un evento por (orden, tipo)
+- Procesar un evento DONE no repite PV/PVG
+- Reintentos con backoff exponencial hasta MAX_ATTEMPTS → FAILED
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from datetime import datetime, timezone
+from sqlmodel import select
+
+from database.users import Users
+from database.comissions import Commissions
+from database.order_outbox import OrderEventOutbox, OutboxStatus
+from NNProtect_new_website.modules.store.backend.order_outbox_service import OrderOutboxService
+from NNProtect_new_website.modules.store.backend.payment_service import PaymentService
+
+
+def _pvg(db_session, member_id: int) -> int:
+    db_session.expire_all()
+    return db_session.exec(select(Users.pvg_cache).where(Users.member_id == member_id)).one()
+
+
+@pytest.mark.integration
+class TestOrderOutbox:
+    """
+    Suite de tests para OrderOutboxService.
+    """
+
+    def test_enqueue_is_idempotent_per_order(self, db_session, test_network_simple, regular_product, create_test_order):
+        """
+        Esperado:
+            - Encolar dos veces la misma orden deja un solo evento PENDING ✅
+        """
+        order = create_test_order(member_id=test_network_simple['C'].member_id, items=[(regular_product, 1)])
+
+        OrderOutboxService.enqueue_payment_confirmed(db_session, order.id)
+        OrderOutboxService.enqueue_payment_confirmed(db_session, order.id)
+
+        events = db_session.exec(select(OrderEventOutbox).where(OrderEventOutbox.order_id == order.id)).all()
+        assert len(events) == 1
+        assert events[0].status == OutboxStatus.PENDING.value
+
+    def test_worker_processes_event_once(
+        self,
+        db_session,
+        ranks,
+        test_period_open,
+        test_network_simple,
+        regular_product,
+        create_test_order
+    ):
+        """
+        Escenario:
+            A → B → C, C paga 1 producto (PV=1,000)
+
+        Esperado:
+            - claim_batch toma el evento y lo marca PROCESSING ✅
+            - process_event propaga PVG a A y B y marca DONE ✅
+            - Re-procesar el evento no duplica PVG ✅
+        """
+        users = test_network_simple
+        order = create_test_order(member_id=users['C'].member_id, items=[(regular_product, 1)])
+        OrderOutboxService.enqueue_payment_confirmed(db_session, order.id)
+        pvg_before = _pvg(db_session, users['A'].member_id)
+
+        event_ids = OrderOutboxService.claim_batch(db_session)
+        assert len(event_ids) == 1
+        assert db_session.get(OrderEventOutbox, event_ids[0]).status == OutboxStatus.PROCESSING.value
+
+        assert OrderOutboxService.process_event(db_session, event_ids[0]) is True
+        assert db_session.get(OrderEventOutbox, event_ids[0]).status == OutboxStatus.DONE.value
+        assert _pvg(db_session, users['A'].member_id) == pvg_before + 1000
+        assert _pvg(db_session, users['B'].member_id) == pvg_before + 1000
+
+        assert OrderOutboxService.process_event(db_session, event_ids[0]) is True
+        assert _pvg(db_session, users['A'].member_id) == pvg_before + 1000
+        assert OrderOutboxService.claim_batch(db_session) == []
+
+    def test_failed_trigger_keeps_event_retryable(
+        self,
+        db_session,
+        ranks,
+        test_period_open,
+        test_network_simple,
+        regular_product,
+        create_test_order,
+        monkeypatch
+    ):
+        """
+        Escenario:
+            C paga 1 producto; el cálculo de Uninivel/Matching falla dentro de _trigger_commissions
+
+        Esperado:
+            - process_event → False y el evento vuelve a PENDING con last_error ✅
+            - Se revierte todo el trabajo del evento (PVG y comisiones) ✅
+        """
+        users = test_network_simple
+        order = create_test_order(member_id=users['C'].member_id, items=[(regular_product, 1)])
+        OrderOutboxService.enqueue_payment_confirmed(db_session, order.id)
+        pvg_before = _pvg(db_session, users['A'].member_id)
+        event_id = OrderOutboxService.claim_batch(db_session)[0]
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("upline no disponible")
+
+        monkeypatch.setattr(PaymentService, "_load_upline_context", fail)
+
+        assert OrderOutboxService.process_event(db_session, event_id) is False
+
+        event = db_session.get(OrderEventOutbox, event_id)
+        assert event.status == OutboxStatus.PENDING.value
+        assert "upline no disponible" in event.last_error
+        assert _pvg(db_session, users['A'].member_id) == pvg_before
+        assert db_session.exec(select(Commissions).where(Commissions.source_order_id == order.id)).all() == []
+
+    def test_retry_backoff_then_failed(self, db_session, test_network_simple, regular_product, create_test_order):
+        """
+        Esperado:
+            - Fallo con intentos restantes → PENDING con available_at futuro ✅
+            - Fallo en el último intento → FAILED ✅
+        """
+        order = create_test_order(member_id=test_network_simple['C'].member_id, items=[(regular_product, 1)])
+        OrderOutboxService.enqueue_payment_confirmed(db_session, order.id)
+        event_id = OrderOutboxService.claim_batch(db_session)[0]
+
+        OrderOutboxService._schedule_retry(db_session, event_id, "boom")
+        event = db_session.get(OrderEventOutbox, event_id)
+        assert event.status == OutboxStatus.PENDING.value
+        assert event.last_error == "boom"
+        assert event.available_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+        assert OrderOutboxService.claim_batch(db_session) == []
+
+        event.attempts = OrderOutboxService.MAX_ATTEMPTS
+        db_session.flush()
+        OrderOutboxService._schedule_retry(db_session, event_id, "boom")
+        assert db_session.get(OrderEventOutbox, event_id).status == OutboxStatus.FAILED.value
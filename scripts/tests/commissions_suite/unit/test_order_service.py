@@ -0,0 +1,139 @@
+"""
+Tests Unitarios - Historial de órdenes paginado (keyset)
+
+Objetivo: Validar que OrderService._query_orders_page recorre todas las órdenes
+del miembro por cursor sin repetir ni saltar, que filtros y conteo se resuelven
+en SQL y que los productos de la página se adjuntan correctamente.
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from datetime import datetime, timezone, timedelta
+
+from database.orders import Orders, OrderStatus
+from database.order_items import OrderItems
+from NNProtect_new_website.modules.store.backend.order_service import OrderService
+
+
+@pytest.fixture
+def regular_product(create_regular_product):
+    """Producto regular del módulo (PV=100, VN=200)."""
+    return create_regular_product(pv=100, vn=200, product_name="Producto Historial (Test)")
+
+
+@pytest.fixture
+def member_orders(db_session, test_network_simple, regular_product):
+    """
+    7 órdenes del usuario A con fechas distintas y montos repetidos (100 ×3, 200 ×2, 300 ×2)
+    para ejercitar el desempate por id; las impares canceladas.
+    Una orden del usuario B que nunca debe aparecer.
+    """
+    base = datetime(2025, 10, 1, tzinfo=timezone.utc)
+    orders = []
+    for index in range(7):
+        order = Orders(
+            member_id=test_network_simple['A'].member_id,
+            country="Mexico",
+            currency="MXN",
+            total=float(100 * (index % 3 + 1)),
+            status=OrderStatus.CANCELLED.value if index % 2 else OrderStatus.PAYMENT_CONFIRMED.value,
+            created_at=base + timedelta(days=index)
+        )
+        db_session.add(order)
+        orders.append(order)
+
+    db_session.add(Orders(
+        member_id=test_network_simple['B'].member_id,
+        country="Mexico",
+        currency="MXN",
+        created_at=base
+    ))
+    db_session.flush()
+
+    for order in orders:
+        db_session.add(OrderItems(
+            order_id=order.id,
+            product_id=regular_product.id,
+            quantity=2,
+            unit_price=500,
+            unit_pv=100,
+            unit_vn=200
+        ))
+    db_session.flush()
+    return orders
+
+
+def _walk_pages(db_session, member_id: int, limit: int, **filters) -> list:
+    """Recorre todas las páginas siguiendo next_cursor."""
+    pages = []
+    cursor = None
+    while True:
+        page = OrderService._query_orders_page(
+            db_session, member_id, limit, cursor,
+            filters.get("statuses"), filters.get("order_number"), filters.get("sort", "newest")
+        )
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+class TestOrderHistoryPagination:
+    """
+    Suite de tests para la paginación keyset del historial de órdenes.
+    """
+
+    @pytest.mark.parametrize("sort, key, reverse", [
+        ("newest", lambda order: (order.created_at, order.id), True),
+        ("oldest", lambda order: (order.created_at, order.id), False),
+        ("amount_desc", lambda order: (order.total, order.id), True),
+        ("amount_asc", lambda order: (order.total, order.id), False),
+    ])
+    def test_pages_cover_all_orders_in_sort_order(
+        self, db_session, test_network_simple, member_orders, sort, key, reverse
+    ):
+        """
+        Escenario:
+            A tiene 7 órdenes, páginas de 3
+
+        Esperado:
+            - 3 páginas (3, 3, 1) sin duplicados ni huecos ✅
+            - Orden igual al ordenamiento en memoria, montos empatados desempatados por id ✅
+            - total = 7 en todas las páginas ✅
+        """
+        pages = _walk_pages(db_session, test_network_simple['A'].member_id, 3, sort=sort)
+
+        assert [len(page["orders"]) for page in pages] == [3, 3, 1]
+        assert all(page["total"] == 7 for page in pages)
+
+        expected_ids = [order.id for order in sorted(member_orders, key=key, reverse=reverse)]
+        assert [order["order_id"] for page in pages for order in page["orders"]] == expected_ids
+
+    def test_status_and_number_filters_run_in_sql(
+        self, db_session, test_network_simple, member_orders
+    ):
+        """
+        Escenario:
+            Filtro por estados cancelados y búsqueda por número "#<id>"
+
+        Esperado:
+            - Solo 3 canceladas, total = 3 ✅
+            - Búsqueda exacta devuelve la orden con sus productos ✅
+        """
+        member_id = test_network_simple['A'].member_id
+
+        cancelled = _walk_pages(db_session, member_id, 10, statuses=["cancelled", "refunded"])
+        assert len(cancelled) == 1
+        assert cancelled[0]["total"] == 3
+        assert {order["status_raw"] for order in cancelled[0]["orders"]} == {"cancelled"}
+
+        target = member_orders[4]
+        found = OrderService._query_orders_page(
+            db_session, member_id, 10, None, None, f"#{target.id}", "newest"
+        )
+        assert target.id in [order["order_id"] for order in found["orders"]]
+
+        order = next(order for order in found["orders"] if order["order_id"] == target.id)
+        assert order["products"] == [{"name": "Producto Historial (Test)", "quantity": 2}]
+        assert order["products_summary"] == "2x Producto Historial (Test)"
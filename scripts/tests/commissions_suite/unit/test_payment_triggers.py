@@ -0,0 +1,82 @@
+"""
+Tests Unitarios - Uninivel y Matching instantáneos por orden
+
+Objetivo: Validar que los triggers de PaymentService comparten un solo
+UplineContext (rango + país de toda la línea ascendente) e insertan en bloque.
+
+Reglas de Negocio:
+- Uninivel según rango del período y profundidad del ancestro
+- Matching nivel 1: % del Uninivel del patrocinado directo en la línea
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from sqlmodel import select
+
+from database.comissions import Commissions, BonusType
+from NNProtect_new_website.modules.store.backend.payment_service import PaymentService
+
+
+@pytest.mark.unilevel_bonus
+class TestOrderTriggers:
+    """
+    Suite de tests para _load_upline_context y los triggers por orden.
+    """
+
+    @pytest.fixture
+    def ranked_network(self, ranks, assign_rank, test_network_4_levels, test_period_current):
+        """
+        A (Embajador Transformador) → B (Visionario) → C (Emprendedor) → D
+        """
+        users = test_network_4_levels
+        for name, rank_name in (('A', "Embajador Transformador"), ('B', "Visionario"), ('C', "Emprendedor")):
+            assign_rank(users[name].member_id, ranks[rank_name].id, period_id=test_period_current.id)
+        return users
+
+    def test_upline_context_single_query(self, db_session, ranked_network, regular_product, create_test_order):
+        """
+        Esperado:
+            - C, B, A en orden de profundidad con su rango del período ✅
+        """
+        users = ranked_network
+        order = create_test_order(member_id=users['D'].member_id, items=[(regular_product, 1)])
+
+        upline = PaymentService._load_upline_context(db_session, order)
+
+        assert [(a.ancestor_id, a.depth, a.rank_name) for a in upline] == [
+            (users['C'].member_id, 1, "Emprendedor"),
+            (users['B'].member_id, 2, "Visionario"),
+            (users['A'].member_id, 3, "Embajador Transformador"),
+        ]
+
+    def test_unilevel_and_matching_amounts(self, db_session, ranked_network, regular_product, create_test_order):
+        """
+        Escenario:
+            D compra VN=1,000
+
+        Esperado:
+            - Uninivel: C 5% = 50, B 8% = 80, A 10% = 100 ✅
+            - Matching: A recibe 30% del Uninivel de B = 24 ✅
+        """
+        users = ranked_network
+        order = create_test_order(member_id=users['D'].member_id, items=[(regular_product, 1)])
+
+        upline = PaymentService._load_upline_context(db_session, order)
+        PaymentService._trigger_unilevel_for_ancestors(db_session, order, upline)
+        PaymentService._trigger_matching_for_ambassadors(db_session, order, upline)
+
+        commissions = {
+            (c.bonus_type, c.member_id, c.source_member_id): c.amount_converted
+            for c in db_session.exec(
+                select(Commissions).where(Commissions.source_order_id == order.id)
+            ).all()
+        }
+
+        unilevel = BonusType.BONO_UNINIVEL.value
+        assert commissions == {
+            (unilevel, users['C'].member_id, users['D'].member_id): pytest.approx(50.0),
+            (unilevel, users['B'].member_id, users['D'].member_id): pytest.approx(80.0),
+            (unilevel, users['A'].member_id, users['D'].member_id): pytest.approx(100.0),
+            (BonusType.BONO_MATCHING.value, users['A'].member_id, users['B'].member_id): pytest.approx(24.0),
+        }
@@ -0,0 +1,72 @@
+"""
+Tests Unitarios - Reseteo de período
+
+Objetivo: Validar que el reseteo masivo (UPDATE + INSERT ... SELECT) deja a
+todos los usuarios en cero y con rango inicial en el nuevo período.
+
+Reglas de Negocio:
+- status → NO_QUALIFIED, pv/pvg/vn cache → 0
+- Un registro rank_id=1 por usuario en user_rank_history del nuevo período
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from sqlmodel import select
+
+from database.users import Users, UserStatus
+from database.user_rank_history import UserRankHistory
+from NNProtect_new_website.modules.network.backend.period_reset_service import PeriodResetService
+from NNProtect_new_website.modules.network.backend.pv_reset_service import PVResetService
+
+
+@pytest.mark.periods
+class TestBulkPeriodReset:
+    """
+    Suite de tests para PeriodResetService / PVResetService en modo masivo.
+    """
+
+    def test_reset_all_users_for_new_period(self, db_session, ranks, create_test_user, test_period_current):
+        """
+        Escenario:
+            3 usuarios calificados con PV/PVG/VN
+
+        Esperado:
+            - Retorna 3 ✅
+            - Caches en 0 y status NO_QUALIFIED ✅
+            - 3 registros rank_id=1 con el nuevo period_id ✅
+        """
+        for member_id in (1000, 1001, 1002):
+            user = create_test_user(member_id=member_id, pv_cache=1465, pvg_cache=5000)
+            user.vn_cache = 1000.0
+            user.status = UserStatus.QUALIFIED
+            db_session.add(user)
+        db_session.flush()
+
+        resetted = PeriodResetService.reset_all_users_for_new_period(db_session, test_period_current.id)
+
+        assert resetted == 3
+        for user in db_session.exec(select(Users)).all():
+            assert (user.pv_cache, user.pvg_cache, user.vn_cache) == (0, 0, 0.0)
+            assert user.status == UserStatus.NO_QUALIFIED
+
+        history = db_session.exec(
+            select(UserRankHistory.member_id, UserRankHistory.rank_id)
+            .where(UserRankHistory.period_id == test_period_current.id)
+        ).all()
+        assert sorted(history) == [(1000, 1), (1001, 1), (1002, 1)]
+
+    def test_reset_all_users_pv_pvg(self, db_session, create_test_user):
+        """
+        Esperado:
+            - PV/PVG en 0 para todos, VN intacto ✅
+        """
+        user = create_test_user(member_id=1000, pv_cache=1465, pvg_cache=5000)
+        user.vn_cache = 1000.0
+        db_session.add(user)
+        db_session.flush()
+
+        assert PVResetService.reset_all_users_pv_pvg(db_session) == 1
+
+        user = db_session.exec(select(Users).where(Users.member_id == 1000)).one()
+        assert (user.pv_cache, user.pvg_cache, user.vn_cache) == (0, 0, 1000.0)
@@ -0,0 +1,58 @@
+"""
+Tests Unitarios - PVUpdateService
+
+Objetivo: Validar que la propagación de PVG a ancestros se hace en bloque
+y devuelve los ancestros afectados.
+
+Reglas de Negocio:
+- Todos los ancestros (depth > 0) suman el PV de la orden a su pvg_cache
+- El propio comprador no se toca (su PVG se actualiza aparte)
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from sqlmodel import select
+
+from database.users import Users
+from NNProtect_new_website.modules.network.backend.pv_update_service import PVUpdateService
+
+
+@pytest.mark.genealogy
+class TestPVGPropagation:
+    """
+    Suite de tests para _update_pvg_for_ancestors.
+    """
+
+    def test_pvg_propagated_to_all_ancestors(self, db_session, test_network_4_levels):
+        """
+        Escenario:
+            A → B → C → D, D genera 1,465 PV
+
+        Esperado:
+            - A, B y C suman 1,465 a pvg_cache ✅
+            - D no cambia ✅
+            - Retorna los member_id de A, B y C ✅
+        """
+        users = test_network_4_levels
+        before = {name: user.pvg_cache for name, user in users.items()}
+
+        updated = PVUpdateService._update_pvg_for_ancestors(
+            db_session, users['D'].member_id, 1465
+        )
+
+        assert sorted(updated) == sorted(users[name].member_id for name in ('A', 'B', 'C'))
+
+        db_session.expire_all()
+        after = {
+            name: db_session.exec(
+                select(Users.pvg_cache).where(Users.member_id == user.member_id)
+            ).one()
+            for name, user in users.items()
+        }
+        assert after == {
+            'A': before['A'] + 1465,
+            'B': before['B'] + 1465,
+            'C': before['C'] + 1465,
+            'D': before['D'],
+        }
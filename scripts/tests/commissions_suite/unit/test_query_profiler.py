@@ -0,0 +1,141 @@
+"""
+Tests Unitarios - Perfilador de queries por request
+
+Objetivo: Validar que QueryProfiler (hooks before/after_cursor_execute del engine
+compartido) cuenta statements y tiempo de BD por scope, acumula los scopes anidados
+en su padre, registra huellas normalizadas de statements lentos, que un statement
+fallido no deja su inicio pendiente en la conexión y que desactivado
+no mide nada.
+
+Fecha: Octubre 2025
+"""
+
+import asyncio
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from database.engine_config import EngineRegistry, get_configured_engine
+from database.query_profiler import QueryProfiler
+
+
+@pytest.fixture
+def engine(tmp_path):
+    url = f"sqlite:///{tmp_path / 'profiler.db'}"
+    engine = get_configured_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+
+    QueryProfiler.reset()
+    QueryProfiler.enable()
+    yield engine
+    QueryProfiler.disable()
+    QueryProfiler.reset()
+    EngineRegistry.dispose(url)
+
+
+def _run(engine, statements: int) -> None:
+    with engine.connect() as connection:
+        for item_id in range(statements):
+            connection.execute(text(f"SELECT name FROM items WHERE id = {item_id}"))
+
+
+class TestQueryProfiler:
+    """
+    Suite de tests para el perfilador de queries.
+    """
+
+    def test_nested_scopes_count_statements(self, engine, capsys):
+        """
+        Escenario:
+            Scope "handler" con 1 statement propio que llama a un servicio perfilado con 3
+
+        Esperado:
+            - Servicio = 3 statements, handler = 4 (incluye al anidado) ✅
+            - Una línea DB_PROFILE por scope ✅
+        """
+        @QueryProfiler.profiled("service")
+        def service():
+            _run(engine, 3)
+
+        with QueryProfiler.track("handler") as scope:
+            _run(engine, 1)
+            service()
+
+        assert scope.statements == 4
+        scopes = {row["scope"]: row for row in QueryProfiler.get_report()["scopes"]}
+        assert (scopes["service"]["calls"], scopes["service"]["statements"]) == (1, 3)
+        assert scopes["handler"]["statements"] == 4
+        assert capsys.readouterr().out.count("📊 DB_PROFILE {") == 2
+
+    def test_async_generator_scope_excludes_work_between_yields(self, engine):
+        """
+        Escenario:
+            Handler async generador con 2 statements antes del yield y 1 después;
+            el consumidor ejecuta 5 statements entre pasos
+
+        Esperado:
+            - El scope del handler cuenta solo sus 3 statements ✅
+        """
+        @QueryProfiler.profiled("handler")
+        async def handler():
+            _run(engine, 2)
+            yield
+            _run(engine, 1)
+
+        async def consume():
+            async for _ in handler():
+                _run(engine, 5)
+
+        asyncio.run(consume())
+
+        scopes = {row["scope"]: row for row in QueryProfiler.get_report()["scopes"]}
+        assert scopes["handler"]["statements"] == 3
+
+    def test_slow_statements_are_fingerprinted(self, engine, monkeypatch):
+        """
+        Escenario:
+            Umbral de lentitud 0 ms; 3 SELECT con distintos literales
+
+        Esperado:
+            - Una sola huella con count = 3 y literales normalizados ✅
+            - Desactivado, nada se registra ✅
+        """
+        monkeypatch.setattr(QueryProfiler, "SLOW_QUERY_MS", 0.0)
+        _run(engine, 3)
+
+        slow = QueryProfiler.get_report()["slow_statements"]
+        assert [(row["fingerprint"], row["count"]) for row in slow] == [
+            ("SELECT name FROM items WHERE id = ?", 3)
+        ]
+        assert QueryProfiler.fingerprint("SELECT * FROM t WHERE id IN (?, ?, ?) AND name = 'x'") == \
+            "SELECT * FROM t WHERE id IN (?, ...) AND name = ?"
+
+        QueryProfiler.reset()
+        QueryProfiler.disable()
+        with QueryProfiler.track("disabled") as scope:
+            _run(engine, 2)
+
+        assert scope is None
+        assert QueryProfiler.get_report()["slow_statements"] == []
+        assert QueryProfiler.get_report()["scopes"] == []
+
+    def test_failed_statement_leaves_no_pending_start(self, engine):
+        """
+        Escenario:
+            Un statement falla (tabla inexistente) y luego se ejecuta uno válido
+
+        Esperado:
+            - La conexión no conserva el inicio del statement fallido ✅
+            - El scope cuenta solo el statement que terminó ✅
+        """
+        with QueryProfiler.track("handler") as scope:
+            with engine.connect() as connection:
+                with pytest.raises(OperationalError):
+                    connection.execute(text("SELECT * FROM missing_table"))
+                assert QueryProfiler._STARTED_KEY not in connection.info
+
+                connection.execute(text("SELECT name FROM items"))
+                assert QueryProfiler._STARTED_KEY not in connection.info
+
+        assert scope.statements == 1
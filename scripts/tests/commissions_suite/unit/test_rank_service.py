@@ -0,0 +1,112 @@
+"""
+Tests Unitarios - Recalculo masivo de rangos
+
+Objetivo: Validar que recalculate_ranks_bulk asigna el mismo rango que
+calculate_rank_from_cache usuario por usuario, registrando solo promociones.
+
+Reglas de Negocio:
+- PV personal < 1,465 → "Sin rango"
+- Rango = mayor umbral de PVG alcanzado
+- Solo se registra historial si el rango calculado es mayor al actual
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+
+from NNProtect_new_website.modules.network.backend.rank_service import RankService
+
+
+@pytest.fixture
+def regular_product(create_regular_product):
+    """Producto regular del módulo (PV=1,465: califica con una sola compra)."""
+    return create_regular_product(pv=1465)
+
+
+@pytest.mark.rank_system
+class TestRecalculateRanksBulk:
+    """
+    Suite de tests para RankService.recalculate_ranks_bulk.
+    """
+
+    def test_bulk_matches_per_user_calculation(self, db_session, ranks, assign_rank, create_test_user, test_period_open):
+        """
+        Escenario:
+            1000: PV 0 / PVG 500,000      (sin PV mínimo)
+            1001: PV 1,465 / PVG 1,465    (Visionario, umbral exacto)
+            1002: PV 2,000 / PVG 130,000  (Innovador)
+            1003: PV 2,000 / PVG 60,000, ya es Innovador (no baja)
+
+        Esperado:
+            - Promueve 1001 y 1002 (1000 sigue en "Sin rango") ✅
+            - Rangos iguales a calculate_rank_from_cache ✅
+        """
+        create_test_user(member_id=1000, pv_cache=0, pvg_cache=500000)
+        create_test_user(member_id=1001, pv_cache=1465, pvg_cache=1465)
+        create_test_user(member_id=1002, pv_cache=2000, pvg_cache=130000)
+        create_test_user(member_id=1003, pv_cache=2000, pvg_cache=60000)
+        assign_rank(1003, ranks["Innovador"].id)
+
+        promoted = RankService.recalculate_ranks_bulk(db_session, [1000, 1001, 1002, 1003])
+
+        assert sorted(promoted) == [1001, 1002]
+
+        current = RankService.get_current_ranks_bulk(db_session, [1000, 1001, 1002, 1003])
+        assert current == {
+            1000: ranks["Sin rango"].id,
+            1001: ranks["Visionario"].id,
+            1002: ranks["Innovador"].id,
+            1003: ranks["Innovador"].id,
+        }
+        for member_id in (1000, 1001, 1002):
+            assert current[member_id] == RankService.calculate_rank_from_cache(db_session, member_id)
+
+    def test_second_run_has_no_promotions(self, db_session, ranks, create_test_user, test_period_open):
+        """
+        Esperado:
+            - Re-ejecutar sin cambios de PVG no crea historial nuevo ✅
+        """
+        create_test_user(member_id=1000, pv_cache=1465, pvg_cache=25000)
+
+        assert RankService.recalculate_ranks_bulk(db_session) == [1000]
+        assert RankService.recalculate_ranks_bulk(db_session) == []
+
+
+@pytest.mark.rank_system
+class TestPVGRealTime:
+    """
+    Suite de tests para RankService.get_pvg / get_pvg_many.
+    """
+
+    def test_pvg_many_single_aggregate(
+        self,
+        db_session,
+        test_network_4_levels,
+        regular_product,
+        create_test_order,
+        test_period_current
+    ):
+        """
+        Escenario:
+            A → B → C → D, B y D compran 1 producto
+
+        Esperado:
+            - PVG(A) = PVG(B) = PV(B) + PV(D) ✅
+            - PVG(C) = PVG(D) = PV(D) ✅
+            - get_pvg coincide con get_pvg_many ✅
+        """
+        users = test_network_4_levels
+        order_b = create_test_order(member_id=users['B'].member_id, items=[(regular_product, 1)])
+        order_d = create_test_order(member_id=users['D'].member_id, items=[(regular_product, 1)])
+
+        member_ids = [user.member_id for user in users.values()]
+        pvg = RankService.get_pvg_many(db_session, member_ids, test_period_current.id)
+
+        group = order_b.total_pv + order_d.total_pv
+        assert pvg == {
+            users['A'].member_id: group,
+            users['B'].member_id: group,
+            users['C'].member_id: order_d.total_pv,
+            users['D'].member_id: order_d.total_pv,
+        }
+        assert RankService.get_pvg(db_session, users['A'].member_id, test_period_current.id) == group
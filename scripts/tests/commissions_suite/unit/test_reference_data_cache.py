@@ -0,0 +1,53 @@
+"""
+Tests Unitarios - Caché de datos de referencia
+
+Objetivo: Validar que rangos y período activo se sirven desde memoria,
+y que PeriodService invalida la caché al crear o finalizar períodos.
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+
+from NNProtect_new_website.modules.network.backend.reference_data_cache import ReferenceDataCache
+from NNProtect_new_website.modules.network.backend.period_service import PeriodService
+
+
+class TestReferenceDataCache:
+    """
+    Suite de tests para ReferenceDataCache.
+    """
+
+    def test_ranks_sorted_and_cached(self, db_session, ranks, no_query_session):
+        """
+        Esperado:
+            - Rangos ordenados por pvg_required ✅
+            - Segunda lectura sin consultar la BD ✅
+            - get_rank_for_pvg usa el umbral más alto cumplido ✅
+        """
+        cached = ReferenceDataCache.get_ranks(db_session)
+
+        assert [r.pvg_required for r in cached] == sorted(r.pvg_required for r in cached)
+        assert ReferenceDataCache.get_ranks(no_query_session) == cached
+
+        visionario = ranks["Visionario"]
+        assert ReferenceDataCache.get_rank_for_pvg(no_query_session, visionario.pvg_required) == visionario.id
+        assert ReferenceDataCache.get_rank_for_pvg(no_query_session, 0) is None
+
+    def test_current_period_cached_and_invalidated(self, db_session, test_period_open, no_query_session):
+        """
+        Esperado:
+            - Período activo servido desde memoria ✅
+            - finalize_period invalida la caché tras el commit (closed_at visible) ✅
+        """
+        period = ReferenceDataCache.get_current_period(db_session)
+        assert period.id == test_period_open.id
+        assert ReferenceDataCache.get_current_period(no_query_session) == period
+
+        assert PeriodService.finalize_period(db_session, test_period_open.id) is True
+        assert ReferenceDataCache.get_current_period(no_query_session) == period
+
+        db_session.commit()
+
+        assert ReferenceDataCache.get_current_period(db_session).closed_at is not None
+        assert PeriodService.get_current_period(db_session) is None
@@ -0,0 +1,150 @@
+"""
+Tests Unitarios - Rollup de inscripciones por (ancestro, día)
+
+Objetivo: Validar que add_member_to_tree / add_members_to_tree mantienen
+network_registration_counts de forma incremental, que rebuild produce la misma
+tabla y que get_counts resuelve hoy / período / histórico en una consulta.
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+import reflex as rx
+from contextlib import nullcontext
+from datetime import datetime, date, timezone
+from sqlmodel import select
+
+from database.users import Users
+from database.network_registration_counts import NetworkRegistrationCounts
+from NNProtect_new_website.modules.network.backend import mlm_user_manager
+from NNProtect_new_website.modules.network.backend.genealogy_service import GenealogyService
+from NNProtect_new_website.modules.network.backend.registration_counter_service import RegistrationCounterService
+
+
+def _counts(db_session) -> dict:
+    db_session.expire_all()
+    return {
+        (row.ancestor_id, row.registration_date): row.registrations
+        for row in db_session.exec(select(NetworkRegistrationCounts)).all()
+    }
+
+
+def _add_user(db_session, member_id: int, sponsor_id, created_at: datetime) -> None:
+    db_session.add(Users(
+        member_id=member_id,
+        sponsor_id=sponsor_id,
+        first_name=f"User_{member_id}",
+        last_name="Test",
+        country_cache="Mexico",
+        created_at=created_at
+    ))
+    db_session.flush()
+
+
+@pytest.mark.genealogy
+class TestRegistrationCounts:
+    """
+    Suite de tests para el rollup network_registration_counts.
+    """
+
+    def test_incremental_counts_match_rebuild(self, db_session):
+        """
+        Escenario:
+            3000 → 3001 (1 oct) → 3002 (1 oct), 3003 (2 oct) uno a uno;
+            3004 (2 oct) → 3005 (2 oct) en lote bajo 3001
+
+        Esperado:
+            - 3000 cuenta 2 el 1 oct y 3 el 2 oct; 3001: 1 y 3 ✅
+            - rebuild produce exactamente la misma tabla ✅
+        """
+        oct_1 = datetime(2025, 10, 1, 12, tzinfo=timezone.utc)
+        oct_2 = datetime(2025, 10, 2, 12, tzinfo=timezone.utc)
+
+        for member_id, sponsor_id, created_at in (
+            (3000, None, oct_1), (3001, 3000, oct_1), (3002, 3001, oct_1), (3003, 3001, oct_2)
+        ):
+            _add_user(db_session, member_id, sponsor_id, created_at)
+            GenealogyService.add_member_to_tree(db_session, member_id, sponsor_id)
+
+        _add_user(db_session, 3004, 3001, oct_2)
+        _add_user(db_session, 3005, 3004, oct_2)
+        GenealogyService.add_members_to_tree(db_session, [(3004, 3001), (3005, 3004)])
+
+        incremental = _counts(db_session)
+        assert incremental[(3000, date(2025, 10, 1))] == 2
+        assert incremental[(3000, date(2025, 10, 2))] == 3
+        assert incremental[(3001, date(2025, 10, 1))] == 1
+        assert incremental[(3001, date(2025, 10, 2))] == 3
+        assert incremental[(3004, date(2025, 10, 2))] == 1
+
+        written = RegistrationCounterService.rebuild(db_session)
+        rebuilt = _counts(db_session)
+
+        assert written == len(incremental)
+        assert rebuilt == incremental
+
+    def test_get_counts_sums_today_period_and_all(self, db_session):
+        """
+        Escenario:
+            Contadores de 3100: 30 sep = 4, 1 oct = 2, 15 oct = 5
+
+        Esperado:
+            - hoy (15 oct) = 5, período octubre = 7, histórico = 11 ✅
+            - sin período: mensual = 0 ✅
+        """
+        _add_user(db_session, 3100, None, datetime(2025, 9, 1, tzinfo=timezone.utc))
+        RegistrationCounterService.record_registrations(db_session, {
+            (3100, date(2025, 9, 30)): 4,
+            (3100, date(2025, 10, 1)): 2,
+            (3100, date(2025, 10, 15)): 5,
+        })
+
+        counts = RegistrationCounterService.get_counts(
+            db_session, 3100, today=date(2025, 10, 15),
+            period_start=date(2025, 10, 1), period_end=date(2025, 10, 31)
+        )
+        assert counts == {"today": 5, "monthly": 7, "all": 11}
+
+        counts = RegistrationCounterService.get_counts(db_session, 3100, today=date(2025, 10, 16))
+        assert counts == {"today": 0, "monthly": 0, "all": 11}
+
+    def test_record_registrations_upserts_existing_and_new_rows(self, db_session):
+        """
+        Escenario:
+            Dos incrementos seguidos sobre el mismo (ancestro, día) más uno nuevo
+
+        Esperado:
+            - El contador existente se suma (2 + 3) y el nuevo se crea ✅
+        """
+        _add_user(db_session, 3200, None, datetime(2025, 10, 1, tzinfo=timezone.utc))
+        RegistrationCounterService.record_registrations(db_session, {(3200, date(2025, 10, 1)): 2})
+        RegistrationCounterService.record_registrations(db_session, {
+            (3200, date(2025, 10, 1)): 3,
+            (3200, date(2025, 10, 2)): 1,
+        })
+
+        assert _counts(db_session) == {(3200, date(2025, 10, 1)): 5, (3200, date(2025, 10, 2)): 1}
+
+    def test_registration_counts_widget_counts_today(self, db_session, monkeypatch):
+        """
+        Escenario:
+            MLMUserManager.get_registration_counts (lo que usa el reporte de red) el 15 oct,
+            con 5 inscripciones ese día y 4 el 30 sep
+
+        Esperado:
+            - 'today' = 5 (la fecha de México se pasa como date, no como datetime) ✅
+            - 'all' = 9 ✅
+        """
+        _add_user(db_session, 3300, None, datetime(2025, 9, 1, tzinfo=timezone.utc))
+        RegistrationCounterService.record_registrations(db_session, {
+            (3300, date(2025, 9, 30)): 4,
+            (3300, date(2025, 10, 15)): 5,
+        })
+
+        monkeypatch.setattr(rx, "session", lambda *args, **kwargs: nullcontext(db_session))
+        monkeypatch.setattr(mlm_user_manager, "get_mexico_now", lambda: datetime(2025, 10, 15, 20, 30))
+
+        counts = mlm_user_manager.MLMUserManager.get_registration_counts(3300)
+
+        assert counts["today"] == 5
+        assert counts["all"] == 9
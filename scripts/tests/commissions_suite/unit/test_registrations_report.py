@@ -0,0 +1,118 @@
+"""
+Tests Unitarios - Reporte de inscripciones de la red
+
+Objetivo: Validar que MLMUserManager._query_registrations_page sirve el reporte
+desde UserTreePath con perfil y sponsor unidos, paginación keyset (nivel, member_id),
+filtro de fechas y conteo en servidor, y que los niveles se leen de la closure table.
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from datetime import datetime, date
+
+from database.userprofiles import UserProfiles, UserGender
+from NNProtect_new_website.modules.network.backend.mlm_user_manager import MLMUserManager
+
+
+@pytest.fixture
+def wide_network(db_session, create_test_user):
+    """
+    Red: A → B, C, D (nivel 1); B → E, F (nivel 2); E → G (nivel 3).
+    A y B con teléfono en su perfil; E y F registrados en septiembre.
+    """
+    users = {'A': create_test_user(member_id=2000)}
+    for name, member_id, sponsor in (
+        ('B', 2001, 2000), ('C', 2002, 2000), ('D', 2003, 2000),
+        ('E', 2004, 2001), ('F', 2005, 2001), ('G', 2006, 2004),
+    ):
+        users[name] = create_test_user(member_id=member_id, sponsor_id=sponsor)
+
+    for name in ('A', 'B'):
+        db_session.add(UserProfiles(
+            user_id=users[name].id,
+            gender=UserGender.FEMALE,
+            phone_number=f"55-{users[name].member_id}"
+        ))
+
+    for name, created_at in (('E', datetime(2025, 9, 10)), ('F', datetime(2025, 9, 30, 23, 59))):
+        users[name].created_at = created_at
+        db_session.add(users[name])
+    db_session.flush()
+    return users
+
+
+class TestRegistrationsReport:
+    """
+    Suite de tests para el reporte paginado de inscripciones.
+    """
+
+    def test_pages_follow_level_then_member_id(self, db_session, wide_network):
+        """
+        Escenario:
+            6 descendientes de A, páginas de 4
+
+        Esperado:
+            - Páginas de 4 y 2 en orden (nivel, member_id) ✅
+            - total = 6 en ambas páginas ✅
+        """
+        first = MLMUserManager._query_registrations_page(db_session, 2000, limit=4)
+        second = MLMUserManager._query_registrations_page(db_session, 2000, limit=4, cursor=first["next_cursor"])
+
+        assert first["total"] == second["total"] == 6
+        assert second["next_cursor"] is None
+        assert [(row["level"], row["member_id"]) for row in first["registrations"] + second["registrations"]] == [
+            (1, 2001), (1, 2002), (1, 2003), (2, 2004), (2, 2005), (3, 2006)
+        ]
+
+    def test_profile_and_sponsor_are_joined(self, db_session, wide_network):
+        """
+        Escenario:
+            E fue patrocinado por B (con teléfono); B por A (con teléfono)
+
+        Esperado:
+            - Teléfono propio vacío si no hay perfil ✅
+            - Nombre, ID y teléfono del sponsor en la misma fila ✅
+        """
+        rows = {
+            row["member_id"]: row
+            for row in MLMUserManager._query_registrations_page(db_session, 2000)["registrations"]
+        }
+
+        assert rows[2001]["phone"] == "55-2001"
+        assert rows[2001]["sponsor_phone"] == "55-2000"
+        assert rows[2004]["phone"] == ""
+        assert rows[2004]["sponsor_member_id"] == 2001
+        assert rows[2004]["sponsor_full_name"] == "User_2001 Test"
+        assert rows[2004]["sponsor_phone"] == "55-2001"
+
+    def test_date_range_is_inclusive_and_counted_in_sql(self, db_session, wide_network):
+        """
+        Escenario:
+            Filtro septiembre 2025 (E el día 10, F el 30 a las 23:59)
+
+        Esperado:
+            - Solo E y F, total = 2 ✅
+        """
+        page = MLMUserManager._query_registrations_page(
+            db_session, 2000, limit=10, start_date=date(2025, 9, 1), end_date=date(2025, 9, 30)
+        )
+
+        assert page["total"] == 2
+        assert [row["member_id"] for row in page["registrations"]] == [2004, 2005]
+        assert page["registrations"][0]["created_at"] == "10/09/2025"
+
+    def test_user_levels_come_from_closure_rows(self, db_session, wide_network):
+        """
+        Escenario:
+            Niveles de B, E, G, A (raíz) y un member_id fuera de la red respecto a A y a B
+
+        Esperado:
+            - Nivel = depth de la fila (A, X) ✅
+            - Raíz y usuarios fuera de la red = 0 ✅
+        """
+        assert MLMUserManager._query_user_levels(db_session, [2001, 2004, 2006, 2000, 9999], 2000) == {
+            2001: 1, 2004: 2, 2006: 3, 2000: 0, 9999: 0
+        }
+        assert MLMUserManager._query_user_levels(db_session, [2006, 2002], 2001) == {2006: 2, 2002: 0}
+        assert MLMUserManager._query_user_levels(db_session, [], 2000) == {}
@@ -0,0 +1,115 @@
+"""
+Tests Unitarios - Acreditación en lote de puntos NN Travel
+
+Objetivo: Validar que TravelPointsService acredita la línea ascendente de un comprador
+con un upsert único sobre NNTravelPoints (crea o suma, recalcula total y calificación)
+y un insert masivo del historial, y que las APIs por miembro delegan en el mismo núcleo.
+
+Reglas de Negocio:
+- full_protect = 4 pts por kit (x2 con promo activa)
+- Califica al viaje con total_points >= target_points de la campaña
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from datetime import datetime, timezone, timedelta
+from sqlmodel import select
+
+from database.travel_campaigns import TravelCampaigns, NNTravelPoints, NNTravelPointsHistory, TravelEventType
+from NNProtect_new_website.modules.network.backend.travel_points_service import TravelPointsService
+
+
+@pytest.fixture
+def campaign(db_session, test_period_current):
+    """
+    Campaña activa con meta de 10 puntos y sin promo.
+    """
+    now = datetime.now(timezone.utc)
+    campaign = TravelCampaigns(
+        name="Campaña Test",
+        start_date=now - timedelta(days=30),
+        end_date=now + timedelta(days=150),
+        target_points=10,
+        period_id=test_period_current.id
+    )
+    db_session.add(campaign)
+    db_session.flush()
+    return campaign
+
+
+def _points(db_session) -> dict:
+    db_session.expire_all()
+    return {row.member_id: row for row in db_session.exec(select(NNTravelPoints)).all()}
+
+
+class TestTravelPointsBatch:
+    """
+    Suite de tests para la acreditación en lote de puntos NN Travel.
+    """
+
+    def test_upline_accrual_creates_and_increments_rows(self, db_session, test_network_4_levels, campaign):
+        """
+        Escenario:
+            A ya tiene 6 pts de kits; D (red A → B → C → D) compra un full_protect
+
+        Esperado:
+            - A, B y C reciben 4 pts; D no ✅
+            - A suma a su fila existente (10) y califica; B y C se crean con 4 ✅
+            - Un historial KIT_PURCHASE por ancestro con la orden y el comprador ✅
+        """
+        users = test_network_4_levels
+        existing = NNTravelPoints(
+            member_id=users['A'].member_id, campaign_id=campaign.id, points_from_kits=6, total_points=6
+        )
+        db_session.add(existing)
+        db_session.flush()
+
+        credited = TravelPointsService.add_points_from_kit_to_upline(
+            db_session, users['D'].member_id, "full_protect", order_id=77
+        )
+
+        assert credited == 3
+        points = _points(db_session)
+        assert set(points) == {users[name].member_id for name in ('A', 'B', 'C')}
+        assert (points[users['A'].member_id].points_from_kits, points[users['A'].member_id].total_points) == (10, 10)
+        assert points[users['A'].member_id].qualifies_for_travel is True
+        assert points[users['B'].member_id].total_points == 4
+        assert points[users['B'].member_id].qualifies_for_travel is False
+
+        history = db_session.exec(select(NNTravelPointsHistory)).all()
+        assert sorted(row.member_id for row in history) == sorted(points)
+        assert all(
+            (row.event_type, row.points_earned, row.source_order_id, row.source_member_id) ==
+            (TravelEventType.KIT_PURCHASE.value, 4, 77, users['D'].member_id)
+            for row in history
+        )
+
+    def test_single_member_apis_share_the_batch_core(self, db_session, test_network_simple, campaign):
+        """
+        Escenario:
+            Promo activa; A gana kit, rango propio y rango de su directo B
+
+        Esperado:
+            - Cada fuente en su columna y total = suma ✅
+            - Kit o rango desconocido → False sin escribir ✅
+        """
+        campaign.is_promo_active = True
+        db_session.add(campaign)
+        db_session.flush()
+        member_id = test_network_simple['A'].member_id
+
+        assert TravelPointsService.add_points_from_kit(db_session, member_id, "full_protect", 1, 2) is True
+        assert TravelPointsService.add_points_from_rank(db_session, member_id, "Visionario") is True
+        assert TravelPointsService.add_points_from_direct_rank(
+            db_session, member_id, test_network_simple['B'].member_id, "Visionario"
+        ) is True
+        assert TravelPointsService.add_points_from_kit(db_session, member_id, "desconocido", 1, 2) is False
+        assert TravelPointsService.add_points_from_rank(db_session, member_id, "Desconocido") is False
+
+        rank_points = TravelPointsService.RANK_POINTS["Visionario"]["promo"]
+        record = _points(db_session)[member_id]
+        assert (record.points_from_kits, record.points_from_self_ranks, record.points_from_direct_ranks) == \
+            (8, rank_points, rank_points)
+        assert record.total_points == 8 + 2 * rank_points
+        assert len(db_session.exec(select(NNTravelPointsHistory)).all()) == 3
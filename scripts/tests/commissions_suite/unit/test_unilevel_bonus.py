@@ -0,0 +1,158 @@
+"""
+Tests Unitarios - Bono Uninivel (Unilevel Bonus) en modo masivo
+
+Objetivo: Validar que calculate_unilevel_for_period genera las mismas comisiones
+que calculate_unilevel_bonus miembro por miembro, pero en una sola pasada.
+
+Reglas de Negocio:
+- Solo productos regulares (NO kits) generan VN para Uninivel
+- Porcentajes según rango actual del miembro
+- Re-ejecutar el cálculo del período no duplica comisiones
+- active_only omite a los miembros suspendidos
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from sqlmodel import select
+
+from database.comissions import Commissions, BonusType
+from database.users import UserStatus
+from NNProtect_new_website.modules.network.backend.commission_service import CommissionService
+
+
+def _commission_set(db_session, commission_ids) -> set:
+    return {
+        (c.member_id, c.level_depth, round(c.amount_converted, 2), c.status)
+        for c in db_session.exec(
+            select(Commissions).where(Commissions.id.in_(commission_ids))
+        ).all()
+    }
+
+
+@pytest.mark.unilevel_bonus
+class TestUnilevelForPeriod:
+    """
+    Suite de tests para el cálculo masivo del Bono Uninivel.
+    """
+
+    def test_batch_matches_per_member_calculation(
+        self,
+        db_session,
+        ranks,
+        assign_rank,
+        test_network_4_levels,
+        regular_product,
+        create_test_order,
+        test_period_current
+    ):
+        """
+        Escenario:
+            A (Creativo) → B (Visionario) → C → D
+            C y D compran 1 producto (VN=1,000)
+
+        Esperado:
+            - calculate_unilevel_bonus miembro por miembro y calculate_unilevel_for_period
+              generan el mismo conjunto de comisiones ✅
+            - A: nivel 2 (8%) + nivel 3 (10%); B: nivel 1 (5%) + nivel 2 (8%) ✅
+        """
+        users = test_network_4_levels
+        assign_rank(users['A'].member_id, ranks["Creativo"].id)
+        assign_rank(users['B'].member_id, ranks["Visionario"].id)
+
+        create_test_order(member_id=users['C'].member_id, items=[(regular_product, 1)])
+        create_test_order(member_id=users['D'].member_id, items=[(regular_product, 1)])
+
+        # Ruta miembro por miembro dentro de un savepoint que luego se descarta
+        per_member_run = db_session.begin_nested()
+        per_member_ids = [
+            commission_id
+            for user in users.values()
+            for commission_id in CommissionService.calculate_unilevel_bonus(
+                db_session, user.member_id, test_period_current.id
+            )
+        ]
+        per_member = _commission_set(db_session, per_member_ids)
+        per_member_run.rollback()
+
+        commission_ids = CommissionService.calculate_unilevel_for_period(
+            db_session, test_period_current.id
+        )
+        batch = _commission_set(db_session, commission_ids)
+
+        assert batch == per_member
+        assert {(member_id, level): amount for member_id, level, amount, _ in batch} == {
+            (users['A'].member_id, 2): pytest.approx(80.0),
+            (users['A'].member_id, 3): pytest.approx(100.0),
+            (users['B'].member_id, 1): pytest.approx(50.0),
+            (users['B'].member_id, 2): pytest.approx(80.0),
+        }
+
+    def test_active_only_skips_suspended_members(
+        self,
+        db_session,
+        ranks,
+        assign_rank,
+        test_network_4_levels,
+        regular_product,
+        create_test_order,
+        test_period_current
+    ):
+        """
+        Escenario:
+            A (Creativo) → B (Visionario, suspendido) → C → D, D compra 1 producto
+
+        Esperado:
+            - active_only=True: solo A cobra (nivel 3) ✅
+        """
+        users = test_network_4_levels
+        assign_rank(users['A'].member_id, ranks["Creativo"].id)
+        assign_rank(users['B'].member_id, ranks["Visionario"].id)
+        users['B'].status = UserStatus.SUSPENDED
+        db_session.add(users['B'])
+        db_session.flush()
+
+        create_test_order(member_id=users['D'].member_id, items=[(regular_product, 1)])
+
+        commission_ids = CommissionService.calculate_unilevel_for_period(
+            db_session, test_period_current.id, active_only=True
+        )
+
+        assert {(member_id, level) for member_id, level, _, _ in _commission_set(db_session, commission_ids)} == {
+            (users['A'].member_id, 3)
+        }
+
+    def test_batch_is_idempotent(
+        self,
+        db_session,
+        ranks,
+        assign_rank,
+        test_network_simple,
+        regular_product,
+        create_test_order,
+        test_period_current
+    ):
+        """
+        Escenario:
+            A (Visionario) → B → C, C compra 1 producto
+
+        Esperado:
+            - Segunda ejecución no crea comisiones nuevas ✅
+        """
+        users = test_network_simple
+        assign_rank(users['A'].member_id, ranks["Visionario"].id)
+        create_test_order(member_id=users['C'].member_id, items=[(regular_product, 1)])
+
+        first_run = CommissionService.calculate_unilevel_for_period(db_session, test_period_current.id)
+        second_run = CommissionService.calculate_unilevel_for_period(db_session, test_period_current.id)
+
+        assert len(first_run) == 1
+        assert second_run == []
+
+        total = db_session.exec(
+            select(Commissions).where(
+                (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value) &
+                (Commissions.period_id == test_period_current.id)
+            )
+        ).all()
+        assert len(total) == 1
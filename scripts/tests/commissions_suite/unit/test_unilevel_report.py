@@ -0,0 +1,203 @@
+"""
+Tests Unitarios - unilevel_report incremental
+
+Objetivo: Validar que update_unilevel_report_for_order suma el delta de cada orden
+en la columna de nivel de cada ancestro, y que rebuild_unilevel_reports reconstruye
+exactamente la misma tabla desde las órdenes pagadas. También que los volúmenes por
+período se leen en una query IN y se sirven de caché hasta que una orden toca el reporte.
+
+Reglas de Negocio:
+- El comprador acumula PV/VN personal (pv/vn)
+- Cada ancestro acumula en pvg_N/vng_N según profundidad y en sus totales
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from database.unilevel_report import UnilevelReports
+from NNProtect_new_website.modules.network.backend.mlm_user_manager import MLMUserManager
+
+
+REPORT_COLUMNS = ["pv", "vn", "pvg_1", "vng_1", "pvg_2", "vng_2", "pvg_3", "vng_3", "pvg_total", "vng_total"]
+
+
+@pytest.fixture
+def regular_product(create_regular_product):
+    """Producto regular del módulo (PV=500, VN=1,000)."""
+    return create_regular_product(pv=500)
+
+
+def _reports(db_session, period_id: int) -> dict:
+    db_session.expire_all()
+    return {
+        report.user_id: {column: getattr(report, column) for column in REPORT_COLUMNS}
+        for report in db_session.exec(
+            select(UnilevelReports).where(UnilevelReports.period_id == period_id)
+        ).all()
+    }
+
+
+@pytest.mark.unilevel_bonus
+class TestUnilevelReportIncremental:
+    """
+    Suite de tests para el mantenimiento incremental de unilevel_report.
+    """
+
+    def test_order_delta_goes_to_each_ancestor_level(
+        self,
+        db_session,
+        test_network_4_levels,
+        regular_product,
+        create_test_order,
+        test_period_current
+    ):
+        """
+        Escenario:
+            A → B → C → D, D compra 2 veces 1 producto (PV=500, VN=1,000)
+
+        Esperado:
+            - D: pv=1,000 / vn=2,000 ✅
+            - C nivel 1, B nivel 2, A nivel 3 con pvg=1,000 y totales ✅
+        """
+        users = test_network_4_levels
+        period_id = test_period_current.id
+
+        for _ in range(2):
+            order = create_test_order(member_id=users['D'].member_id, items=[(regular_product, 1)])
+            updated = MLMUserManager.update_unilevel_report_for_order(
+                db_session, order.member_id, period_id, order.total_pv, order.total_vn
+            )
+            assert updated == 4
+
+        reports = _reports(db_session, period_id)
+
+        assert reports[users['D'].id]["pv"] == 1000
+        assert reports[users['D'].id]["vn"] == pytest.approx(2000.0)
+        assert reports[users['D'].id]["pvg_total"] == 0
+        for name, level in (('C', 1), ('B', 2), ('A', 3)):
+            report = reports[users[name].id]
+            assert report["pv"] == 0
+            assert report[f"pvg_{level}"] == 1000
+            assert report[f"vng_{level}"] == pytest.approx(2000.0)
+            assert report["pvg_total"] == 1000
+            assert report["vng_total"] == pytest.approx(2000.0)
+
+    def test_rebuild_matches_incremental(
+        self,
+        db_session,
+        test_network_4_levels,
+        regular_product,
+        create_test_order,
+        test_period_current
+    ):
+        """
+        Escenario:
+            B y D compran; reportes incrementales vs reconstrucción completa
+
+        Esperado:
+            - rebuild_unilevel_reports produce los mismos valores ✅
+        """
+        users = test_network_4_levels
+        period_id = test_period_current.id
+
+        for buyer in ('B', 'D'):
+            order = create_test_order(member_id=users[buyer].member_id, items=[(regular_product, 1)])
+            MLMUserManager.update_unilevel_report_for_order(
+                db_session, order.member_id, period_id, order.total_pv, order.total_vn
+            )
+
+        incremental = _reports(db_session, period_id)
+        written = MLMUserManager.rebuild_unilevel_reports(db_session, period_id)
+
+        assert written == 4
+        assert _reports(db_session, period_id) == incremental
+
+    def test_period_volumes_batch_and_cache_invalidation(
+        self,
+        db_session,
+        test_network_4_levels,
+        regular_product,
+        create_test_order,
+        test_period_current,
+        test_period_closed,
+        no_query_session
+    ):
+        """
+        Escenario:
+            D compra en octubre; se leen volúmenes de A para octubre y septiembre,
+            luego D vuelve a comprar
+
+        Esperado:
+            - Una lectura devuelve ambos períodos (septiembre en 0) ✅
+            - La segunda lectura sale de caché (sin queries) ✅
+            - La nueva orden invalida la caché de A al hacer commit y se ve el nuevo volumen ✅
+        """
+        users = test_network_4_levels
+        member_a = users['A'].member_id
+        period_ids = [test_period_current.id, test_period_closed.id]
+
+        def _buy():
+            order = create_test_order(member_id=users['D'].member_id, items=[(regular_product, 1)])
+            MLMUserManager.update_unilevel_report_for_order(
+                db_session, order.member_id, test_period_current.id, order.total_pv, order.total_vn
+            )
+
+        _buy()
+        volumes = MLMUserManager._get_period_reports(db_session, member_a, period_ids)
+        assert volumes[test_period_current.id]["pvg_3"] == 500
+        assert volumes[test_period_closed.id] == dict.fromkeys(MLMUserManager._volume_columns(), 0)
+
+        assert MLMUserManager._get_period_reports(no_query_session, member_a, period_ids) == volumes
+
+        _buy()
+        assert MLMUserManager._get_period_reports(no_query_session, member_a, period_ids) == volumes
+
+        db_session.commit()
+        volumes = MLMUserManager._get_period_reports(db_session, member_a, period_ids)
+        assert volumes[test_period_current.id]["pvg_3"] == 1000
+
+    def test_repeated_orders_upsert_single_row(
+        self,
+        db_session,
+        test_network_4_levels,
+        regular_product,
+        create_test_order,
+        test_period_current
+    ):
+        """
+        Escenario:
+            D compra dos veces con el reporte de C ya cargado en la sesión
+
+        Esperado:
+            - Una sola fila por (usuario, período) con el volumen acumulado ✅
+            - La instancia cargada en la sesión ve el valor actualizado ✅
+            - La BD rechaza una fila duplicada (uq_unilevel_report_user_period) ✅
+        """
+        users = test_network_4_levels
+        period_id = test_period_current.id
+
+        def _buy():
+            order = create_test_order(member_id=users['D'].member_id, items=[(regular_product, 1)])
+            MLMUserManager.update_unilevel_report_for_order(
+                db_session, order.member_id, period_id, order.total_pv, order.total_vn
+            )
+
+        _buy()
+        report_c = db_session.exec(
+            select(UnilevelReports)
+            .where((UnilevelReports.user_id == users['C'].id) & (UnilevelReports.period_id == period_id))
+        ).one()
+        _buy()
+
+        assert report_c.pvg_1 == 1000
+        rows = db_session.exec(
+            select(UnilevelReports.user_id).where(UnilevelReports.period_id == period_id)
+        ).all()
+        assert sorted(rows) == sorted(users[name].id for name in ('A', 'B', 'C', 'D'))
+
+        with pytest.raises(IntegrityError):
+            with db_session.begin_nested():
+                db_session.add(UnilevelReports(user_id=users['C'].id, period_id=period_id))
@@ -0,0 +1,137 @@
+"""
+Tests Unitarios - Pago masivo de comisiones a wallets
+
+Objetivo: Validar que deposit_commissions_bulk deposita todas las comisiones
+PENDING del período con una sola pasada de bloqueo por wallet.
+
+Reglas de Negocio:
+- Una WalletTransactions por comisión, con saldo corrido (balance_before/after)
+- Comisiones depositadas → PAID
+- Wallets inexistentes o no ACTIVE → comisiones siguen PENDING
+
+Fecha: Octubre 2025
+"""
+
+import pytest
+from sqlmodel import select
+
+from database.comissions import Commissions, BonusType, CommissionStatus
+from database.wallet import Wallets, WalletTransactions, WalletStatus
+from NNProtect_new_website.modules.finance.backend.wallet_service import WalletService
+
+
+def _add_commission(db_session, member_id: int, period_id: int, amount: float) -> Commissions:
+    commission = Commissions(
+        member_id=member_id,
+        bonus_type=BonusType.BONO_UNINIVEL.value,
+        period_id=period_id,
+        level_depth=1,
+        amount_vn=amount,
+        currency_origin="MXN",
+        amount_converted=amount,
+        currency_destination="MXN"
+    )
+    db_session.add(commission)
+    db_session.flush()
+    return commission
+
+
+@pytest.mark.wallet
+class TestDepositCommissionsBulk:
+    """
+    Suite de tests para WalletService.deposit_commissions_bulk.
+    """
+
+    def test_bulk_payout(self, db_session, create_test_user, test_period_current):
+        """
+        Escenario:
+            1000: wallet activa, 3 comisiones (100, 50, 25)
+            1001: wallet suspendida, 1 comisión (80)
+            1002: sin wallet, 1 comisión (10)
+
+        Esperado:
+            - Balance 1000 = 175 y 3 transacciones con saldo corrido ✅
+            - 3 PAID, 2 siguen PENDING ✅
+        """
+        for member_id in (1000, 1001, 1002):
+            create_test_user(member_id=member_id)
+        WalletService.create_wallet(db_session, 1000, "MXN")
+        WalletService.create_wallet(db_session, 1001, "MXN")
+        suspended = db_session.exec(select(Wallets).where(Wallets.member_id == 1001)).one()
+        suspended.status = WalletStatus.SUSPENDED.value
+        db_session.flush()
+
+        period_id = test_period_current.id
+        for amount in (100.0, 50.0, 25.0):
+            _add_commission(db_session, 1000, period_id, amount)
+        _add_commission(db_session, 1001, period_id, 80.0)
+        _add_commission(db_session, 1002, period_id, 10.0)
+
+        summary = WalletService.deposit_commissions_bulk(db_session, period_id)
+
+        assert summary == {"deposited_count": 3, "deposited_total": 175.0, "failed_count": 2, "members": 1}
+        assert WalletService.get_wallet_balance(db_session, 1000) == pytest.approx(175.0)
+
+        transactions = db_session.exec(
+            select(WalletTransactions).where(WalletTransactions.member_id == 1000).order_by(WalletTransactions.id)
+        ).all()
+        assert [(t.balance_before, t.balance_after) for t in transactions] == [
+            (0.0, 100.0), (100.0, 150.0), (150.0, 175.0)
+        ]
+
+        statuses = db_session.exec(select(Commissions.member_id, Commissions.status)).all()
+        assert sorted(statuses) == [
+            (1000, CommissionStatus.PAID.value),
+            (1000, CommissionStatus.PAID.value),
+            (1000, CommissionStatus.PAID.value),
+            (1001, CommissionStatus.PENDING.value),
+            (1002, CommissionStatus.PENDING.value),
+        ]
+
+    def test_second_run_pays_nothing(self, db_session, create_test_user, test_period_current):
+        """
+        Esperado:
+            - Re-ejecutar no duplica depósitos ✅
+        """
+        create_test_user(member_id=1000)
+        WalletService.create_wallet(db_session, 1000, "MXN")
+        _add_commission(db_session, 1000, test_period_current.id, 100.0)
+
+        WalletService.deposit_commissions_bulk(db_session, test_period_current.id)
+        second = WalletService.deposit_commissions_bulk(db_session, test_period_current.id)
+
+        assert second["deposited_count"] == 0
+        assert WalletService.get_wallet_balance(db_session, 1000) == pytest.approx(100.0)
+
+    def test_overlapping_run_cannot_claim_same_commissions(
+        self, db_session, create_test_user, test_period_current, monkeypatch
+    ):
+        """
+        Escenario:
+            Un segundo cierre arranca mientras el primero ya reclamó sus comisiones
+            (antes de bloquear wallets y depositar)
+
+        Esperado:
+            - El segundo cierre no reclama nada ✅
+            - Un solo depósito por comisión y balance sin duplicar ✅
+        """
+        create_test_user(member_id=1000)
+        WalletService.create_wallet(db_session, 1000, "MXN")
+        _add_commission(db_session, 1000, test_period_current.id, 100.0)
+
+        original_lock = WalletService._lock_wallets.__func__
+        overlapping = []
+
+        def lock_after_overlapping_run(cls, session, member_ids):
+            if not overlapping:
+                overlapping.append(WalletService.deposit_commissions_bulk(session, test_period_current.id))
+            return original_lock(cls, session, member_ids)
+
+        monkeypatch.setattr(WalletService, "_lock_wallets", classmethod(lock_after_overlapping_run))
+
+        first = WalletService.deposit_commissions_bulk(db_session, test_period_current.id)
+
+        assert first["deposited_count"] == 1
+        assert overlapping[0]["deposited_count"] == 0
+        assert WalletService.get_wallet_balance(db_session, 1000) == pytest.approx(100.0)
+        assert len(db_session.exec(select(WalletTransactions)).all()) == 1
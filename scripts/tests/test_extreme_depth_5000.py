@@ -28,7 +28,8 @@ from database.comissions import Commissions, BonusType
 from database.periods import Periods
 from database.ranks import Ranks
 from database.user_rank_history import UserRankHistory
-from NNProtect_new_website.payment_service.payment_service import PaymentService
+from NNProtect_new_website.modules.network.backend.genealogy_service import GenealogyService
+from NNProtect_new_website.modules.store.backend.payment_service import PaymentService
 
 
 def create_linear_network(session, period_id: int, depth: int = 5000):
@@ -103,37 +104,8 @@ def create_linear_network(session, period_id: int, depth: int = 5000):
             session.add(user)
             session.flush()
             
-            # Crear paths en UserTreePath
-            if sponsor_id is not None:
-                # Self-reference
-                self_path = UserTreePath(
-                    ancestor_id=member_id,
-                    descendant_id=member_id,
-                    depth=0
-                )
-                session.add(self_path)
-                
-                # Copiar todos los ancestros del sponsor + agregar el sponsor
-                ancestor_paths = session.exec(
-                    sqlmodel.select(UserTreePath)
-                    .where(UserTreePath.descendant_id == sponsor_id)
-                ).all()
-                
-                for ancestor_path in ancestor_paths:
-                    new_path = UserTreePath(
-                        ancestor_id=ancestor_path.ancestor_id,
-                        descendant_id=member_id,
-                        depth=ancestor_path.depth + 1
-                    )
-                    session.add(new_path)
-            else:
-                # Usuario raíz (member_id=1)
-                self_path = UserTreePath(
-                    ancestor_id=member_id,
-                    descendant_id=member_id,
-                    depth=0
-                )
-                session.add(self_path)
+            # Crear paths en UserTreePath (INSERT ... SELECT, un statement por usuario)
+            GenealogyService.add_member_to_tree(session, member_id, sponsor_id)
             
             # Asignar rango Visionario
             rank_history = UserRankHistory(